@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+⏱️ BENCHMARKS DE LAS SOLUCIONES
+===============================
+
+Punto de entrada único de los benchmarks de ``solutions/``. Trabajan sobre los
+HTML de ejemplo de la carpeta data/ o sobre catálogos sintéticos generados a
+partir de ellos en un directorio temporal.
+
+Uso:
+    python benchmarks/run.py backends      # páginas/s y µs/registro por backend
+    python benchmarks/run.py streaming     # pico de RSS por tamaño
+    python benchmarks/run.py exportadores  # registros/s y memoria
+"""
+
+import argparse
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from itertools import cycle, islice
+from typing import Any, Dict, Iterable
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'solutions'))
+
+from especificaciones import (
+    BACKENDS, LXML_DISPONIBLE, ESPEC_LIBROS, ESPEC_PRODUCTOS, ESPEC_NOTICIAS,
+    extraer, extraer_de_arbol, extraer_stream, parsear
+)
+from exportadores import ZSTD_DISPONIBLE, exportar_csv, exportar_jsonl
+
+RUTA_DATOS = os.path.join(os.path.dirname(__file__), '..', '..', 'data')
+
+# Especificación de cada HTML de ejemplo de la carpeta data/
+ESPECIFICACIONES_DATOS = {
+    'books_catalog.html': ESPEC_LIBROS,
+    'ecommerce_products.html': ESPEC_PRODUCTOS,
+    'news_portal.html': ESPEC_NOTICIAS,
+}
+
+# Columnas fijas del CSV de libros
+CAMPOS_LIBROS = ESPEC_LIBROS.nombres
+
+
+def cargar_html(ruta_archivo: str) -> str:
+    """
+    Carga el contenido HTML desde un archivo local.
+    """
+    with open(ruta_archivo, 'r', encoding='utf-8') as file:
+        return file.read()
+
+
+def benchmark_backends(args):
+    """
+    Mide páginas por segundo de cada backend (parseo + extracción) y el tiempo
+    de extracción por registro sobre un árbol ya parseado.
+    """
+    print("\n⏱️ BENCHMARK DE BACKENDS")
+    print("-"*50)
+    
+    disponibles = BACKENDS if LXML_DISPONIBLE else ('html.parser',)
+    
+    for nombre, espec in ESPECIFICACIONES_DATOS.items():
+        html = cargar_html(os.path.join(RUTA_DATOS, nombre))
+        print(f"\n📄 {nombre}")
+        for backend in disponibles:
+            inicio = time.perf_counter()
+            for _ in range(args.repeticiones):
+                extraer(html, espec, backend=backend)
+            paginas_s = args.repeticiones / (time.perf_counter() - inicio)
+            
+            arbol, raiz = parsear(html, backend)
+            registros = 0
+            inicio = time.perf_counter()
+            for _ in range(args.repeticiones):
+                registros += len(extraer_de_arbol(arbol, raiz, espec))
+            por_registro = (time.perf_counter() - inicio) / max(registros, 1) * 1e6
+            print(f"   {backend:12s} {paginas_s:8.1f} páginas/s   {por_registro:6.1f} µs/registro")
+
+
+def generar_catalogo_grande(ruta_destino: str, num_libros: int):
+    """
+    Genera un catálogo sintético repitiendo los libros de books_catalog.html.
+    """
+    html = cargar_html(os.path.join(RUTA_DATOS, 'books_catalog.html'))
+    articulos = re.findall(r'<article class="book-item.*?</article>', html, re.S)
+    with open(ruta_destino, 'w', encoding='utf-8') as destino:
+        destino.write('<!DOCTYPE html>\n<html><body><main class="catalog">\n')
+        for i in range(num_libros):
+            destino.write(articulos[i % len(articulos)])
+            destino.write('\n')
+        destino.write('</main></body></html>\n')
+
+
+def medir_rss(modo: str, ruta: str):
+    """
+    Extrae los libros de ``ruta`` e imprime "registros pico_rss_kb".
+    
+    Se ejecuta en un subproceso desde ``benchmark_streaming`` para que cada
+    medida empiece con el pico de memoria a cero.
+    """
+    import resource
+    
+    if modo == 'stream':
+        registros = sum(1 for _ in extraer_stream(ruta, ESPEC_LIBROS))
+    else:
+        registros = len(extraer(cargar_html(ruta), ESPEC_LIBROS))
+    print(registros, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+
+
+def benchmark_streaming(args):
+    """
+    Compara el pico de memoria (RSS) de la extracción completa y en streaming
+    sobre catálogos sintéticos cada vez más grandes.
+    """
+    print("\n🌊 BENCHMARK DE STREAMING")
+    print("-"*50)
+    
+    with tempfile.TemporaryDirectory() as directorio:
+        for num_libros in args.tamanos:
+            ruta = os.path.join(directorio, f'catalogo_{num_libros}.html')
+            generar_catalogo_grande(ruta, num_libros)
+            tamano_mb = os.path.getsize(ruta) / 1024 / 1024
+            print(f"\n📄 {num_libros} libros ({tamano_mb:.1f} MB)")
+            for modo in ('completo', 'stream'):
+                inicio = time.perf_counter()
+                salida = subprocess.run(
+                    [sys.executable, __file__, '--medir-rss', modo, ruta],
+                    capture_output=True, text=True, check=True
+                ).stdout.split()
+                duracion = time.perf_counter() - inicio
+                registros, pico_kb = int(salida[0]), int(salida[1])
+                print(f"   {modo:9s} {registros:7d} libros   pico RSS {pico_kb / 1024:7.1f} MB   {duracion:6.2f} s")
+
+
+def medir_exportacion(exportar, registros: Iterable[Dict], *args, **kwargs) -> Dict[str, Any]:
+    """
+    Ejecuta una exportación y devuelve registros, segundos y registros/s.
+    """
+    inicio = time.perf_counter()
+    total = exportar(registros, *args, **kwargs)
+    segundos = time.perf_counter() - inicio
+    return {
+        'registros': total,
+        'segundos': segundos,
+        'registros_por_segundo': total / segundos if segundos else 0.0
+    }
+
+
+def benchmark_exportadores(args):
+    """
+    Mide registros/s de cada formato y compresión, y comprueba que la memoria
+    usada (pico de tracemalloc) no crece con el número de registros.
+    """
+    print("\n📤 BENCHMARK DE EXPORTADORES")
+    print("-"*50)
+    
+    libros = extraer(cargar_html(os.path.join(RUTA_DATOS, 'books_catalog.html')), ESPEC_LIBROS)
+    
+    def sinteticos(total):
+        return islice(cycle(libros), total)
+    
+    formatos = [
+        ('csv', exportar_csv, {'campos': CAMPOS_LIBROS}),
+        ('jsonl', exportar_jsonl, {})
+    ]
+    compresiones = [None, 'gzip'] + (['zstd'] if ZSTD_DISPONIBLE else [])
+    
+    with tempfile.TemporaryDirectory() as directorio:
+        for nombre, exportar, opciones in formatos:
+            for compresion in compresiones:
+                ruta = os.path.join(directorio, f'libros.{nombre}')
+                medida = medir_exportacion(exportar, sinteticos(args.registros), ruta,
+                                           compresion=compresion, **opciones)
+                
+                picos = []
+                for total in (args.registros // 10, args.registros):
+                    tracemalloc.start()
+                    exportar(sinteticos(total), ruta, compresion=compresion, **opciones)
+                    picos.append(tracemalloc.get_traced_memory()[1] / 1024)
+                    tracemalloc.stop()
+                
+                etiqueta = f"{nombre} + {compresion or 'sin comprimir'}"
+                print(f"   {etiqueta:22s} {medida['registros_por_segundo']:9.0f} registros/s   "
+                      f"pico memoria {picos[0]:6.0f} KB ({args.registros // 10}) / {picos[1]:6.0f} KB ({args.registros})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="⏱️ Benchmarks de las soluciones")
+    comandos = parser.add_subparsers(dest='benchmark', metavar='BENCHMARK', required=True)
+    
+    backends = comandos.add_parser('backends', help='Páginas/s y µs/registro de cada backend de parseo')
+    backends.add_argument('--repeticiones', type=int, default=200,
+                          help='Veces que se extrae cada página (default: 200)')
+    backends.set_defaults(ejecutar=benchmark_backends)
+    
+    streaming = comandos.add_parser('streaming', help='Pico de RSS de la extracción completa frente a streaming')
+    streaming.add_argument('--tamanos', type=int, nargs='+', default=[1000, 10000, 50000],
+                           help='Libros de cada catálogo sintético (default: 1000 10000 50000)')
+    streaming.set_defaults(ejecutar=benchmark_streaming)
+    
+    exportadores = comandos.add_parser('exportadores', help='Registros/s y memoria de cada formato y compresión')
+    exportadores.add_argument('--registros', type=int, default=100000,
+                              help='Registros sintéticos por exportación (default: 100000)')
+    exportadores.set_defaults(ejecutar=benchmark_exportadores)
+    
+    args = parser.parse_args()
+    args.ejecutar(args)
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ['--medir-rss']:
+        medir_rss(sys.argv[2], sys.argv[3])
+    else:
+        main()
@@ -4,11 +4,20 @@
 """
 
 import os
-from bs4 import BeautifulSoup
-from typing import List, Dict
-import csv
+import sys
+import textwrap
+from typing import Iterable, Iterator, List, Dict
 import json
 
+from especificaciones import (
+    BACKENDS, LXML_DISPONIBLE, ESPEC_LIBROS, ESPEC_PRODUCTOS, ESPEC_NOTICIAS,
+    configurar_backend, extraer, extraer_stream
+)
+from exportadores import exportar_csv, exportar_jsonl
+
+# Columnas fijas del CSV de libros
+CAMPOS_LIBROS = ESPEC_LIBROS.nombres
+
 
 def cargar_html(ruta_archivo: str) -> str:
     """
@@ -18,106 +27,32 @@ def cargar_html(ruta_archivo: str) -> str:
         return file.read()
 
 
-def extraer_libros(html_content: str) -> List[Dict]:
+def extraer_libros(html_content: str, backend: str = None) -> List[Dict]:
     """
     Extrae información de todos los libros del HTML.
+    
+    Los campos se describen de forma declarativa en ``ESPEC_LIBROS``
+    (ver especificaciones.py) y se rellenan en una sola pasada por libro.
+    
+    Args:
+        html_content: Contenido HTML como string
+        backend: 'lxml' o 'html.parser' (por defecto BACKEND_POR_DEFECTO)
     """
-    soup = BeautifulSoup(html_content, 'html.parser')
-    libros = []
-    
-    # Encontrar todos los artículos de libros
-    articulos = soup.find_all('article', class_='book-item')
-    
-    for articulo in articulos:
-        libro = {}
-        
-        # Título
-        titulo_elem = articulo.find('h3', class_='book-title')
-        libro['titulo'] = titulo_elem.text.strip() if titulo_elem else 'Sin título'
-        
-        # Precio actual
-        precio_actual_elem = articulo.find('span', class_='current-price')
-        if precio_actual_elem:
-            # Extraer el precio del atributo data-price o del texto
-            precio_data = precio_actual_elem.get('data-price')
-            if precio_data:
-                libro['precio_actual'] = float(precio_data)
-            else:
-                # Limpiar el texto del precio
-                precio_texto = precio_actual_elem.text.strip()
-                precio_texto = precio_texto.replace('$', '').replace(',', '')
-                try:
-                    libro['precio_actual'] = float(precio_texto)
-                except:
-                    libro['precio_actual'] = 0.0
-        else:
-            libro['precio_actual'] = 0.0
-        
-        # Precio original (si existe)
-        precio_original_elem = articulo.find('span', class_='original-price')
-        if precio_original_elem:
-            precio_texto = precio_original_elem.text.strip()
-            precio_texto = precio_texto.replace('$', '').replace(',', '')
-            try:
-                libro['precio_original'] = float(precio_texto)
-            except:
-                libro['precio_original'] = None
-        else:
-            libro['precio_original'] = None
-        
-        # Valoración
-        rating_elem = articulo.find('span', class_='rating')
-        if rating_elem:
-            rating_data = rating_elem.get('data-rating')
-            libro['valoracion'] = float(rating_data) if rating_data else 0.0
-        else:
-            libro['valoracion'] = 0.0
-        
-        # Número de reseñas
-        reviews_elem = articulo.find('span', class_='reviews-count')
-        if reviews_elem:
-            # Extraer número del texto (ej: "(234 reseñas)")
-            import re
-            match = re.search(r'\d+', reviews_elem.text)
-            libro['num_resenas'] = int(match.group()) if match else 0
-        else:
-            libro['num_resenas'] = 0
-        
-        # Estado del stock
-        stock_elem = articulo.find('span', class_='stock')
-        if stock_elem:
-            stock_text = stock_elem.text.lower()
-            libro['en_stock'] = 'agotado' not in stock_text and 'out' not in stock_text
-            
-            # Extraer cantidad si está disponible
-            stock_data = stock_elem.get('data-stock')
-            libro['cantidad_stock'] = int(stock_data) if stock_data else 0
-        else:
-            libro['en_stock'] = False
-            libro['cantidad_stock'] = 0
-        
-        # Autor
-        autor_elem = articulo.find('p', class_='author')
-        libro['autor'] = autor_elem.text.strip() if autor_elem else 'Autor desconocido'
-        
-        # Editorial
-        editorial_elem = articulo.find('p', class_='publisher')
-        if editorial_elem:
-            # Buscar el span dentro que contiene el nombre
-            span_editorial = editorial_elem.find('span')
-            libro['editorial'] = span_editorial.text.strip() if span_editorial else 'Editorial desconocida'
-        else:
-            libro['editorial'] = 'Editorial desconocida'
-        
-        # ISBN (información adicional)
-        libro['isbn'] = articulo.get('data-isbn', 'Sin ISBN')
-        
-        # Categoría
-        libro['categoria'] = articulo.get('data-category', 'Sin categoría')
-        
-        libros.append(libro)
+    return extraer(html_content, ESPEC_LIBROS, backend)
+
+
+def extraer_libros_stream(ruta_archivo: str) -> Iterator[Dict]:
+    """
+    Versión en streaming de ``extraer_libros`` para catálogos muy grandes.
     
-    return libros
+    Lee el fichero de forma incremental y devuelve cada libro en cuanto se
+    cierra su ``<article>``; la memoria usada no depende del tamaño del
+    fichero y el primer libro está disponible sin esperar al final.
+    
+    Args:
+        ruta_archivo: Ruta del HTML
+    """
+    return extraer_stream(ruta_archivo, ESPEC_LIBROS)
 
 
 def analizar_stock(libros: List[Dict]) -> Dict:
@@ -171,32 +106,50 @@ def ordenar_por_valoracion(libros: List[Dict], descendente: bool = True) -> List
     return sorted(libros, key=lambda x: x['valoracion'], reverse=descendente)
 
 
-def exportar_a_csv(libros: List[Dict], nombre_archivo: str = 'libros.csv'):
+def exportar_a_csv(libros: Iterable[Dict], nombre_archivo: str = 'libros.csv',
+                   compresion: str = None, append: bool = False):
     """
     Función adicional: Exporta los libros a un archivo CSV.
-    """
-    if not libros:
-        return
-    
-    # Obtener todas las claves para los encabezados
-    fieldnames = libros[0].keys()
-    
-    with open(nombre_archivo, 'w', newline='', encoding='utf-8') as csvfile:
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-        writer.writeheader()
-        writer.writerows(libros)
     
-    print(f"✅ Datos exportados a {nombre_archivo}")
+    Acepta cualquier iterable (p. ej. ``extraer_libros_stream``) y escribe fila
+    a fila con las columnas fijas de ``ESPEC_LIBROS``; con ``append=True`` la
+    cabecera solo se escribe si el archivo no existía.
+    """
+    total = exportar_csv(libros, nombre_archivo, campos=CAMPOS_LIBROS,
+                         compresion=compresion, append=append)
+    if total:
+        print(f"✅ {total} libros exportados a {nombre_archivo}")
 
 
-def exportar_a_json(libros: List[Dict], nombre_archivo: str = 'libros.json'):
+def exportar_a_json(libros: Iterable[Dict], nombre_archivo: str = 'libros.json'):
     """
-    Función adicional: Exporta los libros a un archivo JSON.
+    Función adicional: Exporta los libros a un archivo JSON (un array).
+    
+    El array se escribe elemento a elemento, con el mismo formato que
+    ``json.dump(libros, f, ensure_ascii=False, indent=2)``; para ficheros que
+    se amplían en cada ejecución o se comprimen, usar ``exportar_a_jsonl``.
     """
+    total = 0
     with open(nombre_archivo, 'w', encoding='utf-8') as jsonfile:
-        json.dump(libros, jsonfile, ensure_ascii=False, indent=2)
+        jsonfile.write('[')
+        for libro in libros:
+            jsonfile.write(',\n' if total else '\n')
+            jsonfile.write(textwrap.indent(json.dumps(libro, ensure_ascii=False, indent=2), '  '))
+            total += 1
+        jsonfile.write('\n]' if total else ']')
+    
+    print(f"✅ {total} libros exportados a {nombre_archivo}")
+
+
+def exportar_a_jsonl(libros: Iterable[Dict], nombre_archivo: str = 'libros.jsonl',
+                     compresion: str = None, append: bool = False):
+    """
+    Función adicional: Exporta los libros a JSON Lines (un libro por línea).
     
-    print(f"✅ Datos exportados a {nombre_archivo}")
+    La compresión ('gzip' o 'zstd') se deduce de la extensión si no se indica.
+    """
+    total = exportar_jsonl(libros, nombre_archivo, compresion=compresion, append=append)
+    print(f"✅ {total} libros exportados a {nombre_archivo}")
 
 
 def generar_reporte(libros: List[Dict]) -> str:
@@ -314,5 +267,50 @@ def demo_completa():
     print("\n✨ ¡Demostración completa finalizada!")
 
 
+# VERIFICACIÓN DE LOS BACKENDS
+RUTA_DATOS = os.path.join(os.path.dirname(__file__), '..', '..', 'data')
+ESPECIFICACIONES_DATOS = {
+    'books_catalog.html': ESPEC_LIBROS,
+    'ecommerce_products.html': ESPEC_PRODUCTOS,
+    'news_portal.html': ESPEC_NOTICIAS,
+}
+
+
+def verificar_paridad_backends() -> bool:
+    """
+    Comprueba que todos los backends (y la extracción en streaming) producen
+    exactamente la misma salida sobre los HTML de ejemplo de la carpeta data/.
+    
+    Sin lxml no hay nada que comparar y la comprobación no se da por buena.
+    """
+    print("\n🧪 PARIDAD ENTRE BACKENDS")
+    print("-"*50)
+    
+    if not LXML_DISPONIBLE:
+        print("❌ lxml no está instalado: no se puede comprobar la paridad (pip install lxml)")
+        return False
+    
+    todo_ok = True
+    for nombre, espec in ESPECIFICACIONES_DATOS.items():
+        ruta = os.path.join(RUTA_DATOS, nombre)
+        html = cargar_html(ruta)
+        resultados = {backend: extraer(html, espec, backend=backend) for backend in BACKENDS}
+        resultados['stream'] = list(extraer_stream(ruta, espec))
+        referencia = resultados['html.parser']
+        iguales = all(resultado == referencia for resultado in resultados.values())
+        todo_ok = todo_ok and iguales
+        icono = "✅" if iguales else "❌"
+        print(f"{icono} {nombre}: {len(referencia)} registros")
+    
+    return todo_ok
+
+
 if __name__ == "__main__":
-    demo_completa()
\ No newline at end of file
+    for argumento in sys.argv[1:]:
+        if argumento.startswith('--backend='):
+            configurar_backend(argumento.split('=', 1)[1])
+    
+    if '--paridad' in sys.argv:
+        sys.exit(0 if verificar_paridad_backends() else 1)
+    else:
+        demo_completa()
\ No newline at end of file
@@ -0,0 +1,544 @@
+"""
+📐 Extracción declarativa con especificaciones precompiladas
+============================================================
+
+En lugar de escribir a mano una llamada ``find(...)`` por campo (y recorrer el
+subárbol de cada registro una vez por campo), se describe cada registro con
+una especificación:
+
+    ESPEC_LIBROS = Especificacion('article.book-item', {
+        'titulo': Campo('h3.book-title', defecto='Sin título'),
+        'precio_actual': Campo('span.current-price', atributo='data-price',
+                               respaldo_texto=True, tipo=precio, defecto=0.0),
+        ...
+    })
+
+La especificación se compila una vez en una tabla ``tag -> campos`` y el
+extractor recorre el subárbol de cada registro **una sola vez**, rellenando
+todos los campos en esa pasada.
+
+Selectores soportados: ``tag``, ``.clase``, ``tag.clase1.clase2`` y cadenas de
+descendientes separadas por espacios (``p.publisher span``). Igual que
+``find`` de BeautifulSoup, cada paso toma el primer elemento que coincide.
+"""
+
+import os
+import re
+from html.parser import HTMLParser
+from typing import IO, Any, Callable, Dict, Iterator, List, Optional, Union
+
+from bs4 import BeautifulSoup, Tag
+
+try:
+    from lxml import etree, html as lxml_html
+    LXML_DISPONIBLE = True
+except ImportError:
+    LXML_DISPONIBLE = False
+
+
+# Backend de parseo: 'lxml' (mucho más rápido) o 'html.parser' (BeautifulSoup
+# con el parser de la librería estándar). Si lxml no está instalado se usa
+# siempre 'html.parser'. El valor inicial sale de la variable de entorno
+# SCRAPER_BACKEND; ``configurar_backend`` lo cambia desde la configuración.
+BACKENDS = ('lxml', 'html.parser')
+BACKEND_POR_DEFECTO = os.environ.get('SCRAPER_BACKEND', 'lxml')
+
+PATRON_NUMERO = re.compile(r'\d+')
+
+
+# CONVERSORES DE TIPO
+# ===================
+
+def texto(valor: str) -> str:
+    """Texto sin espacios al principio ni al final."""
+    return valor.strip()
+
+
+def texto_normalizado(valor: str) -> str:
+    """Texto con los espacios y saltos de línea internos colapsados."""
+    return ' '.join(valor.split())
+
+
+def precio(valor: str) -> float:
+    """'$1,234.50' -> 1234.5"""
+    return float(valor.strip().replace('$', '').replace(',', ''))
+
+
+def primer_entero(valor: str) -> int:
+    """Primer número entero que aparece en el texto ('(234 reseñas)' -> 234)."""
+    match = PATRON_NUMERO.search(valor)
+    if not match:
+        raise ValueError(f"No hay ningún número en {valor!r}")
+    return int(match.group())
+
+
+def presente(valor: str) -> bool:
+    """True si el elemento existe (se usa con defecto=False)."""
+    return True
+
+
+def sin_prefijo(prefijo: str) -> Callable[[str], str]:
+    """Conversor que elimina un prefijo fijo ('SKU: LAP-001' -> 'LAP-001')."""
+    def conversor(valor: str) -> str:
+        valor = valor.strip()
+        return valor[len(prefijo):].strip() if valor.startswith(prefijo) else valor
+    return conversor
+
+
+# ESPECIFICACIONES
+# ================
+
+class Campo:
+    """
+    Describe cómo obtener un campo de un registro.
+    """
+
+    def __init__(self, selector: Optional[str] = None, atributo: Optional[str] = None,
+                 tipo: Callable[[str], Any] = texto, defecto: Any = None,
+                 respaldo_texto: bool = False, multiple: bool = False):
+        """
+        Args:
+            selector: Selector CSS relativo al registro (None = el propio registro)
+            atributo: Atributo a leer; si es None se usa el texto del elemento
+            tipo: Conversor aplicado al valor; si lanza una excepción se usa ``defecto``
+            defecto: Valor cuando el elemento no existe o no se puede convertir
+            respaldo_texto: Si el atributo falta o está vacío, usar el texto del elemento
+            multiple: Devolver la lista de valores de todos los elementos que coinciden
+        """
+        self.selector = selector
+        self.atributo = atributo
+        self.tipo = tipo
+        self.defecto = defecto
+        self.respaldo_texto = respaldo_texto
+        self.multiple = multiple
+        self.pasos = _compilar_selector(selector) if selector else []
+
+
+def _compilar_selector(selector: str) -> List[tuple]:
+    """
+    'p.publisher span' -> [('p', {'publisher'}), ('span', set())]
+    """
+    pasos = []
+    for parte in selector.split():
+        tag, *clases = parte.split('.')
+        pasos.append((tag or None, frozenset(clases)))
+    return pasos
+
+
+class Especificacion:
+    """
+    Conjunto de campos de un tipo de registro, compilado para una sola pasada.
+    """
+
+    def __init__(self, selector_item: str, campos: Dict[str, Campo]):
+        """
+        Args:
+            selector_item: Selector simple del elemento raíz de cada registro
+            campos: Nombre del campo -> Campo (el orden se conserva en la salida)
+        """
+        (self.tag_item, self.clases_item), = _compilar_selector(selector_item)
+        self.campos = campos
+        self.nombres = list(campos)
+
+        # Campos que se leen del propio elemento raíz
+        self.campos_raiz = [nombre for nombre, campo in campos.items() if not campo.pasos]
+
+        # Tabla de despacho: tag -> [(nombre, índice del paso, clases requeridas, es el último)]
+        self.por_tag: Dict[Optional[str], List[tuple]] = {}
+        for nombre, campo in campos.items():
+            for indice, (tag, clases) in enumerate(campo.pasos):
+                ultimo = indice == len(campo.pasos) - 1
+                self.por_tag.setdefault(tag, []).append((nombre, indice, clases, ultimo))
+        self.cualquier_tag = self.por_tag.pop(None, [])
+
+
+# ADAPTADORES DE ÁRBOL
+# ====================
+# El motor solo necesita estas operaciones, así que funciona igual sobre un
+# árbol de lxml que sobre uno de BeautifulSoup.
+
+class _ArbolLxml:
+    @staticmethod
+    def items(raiz, espec: Especificacion) -> Iterator:
+        for elem in raiz.iter(espec.tag_item or '*'):
+            if espec.clases_item <= set(elem.get('class', '').split()):
+                yield elem
+
+    @staticmethod
+    def descendientes(elem) -> Iterator:
+        for hijo in elem.iterdescendants():
+            if isinstance(hijo.tag, str):
+                yield hijo
+
+    @staticmethod
+    def tag(elem) -> str:
+        return elem.tag
+
+    @staticmethod
+    def clases(elem) -> frozenset:
+        return frozenset(elem.get('class', '').split())
+
+    @staticmethod
+    def atributo(elem, nombre: str) -> Optional[str]:
+        return elem.get(nombre)
+
+    @staticmethod
+    def texto(elem) -> str:
+        # Equivale a text_content() pero funciona también con los elementos
+        # de etree que produce iterparse
+        return ''.join(elem.itertext())
+
+    @staticmethod
+    def es_ancestro(ancestro, elem) -> bool:
+        return any(padre is ancestro for padre in elem.iterancestors())
+
+
+class _ArbolBs4:
+    @staticmethod
+    def items(raiz, espec: Especificacion) -> Iterator:
+        for elem in raiz.find_all(espec.tag_item or True):
+            if espec.clases_item <= set(elem.get('class', [])):
+                yield elem
+
+    @staticmethod
+    def descendientes(elem) -> Iterator:
+        for hijo in elem.descendants:
+            if isinstance(hijo, Tag):
+                yield hijo
+
+    @staticmethod
+    def tag(elem) -> str:
+        return elem.name
+
+    @staticmethod
+    def clases(elem) -> frozenset:
+        return frozenset(elem.get('class', []))
+
+    @staticmethod
+    def atributo(elem, nombre: str) -> Optional[str]:
+        valor = elem.get(nombre)
+        return ' '.join(valor) if isinstance(valor, list) else valor
+
+    @staticmethod
+    def texto(elem) -> str:
+        return elem.get_text()
+
+    @staticmethod
+    def es_ancestro(ancestro, elem) -> bool:
+        return any(padre is ancestro for padre in elem.parents)
+
+
+# MOTOR DE EXTRACCIÓN
+# ===================
+
+def _valor(arbol, campo: Campo, elem) -> Any:
+    """
+    Convierte un elemento en el valor de un campo según su especificación.
+    """
+    if campo.atributo:
+        bruto = arbol.atributo(elem, campo.atributo)
+        if not bruto and campo.respaldo_texto:
+            bruto = arbol.texto(elem)
+        elif bruto is None:
+            return campo.defecto
+    else:
+        bruto = arbol.texto(elem)
+
+    try:
+        return campo.tipo(bruto)
+    except (ValueError, TypeError):
+        return campo.defecto
+
+
+def _extraer_item(arbol, espec: Especificacion, item) -> Dict:
+    """
+    Rellena todos los campos de un registro recorriendo su subárbol una sola vez.
+    """
+    encontrados: Dict[str, Any] = {}
+    progreso: Dict[tuple, Any] = {}  # (campo, paso) -> primer elemento que coincidió
+
+    for nombre in espec.campos_raiz:
+        encontrados[nombre] = _valor(arbol, espec.campos[nombre], item)
+
+    for elem in arbol.descendientes(item):
+        candidatos = espec.por_tag.get(arbol.tag(elem))
+        if candidatos is None and not espec.cualquier_tag:
+            continue
+
+        clases = arbol.clases(elem)
+        for nombre, indice, requeridas, ultimo in (candidatos or []) + espec.cualquier_tag:
+            campo = espec.campos[nombre]
+            if not requeridas <= clases:
+                continue
+            if nombre in encontrados and not campo.multiple:
+                continue
+            if indice > 0:
+                padre = progreso.get((nombre, indice - 1))
+                if padre is None or not arbol.es_ancestro(padre, elem):
+                    continue
+            if not ultimo:
+                progreso.setdefault((nombre, indice), elem)
+            elif campo.multiple:
+                encontrados.setdefault(nombre, []).append(_valor(arbol, campo, elem))
+            else:
+                encontrados[nombre] = _valor(arbol, campo, elem)
+
+    registro = {}
+    for nombre in espec.nombres:
+        if nombre in encontrados:
+            registro[nombre] = encontrados[nombre]
+        else:
+            campo = espec.campos[nombre]
+            registro[nombre] = [] if campo.multiple else campo.defecto
+    return registro
+
+
+def _validar_backend(backend: str):
+    if backend not in BACKENDS:
+        raise ValueError(f"Backend desconocido: {backend} (opciones: {', '.join(BACKENDS)})")
+
+
+def configurar_backend(backend: str):
+    """
+    Fija el backend que usan ``parsear`` y ``extraer`` cuando no se indica otro.
+
+    Args:
+        backend: 'lxml' o 'html.parser'
+    """
+    global BACKEND_POR_DEFECTO
+    _validar_backend(backend)
+    BACKEND_POR_DEFECTO = backend
+
+
+def parsear(html_content: str, backend: str = None):
+    """
+    Parsea el HTML con el backend indicado.
+
+    Returns:
+        Tupla (adaptador, raíz del árbol)
+    """
+    backend = backend or BACKEND_POR_DEFECTO
+    _validar_backend(backend)
+
+    if backend == 'lxml' and LXML_DISPONIBLE:
+        return _ArbolLxml, lxml_html.fromstring(html_content)
+    return _ArbolBs4, BeautifulSoup(html_content, 'html.parser')
+
+
+def extraer_de_arbol(arbol, raiz, espec: Especificacion) -> List[Dict]:
+    """
+    Extrae todos los registros de un árbol ya parseado.
+    """
+    return [_extraer_item(arbol, espec, item) for item in arbol.items(raiz, espec)]
+
+
+def extraer(html_content: str, espec: Especificacion, backend: str = None) -> List[Dict]:
+    """
+    Extrae todos los registros descritos por ``espec`` del HTML.
+
+    Args:
+        html_content: Contenido HTML como string
+        espec: Especificación del registro
+        backend: 'lxml' o 'html.parser' (por defecto BACKEND_POR_DEFECTO)
+    """
+    arbol, raiz = parsear(html_content, backend)
+    return extraer_de_arbol(arbol, raiz, espec)
+
+
+# EXTRACCIÓN EN STREAMING
+# =======================
+# El parser HTML de libxml2 (y por tanto ``lxml.etree.iterparse(html=True)``)
+# conserva todo el documento de entrada en su buffer aunque se vayan borrando
+# los elementos ya procesados, así que su memoria sigue creciendo con el
+# tamaño del fichero. ``HTMLParser`` de la librería estándar sí descarta lo
+# que ya ha tokenizado; se usa como tokenizador y solo se construye (con el
+# TreeBuilder de lxml) el subárbol del registro que se está leyendo.
+
+ETIQUETAS_VACIAS = frozenset((
+    'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input',
+    'link', 'meta', 'param', 'source', 'track', 'wbr'
+))
+
+TAMANO_BLOQUE = 64 * 1024
+
+
+class _LectorItems(HTMLParser):
+    """
+    Tokenizador incremental que construye únicamente los registros completos.
+
+    Un registro anidado dentro de otro se construye aparte (y también forma
+    parte del exterior), como en la extracción sobre el árbol completo; los
+    registros se entregan en el orden en que se abren.
+    """
+
+    def __init__(self, espec: Especificacion):
+        super().__init__(convert_charrefs=True)
+        self.espec = espec
+        self.completos: List = []
+        # Registros abiertos: [orden, builder, etiquetas abiertas]
+        self._activos: List[list] = []
+        self._terminados: Dict[int, object] = {}
+        self._abiertos = 0
+        self._entregados = 0
+
+    def _es_item(self, tag: str, atributos: Dict[str, str]) -> bool:
+        return (
+            (self.espec.tag_item is None or tag == self.espec.tag_item) and
+            self.espec.clases_item <= set(atributos.get('class', '').split())
+        )
+
+    def handle_starttag(self, tag, attrs):
+        atributos = {nombre: valor or '' for nombre, valor in reversed(attrs)}
+        if self._es_item(tag, atributos):
+            self._activos.append([self._abiertos, etree.TreeBuilder(), []])
+            self._abiertos += 1
+        for _, builder, abiertas in self._activos:
+            builder.start(tag, atributos)
+            if tag in ETIQUETAS_VACIAS:
+                builder.end(tag)
+            else:
+                abiertas.append(tag)
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag not in ETIQUETAS_VACIAS:
+            self.handle_endtag(tag)
+
+    def handle_endtag(self, tag):
+        activos = []
+        for activo in self._activos:
+            orden, builder, abiertas = activo
+            if tag in abiertas:
+                # Las etiquetas sin cerrar (<p>, <li>...) se cierran implícitamente
+                while abiertas:
+                    abierta = abiertas.pop()
+                    builder.end(abierta)
+                    if abierta == tag:
+                        break
+            if abiertas:
+                activos.append(activo)
+            else:
+                self._terminados[orden] = builder.close()
+        self._activos = activos
+        while self._entregados in self._terminados:
+            self.completos.append(self._terminados.pop(self._entregados))
+            self._entregados += 1
+
+    def handle_data(self, data):
+        for _, builder, _ in self._activos:
+            builder.data(data)
+
+
+def extraer_stream(fuente: Union[str, IO[str]], espec: Especificacion,
+                   tamano_bloque: int = TAMANO_BLOQUE) -> Iterator[Dict]:
+    """
+    Extrae registros de un HTML muy grande sin construir el árbol completo.
+
+    El fichero se lee por bloques; cada registro se emite en cuanto se cierra
+    su etiqueta y su subárbol se descarta, así que la memoria usada no crece
+    con el tamaño del fichero y el primer registro sale sin esperar al final.
+
+    Args:
+        fuente: Ruta del fichero o fichero de texto ya abierto
+        espec: Especificación del registro
+        tamano_bloque: Caracteres leídos en cada bloque
+
+    Yields:
+        Un diccionario por registro, en orden de aparición
+    """
+    propio = isinstance(fuente, str)
+    fichero = open(fuente, 'r', encoding='utf-8') if propio else fuente
+    try:
+        if not LXML_DISPONIBLE:
+            # Sin lxml no hay TreeBuilder: se parsea el documento entero
+            yield from extraer(fichero.read(), espec, backend='html.parser')
+            return
+
+        lector = _LectorItems(espec)
+        while True:
+            bloque = fichero.read(tamano_bloque)
+            if bloque:
+                lector.feed(bloque)
+            else:
+                lector.close()
+            for item in lector.completos:
+                yield _extraer_item(_ArbolLxml, espec, item)
+            lector.completos.clear()
+            if not bloque:
+                break
+    finally:
+        if propio:
+            fichero.close()
+
+
+# ESPECIFICACIONES DE LOS HTML DE EJEMPLO (carpeta data/)
+# =======================================================
+
+def _en_stock(valor: str) -> bool:
+    valor = valor.lower()
+    return 'agotado' not in valor and 'out' not in valor
+
+
+ESPEC_LIBROS = Especificacion('article.book-item', {
+    'titulo': Campo('h3.book-title', defecto='Sin título'),
+    'precio_actual': Campo('span.current-price', atributo='data-price', respaldo_texto=True,
+                           tipo=precio, defecto=0.0),
+    'precio_original': Campo('span.original-price', tipo=precio, defecto=None),
+    'valoracion': Campo('span.rating', atributo='data-rating', tipo=float, defecto=0.0),
+    'num_resenas': Campo('span.reviews-count', tipo=primer_entero, defecto=0),
+    'en_stock': Campo('span.stock', tipo=_en_stock, defecto=False),
+    'cantidad_stock': Campo('span.stock', atributo='data-stock', tipo=int, defecto=0),
+    'autor': Campo('p.author', defecto='Autor desconocido'),
+    'editorial': Campo('p.publisher span', defecto='Editorial desconocida'),
+    'isbn': Campo(atributo='data-isbn', defecto='Sin ISBN'),
+    'categoria': Campo(atributo='data-category', defecto='Sin categoría'),
+})
+
+ESPEC_PRODUCTOS = Especificacion('article.product-card', {
+    'id': Campo(atributo='data-product-id'),
+    'titulo': Campo('h3.product-title', defecto='Sin título'),
+    'url': Campo('h3.product-title a', atributo='href'),
+    'marca': Campo('div.product-brand'),
+    'sku': Campo('div.product-sku', tipo=sin_prefijo('SKU:')),
+    'categoria': Campo(atributo='data-category'),
+    'precio_actual': Campo('span.price-current', atributo='data-price', respaldo_texto=True,
+                           tipo=precio, defecto=0.0),
+    'precio_original': Campo('span.price-original', tipo=precio, defecto=None),
+    'valoracion': Campo('div.product-rating', atributo='data-rating', tipo=float, defecto=0.0),
+    'num_resenas': Campo('span.reviews-count', tipo=primer_entero, defecto=0),
+    'en_stock': Campo('span.in-stock', tipo=presente, defecto=False),
+    'cantidad_stock': Campo('div.product-availability', atributo='data-stock', tipo=int, defecto=0),
+    'envio_gratis': Campo('span.free-shipping', tipo=presente, defecto=False),
+    'caracteristicas': Campo('div.product-features li', multiple=True),
+})
+
+ESPEC_NOTICIAS = Especificacion('article.news-article', {
+    'id': Campo(atributo='data-article-id'),
+    'titulo': Campo('.article-title', tipo=texto_normalizado, defecto='Sin título'),
+    'url': Campo('.article-title a', atributo='href'),
+    'categoria': Campo(atributo='data-category'),
+    'prioridad': Campo(atributo='data-priority'),
+    'autor': Campo('span.author a', defecto='Autor desconocido'),
+    'fecha': Campo('time.publish-date', atributo='datetime'),
+    'minutos_lectura': Campo('span.read-time', atributo='data-minutes', tipo=int, defecto=0),
+    'resumen': Campo('p.article-summary', tipo=texto_normalizado, defecto=''),
+    'views': Campo('span.views', atributo='data-count', tipo=int, defecto=0),
+    'comments': Campo('span.comments', atributo='data-count', tipo=int, defecto=0),
+    'shares': Campo('span.shares', atributo='data-count', tipo=int, defecto=0),
+    'likes': Campo('span.likes', atributo='data-count', tipo=int, defecto=0),
+    'tags': Campo('a.tag', multiple=True),
+})
+
+
+def extraer_productos(html_content: str, backend: str = None) -> List[Dict]:
+    """
+    Extrae los productos de una página como data/ecommerce_products.html.
+    """
+    return extraer(html_content, ESPEC_PRODUCTOS, backend)
+
+
+def extraer_noticias(html_content: str, backend: str = None) -> List[Dict]:
+    """
+    Extrae las noticias de una página como data/news_portal.html.
+    """
+    return extraer(html_content, ESPEC_NOTICIAS, backend)
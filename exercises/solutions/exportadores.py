@@ -0,0 +1,201 @@
+"""
+📤 Exportadores en streaming: CSV y JSON Lines
+===============================================
+
+Los exportadores aceptan cualquier iterable de registros (una lista, un
+generador como ``extraer_libros_stream``...) y escriben fila a fila, así que la
+memoria usada no depende del número de registros:
+
+    with ExportadorJSONL('libros.jsonl.gz', append=True) as salida:
+        salida.escribir_todos(extraer_libros_stream('catalogo.html'))
+
+- **CSV** con un esquema de columnas fijo: las claves que falten se escriben
+  vacías y las que sobren se ignoran, de modo que todas las filas de un
+  fichero (aunque se añadan en ejecuciones distintas) tienen las mismas columnas.
+- **JSON Lines**: un objeto JSON por línea; a diferencia de un array JSON se
+  puede ampliar con ``append=True`` y leer línea a línea.
+- **Compresión** ``gzip`` o ``zstd`` (esta última requiere ``zstandard``). Si no
+  se indica, se deduce de la extensión (``.gz`` / ``.zst``). Al añadir a un
+  fichero comprimido se escribe un nuevo miembro/frame, que los lectores
+  estándar concatenan sin problema.
+- Se hace ``flush`` cada ``flush_cada`` registros para que un proceso que lea
+  el fichero (o un corte inesperado) vea los datos escritos hasta ese momento.
+"""
+
+import abc
+import csv
+import gzip
+import io
+import json
+import os
+from typing import IO, Dict, Iterable, Optional, Sequence
+
+try:
+    import zstandard
+    ZSTD_DISPONIBLE = True
+except ImportError:
+    ZSTD_DISPONIBLE = False
+
+
+COMPRESIONES = (None, 'gzip', 'zstd')
+EXTENSIONES_COMPRESION = {
+    '.gz': 'gzip',
+    '.zst': 'zstd'
+}
+
+FLUSH_CADA = 1000
+
+
+def deducir_compresion(ruta: str) -> Optional[str]:
+    """'libros.jsonl.gz' -> 'gzip', 'libros.csv' -> None"""
+    return EXTENSIONES_COMPRESION.get(os.path.splitext(ruta)[1])
+
+
+def abrir_salida(ruta: str, compresion: Optional[str] = None, append: bool = False) -> IO[str]:
+    """
+    Abre un fichero de texto UTF-8 para escritura, comprimido o no.
+
+    Args:
+        ruta: Ruta del fichero
+        compresion: None, 'gzip' o 'zstd'
+        append: Añadir al final en lugar de sobrescribir
+    """
+    if compresion not in COMPRESIONES:
+        raise ValueError(f"Compresión no soportada: {compresion} (usa una de {COMPRESIONES})")
+
+    modo = 'a' if append else 'w'
+    if compresion == 'gzip':
+        return gzip.open(ruta, modo + 't', encoding='utf-8', newline='')
+    if compresion == 'zstd':
+        if not ZSTD_DISPONIBLE:
+            raise ImportError("La compresión zstd requiere el paquete 'zstandard' (pip install zstandard)")
+        binario = open(ruta, modo + 'b')
+        comprimido = zstandard.ZstdCompressor().stream_writer(binario, closefd=True)
+        return io.TextIOWrapper(comprimido, encoding='utf-8', newline='')
+    return open(ruta, modo, encoding='utf-8', newline='')
+
+
+class _Exportador(abc.ABC):
+    """
+    Base común: apertura, conteo de registros, flush periódico y cierre.
+    """
+
+    def __init__(self, ruta: str, compresion: Optional[str] = None,
+                 append: bool = False, flush_cada: int = FLUSH_CADA):
+        """
+        Args:
+            ruta: Fichero de salida
+            compresion: None, 'gzip' o 'zstd' (por defecto se deduce de la extensión)
+            append: Añadir al fichero existente en lugar de sobrescribirlo
+            flush_cada: Registros entre cada flush al disco
+        """
+        self.ruta = ruta
+        self.compresion = compresion or deducir_compresion(ruta)
+        self.flush_cada = flush_cada
+        self.nuevo = not (append and os.path.exists(ruta) and os.path.getsize(ruta) > 0)
+        self.registros = 0
+        self._archivo = abrir_salida(ruta, self.compresion, append)
+
+    @abc.abstractmethod
+    def _escribir(self, registro: Dict):
+        """
+        Escribe un registro en el formato de la subclase.
+        """
+
+    def escribir(self, registro: Dict):
+        """
+        Escribe un registro.
+        """
+        self._escribir(registro)
+        self.registros += 1
+        if self.registros % self.flush_cada == 0:
+            self._archivo.flush()
+
+    def escribir_todos(self, registros: Iterable[Dict]) -> int:
+        """
+        Escribe todos los registros de un iterable sin materializarlo.
+
+        Returns:
+            Número de registros escritos en esta llamada
+        """
+        inicio = self.registros
+        for registro in registros:
+            self.escribir(registro)
+        return self.registros - inicio
+
+    def cerrar(self):
+        if not self._archivo.closed:
+            self._archivo.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.cerrar()
+
+
+class ExportadorCSV(_Exportador):
+    """
+    CSV con cabecera fija; la cabecera solo se escribe si el fichero es nuevo.
+    """
+
+    def __init__(self, ruta: str, campos: Sequence[str], **opciones):
+        """
+        Args:
+            ruta: Fichero de salida
+            campos: Columnas del CSV, en orden
+            **opciones: compresion, append y flush_cada (ver ``_Exportador``)
+        """
+        super().__init__(ruta, **opciones)
+        self.campos = list(campos)
+        self._writer = csv.DictWriter(self._archivo, fieldnames=self.campos,
+                                      restval='', extrasaction='ignore')
+        if self.nuevo:
+            self._writer.writeheader()
+
+    def _escribir(self, registro: Dict):
+        self._writer.writerow(registro)
+
+
+class ExportadorJSONL(_Exportador):
+    """
+    JSON Lines: un objeto JSON por línea.
+    """
+
+    def _escribir(self, registro: Dict):
+        self._archivo.write(json.dumps(registro, ensure_ascii=False, default=str))
+        self._archivo.write('\n')
+
+
+def exportar_csv(registros: Iterable[Dict], ruta: str, campos: Optional[Sequence[str]] = None,
+                 **opciones) -> int:
+    """
+    Exporta registros a CSV en streaming.
+
+    Args:
+        registros: Cualquier iterable de diccionarios
+        ruta: Fichero de salida
+        campos: Columnas; por defecto, las claves del primer registro
+        **opciones: compresion, append y flush_cada
+
+    Returns:
+        Número de registros escritos
+    """
+    registros = iter(registros)
+    primero = next(registros, None)
+    if primero is None:
+        return 0
+    with ExportadorCSV(ruta, campos or list(primero), **opciones) as salida:
+        salida.escribir(primero)
+        return 1 + salida.escribir_todos(registros)
+
+
+def exportar_jsonl(registros: Iterable[Dict], ruta: str, **opciones) -> int:
+    """
+    Exporta registros a JSON Lines en streaming.
+
+    Returns:
+        Número de registros escritos
+    """
+    with ExportadorJSONL(ruta, **opciones) as salida:
+        return salida.escribir_todos(registros)
@@ -0,0 +1,8 @@
+"""
+Configuración común de los tests: las soluciones viven en ``solutions/``.
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'solutions'))
@@ -0,0 +1,97 @@
+"""
+Tests de la extracción declarativa: especificaciones y paridad entre backends sobre los HTML de data/.
+"""
+
+import os
+
+import pytest
+
+import especificaciones
+from especificaciones import (ESPEC_LIBROS, ESPEC_NOTICIAS, ESPEC_PRODUCTOS, Campo, Especificacion,
+                              configurar_backend, extraer, precio, primer_entero)
+
+RUTA_DATOS = os.path.join(os.path.dirname(__file__), '..', '..', 'data')
+DATOS = [
+    ('books_catalog.html', ESPEC_LIBROS),
+    ('ecommerce_products.html', ESPEC_PRODUCTOS),
+    ('news_portal.html', ESPEC_NOTICIAS),
+]
+
+
+def _html(nombre):
+    with open(os.path.join(RUTA_DATOS, nombre), encoding='utf-8') as fichero:
+        return fichero.read()
+
+
+@pytest.mark.parametrize('nombre, espec', DATOS)
+def test_both_backends_extract_the_same_records(nombre, espec):
+    pytest.importorskip('lxml')
+    html = _html(nombre)
+    registros = extraer(html, espec, backend='html.parser')
+    assert registros
+    assert extraer(html, espec, backend='lxml') == registros
+
+
+def test_configured_backend_is_the_default(monkeypatch):
+    monkeypatch.setattr(especificaciones, 'BACKEND_POR_DEFECTO', 'lxml')
+    configurar_backend('html.parser')
+    arbol, _ = especificaciones.parsear('<p>hola</p>')
+    assert arbol is especificaciones._ArbolBs4
+    with pytest.raises(ValueError):
+        configurar_backend('html5lib')
+    assert especificaciones.BACKEND_POR_DEFECTO == 'html.parser'
+
+
+def test_books_fill_every_field_in_one_pass():
+    libros = extraer(_html('books_catalog.html'), ESPEC_LIBROS)
+    assert len(libros) == 7
+    assert libros[0] == {
+        'titulo': 'Effective Python: 90 Specific Ways to Write Better Python',
+        'precio_actual': 39.99,
+        'precio_original': 49.99,
+        'valoracion': 4.5,
+        'num_resenas': 234,
+        'en_stock': True,
+        'cantidad_stock': 15,
+        'autor': 'Brett Slatkin',
+        'editorial': 'Pearson',
+        'isbn': '978-0134685991',
+        'categoria': 'python',
+    }
+    # Sin precio original se usa el valor por defecto
+    assert libros[-1]['precio_original'] is None
+
+
+def test_products_and_news_share_the_engine():
+    producto = extraer(_html('ecommerce_products.html'), ESPEC_PRODUCTOS)[0]
+    assert (producto['id'], producto['sku'], producto['precio_actual']) == ('LAP-001', 'LAP-001-XPS', 1199.99)
+    assert producto['caracteristicas'][0] == 'Procesador Intel Core i7 11va Gen'
+    assert producto['envio_gratis'] is True
+
+    noticias = extraer(_html('news_portal.html'), ESPEC_NOTICIAS)
+    assert noticias[0]['tags'] == ['#GPT5', '#AI', '#Automation', '#Coding']
+    assert (noticias[0]['views'], noticias[0]['likes']) == (15234, 4521)
+    assert (noticias[-1]['autor'], noticias[-1]['tags']) == ('Autor desconocido', [])
+
+
+@pytest.mark.parametrize('backend', ['html.parser', 'lxml'])
+def test_spec_defaults_conversions_and_descendant_selectors(backend):
+    if backend == 'lxml':
+        pytest.importorskip('lxml')
+    espec = Especificacion('div.item', {
+        'sku': Campo(atributo='data-sku'),
+        'precio': Campo('span.price', atributo='data-price', respaldo_texto=True, tipo=precio, defecto=0.0),
+        'unidades': Campo('span.units', tipo=primer_entero, defecto=0),
+        'marca': Campo('p.brand span', defecto='?'),
+        'etiquetas': Campo('li', multiple=True),
+    })
+    html = """
+    <div class="item" data-sku="A1"><span class="price" data-price="">$1,234.50</span>
+      <span class="units">quedan 3</span><span>Fuera</span>
+      <p class="brand">Marca: <span>ACME</span></p><ul><li>x</li><li>y</li></ul></div>
+    <div class="item"><span class="price">gratis</span><p>Sin marca <span>no</span></p></div>
+    """
+    assert extraer(html, espec, backend=backend) == [
+        {'sku': 'A1', 'precio': 1234.5, 'unidades': 3, 'marca': 'ACME', 'etiquetas': ['x', 'y']},
+        {'sku': None, 'precio': 0.0, 'unidades': 0, 'marca': '?', 'etiquetas': []},
+    ]
@@ -0,0 +1,74 @@
+"""
+Tests de los exportadores en streaming: esquema fijo del CSV, modo append y compresión.
+"""
+
+import csv
+import gzip
+import importlib
+import json
+
+import pytest
+
+from exportadores import ExportadorJSONL, _Exportador, exportar_csv, exportar_jsonl
+
+solucion = importlib.import_module('01_primer_scraper_solution')
+
+LIBROS = [
+    {'titulo': 'A', 'precio_actual': 10.0, 'en_stock': True},
+    {'titulo': 'B', 'precio_actual': 20.0, 'en_stock': False, 'sobrante': 'x'},
+]
+
+
+def _filas_csv(ruta):
+    with open(ruta, encoding='utf-8', newline='') as fichero:
+        return list(csv.reader(fichero))
+
+
+def test_csv_append_keeps_one_header_and_the_fixed_columns(tmp_path):
+    ruta = str(tmp_path / 'libros.csv')
+    campos = ['titulo', 'precio_actual', 'autor']
+    assert exportar_csv(iter(LIBROS), ruta, campos=campos, append=True) == 2
+    assert exportar_csv(iter(LIBROS[:1]), ruta, campos=campos, append=True) == 1
+    assert _filas_csv(ruta) == [
+        campos,
+        ['A', '10.0', ''],
+        ['B', '20.0', ''],
+        ['A', '10.0', ''],
+    ]
+
+
+def test_csv_without_append_overwrites(tmp_path):
+    ruta = str(tmp_path / 'libros.csv')
+    exportar_csv(LIBROS, ruta)
+    exportar_csv(LIBROS[:1], ruta)
+    assert _filas_csv(ruta) == [['titulo', 'precio_actual', 'en_stock'], ['A', '10.0', 'True']]
+
+
+def test_jsonl_append_to_a_gzip_file_adds_a_member(tmp_path):
+    ruta = str(tmp_path / 'libros.jsonl.gz')
+    exportar_jsonl(iter(LIBROS), ruta, append=True)
+    exportar_jsonl(iter(LIBROS), ruta, append=True)
+    with gzip.open(ruta, 'rt', encoding='utf-8') as fichero:
+        assert [json.loads(linea)['titulo'] for linea in fichero] == ['A', 'B', 'A', 'B']
+
+
+def test_records_are_flushed_periodically(tmp_path):
+    ruta = tmp_path / 'libros.jsonl'
+    with ExportadorJSONL(str(ruta), flush_cada=2) as salida:
+        salida.escribir_todos(iter(LIBROS))
+        assert len(ruta.read_text(encoding='utf-8').splitlines()) == 2
+        salida.escribir(LIBROS[0])
+    assert len(ruta.read_text(encoding='utf-8').splitlines()) == 3
+
+
+def test_base_exporter_is_abstract(tmp_path):
+    with pytest.raises(TypeError):
+        _Exportador(str(tmp_path / 'libros.txt'))
+
+
+def test_exportar_a_json_matches_json_dump_with_indent(tmp_path):
+    ruta = tmp_path / 'libros.json'
+    solucion.exportar_a_json(iter(LIBROS), str(ruta))
+    assert ruta.read_text(encoding='utf-8') == json.dumps(LIBROS, ensure_ascii=False, indent=2)
+    solucion.exportar_a_json(iter([]), str(ruta))
+    assert json.loads(ruta.read_text(encoding='utf-8')) == []
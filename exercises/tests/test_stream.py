@@ -0,0 +1,69 @@
+"""
+Tests de la extracción en streaming: misma salida que el árbol completo, registros anidados y lectura por bloques.
+"""
+
+import io
+import os
+
+import pytest
+
+from especificaciones import (ESPEC_LIBROS, ESPEC_NOTICIAS, ESPEC_PRODUCTOS, Campo, Especificacion, extraer,
+                              extraer_stream)
+
+pytest.importorskip('lxml')
+
+RUTA_DATOS = os.path.join(os.path.dirname(__file__), '..', '..', 'data')
+
+
+@pytest.mark.parametrize('nombre, espec', [
+    ('books_catalog.html', ESPEC_LIBROS),
+    ('ecommerce_products.html', ESPEC_PRODUCTOS),
+    ('news_portal.html', ESPEC_NOTICIAS),
+])
+@pytest.mark.parametrize('tamano_bloque', [7, 64 * 1024])
+def test_stream_matches_the_full_tree(nombre, espec, tamano_bloque):
+    ruta = os.path.join(RUTA_DATOS, nombre)
+    with open(ruta, encoding='utf-8') as fichero:
+        esperado = extraer(fichero.read(), espec, backend='html.parser')
+    assert list(extraer_stream(ruta, espec, tamano_bloque=tamano_bloque)) == esperado
+
+
+ESPEC_CAJAS = Especificacion('div.box', {
+    'id': Campo(atributo='id'),
+    'nombres': Campo('b', multiple=True),
+})
+
+
+def test_nested_items_are_emitted_in_opening_order():
+    html = ('<div class="box" id="fuera"><b>1</b>'
+            '<div class="box" id="dentro"><b>2</b><p>sin cerrar</div>'
+            '<b>3</b></div><div class="box" id="suelta"><b>4</b></div>')
+    esperado = [
+        {'id': 'fuera', 'nombres': ['1', '2', '3']},
+        {'id': 'dentro', 'nombres': ['2']},
+        {'id': 'suelta', 'nombres': ['4']},
+    ]
+    assert extraer(html, ESPEC_CAJAS, backend='html.parser') == esperado
+    assert list(extraer_stream(io.StringIO(html), ESPEC_CAJAS, tamano_bloque=5)) == esperado
+
+
+class FicheroContado(io.StringIO):
+    """
+    Fichero en memoria que cuenta los caracteres leídos.
+    """
+
+    leidos = 0
+
+    def read(self, tamano=-1):
+        bloque = super().read(tamano)
+        self.leidos += len(bloque)
+        return bloque
+
+
+def test_first_record_arrives_before_the_end_of_the_file():
+    html = '<main>' + ''.join(f'<div class="box" id="c{i}"><b>{i}</b></div>' for i in range(1000)) + '</main>'
+    fichero = FicheroContado(html)
+    registros = extraer_stream(fichero, ESPEC_CAJAS, tamano_bloque=100)
+    assert next(registros) == {'id': 'c0', 'nombres': ['0']}
+    assert fichero.leidos <= 200
+    assert sum(1 for _ in registros) == 999
@@ -0,0 +1,159 @@
+"""
+🚨 Alerts Bench - Consultas de ``check_alerts`` sobre un catálogo grande
+========================================================================
+
+Crea una base de datos SQLite temporal con ``products`` productos sintéticos
+(10.000 por defecto) y unas pocas lecturas por tienda, y prepara los datos de
+``check_alerts`` de dos maneras:
+
+1. Como antes: ``PriceDB.get_latest_prices`` por producto y búsqueda lineal
+   de su configuración por nombre (N+1 consultas y O(n²) en Python).
+2. Como ahora: ``PriceStore.get_latest_prices_by_product`` (una consulta) y
+   un índice nombre -> configuración.
+
+Para cada camino mide el tiempo y las sentencias SQL ejecutadas, y comprueba
+que los últimos precios y las alertas de precio objetivo son idénticos.
+"""
+
+import logging
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Tuple
+
+from sqlalchemy import event
+
+from db_bench import STORES
+from price_store import PriceStore
+
+logger = logging.getLogger(__name__)
+
+
+class _QueryCounter:
+    """
+    Cuenta las sentencias que se ejecutan en un engine mientras está activo.
+    """
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.queries = 0
+
+    def _count(self, *args):
+        self.queries += 1
+
+    def __enter__(self):
+        event.listen(self.engine, 'before_cursor_execute', self._count)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        event.remove(self.engine, 'before_cursor_execute', self._count)
+
+
+def _seed(db, store: PriceStore, products: int, stores: int, readings: int) -> List[Dict]:
+    """
+    Crea los productos y ``readings`` lecturas por tienda; devuelve sus configuraciones.
+    """
+    random.seed(42)
+    start = datetime.now().replace(microsecond=0) - timedelta(hours=readings)
+    configs, batch = [], []
+    for index in range(products):
+        config = {
+            'name': f"Producto {index}",
+            'urls': [f"https://www.{name}/item/{index}" for name in STORES[:stores]],
+            'target_price': round(random.uniform(100, 1000), 2)
+        }
+        product = db.get_or_create_product(**config)
+        configs.append(config)
+        for offset, name in enumerate(STORES[:stores]):
+            for reading in range(readings):
+                batch.append({
+                    'product_id': product.id,
+                    'store': name,
+                    'price': round(random.uniform(50, 1500), 2),
+                    'url': config['urls'][offset],
+                    'availability': True,
+                    'title': config['name'],
+                    # Sin empates en el último timestamp de cada tienda
+                    'timestamp': start + timedelta(hours=reading, seconds=offset)
+                })
+        if len(batch) >= 50000:
+            store.save_price_history_many(batch)
+            batch = []
+    store.save_price_history_many(batch)
+    return configs
+
+
+def _evaluate(products, latest_for: Callable, config_for: Callable) -> Tuple[Dict, List]:
+    """
+    Últimos precios y alertas de precio objetivo, como en ``check_alerts``.
+    """
+    latest, alerts = {}, []
+    for product in products:
+        prices = latest_for(product.id)
+        if not prices:
+            continue
+        config = config_for(product.name)
+        if not config:
+            continue
+        target_price = config.get('target_price')
+        for record in prices:
+            latest[(product.id, record.store)] = (record.price, record.url, record.timestamp)
+            if target_price and record.price <= target_price:
+                alerts.append((product.name, record.store, record.price, record.url))
+    return latest, sorted(alerts)
+
+
+def run(db_factory: Callable[[str], object], products: int = 10000, stores: int = 3, readings: int = 4,
+        products_table: str = 'products', history_table: str = 'price_history') -> Dict:
+    """
+    Ejecuta el benchmark completo sobre una base de datos temporal.
+
+    Args:
+        db_factory: Crea una instancia de PriceDB a partir de una URL de SQLAlchemy
+        products: Productos sintéticos
+        stores: Tiendas por producto
+        readings: Lecturas por tienda
+        products_table: Tabla de productos
+        history_table: Tabla del histórico
+
+    Returns:
+        Diccionario con products, rows, legacy y set_based (seconds, queries),
+        speedup, alerts e identical
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        db = db_factory(f"sqlite:///{os.path.join(directory, 'bench.db')}")
+        store = PriceStore(db.engine, products_table, history_table)
+        logger.info(f"🚨 Generando {products} productos con {stores * readings} lecturas cada uno...")
+        configs = _seed(db, store, products, stores, readings)
+
+        logger.info("🚨 Consultas por producto (N+1)...")
+        with _QueryCounter(db.engine) as counter:
+            start = time.perf_counter()
+            legacy = _evaluate(
+                db.get_all_products(),
+                db.get_latest_prices,
+                lambda name: next((config for config in configs if config['name'] == name), None)
+            )
+            legacy_stats = {'seconds': time.perf_counter() - start, 'queries': counter.queries}
+
+        logger.info("🚨 Consulta única por catálogo...")
+        with _QueryCounter(db.engine) as counter:
+            start = time.perf_counter()
+            config_by_name = {}
+            for config in configs:
+                config_by_name.setdefault(config['name'], config)
+            latest_by_product = store.get_latest_prices_by_product()
+            set_based = _evaluate(db.get_all_products(), latest_by_product.get, config_by_name.get)
+            set_stats = {'seconds': time.perf_counter() - start, 'queries': counter.queries}
+
+    return {
+        'products': products,
+        'rows': products * stores * readings,
+        'legacy': legacy_stats,
+        'set_based': set_stats,
+        'speedup': legacy_stats['seconds'] / set_stats['seconds'],
+        'alerts': len(set_based[1]),
+        'identical': legacy == set_based and len(set_based[0]) == products * stores
+    }
@@ -0,0 +1,101 @@
+"""
+🗄️ Archive Bench - Tamaño y tiempos de Parquet, CSV y JSON Lines
+=================================================================
+
+Crea una base de datos SQLite temporal con ``days`` días de lecturas horarias
+de ``products`` productos × ``stores`` tiendas y exporta el mismo histórico
+en cada formato de ``archive``. De cada uno mide el tamaño en disco, el tiempo
+de exportación y el de leer y decodificar todos los registros de vuelta
+(``read_history``, sin escribirlos en la DB).
+
+Parquet requiere ``pyarrow``; sin él se omite de la comparación.
+"""
+
+import logging
+import math
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterable, Optional
+
+import archive
+from db_bench import STORES
+from price_store import PriceStore
+from price_writer import BufferedPriceWriter
+
+logger = logging.getLogger(__name__)
+
+
+def _seed(db, store: PriceStore, products: int, stores: int, days: int):
+    random.seed(42)
+    start = datetime.now().replace(minute=0, second=0, microsecond=0) - timedelta(days=days)
+    with BufferedPriceWriter(store, batch_size=50000, flush_interval=math.inf) as writer:
+        for index in range(products):
+            product = db.get_or_create_product(name=f"Archive bench {index}",
+                                               urls=[f"https://www.{name}/item/{index}" for name in STORES[:stores]],
+                                               target_price=100.0)
+            for name in STORES[:stores]:
+                price = random.uniform(80, 500)
+                for hour in range(days * 24):
+                    price = max(1.0, price * random.uniform(0.98, 1.02))
+                    writer.add(timestamp=start + timedelta(hours=hour), product_id=product.id, store=name,
+                               price=round(price, 2), url=f"https://www.{name}/item/{index}",
+                               availability=True, title=product.name)
+
+
+def compare_formats(store, directory: str, days: Optional[int] = None,
+                    formats: Iterable[str] = archive.FORMATS) -> Dict[str, Dict]:
+    """
+    Exporta la misma ventana en cada formato y mide tamaño y tiempos.
+
+    El tiempo de importación es el de leer y decodificar todos los registros
+    (``read_history``), sin escribirlos en la DB.
+
+    Returns:
+        {format: {rows, bytes, export_seconds, import_seconds}}
+    """
+    results = {}
+    for format in formats:
+        if format == 'parquet' and not archive.PYARROW_AVAILABLE:
+            logger.warning("pyarrow no está instalado, se omite Parquet en la comparación")
+            continue
+        exported = archive.export_history(store, os.path.join(directory, format), format=format, days=days)
+        start = time.perf_counter()
+        rows = sum(1 for _ in archive.read_history(exported['path'], format))
+        results[format] = {
+            'rows': rows,
+            'bytes': exported['bytes'],
+            'export_seconds': exported['seconds'],
+            'import_seconds': time.perf_counter() - start
+        }
+    return results
+
+
+def run(db_factory: Callable[[str], object], products: int = 500, stores: int = 3, days: int = 29,
+        formats: Iterable[str] = archive.FORMATS,
+        products_table: str = 'products', history_table: str = 'price_history') -> Dict:
+    """
+    Ejecuta el benchmark completo sobre una base de datos temporal.
+
+    Args:
+        db_factory: Crea una instancia de PriceDB a partir de una URL de SQLAlchemy
+        products: Productos sintéticos
+        stores: Tiendas por producto
+        days: Días de histórico horario
+        formats: Formatos a comparar
+        products_table: Tabla de productos
+        history_table: Tabla del histórico
+
+    Returns:
+        Diccionario con rows y formats ({format: {rows, bytes, export_seconds,
+        import_seconds}})
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        db = db_factory(f"sqlite:///{os.path.join(directory, 'bench.db')}")
+        store = PriceStore(db.engine, products_table, history_table)
+        logger.info(f"🗄️ Generando {products} productos × {stores} tiendas × {days} días...")
+        _seed(db, store, products, stores, days)
+        results = compare_formats(store, os.path.join(directory, 'exports'), formats=formats)
+    return {'rows': products * stores * days * 24, 'formats': results}
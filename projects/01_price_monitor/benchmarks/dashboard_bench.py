@@ -0,0 +1,192 @@
+"""
+🏎️ Dashboard Bench - Prueba de carga de la API del dashboard
+=============================================================
+
+Crea una base de datos SQLite temporal con un histórico sintético (escrito
+con ``BufferedPriceWriter``, así que también tiene rollups), arranca la API
+del dashboard en otro proceso con el servidor elegido y simula ``viewers``
+usuarios concurrentes. Cada uno abre el resumen y el gráfico de un producto
+al azar con una ventana de 1, 7, 30 o 90 días, una y otra vez, durante
+``duration`` segundos.
+
+Se hace una ronda sin caché (``cache_ttl`` 0) y otra con caché, y de cada
+una se informa peticiones por segundo y latencias p50/p99.
+"""
+
+import logging
+import math
+import multiprocessing
+import os
+import random
+import socket
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Tuple
+from urllib.error import URLError
+from urllib.request import urlopen
+
+from dashboard_api import DashboardAPI, TTLCache, serve
+from db_bench import STORES, _percentile
+from price_store import PriceStore
+from price_writer import BufferedPriceWriter
+
+logger = logging.getLogger(__name__)
+
+WINDOWS = (1, 7, 30, 90)
+
+
+def _seed(db, store: PriceStore, products: int, stores: int, days: int) -> List[int]:
+    """
+    Crea los productos y ``days`` días de lecturas horarias por tienda (paseo aleatorio).
+    """
+    random.seed(42)
+    writer = BufferedPriceWriter(store, batch_size=50000, flush_interval=math.inf)
+    start = datetime.now().replace(minute=0, second=0, microsecond=0) - timedelta(days=days)
+    product_ids = []
+    for index in range(products):
+        product = db.get_or_create_product(name=f"Dashboard bench {index}",
+                                           urls=[f"https://www.{store}/item/{index}" for store in STORES[:stores]],
+                                           target_price=100.0)
+        product_ids.append(product.id)
+        for store in STORES[:stores]:
+            price = random.uniform(80, 500)
+            for hour in range(days * 24):
+                price = max(1.0, price * random.uniform(0.98, 1.02))
+                writer.add(timestamp=start + timedelta(hours=hour), product_id=product.id, store=store,
+                           price=round(price, 2), url=f"https://www.{store}/item/{index}",
+                           availability=True, title=product.name)
+    writer.flush()
+    return product_ids
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def _server_process(db_factory: Callable, db_url: str, tables: Tuple[str, str], port: int, server: str,
+                    workers: int, cache_ttl: float):
+    from flask import Flask
+
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    db = db_factory(db_url)
+    app = Flask(__name__)
+    DashboardAPI(db, PriceStore(db.engine, *tables), TTLCache(ttl=cache_ttl)).register(app)
+    serve(app, '127.0.0.1', port, server=server, workers=workers,
+          post_fork=lambda: db.engine.dispose(close=False))
+
+
+def _wait_ready(base: str, timeout: float = 30):
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            with urlopen(f"{base}/api/v2/cache", timeout=1) as response:
+                response.read()
+            return
+        except (URLError, OSError):
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.2)
+
+
+def _viewers(base: str, product_ids: List[int], viewers: int, duration: float) -> Dict:
+    """
+    Lanza ``viewers`` hilos que piden resumen y gráfico sin pausa durante ``duration`` segundos.
+    """
+    latencies: List[float] = []
+    errors = [0]
+    lock = threading.Lock()
+    deadline = time.monotonic() + duration
+
+    def viewer(seed: int):
+        rng = random.Random(seed)
+        local, failed = [], 0
+        while time.monotonic() < deadline:
+            paths = [
+                "/api/v2/summary",
+                f"/api/v2/products/{rng.choice(product_ids)}/chart?days={rng.choice(WINDOWS)}&width=800"
+            ]
+            for path in paths:
+                start = time.perf_counter()
+                try:
+                    with urlopen(base + path, timeout=30) as response:
+                        response.read()
+                    local.append(time.perf_counter() - start)
+                except (URLError, OSError):
+                    failed += 1
+        with lock:
+            latencies.extend(local)
+            errors[0] += failed
+
+    threads = [threading.Thread(target=viewer, args=(index,), daemon=True) for index in range(viewers)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    seconds = time.perf_counter() - start
+
+    return {
+        'requests': len(latencies),
+        'errors': errors[0],
+        'per_second': len(latencies) / seconds,
+        'p50_ms': _percentile(latencies or [0.0], 0.50) * 1000,
+        'p99_ms': _percentile(latencies or [0.0], 0.99) * 1000
+    }
+
+
+def run(db_factory: Callable[[str], object], viewers: int = 100, duration: float = 20,
+        server: str = 'dev', workers: int = 4, products: int = 50, stores: int = 3,
+        days: int = 90, products_table: str = 'products', history_table: str = 'price_history') -> Dict:
+    """
+    Ejecuta la prueba de carga.
+
+    Args:
+        db_factory: Crea una instancia de PriceDB a partir de una URL de SQLAlchemy
+        viewers: Usuarios concurrentes
+        duration: Segundos de cada ronda
+        server: Servidor de la API ('dev', 'waitress' o 'gunicorn')
+        workers: Procesos (gunicorn) o grupos de hilos (waitress)
+        products: Productos sintéticos
+        stores: Tiendas por producto
+        days: Días de histórico horario
+        products_table: Tabla de productos
+        history_table: Tabla del histórico
+
+    Returns:
+        Diccionario con viewers, server, rows y rounds (cache, requests,
+        errors, per_second, p50_ms, p99_ms)
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        db_url = f"sqlite:///{os.path.join(directory, 'dashboard.db')}"
+        logger.info(f"🏎️ Generando {products} productos × {stores} tiendas × {days} días...")
+        db = db_factory(db_url)
+        product_ids = _seed(db, PriceStore(db.engine, products_table, history_table), products, stores, days)
+
+        rounds = []
+        for cache_ttl in (0, 300):
+            port = _free_port()
+            base = f"http://127.0.0.1:{port}"
+            process = multiprocessing.Process(target=_server_process, args=(
+                db_factory, db_url, (products_table, history_table), port, server, workers, cache_ttl))
+            process.start()
+            try:
+                _wait_ready(base)
+                logger.info(f"🏎️ {viewers} usuarios durante {duration:.0f}s "
+                            f"({'con' if cache_ttl else 'sin'} caché, servidor {server})...")
+                result = _viewers(base, product_ids, viewers, duration)
+            finally:
+                process.terminate()
+                process.join()
+            result['cache'] = bool(cache_ttl)
+            rounds.append(result)
+
+    return {
+        'viewers': viewers,
+        'server': server,
+        'rows': products * stores * days * 24,
+        'rounds': rounds
+    }
@@ -0,0 +1,140 @@
+"""
+⏱️ DB Bench - Latencia de las consultas de PriceDB sobre datos sintéticos
+=========================================================================
+
+Crea una base de datos SQLite temporal, la rellena con un histórico sintético
+(productos × tiendas × lecturas horarias) y mide p50/p99 de las llamadas que
+se hacen en cada ciclo. También devuelve el plan de ejecución
+(EXPLAIN QUERY PLAN) de la consulta equivalente a cada llamada y el resultado
+de ``db_tuning.verify_indexes``.
+"""
+
+import logging
+import os
+import random
+import sqlite3
+import tempfile
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List
+
+import db_tuning
+from price_store import PriceStore
+
+logger = logging.getLogger(__name__)
+
+STORES = ('amazon.com', 'ebay.com', 'bestbuy.com', 'walmart.com', 'target.com')
+
+
+def _percentile(samples: List[float], fraction: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def _measure(call: Callable, repeat: int) -> Dict[str, float]:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        call()
+        samples.append((time.perf_counter() - start) * 1000)
+    return {'p50_ms': _percentile(samples, 0.50), 'p99_ms': _percentile(samples, 0.99)}
+
+
+def _seed(db, store: PriceStore, configs: List[Dict], stores: int, days: int,
+          chunk_size: int = 50000) -> List:
+    """
+    Crea los productos y ``days`` días de lecturas horarias por tienda.
+    """
+    random.seed(42)
+    catalog = [db.get_or_create_product(**config) for config in configs]
+
+    start = datetime.now().replace(minute=0, second=0, microsecond=0) - timedelta(days=days)
+    batch = []
+    for hour in range(days * 24):
+        timestamp = start + timedelta(hours=hour)
+        for product in catalog:
+            for name in STORES[:stores]:
+                batch.append({
+                    'product_id': product.id,
+                    'store': name,
+                    'price': round(random.uniform(50, 1500), 2),
+                    'url': f"https://www.{name}/item/{product.id}",
+                    'availability': True,
+                    'title': product.name,
+                    'timestamp': timestamp
+                })
+                if len(batch) >= chunk_size:
+                    store.save_price_history_many(batch)
+                    batch = []
+    if batch:
+        store.save_price_history_many(batch)
+    return catalog
+
+
+def run(db_factory: Callable[[str], object], products: int = 200, stores: int = 3,
+        days: int = 90, repeat: int = 200, history_days: int = 7,
+        products_table: str = 'products', history_table: str = 'price_history') -> Dict:
+    """
+    Ejecuta el benchmark completo sobre una base de datos temporal.
+
+    Args:
+        db_factory: Crea una instancia de PriceDB a partir de una URL de SQLAlchemy
+        products: Productos sintéticos
+        stores: Tiendas por producto
+        days: Días de histórico horario
+        repeat: Llamadas medidas por consulta
+        history_days: Ventana de ``get_price_history``
+        products_table: Tabla de productos
+        history_table: Tabla del histórico
+
+    Returns:
+        Diccionario con rows, seed_seconds, timings, plans e index_problems
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'bench.db')
+        db = db_factory(f"sqlite:///{path}")
+
+        store_names = STORES[:stores]
+        configs = [
+            {
+                'name': f"Producto {index}",
+                'urls': [f"https://www.{store}/item/{index}" for store in store_names],
+                'target_price': 100.0 + index
+            }
+            for index in range(products)
+        ]
+
+        logger.info(f"⏱️ Generando {products * stores * days * 24} lecturas sintéticas...")
+        start = time.perf_counter()
+        catalog = _seed(db, PriceStore(db.engine, products_table, history_table), configs, stores, days)
+        seed_seconds = time.perf_counter() - start
+
+        pick = lambda: random.choice(catalog)
+        timings = {
+            'get_or_create_product': _measure(
+                lambda: db.get_or_create_product(**random.choice(configs)), repeat),
+            'get_latest_prices': _measure(lambda: db.get_latest_prices(pick().id), repeat),
+            'get_price_history': _measure(lambda: db.get_price_history(pick().id, days=history_days), repeat),
+            'get_all_products': _measure(db.get_all_products, repeat)
+        }
+
+        since = str(datetime.now() - timedelta(days=history_days))
+        connection = sqlite3.connect(path)
+        try:
+            plans = db_tuning.explain_queries(connection, {
+                'get_or_create_product': ('Producto 0',),
+                'get_latest_prices': (catalog[0].id, store_names[0]),
+                'get_price_history': (catalog[0].id, since),
+                'iter_price_history(since)': (since,)
+            }, products_table, history_table)
+            index_problems = db_tuning.verify_indexes(connection, products_table, history_table)
+        finally:
+            connection.close()
+
+    return {
+        'rows': products * stores * days * 24,
+        'seed_seconds': seed_seconds,
+        'timings': timings,
+        'plans': plans,
+        'index_problems': index_problems
+    }
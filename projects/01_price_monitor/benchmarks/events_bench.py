@@ -0,0 +1,226 @@
+"""
+📡 Events Bench - Latencia de reparto y memoria por conexión SSE
+=================================================================
+
+Dos mediciones:
+
+1. En el propio bus: memoria por ``Subscription`` (``tracemalloc``) y tiempo
+   de ``publish`` con ``bus_subscriptions`` suscripciones.
+2. Extremo a extremo: arranca en otro proceso una app Flask con
+   ``register_sse`` y un hilo que publica ``events`` actualizaciones de
+   precio de ``products`` productos, abre ``subscribers`` conexiones SSE
+   locales y mide, para cada evento recibido, el tiempo desde ``publish``
+   hasta que llega al cliente. La memoria por conexión es el aumento del
+   RSS del servidor (Linux) al abrir las conexiones dividido entre su número.
+
+Como las actualizaciones del mismo producto se fusionan, cada cliente recibe
+como mucho tantos eventos como se publicaron.
+"""
+
+import http.client
+import json
+import logging
+import multiprocessing
+import random
+import socket
+import threading
+import time
+import tracemalloc
+from typing import Dict, List, Optional
+from urllib.request import urlopen
+
+from db_bench import STORES, _percentile
+from events import EventBus, register_sse
+
+logger = logging.getLogger(__name__)
+
+
+def _rss_kb(pid: int) -> Optional[int]:
+    try:
+        with open(f"/proc/{pid}/status", encoding='ascii') as status:
+            for line in status:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def _bus_measure(subscriptions: int) -> Dict:
+    """
+    Memoria por suscripción y coste de ``publish`` sin HTTP de por medio.
+    """
+    bus = EventBus()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    subscribers = [bus.subscribe() for _ in range(subscriptions)]
+    per_subscription = (tracemalloc.get_traced_memory()[0] - before) / subscriptions
+    tracemalloc.stop()
+
+    samples = []
+    for product_id in range(100):
+        start = time.perf_counter()
+        bus.publish('price', {'product_id': product_id, 'prices': {'store': {'price': 1.0}}}, key=product_id)
+        samples.append(time.perf_counter() - start)
+    received = len(subscribers[0].get(timeout=0))
+    return {
+        'subscriptions': subscriptions,
+        'bytes_per_subscription': per_subscription,
+        'publish_p50_ms': _percentile(samples, 0.50) * 1000,
+        'publish_p99_ms': _percentile(samples, 0.99) * 1000,
+        'received': received
+    }
+
+
+def _server_process(port: int, server: str, threads: int):
+    from flask import Flask, jsonify, request
+
+    from dashboard_api import serve
+
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    bus = EventBus()
+    app = Flask(__name__)
+    register_sse(app, bus, heartbeat=5.0)
+
+    def publisher(events: int, products: int, interval: float):
+        rng = random.Random(42)
+        for _ in range(events):
+            product_id = rng.randrange(products)
+            store = rng.choice(STORES)
+            bus.publish('price', {
+                'product_id': product_id,
+                'prices': {store: {'price': round(rng.uniform(50, 500), 2)}},
+                'sent_at': time.time()
+            }, key=product_id)
+            time.sleep(interval)
+        bus.publish('end', {'sent_at': time.time()})
+
+    def start_view():
+        thread = threading.Thread(target=publisher, daemon=True, args=(
+            request.args.get('events', type=int), request.args.get('products', type=int),
+            request.args.get('interval', type=float)))
+        thread.start()
+        return jsonify({'started': True})
+
+    def stats_view():
+        return jsonify(bus.stats())
+
+    app.add_url_rule('/bench/start', 'bench_start', start_view)
+    app.add_url_rule('/bench/stats', 'bench_stats', stats_view)
+    serve(app, '127.0.0.1', port, server=server, workers=1, threads=threads)
+
+
+def _subscriber(port: int, connected: threading.Event, latencies: List[float], counts: List[int],
+                lock: threading.Lock):
+    connection = http.client.HTTPConnection('127.0.0.1', port, timeout=120)
+    connection.request('GET', '/api/v2/events')
+    response = connection.getresponse()
+    connected.set()
+    local, received = [], 0
+    try:
+        event = None
+        while True:
+            line = response.readline()
+            if not line:
+                break
+            line = line.decode('utf-8').rstrip('\n')
+            if line.startswith('event: '):
+                event = line[len('event: '):]
+            elif line.startswith('data: '):
+                data = json.loads(line[len('data: '):])
+                local.append(time.time() - data['sent_at'])
+                if event == 'end':
+                    break
+                received += 1
+    finally:
+        connection.close()
+        with lock:
+            latencies.extend(local)
+            counts.append(received)
+
+
+def _get_json(port: int, path: str) -> Dict:
+    with urlopen(f"http://127.0.0.1:{port}{path}", timeout=10) as response:
+        return json.loads(response.read())
+
+
+def run(subscribers: int = 200, events: int = 500, products: int = 50, interval: float = 0.005,
+        server: str = 'dev', bus_subscriptions: int = 10000) -> Dict:
+    """
+    Ejecuta el benchmark completo.
+
+    Args:
+        subscribers: Conexiones SSE concurrentes
+        events: Actualizaciones de precio publicadas
+        products: Productos distintos (las actualizaciones del mismo se fusionan)
+        interval: Segundos entre publicaciones
+        server: Servidor de la app ('dev' o 'waitress')
+        bus_subscriptions: Suscripciones de la medición sin HTTP
+
+    Returns:
+        Diccionario con bus (memoria y coste de publish) y sse (subscribers,
+        published, received_avg, p50_ms, p99_ms, max_ms, rss_per_connection_kb)
+    """
+    logger.info(f"📡 Midiendo el bus con {bus_subscriptions} suscripciones...")
+    bus_result = _bus_measure(bus_subscriptions)
+
+    port = _free_port()
+    process = multiprocessing.Process(target=_server_process, args=(port, server, subscribers + 8))
+    process.start()
+    try:
+        deadline = time.monotonic() + 30
+        while True:
+            try:
+                _get_json(port, '/bench/stats')
+                break
+            except OSError:
+                if time.monotonic() > deadline:
+                    raise
+                time.sleep(0.2)
+        rss_before = _rss_kb(process.pid)
+
+        logger.info(f"📡 Abriendo {subscribers} conexiones SSE...")
+        latencies: List[float] = []
+        counts: List[int] = []
+        lock = threading.Lock()
+        threads = []
+        for _ in range(subscribers):
+            connected = threading.Event()
+            thread = threading.Thread(target=_subscriber, daemon=True,
+                                      args=(port, connected, latencies, counts, lock))
+            thread.start()
+            connected.wait(30)
+            threads.append(thread)
+        while _get_json(port, '/bench/stats')['subscribers'] < subscribers:
+            time.sleep(0.1)
+        rss_after = _rss_kb(process.pid)
+
+        logger.info(f"📡 Publicando {events} actualizaciones de {products} productos...")
+        _get_json(port, f"/bench/start?events={events}&products={products}&interval={interval}")
+        for thread in threads:
+            thread.join()
+    finally:
+        process.terminate()
+        process.join()
+
+    rss_per_connection = None
+    if rss_before is not None and rss_after is not None:
+        rss_per_connection = (rss_after - rss_before) / subscribers
+    return {
+        'bus': bus_result,
+        'sse': {
+            'subscribers': subscribers,
+            'published': events,
+            'received_avg': sum(counts) / len(counts) if counts else 0,
+            'p50_ms': _percentile(latencies or [0.0], 0.50) * 1000,
+            'p99_ms': _percentile(latencies or [0.0], 0.99) * 1000,
+            'max_ms': max(latencies, default=0.0) * 1000,
+            'rss_per_connection_kb': rss_per_connection
+        }
+    }
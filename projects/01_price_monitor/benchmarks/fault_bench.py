@@ -0,0 +1,125 @@
+"""
+🔌 Fault Bench - Coste de una tienda caída con y sin circuit breakers
+=====================================================================
+
+Levanta dos tiendas locales (``127.0.0.1`` y ``localhost``, dos hosts para
+los breakers) y recorre sus URLs intercaladas como el modo secuencial de
+``scrape_once``. Rondas:
+
+1. Ambas tiendas responden (línea base; los breakers aprenden las latencias).
+2. Una tienda deja de responder, sin breakers: cada URL suya espera el timeout.
+3. La misma caída con ``StoreBreakers``: timeout adaptativo y circuito abierto
+   tras ``failure_threshold`` fallos; el resto de sus URLs se saltan.
+4. La tienda vuelve y pasa ``open_seconds``: la petición de prueba cierra el
+   circuito y el ciclo termina sin errores.
+
+El timeout y las esperas están a escala para que el benchmark dure segundos;
+la proporción entre rondas es la misma que con ``scraping.timeout`` real.
+"""
+
+import logging
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+from urllib.request import urlopen
+
+from breakers import CircuitOpenError, StoreBreakers
+from politeness import interleave_by_domain
+from queue_bench import PRICE_PATTERN, start_stub_server
+
+logger = logging.getLogger(__name__)
+
+
+def _send(url: str, timeout: float = None) -> float:
+    with urlopen(url, timeout=timeout) as response:
+        html = response.read().decode('utf-8')
+    return float(PRICE_PATTERN.search(html).group(1))
+
+
+def _cycle(urls: List[str], send: Callable, breakers: Optional[StoreBreakers]) -> Dict:
+    """
+    Recorre ``urls`` una tras otra y cuenta éxitos, errores y saltadas.
+    """
+    if breakers:
+        breakers.reset_metrics()
+    result = {'success': 0, 'errors': 0, 'skipped': 0}
+    start = time.perf_counter()
+    for url in urls:
+        try:
+            if breakers:
+                breakers.check(url)
+                breakers.request(url, send)
+            else:
+                send(url)
+            result['success'] += 1
+        except CircuitOpenError:
+            result['skipped'] += 1
+        except Exception:
+            result['errors'] += 1
+    result['seconds'] = time.perf_counter() - start
+    if breakers:
+        result['breakers'] = breakers.metrics()
+    return result
+
+
+def run(urls_per_store: int = 20, latency: float = 0.02, timeout: float = 1.0,
+        failure_threshold: int = 3, open_seconds: float = 1.0) -> Dict:
+    """
+    Ejecuta el benchmark completo.
+
+    Args:
+        urls_per_store: URLs de cada una de las dos tiendas
+        latency: Segundos que tarda cada página mientras la tienda responde
+        timeout: Timeout fijo (el equivalente a ``scraping.timeout``)
+        failure_threshold: Fallos seguidos que abren el circuito
+        open_seconds: Espera antes de la petición de prueba
+
+    Returns:
+        Diccionario con baseline, outage_fixed (sin breakers), outage_breakers,
+        recovery, saved_seconds y saved_pct
+    """
+    outage = threading.Event()
+    healthy = start_stub_server(latency)
+    flaky = start_stub_server(latency, outage=outage, hang=timeout * 2)
+    bases = [f"http://127.0.0.1:{healthy.server_address[1]}/item/",
+             f"http://localhost:{flaky.server_address[1]}/item/"]
+    urls = interleave_by_domain([f"{base}{index}" for base in bases for index in range(urls_per_store)],
+                                url_of=lambda url: url)
+
+    def fixed(url: str) -> float:
+        return _send(url, timeout=timeout)
+
+    breakers = StoreBreakers(default_timeout=timeout, failure_threshold=failure_threshold,
+                             open_seconds=open_seconds, min_timeout=latency * 2,
+                             min_samples=min(10, urls_per_store))
+    try:
+        logger.info("🔌 Ronda base: las dos tiendas responden...")
+        baseline = _cycle(urls, fixed, None)
+        _cycle(urls, _send, breakers)
+
+        outage.set()
+        logger.info("🔌 Caída de una tienda sin breakers...")
+        outage_fixed = _cycle(urls, fixed, None)
+        logger.info("🔌 Caída de una tienda con breakers...")
+        outage_breakers = _cycle(urls, _send, breakers)
+
+        outage.clear()
+        time.sleep(open_seconds)
+        logger.info("🔌 La tienda vuelve a responder...")
+        recovery = _cycle(urls, _send, breakers)
+    finally:
+        for server in (healthy, flaky):
+            server.shutdown()
+            server.server_close()
+
+    saved = outage_fixed['seconds'] - outage_breakers['seconds']
+    return {
+        'urls': len(urls),
+        'timeout': timeout,
+        'baseline': baseline,
+        'outage_fixed': outage_fixed,
+        'outage_breakers': outage_breakers,
+        'recovery': recovery,
+        'saved_seconds': saved,
+        'saved_pct': 100 * saved / outage_fixed['seconds']
+    }
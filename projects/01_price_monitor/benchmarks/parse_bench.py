@@ -0,0 +1,114 @@
+"""
+🏭 Parse Bench - Páginas parseadas por segundo: hilos frente a procesos
+=======================================================================
+
+Genera ``pages`` páginas de producto sintéticas de ``page_kb`` KB y las
+parsea con BeautifulSoup de dos maneras, sin red (la descarga devuelve los
+bytes ya generados, así que solo se mide el parseo):
+
+1. Como ``--concurrency``: descarga y parseo en los mismos hilos, que se
+   turnan el GIL.
+2. Con ``ParsePipeline`` y 1, 2, 4... procesos de parseo (``--parse-workers``).
+
+Para cada ronda informa páginas por segundo y la aceleración frente a los
+hilos, y comprueba que todas extraen los mismos precios. La aceleración está
+limitada por los núcleos disponibles (``cpus`` en el resultado).
+"""
+
+import logging
+import os
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional, Sequence
+
+from bs4 import BeautifulSoup
+
+from parse_pipeline import ParsePipeline
+
+logger = logging.getLogger(__name__)
+
+_ROW = ('<tr class="spec"><td class="name">Característica {index}</td>'
+        '<td class="value"><span>{value}</span></td></tr>')
+
+
+def _page(item: int, price: float, page_kb: int) -> bytes:
+    rows, size, index = [], 0, 0
+    while size < page_kb * 1024:
+        row = _ROW.format(index=index, value=random.randint(0, 10 ** 6))
+        rows.append(row)
+        size += len(row)
+        index += 1
+    return (f'<html><head><title>Producto {item}</title></head><body>'
+            f'<table>{"".join(rows)}</table>'
+            f'<div class="buy"><span class="price">${price:.2f}</span></div>'
+            f'</body></html>').encode('utf-8')
+
+
+def parse_page(url: str, body: bytes) -> Optional[Dict]:
+    """
+    Extrae título y precio de una página sintética (nivel de módulo para poder
+    ejecutarse en otro proceso).
+    """
+    soup = BeautifulSoup(body, 'html.parser')
+    price = soup.find('span', class_='price')
+    if price is None:
+        return None
+    return {
+        'price': float(price.get_text().lstrip('$')),
+        'store': 'bench',
+        'title': soup.title.get_text(),
+        'availability': True
+    }
+
+
+def run(pages: int = 100, page_kb: int = 50, fetch_workers: int = 8,
+        levels: Sequence[int] = (1, 2, 4)) -> Dict:
+    """
+    Ejecuta el benchmark completo.
+
+    Args:
+        pages: Páginas parseadas en cada ronda
+        page_kb: Tamaño aproximado de cada página
+        fetch_workers: Hilos de descarga (y de parseo en la ronda de hilos)
+        levels: Procesos de parseo de cada ronda del pipeline
+
+    Returns:
+        Diccionario con pages, page_kb, cpus, rounds (mode, parse_workers,
+        seconds, per_second, speedup) e identical
+    """
+    random.seed(42)
+    logger.info(f"🏭 Generando {pages} páginas de ~{page_kb} KB...")
+    bodies = {f"https://bench.local/item/{item}": _page(item, random.uniform(10, 2000), page_kb)
+              for item in range(pages)}
+    urls = list(bodies)
+
+    rounds = []
+    logger.info(f"🏭 Parseo en {fetch_workers} hilos...")
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=fetch_workers) as executor:
+        results = dict(zip(urls, executor.map(lambda url: parse_page(url, bodies[url]), urls)))
+    rounds.append({'mode': 'threads', 'parse_workers': 0,
+                   'seconds': time.perf_counter() - start, 'results': results})
+
+    for parse_workers in levels:
+        logger.info(f"🏭 Pipeline con {parse_workers} procesos de parseo...")
+        start = time.perf_counter()
+        with ParsePipeline(fetch=bodies.__getitem__, parse=parse_page, fetch_workers=fetch_workers,
+                           parse_workers=parse_workers) as pipeline:
+            results = {}
+            for url, price_data, error in pipeline.run((url, url) for url in urls):
+                if error is not None:
+                    raise error
+                results[url] = price_data
+        rounds.append({'mode': 'pipeline', 'parse_workers': parse_workers,
+                       'seconds': time.perf_counter() - start, 'results': results})
+
+    results = [result.pop('results') for result in rounds]
+    identical = all(result == results[0] for result in results)
+    baseline = rounds[0]['seconds']
+    for result in rounds:
+        result['per_second'] = pages / result['seconds']
+        result['speedup'] = baseline / result['seconds']
+    return {'pages': pages, 'page_kb': page_kb, 'cpus': os.cpu_count(), 'rounds': rounds,
+            'identical': identical}
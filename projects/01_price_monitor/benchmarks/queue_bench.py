@@ -0,0 +1,224 @@
+"""
+🏁 Queue Bench - Escalado de los workers distribuidos en una sola máquina
+=========================================================================
+
+Levanta un servidor HTTP local que imita una tienda (cada página tarda
+``latency`` segundos y contiene un precio), crea una base de datos SQLite
+temporal con una cola de ``urls`` trabajos y la procesa con 1, 2, 4, ...
+procesos ``QueueWorker``. Para cada ronda mide el tiempo total y la
+aceleración frente a un worker.
+
+Una última ronda simula la caída de un worker: un proceso reserva un lote y
+muere sin liberarlo; el resto debe terminar la cola cuando caduquen sus
+leases. Al final se comprueba que cada ronda escribió exactamente una lectura
+por URL a través de ``PriceStore``.
+"""
+
+import logging
+import math
+import multiprocessing
+import os
+import re
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Tuple
+from urllib.request import urlopen
+
+from sqlalchemy import update
+
+from distributed import QueueWorker
+from price_store import PriceStore
+from price_writer import BufferedPriceWriter
+from work_queue import WorkQueue
+
+logger = logging.getLogger(__name__)
+
+STUB_PAGE = ('<html><head><title>Producto {item}</title></head>'
+             '<body><span class="price">${price:.2f}</span></body></html>')
+PRICE_PATTERN = re.compile(r'class="price">\$([\d.]+)<')
+TITLE_PATTERN = re.compile(r'<title>(.*?)</title>')
+
+# Periodo de los trabajos completados: no vuelven a vencer durante la ronda
+BENCH_INTERVAL = 10 ** 6
+
+
+def start_stub_server(latency: float, outage: threading.Event = None,
+                      hang: float = 60) -> ThreadingHTTPServer:
+    """
+    Servidor HTTP en un puerto libre de 127.0.0.1 que sirve ``/item/<n>``.
+
+    Mientras ``outage`` esté activado, la tienda acepta la conexión pero no
+    responde durante ``hang`` segundos (como una tienda caída tras un balanceador).
+    """
+    class StubHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if outage is not None and outage.is_set():
+                time.sleep(hang)
+                return
+            time.sleep(latency)
+            item = self.path.rsplit('/', 1)[-1]
+            body = STUB_PAGE.format(item=item, price=10 + int(item) % 990).encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/html; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="stub-store", daemon=True).start()
+    return server
+
+
+class _StubScraper:
+    """
+    Scraper mínimo para las páginas de ``start_stub_server``.
+    """
+
+    def scrape_price(self, url: str) -> Dict:
+        with urlopen(url, timeout=10) as response:
+            html = response.read().decode('utf-8')
+        return {
+            'price': float(PRICE_PATTERN.search(html).group(1)),
+            'store': 'stub',
+            'title': TITLE_PATTERN.search(html).group(1),
+            'availability': True
+        }
+
+
+class _BenchMonitor:
+    """
+    Lo que ``QueueWorker`` necesita de PriceMonitor, con el scraper de prueba.
+    """
+
+    def __init__(self, db, store: PriceStore):
+        self.db = db
+        self.store = store
+        self.scraper = _StubScraper()
+        self.price_writer = BufferedPriceWriter(store, batch_size=10 ** 6, flush_interval=math.inf)
+
+    def _scrape_url(self, url: str) -> Dict:
+        # Todo es el servidor local: la cortesía por dominio serializaría la prueba
+        return self.scraper.scrape_price(url)
+
+    def _handle_scrape_error(self, url: str, error: Exception):
+        logger.error(f"❌ Error scrapeando {url}: {str(error)}")
+
+
+def _worker_process(db_factory: Callable, db_url: str, tables: Tuple[str, str], worker_id: str,
+                    concurrency: int, lease_seconds: float, crash: bool):
+    db = db_factory(db_url)
+    queue = WorkQueue(db.engine, lease_seconds=lease_seconds)
+    if crash:
+        queue.claim(worker_id, concurrency * 2)
+        os._exit(1)
+    worker = QueueWorker(_BenchMonitor(db, PriceStore(db.engine, *tables)), queue, worker_id=worker_id, interval=BENCH_INTERVAL,
+                         concurrency=concurrency, idle_sleep=0.2, log_interval=math.inf)
+    worker.run(until_drained=True)
+
+
+def _round(db_factory: Callable, db_url: str, tables: Tuple[str, str], queue: WorkQueue,
+           workers: int, concurrency: int, crash: bool = False) -> Dict:
+    """
+    Vuelve a poner todos los trabajos como vencidos y los procesa con ``workers`` procesos.
+    """
+    with queue.engine.begin() as connection:
+        connection.execute(update(queue.jobs).values(
+            due_at=time.time(), lease_owner=None, lease_expires=None, attempts=0))
+
+    start = time.perf_counter()
+    if crash:
+        # El worker caído reserva su lote antes de que arranque el resto
+        crashed = multiprocessing.Process(target=_worker_process, args=(
+            db_factory, db_url, tables, 'bench-crash', concurrency, queue.lease_seconds, True))
+        crashed.start()
+        crashed.join()
+
+    processes = [
+        multiprocessing.Process(target=_worker_process, args=(
+            db_factory, db_url, tables, f"bench-{index}", concurrency, queue.lease_seconds, False))
+        for index in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+    seconds = time.perf_counter() - start
+
+    counts = queue.counts()
+    return {
+        'workers': workers,
+        'seconds': seconds,
+        'pending': counts['due'] + counts['leased'] + counts['expired'],
+        'failed_processes': sum(1 for process in processes if process.exitcode != 0)
+    }
+
+
+def _worker_counts(workers: int) -> List[int]:
+    counts = [1]
+    while counts[-1] * 2 < workers:
+        counts.append(counts[-1] * 2)
+    if workers > 1:
+        counts.append(workers)
+    return counts
+
+
+def run(db_factory: Callable[[str], object], workers: int = 4, urls: int = 2000,
+        latency: float = 0.05, concurrency: int = 8, lease_seconds: float = 5,
+        products_table: str = 'products', history_table: str = 'price_history') -> Dict:
+    """
+    Ejecuta el benchmark completo.
+
+    Args:
+        db_factory: Crea una instancia de PriceDB a partir de una URL de SQLAlchemy
+        workers: Número máximo de procesos worker
+        urls: Trabajos en la cola
+        latency: Segundos que tarda cada página del servidor local
+        concurrency: Hilos por worker
+        lease_seconds: Duración de los leases (la ronda con caída espera a que caduquen)
+        products_table: Tabla de productos
+        history_table: Tabla del histórico
+
+    Returns:
+        Diccionario con urls, rounds (workers, seconds, per_second, speedup,
+        pending), crash (la ronda con un worker caído), rows y expected_rows
+    """
+    server = start_stub_server(latency)
+    base = f"http://127.0.0.1:{server.server_address[1]}/item/"
+    tables = (products_table, history_table)
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            db_url = f"sqlite:///{os.path.join(directory, 'bench.db')}"
+            db = db_factory(db_url)
+            product = db.get_or_create_product(name='Queue bench', urls=[base], target_price=None)
+            queue = WorkQueue(db.engine, lease_seconds=lease_seconds)
+            queue.sync([(product.id, f"{base}{index}") for index in range(urls)], interval=0)
+
+            rounds = []
+            for count in _worker_counts(workers):
+                logger.info(f"🏁 {urls} URLs con {count} workers...")
+                rounds.append(_round(db_factory, db_url, tables, queue, count, concurrency))
+            logger.info(f"🏁 {urls} URLs con {workers} workers y uno caído...")
+            crash = _round(db_factory, db_url, tables, queue, workers, concurrency, crash=True)
+
+            rows = sum(1 for _ in PriceStore(db.engine, *tables).iter_price_history())
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    baseline = rounds[0]['seconds']
+    for result in rounds + [crash]:
+        result['per_second'] = urls / result['seconds']
+        result['speedup'] = baseline / result['seconds']
+    return {
+        'urls': urls,
+        'rounds': rounds,
+        'crash': crash,
+        'rows': rows,
+        'expected_rows': urls * (len(rounds) + 1)
+    }
@@ -0,0 +1,143 @@
+"""
+📑 Report Bench - Memoria y latencia de los agregados de ``generate_report``
+============================================================================
+
+Crea una base de datos SQLite temporal con ``days`` días de lecturas horarias
+(escritas con ``BufferedPriceWriter``, así que también tiene rollups) y
+calcula las estadísticas de ``generate_report`` para ventanas de 7, 30 y 90
+días de dos maneras:
+
+1. Como antes: ``PriceDB.get_price_history`` de cada producto y mínimo,
+   máximo, media y tiendas calculados en Python sobre la lista completa.
+2. Como ahora: ``PriceStore.iter_price_summary`` (``GROUP BY`` en la DB,
+   sobre los rollups en las ventanas largas).
+
+De cada camino se mide la latencia y, en una segunda pasada con
+``tracemalloc``, el pico de memoria. También se comprueba que las
+estadísticas coinciden producto a producto.
+"""
+
+import logging
+import math
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Sequence
+
+import rollups
+from db_bench import STORES
+from price_store import PriceStore
+from price_writer import BufferedPriceWriter
+
+logger = logging.getLogger(__name__)
+
+
+def _seed(db, store: PriceStore, products: int, stores: int, days: int):
+    random.seed(42)
+    start = datetime.now().replace(minute=0, second=0, microsecond=0) - timedelta(days=days)
+    with BufferedPriceWriter(store, batch_size=50000, flush_interval=math.inf) as writer:
+        for index in range(products):
+            product = db.get_or_create_product(name=f"Report bench {index}",
+                                               urls=[f"https://www.{name}/item/{index}" for name in STORES[:stores]],
+                                               target_price=100.0)
+            for name in STORES[:stores]:
+                price = random.uniform(80, 500)
+                for hour in range(days * 24):
+                    price = max(1.0, price * random.uniform(0.98, 1.02))
+                    writer.add(timestamp=start + timedelta(hours=hour), product_id=product.id, store=name,
+                               price=round(price, 2), url=f"https://www.{name}/item/{index}",
+                               availability=True, title=product.name)
+
+
+def _legacy(db, days: int) -> Dict[int, Dict]:
+    summaries = {}
+    for product in db.get_all_products():
+        history = db.get_price_history(product.id, days=days)
+        if not history:
+            continue
+        prices = [record.price for record in history]
+        summaries[product.id] = {
+            'min_price': min(prices),
+            'max_price': max(prices),
+            'avg_price': sum(prices) / len(prices),
+            'data_points': len(history),
+            'stores': sorted(set(record.store for record in history))
+        }
+    return summaries
+
+
+def _aggregated(store: PriceStore, days: int) -> Dict[int, Dict]:
+    granularity = rollups.granularity_for_window(days)
+    return {
+        summary['product_id']: summary
+        for summary in store.iter_price_summary(days=days, granularity=granularity)
+    }
+
+
+def _measure(call: Callable) -> Dict:
+    start = time.perf_counter()
+    result = call()
+    seconds = time.perf_counter() - start
+    tracemalloc.start()
+    try:
+        call()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {'seconds': seconds, 'peak_mb': peak / 1024 / 1024, 'result': result}
+
+
+def _same(legacy: Dict[int, Dict], aggregated: Dict[int, Dict]) -> bool:
+    if legacy.keys() != aggregated.keys():
+        return False
+    for product_id, expected in legacy.items():
+        actual = aggregated[product_id]
+        if any(actual[key] != expected[key] for key in ('min_price', 'max_price', 'data_points', 'stores')):
+            return False
+        if not math.isclose(actual['avg_price'], expected['avg_price'], rel_tol=1e-9):
+            return False
+    return True
+
+
+def run(db_factory: Callable[[str], object], products: int = 50, stores: int = 3, days: int = 120,
+        windows: Sequence[int] = (7, 30, 90),
+        products_table: str = 'products', history_table: str = 'price_history') -> Dict:
+    """
+    Ejecuta el benchmark completo sobre una base de datos temporal.
+
+    Args:
+        db_factory: Crea una instancia de PriceDB a partir de una URL de SQLAlchemy
+        products: Productos sintéticos
+        stores: Tiendas por producto
+        days: Días de histórico horario (al menos la ventana más larga)
+        windows: Ventanas del reporte, en días
+        products_table: Tabla de productos
+        history_table: Tabla del histórico
+
+    Returns:
+        Diccionario con rows y windows (days, granularity, legacy y
+        aggregated con seconds y peak_mb, identical)
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        db = db_factory(f"sqlite:///{os.path.join(directory, 'bench.db')}")
+        store = PriceStore(db.engine, products_table, history_table)
+        logger.info(f"📑 Generando {products} productos × {stores} tiendas × {days} días...")
+        _seed(db, store, products, stores, days)
+
+        results = []
+        for window in windows:
+            logger.info(f"📑 Reporte de {window} días...")
+            legacy = _measure(lambda: _legacy(db, window))
+            aggregated = _measure(lambda: _aggregated(store, window))
+            results.append({
+                'days': window,
+                'granularity': rollups.granularity_for_window(window),
+                'identical': _same(legacy.pop('result'), aggregated.pop('result')),
+                'legacy': legacy,
+                'aggregated': aggregated
+            })
+
+    return {'rows': products * stores * days * 24, 'windows': results}
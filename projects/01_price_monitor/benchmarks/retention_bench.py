@@ -0,0 +1,152 @@
+"""
+🧊 Retention Bench - Latencia de las consultas a medida que el histórico envejece
+===============================================================================
+
+Rellena dos bases de datos SQLite temporales con el mismo histórico sintético
+de varios años, año a año. Tras cada año, una aplica ``RetentionPolicy`` (sin
+archivar) y la otra lo conserva todo; en ambas se mide p50/p99 de las
+consultas que hace cada ciclo con el "ahora" del final de ese año:
+
+- ``history_7d``: lecturas de un producto en los últimos 7 días
+- ``latest``: último precio de todo el catálogo (``check_alerts``)
+- ``report_7d`` / ``report_90d``: estadísticas de ``generate_report``
+
+Con la retención, las lecturas crudas se quedan en ``raw_days`` días y la
+latencia no debería crecer con los años; sin ella, crece con la tabla. Al
+final se comprueba que los reportes de 90 días de ambas bases coinciden.
+"""
+
+import logging
+import math
+import os
+import random
+import tempfile
+from datetime import datetime, timedelta
+from typing import Callable, Dict
+
+from sqlalchemy import func, select
+
+from db_bench import STORES, _measure
+from price_store import PriceStore
+from price_writer import BufferedPriceWriter
+from retention import RetentionPolicy
+
+logger = logging.getLogger(__name__)
+
+
+def _open(db_factory: Callable[[str], object], directory: str, name: str,
+          products: int, stores: int, products_table: str, history_table: str):
+    db = db_factory(f"sqlite:///{os.path.join(directory, name)}")
+    store = PriceStore(db.engine, products_table, history_table)
+    catalog = [
+        db.get_or_create_product(name=f"Retention bench {index}",
+                                 urls=[f"https://www.{host}/item/{index}" for host in STORES[:stores]],
+                                 target_price=100.0)
+        for index in range(products)
+    ]
+    return store, [product.id for product in catalog]
+
+
+def _seed_year(stores_with_ids, start: datetime, step_hours: int, stores: int, prices: Dict):
+    """
+    Escribe un año de lecturas cada ``step_hours`` horas en todas las bases.
+    """
+    writers = [BufferedPriceWriter(store, batch_size=20000, flush_interval=math.inf)
+               for store, _ in stores_with_ids]
+    product_ids = stores_with_ids[0][1]
+    for step in range(365 * 24 // step_hours):
+        timestamp = start + timedelta(hours=step * step_hours)
+        for product_id in product_ids:
+            for host in STORES[:stores]:
+                key = (product_id, host)
+                prices[key] = round(max(1.0, prices.get(key, random.uniform(80, 500)) * random.uniform(0.97, 1.03)), 2)
+                for writer in writers:
+                    writer.add(timestamp=timestamp, product_id=product_id, store=host, price=prices[key],
+                               url=f"https://www.{host}/item/{product_id}", availability=True, title=None)
+    for writer in writers:
+        writer.flush()
+
+
+def _raw_rows(store: PriceStore) -> int:
+    with store.engine.connect() as connection:
+        return connection.execute(select(func.count()).select_from(store.history)).scalar()
+
+
+def _queries(store: PriceStore, product_id: int, now: datetime) -> Dict[str, Callable]:
+    return {
+        'history_7d': lambda: list(store.iter_price_history(since=now - timedelta(days=7), until=now,
+                                                            product_id=product_id)),
+        'latest': store.get_latest_prices_by_product,
+        'report_7d': lambda: list(store.iter_price_summary(7, 'hour', now=now)),
+        'report_90d': lambda: list(store.iter_price_summary(90, 'day', now=now))
+    }
+
+
+def _same_reports(first, second) -> bool:
+    if len(first) != len(second):
+        return False
+    for one, other in zip(first, second):
+        if (one['product_id'], one['min_price'], one['max_price'], one['data_points'], one['stores']) != \
+                (other['product_id'], other['min_price'], other['max_price'], other['data_points'], other['stores']):
+            return False
+        if not math.isclose(one['avg_price'], other['avg_price'], rel_tol=1e-9):
+            return False
+    return True
+
+
+def run(db_factory: Callable[[str], object], products: int = 20, stores: int = 2, years: int = 3,
+        step_hours: int = 3, raw_days: int = 90, repeat: int = 20,
+        products_table: str = 'products', history_table: str = 'price_history') -> Dict:
+    """
+    Ejecuta el benchmark completo sobre dos bases de datos temporales.
+
+    Args:
+        db_factory: Crea una instancia de PriceDB a partir de una URL de SQLAlchemy
+        products: Productos sintéticos
+        stores: Tiendas por producto
+        years: Años de histórico
+        step_hours: Horas entre dos lecturas de la misma tienda
+        raw_days: Días de lecturas crudas que conserva la retención
+        repeat: Repeticiones de cada consulta
+        products_table: Tabla de productos
+        history_table: Tabla del histórico
+
+    Returns:
+        Diccionario con rows_per_year, years (year, raw_rows y timings por
+        base, 'retained' y 'full') e identical
+    """
+    random.seed(42)
+    policy = RetentionPolicy(raw_days=raw_days, archive_dir=None)
+    with tempfile.TemporaryDirectory() as directory:
+        retained, product_ids = _open(db_factory, directory, 'retained.db', products, stores,
+                                      products_table, history_table)
+        full, _ = _open(db_factory, directory, 'full.db', products, stores, products_table, history_table)
+        start = datetime.now().replace(minute=0, second=0, microsecond=0) - timedelta(days=365 * years)
+
+        prices, results = {}, []
+        for year in range(years):
+            logger.info(f"🧊 Año {year + 1} de {years}...")
+            year_start = start + timedelta(days=365 * year)
+            _seed_year([(retained, product_ids), (full, product_ids)], year_start, step_hours, stores, prices)
+            now = year_start + timedelta(days=365)
+            compaction = policy.run(retained, now=now)
+            if compaction['uncovered']:
+                raise RuntimeError("Los rollups no cubren el histórico sintético")
+
+            result = {'year': year + 1, 'raw_rows': {}, 'timings': {}}
+            for label, store in (('retained', retained), ('full', full)):
+                result['raw_rows'][label] = _raw_rows(store)
+                result['timings'][label] = {
+                    name: _measure(call, repeat)
+                    for name, call in _queries(store, product_ids[0], now).items()
+                }
+            results.append(result)
+
+        identical = _same_reports(list(retained.iter_price_summary(90, 'day', now=now)),
+                                  list(full.iter_price_summary(90, 'day', now=now)))
+
+    return {
+        'rows_per_year': products * stores * 365 * 24 // step_hours,
+        'years': results,
+        'identical': identical
+    }
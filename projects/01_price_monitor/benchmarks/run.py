@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+"""
+🏁 Benchmarks del Price Monitor
+===============================
+
+Punto de entrada único de los benchmarks. Cada uno trabaja sobre datos
+sintéticos (bases de datos SQLite temporales y tiendas HTTP locales), así que
+no toca la base de datos configurada ni tiendas reales.
+
+Uso:
+    python benchmarks/run.py scrape            # Secuencial vs --concurrency 4/16/64 en local
+    python benchmarks/run.py write             # Inserciones fila a fila vs por lotes
+    python benchmarks/run.py alerts            # check_alerts con 10.000 productos
+    python benchmarks/run.py report            # Memoria y latencia del reporte a 7/30/90 días
+    python benchmarks/run.py parse             # Parseo en hilos vs --parse-workers 1/2/4
+    python benchmarks/run.py formats           # Parquet vs CSV vs JSONL
+    python benchmarks/run.py retention         # Latencia en 3 años sintéticos, con y sin retención
+    python benchmarks/run.py breakers          # Ciclo con una tienda caída, con y sin breakers
+    python benchmarks/run.py queue             # Escalado de los workers distribuidos en local
+    python benchmarks/run.py dashboard         # Carga de la API del dashboard (100 usuarios)
+    python benchmarks/run.py events            # Reparto de eventos SSE a 200 clientes
+    python benchmarks/run.py db                # p50/p99 y planes de las consultas de la DB
+"""
+
+import argparse
+import logging
+import os
+import sys
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_DIR = os.path.dirname(BENCHMARKS_DIR)
+
+# main.py y los módulos de src/ (los benchmarks se importan desde este directorio)
+sys.path.append(PROJECT_DIR)
+sys.path.append(os.path.join(PROJECT_DIR, 'src'))
+
+from dashboard_api import SERVERS
+from database import PriceHistory, Product
+from main import PriceMonitor
+import alerts_bench
+import archive_bench
+import dashboard_bench
+import db_bench
+import events_bench
+import fault_bench
+import parse_bench
+import queue_bench
+import report_bench
+import retention_bench
+import scrape_bench
+import write_bench
+
+
+def _database() -> dict:
+    # PriceDB con los PRAGMAs e índices de producción y los nombres de sus tablas
+    return {'db_factory': PriceMonitor._open_db, 'products_table': Product.__tablename__,
+            'history_table': PriceHistory.__tablename__}
+
+
+def bench_scrape(args):
+    print("\n⚡ Benchmark de --concurrency contra una tienda local...")
+    monitor = PriceMonitor(config_path=args.config)
+    bench = scrape_bench.run(monitor, urls=args.urls, levels=args.levels)
+    print(f"   {bench['urls']} URLs, {bench['latency'] * 1000:.0f} ms por página")
+    for result in bench['rounds']:
+        print(f"   concurrencia {result['concurrency']:3d}: {result['seconds']:6.2f}s  "
+              f"{result['per_second']:7.1f} URLs/s  x{result['speedup']:.1f}  "
+              f"❌ {result['errors']}")
+    print(f"   Mismas lecturas en todos los niveles: {'sí' if bench['identical'] else 'NO'}")
+
+
+def bench_write(args):
+    print("\n💾 Benchmark de escritura del histórico...")
+    bench = write_bench.run(rows=args.rows, **_database())
+    for result in bench['rounds']:
+        label = 'fila a fila' if result['mode'] == 'single' else f"lotes de {result['batch_size']}"
+        print(f"   {label:16s} {result['per_second']:9.0f} filas/s  x{result['speedup']:.1f}  "
+              f"({result['written']}/{bench['rows']} guardadas)")
+
+
+def bench_alerts(args):
+    print("\n🚨 Benchmark de las consultas de alertas...")
+    bench = alerts_bench.run(products=args.products, **_database())
+    print(f"   {bench['products']} productos, {bench['rows']} lecturas")
+    for key, label in (('legacy', 'por producto'), ('set_based', 'por catálogo')):
+        print(f"   {label:13s} {bench[key]['seconds']:7.2f}s  {bench[key]['queries']:6d} consultas")
+    print(f"   x{bench['speedup']:.0f}, {bench['alerts']} alertas de precio objetivo, "
+          f"resultados idénticos: {'sí' if bench['identical'] else 'NO'}")
+
+
+def bench_report(args):
+    print("\n📑 Benchmark del reporte...")
+    bench = report_bench.run(products=args.products, days=args.days, **_database())
+    print(f"   {bench['rows']} lecturas horarias")
+    for result in bench['windows']:
+        print(f"   {result['days']:3d} días ({result['granularity']})  "
+              f"Python {result['legacy']['seconds']:6.2f}s {result['legacy']['peak_mb']:7.1f} MB  |  "
+              f"SQL {result['aggregated']['seconds']:6.2f}s {result['aggregated']['peak_mb']:7.1f} MB  "
+              f"idénticos: {'sí' if result['identical'] else 'NO'}")
+
+
+def bench_parse(args):
+    print("\n🏭 Benchmark del parseo en hilos frente a procesos...")
+    bench = parse_bench.run(pages=args.pages, levels=args.levels)
+    print(f"   {bench['pages']} páginas de ~{bench['page_kb']} KB, {bench['cpus']} CPUs")
+    for result in bench['rounds']:
+        label = 'hilos' if result['mode'] == 'threads' else f"{result['parse_workers']} procesos"
+        print(f"   {label:11s} {result['seconds']:6.2f}s  {result['per_second']:6.1f} páginas/s  "
+              f"x{result['speedup']:.1f}")
+    print(f"   Mismos precios en todas las rondas: {'sí' if bench['identical'] else 'NO'}")
+
+
+def bench_formats(args):
+    print(f"\n🗄️ Comparando formatos de exportación ({args.products} productos, {args.days} días)...")
+    bench = archive_bench.run(products=args.products, days=args.days, **_database())
+    print(f"   {bench['rows']} lecturas sintéticas")
+    for format, result in bench['formats'].items():
+        print(f"   {format:8s} {result['bytes'] / 1024:9.0f} KB   "
+              f"exportar {result['export_seconds']:6.1f}s   importar {result['import_seconds']:6.1f}s")
+
+
+def bench_retention(args):
+    print("\n🧊 Benchmark de latencia con el histórico envejeciendo...")
+    bench = retention_bench.run(years=args.years, raw_days=args.raw_days, **_database())
+    print(f"   {bench['rows_per_year']} lecturas por año")
+    for result in bench['years']:
+        rows = result['raw_rows']
+        print(f"   Año {result['year']}: {rows['retained']} lecturas crudas con retención, "
+              f"{rows['full']} sin ella")
+        for query, timing in result['timings']['retained'].items():
+            full = result['timings']['full'][query]
+            print(f"      {query:11s} p50 {timing['p50_ms']:8.2f} ms  frente a {full['p50_ms']:8.2f} ms")
+    print(f"   Reportes de 90 días idénticos: {'sí' if bench['identical'] else 'NO'}")
+
+
+def bench_breakers(args):
+    print("\n🔌 Benchmark de circuit breakers (una de dos tiendas caída)...")
+    bench = fault_bench.run(urls_per_store=args.urls)
+    labels = {'baseline': 'Sin caída', 'outage_fixed': 'Caída, sin breakers',
+              'outage_breakers': 'Caída, con breakers', 'recovery': 'Recuperación'}
+    for key, label in labels.items():
+        result = bench[key]
+        print(f"   {label:22s} {result['seconds']:6.2f}s   ✅ {result['success']:3d}   "
+              f"❌ {result['errors']:3d}   ⏭️ {result['skipped']:3d}")
+    print(f"   Tiempo ahorrado durante la caída: {bench['saved_seconds']:.1f}s "
+          f"({bench['saved_pct']:.0f}%) con timeout de {bench['timeout']:.1f}s")
+
+
+def bench_queue(args):
+    print(f"\n🏁 Benchmark del modo distribuido (hasta {args.workers} workers)...")
+    bench = queue_bench.run(workers=args.workers, urls=args.urls, **_database())
+    for result in bench['rounds'] + [bench['crash']]:
+        label = f"{result['workers']} workers" + (" + 1 caído" if result is bench['crash'] else "")
+        print(f"   {label:20s} {result['seconds']:6.1f}s   {result['per_second']:7.1f} URLs/s   "
+              f"x{result['speedup']:.2f}   pendientes {result['pending']}")
+    print(f"   Lecturas guardadas: {bench['rows']} (esperadas {bench['expected_rows']})")
+
+
+def bench_dashboard(args):
+    print(f"\n🏎️ Prueba de carga de la API del dashboard ({args.viewers} usuarios concurrentes)...")
+    bench = dashboard_bench.run(viewers=args.viewers, server=args.server, workers=args.workers, **_database())
+    print(f"   {bench['rows']} lecturas sintéticas, servidor {bench['server']}")
+    for result in bench['rounds']:
+        label = "Con caché" if result['cache'] else "Sin caché"
+        print(f"   {label:10s} {result['per_second']:8.1f} req/s   p50 {result['p50_ms']:7.1f} ms   "
+              f"p99 {result['p99_ms']:7.1f} ms   errores {result['errors']}")
+
+
+def bench_events(args):
+    print(f"\n📡 Reparto de eventos SSE a {args.subscribers} clientes locales...")
+    bench = events_bench.run(subscribers=args.subscribers, server=args.server)
+    bus, sse = bench['bus'], bench['sse']
+    print(f"   Bus: {bus['bytes_per_subscription']:.0f} bytes por suscripción, publish a "
+          f"{bus['subscriptions']} suscripciones p50 {bus['publish_p50_ms']:.1f} ms")
+    print(f"   SSE: {sse['subscribers']} clientes, {sse['published']} eventos publicados, "
+          f"{sse['received_avg']:.0f} recibidos de media (fusionados por producto)")
+    print(f"   Latencia publish → cliente: p50 {sse['p50_ms']:.1f} ms   p99 {sse['p99_ms']:.1f} ms   "
+          f"máx. {sse['max_ms']:.1f} ms")
+    if sse['rss_per_connection_kb'] is not None:
+        print(f"   Memoria del servidor por conexión: {sse['rss_per_connection_kb']:.1f} KB")
+
+
+def bench_db(args):
+    print(f"\n⏱️ Benchmark de la base de datos ({args.days} días sintéticos)...")
+    bench = db_bench.run(products=args.products, days=args.days, repeat=args.repeat, **_database())
+    print(f"   {bench['rows']} lecturas generadas en {bench['seed_seconds']:.1f}s")
+    for call, timing in bench['timings'].items():
+        print(f"   {call:24s} p50 {timing['p50_ms']:8.3f} ms   p99 {timing['p99_ms']:8.3f} ms")
+    print("\n🔍 EXPLAIN QUERY PLAN:")
+    for call, plan in bench['plans'].items():
+        print(f"   {call}:")
+        for step in plan:
+            print(f"      {step}")
+    for problem in bench['index_problems']:
+        print(f"   ⚠️ {problem}")
+
+
+def main():
+    """
+    Elige el benchmark por subcomando; cada uno tiene sus propias opciones y valores por defecto.
+    """
+    parser = argparse.ArgumentParser(
+        description="🏁 Benchmarks del Price Monitor",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Ejemplos de uso:
+  python benchmarks/run.py scrape                 # Secuencial vs --concurrency 4/16/64 en local
+  python benchmarks/run.py scrape --levels 1 8    # Solo los niveles 1 y 8
+  python benchmarks/run.py write                  # Inserciones fila a fila vs por lotes
+  python benchmarks/run.py alerts                 # check_alerts con 10.000 productos
+  python benchmarks/run.py report                 # Memoria y latencia del reporte a 7/30/90 días
+  python benchmarks/run.py parse                  # Parseo en hilos vs --parse-workers 1/2/4
+  python benchmarks/run.py formats --days=7       # Parquet vs CSV vs JSONL
+  python benchmarks/run.py retention              # Latencia en 3 años sintéticos, con y sin retención
+  python benchmarks/run.py breakers               # Ciclo con una tienda caída, con y sin breakers
+  python benchmarks/run.py queue --workers=8      # Escalado de los workers distribuidos en local
+  python benchmarks/run.py dashboard              # Carga de la API del dashboard (100 usuarios)
+  python benchmarks/run.py events                 # Reparto de eventos SSE a 200 clientes
+  python benchmarks/run.py db --days=365          # p50/p99 y planes de las consultas de la DB
+        """
+    )
+    parser.add_argument('--config', default='config/settings.json',
+                        help='Archivo de configuración (default: config/settings.json)')
+    commands = parser.add_subparsers(dest='benchmark', metavar='BENCHMARK', required=True)
+
+    scrape = commands.add_parser('scrape', help='Scraping secuencial frente a 4/16/64 descargas simultáneas')
+    scrape.add_argument('--urls', type=int, default=200, help='Páginas por nivel (default: 200)')
+    scrape.add_argument('--levels', type=int, nargs='+', default=[1, 4, 16, 64],
+                        help='Niveles de concurrencia; 1 = secuencial (default: 1 4 16 64)')
+    scrape.set_defaults(run=bench_scrape)
+
+    write = commands.add_parser('write', help='Inserciones fila a fila frente a lotes en SQLite')
+    write.add_argument('--rows', type=int, default=5000, help='Lecturas por ronda (default: 5000)')
+    write.set_defaults(run=bench_write)
+
+    alerts = commands.add_parser('alerts', help='Consultas de check_alerts por producto frente a por catálogo')
+    alerts.add_argument('--products', type=int, default=10000,
+                        help='Productos sintéticos (default: 10000)')
+    alerts.set_defaults(run=bench_alerts)
+
+    report = commands.add_parser('report', help='Memoria y latencia del reporte a 7, 30 y 90 días')
+    report.add_argument('--products', type=int, default=50, help='Productos sintéticos (default: 50)')
+    report.add_argument('--days', type=int, default=120, help='Días de histórico sintético (default: 120)')
+    report.set_defaults(run=bench_report)
+
+    parse = commands.add_parser('parse', help='Páginas parseadas por segundo en hilos frente a 1/2/4 procesos')
+    parse.add_argument('--pages', type=int, default=100, help='Páginas sintéticas (default: 100)')
+    parse.add_argument('--levels', type=int, nargs='+', default=[1, 2, 4],
+                       help='Procesos de parseo de cada ronda (default: 1 2 4)')
+    parse.set_defaults(run=bench_parse)
+
+    formats = commands.add_parser('formats', help='Tamaño y tiempos de exportación de Parquet, CSV y JSONL')
+    formats.add_argument('--products', type=int, default=500, help='Productos sintéticos (default: 500)')
+    formats.add_argument('--days', type=int, default=29, help='Días de histórico sintético (default: 29)')
+    formats.set_defaults(run=bench_formats)
+
+    retention = commands.add_parser('retention', help='Latencia de las consultas con y sin retención, año a año')
+    retention.add_argument('--years', type=int, default=3, help='Años sintéticos (default: 3)')
+    retention.add_argument('--raw-days', type=int, default=90,
+                           help='Días de lecturas crudas que conserva la retención (default: 90)')
+    retention.set_defaults(run=bench_retention)
+
+    breakers = commands.add_parser('breakers', help='Ciclo con una de dos tiendas caída, con y sin circuit breakers')
+    breakers.add_argument('--urls', type=int, default=20, help='URLs de cada tienda (default: 20)')
+    breakers.set_defaults(run=bench_breakers)
+
+    queue = commands.add_parser('queue', help='Escalado de 1..--workers workers contra una tienda local')
+    queue.add_argument('--workers', type=int, default=4, help='Procesos worker máximos (default: 4)')
+    queue.add_argument('--urls', type=int, default=2000, help='Trabajos en la cola (default: 2000)')
+    queue.set_defaults(run=bench_queue)
+
+    dashboard = commands.add_parser('dashboard', help='Prueba de carga de la API del dashboard, sin y con caché')
+    dashboard.add_argument('--viewers', type=int, default=100, help='Usuarios concurrentes (default: 100)')
+    dashboard.add_argument('--server', choices=SERVERS, default='dev', help='Servidor de la API (default: dev)')
+    dashboard.add_argument('--workers', type=int, default=4,
+                           help='Procesos (gunicorn) o grupos de hilos (waitress) (default: 4)')
+    dashboard.set_defaults(run=bench_dashboard)
+
+    events = commands.add_parser('events', help='Latencia y memoria por conexión de los eventos SSE')
+    events.add_argument('--subscribers', type=int, default=200, help='Conexiones SSE concurrentes (default: 200)')
+    # gunicorn no comparte el bus de eventos entre procesos
+    events.add_argument('--server', choices=('dev', 'waitress'), default='dev',
+                        help='Servidor de la app (default: dev)')
+    events.set_defaults(run=bench_events)
+
+    db = commands.add_parser('db', help='p50/p99 y EXPLAIN QUERY PLAN de las consultas de cada ciclo')
+    db.add_argument('--products', type=int, default=200, help='Productos sintéticos (default: 200)')
+    db.add_argument('--days', type=int, default=90, help='Días de histórico sintético (default: 90)')
+    db.add_argument('--repeat', type=int, default=200, help='Llamadas medidas por consulta (default: 200)')
+    db.set_defaults(run=bench_db)
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(message)s')
+    args.run(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""
+⚡ Scrape Bench - Escalado de ``--concurrency`` contra una tienda local
+======================================================================
+
+Levanta el servidor HTTP de ``queue_bench`` (cada página tarda ``latency``
+segundos) y recorre ``urls`` páginas con los modos reales de ``scrape_once``:
+el secuencial (concurrencia 1) y ``_scrape_concurrent`` con 4, 16, 64...
+hilos de descarga. Para cada nivel mide el tiempo total, las URLs por segundo
+y la aceleración frente al secuencial, y comprueba que todos los niveles
+guardan exactamente las mismas lecturas.
+
+El monitor se copia y se le quitan la cortesía por dominio, los breakers, la
+caché HTTP y el diario (todo es el mismo host local y esas piezas tienen sus
+propios benchmarks); las lecturas se cuentan en memoria en lugar de ir a la DB.
+"""
+
+import asyncio
+import copy
+import logging
+import math
+import time
+from typing import Dict, List, Optional, Sequence
+
+import requests
+
+from politeness import DomainScheduler
+from queue_bench import PRICE_PATTERN, TITLE_PATTERN, start_stub_server
+from trends import TrendTracker
+
+logger = logging.getLogger(__name__)
+
+
+class _BenchProduct:
+    """
+    Lo que el monitor lee de un producto al guardar un precio.
+    """
+
+    def __init__(self, product_id: int):
+        self.id = product_id
+        self.name = f"Producto {product_id}"
+
+
+class _CountingWriter:
+    """
+    Sustituto de BufferedPriceWriter que guarda las lecturas en memoria.
+    """
+
+    def __init__(self):
+        self.rows = []
+
+    def add(self, **row):
+        self.rows.append(row)
+
+    def flush(self):
+        pass
+
+
+def _parse(url: str, body: bytes) -> Optional[Dict]:
+    html = body.decode('utf-8')
+    return {
+        'price': float(PRICE_PATTERN.search(html).group(1)),
+        'store': 'stub',
+        'title': TITLE_PATTERN.search(html).group(1),
+        'availability': True
+    }
+
+
+def _bench_monitor(monitor, max_concurrency: int):
+    """
+    Copia de ``monitor`` que descarga sin límites por dominio y no toca la DB.
+    """
+    bench = copy.copy(monitor)
+    bench.politeness = DomainScheduler(rate=0)
+    bench.breakers = None
+    bench.http_cache = None
+    bench.retry_policy = None
+    bench.journal = None
+    bench.events = None
+    bench.trends = TrendTracker()
+    bench.parse = _parse
+    bench.session = requests.Session()
+    bench._pool_size = 0
+    bench._resize_pool(max_concurrency)
+    return bench
+
+
+def _round(bench, jobs: List[tuple], concurrency: int) -> Dict:
+    bench.price_writer = _CountingWriter()
+    stats = {'success': 0, 'errors': 0, 'skipped': 0, 'retries': 0, 'recovered': 0, 'results': []}
+    start = time.perf_counter()
+    if concurrency > 1:
+        asyncio.run(bench._scrape_concurrent(jobs, stats, concurrency))
+    else:
+        bench._scrape_sequential(jobs, stats)
+    seconds = time.perf_counter() - start
+    records = sorted((row['product_id'], row['url'], row['price']) for row in bench.price_writer.rows)
+    return {
+        'concurrency': concurrency,
+        'seconds': seconds,
+        'per_second': len(jobs) / seconds,
+        'success': stats['success'],
+        'errors': stats['errors'],
+        'records': records
+    }
+
+
+def run(monitor, urls: int = 200, latency: float = 0.05,
+        levels: Sequence[int] = (1, 4, 16, 64)) -> Dict:
+    """
+    Ejecuta el benchmark completo.
+
+    Args:
+        monitor: PriceMonitor cuyos modos de scraping se miden
+        urls: Páginas a descargar en cada nivel
+        latency: Segundos que tarda cada página del servidor local
+        levels: Niveles de concurrencia (1 = modo secuencial)
+
+    Returns:
+        Diccionario con urls, latency, rounds (concurrency, seconds,
+        per_second, speedup, success, errors) e identical (mismas lecturas
+        en todos los niveles)
+    """
+    server = start_stub_server(latency)
+    base = f"http://127.0.0.1:{server.server_address[1]}/item/"
+    jobs = [(_BenchProduct(index), f"{base}{index}") for index in range(urls)]
+    bench = _bench_monitor(monitor, max(levels))
+    try:
+        rounds = []
+        for concurrency in levels:
+            logger.info(f"⚡ {urls} URLs con concurrencia {concurrency}...")
+            rounds.append(_round(bench, jobs, concurrency))
+    finally:
+        bench.session.close()
+        server.shutdown()
+        server.server_close()
+
+    baseline = rounds[0]['seconds']
+    expected = rounds[0]['records']
+    identical = all(result['records'] == expected for result in rounds)
+    for result in rounds:
+        result['speedup'] = baseline / result['seconds']
+        del result['records']
+    return {
+        'urls': urls,
+        'latency': latency,
+        'rounds': rounds,
+        'identical': identical and len(expected) == urls,
+        # Límite teórico: todas las páginas en paralelo
+        'ideal_seconds': latency * math.ceil(urls / max(levels))
+    }
@@ -0,0 +1,101 @@
+"""
+💾 Write Bench - Filas por segundo: inserciones sueltas frente a lotes
+=======================================================================
+
+Crea una base de datos SQLite temporal (con los PRAGMAs de ``db_tuning`` si
+``db_factory`` los instala) y guarda ``rows`` lecturas sintéticas de dos
+maneras:
+
+1. Una a una con ``PriceDB.save_price_history`` (una transacción por fila).
+2. Con ``BufferedPriceWriter`` sobre ``PriceStore.save_price_history_many``
+   y varios tamaños de lote, rollups incluidos (es el camino de ``scrape_once``).
+
+Para cada ronda informa filas por segundo y la aceleración frente a la
+inserción fila a fila, y comprueba que cada ronda escribió todas sus filas.
+"""
+
+import logging
+import math
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Sequence
+
+from db_bench import STORES
+from price_store import PriceStore
+from price_writer import BufferedPriceWriter
+
+logger = logging.getLogger(__name__)
+
+
+def _records(product_id: int, rows: int) -> List[Dict]:
+    start = datetime.now().replace(minute=0, second=0, microsecond=0) - timedelta(hours=rows)
+    return [
+        {
+            'product_id': product_id,
+            'store': STORES[index % len(STORES)],
+            'price': round(random.uniform(50, 1500), 2),
+            'url': f"https://www.{STORES[index % len(STORES)]}/item/{product_id}",
+            'availability': True,
+            'title': f"Producto {product_id}",
+            'timestamp': start + timedelta(hours=index)
+        }
+        for index in range(rows)
+    ]
+
+
+def _count(store: PriceStore, product_id: int) -> int:
+    return sum(1 for _ in store.iter_price_history(product_id=product_id))
+
+
+def run(db_factory: Callable[[str], object], rows: int = 5000,
+        batch_sizes: Sequence[int] = (50, 500, 5000),
+        products_table: str = 'products', history_table: str = 'price_history') -> Dict:
+    """
+    Ejecuta el benchmark completo sobre una base de datos temporal.
+
+    Args:
+        db_factory: Crea una instancia de PriceDB a partir de una URL de SQLAlchemy
+        rows: Lecturas escritas en cada ronda
+        batch_sizes: Tamaños de lote de ``BufferedPriceWriter``
+        products_table: Tabla de productos
+        history_table: Tabla del histórico
+
+    Returns:
+        Diccionario con rows y rounds (mode, batch_size, seconds, per_second,
+        speedup, written)
+    """
+    random.seed(42)
+    with tempfile.TemporaryDirectory() as directory:
+        db = db_factory(f"sqlite:///{os.path.join(directory, 'bench.db')}")
+        store = PriceStore(db.engine, products_table, history_table)
+
+        rounds = []
+        product = db.get_or_create_product(name='Write bench single', urls=[], target_price=None)
+        logger.info(f"💾 {rows} inserciones fila a fila...")
+        start = time.perf_counter()
+        for record in _records(product.id, rows):
+            db.save_price_history(record['product_id'], record['store'], record['price'],
+                                  record['url'], record['availability'], record['title'])
+        rounds.append({'mode': 'single', 'batch_size': 1, 'seconds': time.perf_counter() - start,
+                       'written': _count(store, product.id)})
+
+        for batch_size in batch_sizes:
+            product = db.get_or_create_product(name=f"Write bench {batch_size}", urls=[], target_price=None)
+            records = _records(product.id, rows)
+            logger.info(f"💾 {rows} inserciones en lotes de {batch_size}...")
+            start = time.perf_counter()
+            with BufferedPriceWriter(store, batch_size=batch_size, flush_interval=math.inf) as writer:
+                for record in records:
+                    writer.add(**record)
+            rounds.append({'mode': 'batched', 'batch_size': batch_size,
+                           'seconds': time.perf_counter() - start,
+                           'written': _count(store, product.id)})
+
+    baseline = rounds[0]['seconds']
+    for result in rounds:
+        result['per_second'] = rows / result['seconds']
+        result['speedup'] = baseline / result['seconds']
+    return {'rows': rows, 'rounds': rounds}
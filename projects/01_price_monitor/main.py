@@ -9,31 +9,64 @@ Descripción: Sistema completo para monitorear precios de productos en múltiple
 
 Uso:
     python main.py --scrape                    # Ejecutar scraping una vez
+    python main.py --scrape --concurrency=64   # Scraping con 64 descargas simultáneas (hilos)
     python main.py --dashboard                 # Iniciar dashboard web
-    python main.py --schedule --interval=3600  # Ejecutar cada hora
+    python main.py --schedule --interval=3600  # Daemon: cada URL se revisa cada hora
     python main.py --report --email=user@example.com  # Enviar reporte
+    python main.py --backfill-rollups          # Reconstruir rollups OHLC
+    python main.py --export --format=parquet --days=90  # Exportar histórico a Parquet
+    python main.py --compact                   # Aplicar la política de retención
+    python main.py --simulate-revisit --days=30  # Revisión adaptativa vs periodo fijo
+    python main.py --coordinator               # Modo distribuido: cola y mantenimiento
+    python main.py --worker --concurrency=16   # Modo distribuido: un worker (N procesos)
 """
 
 import argparse
 import sys
 import os
-import time
 import logging
-from datetime import datetime
-from typing import List, Dict
+from collections import defaultdict, deque
+from datetime import datetime, timedelta
+from typing import List, Dict, Optional, Set
 import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+import requests
+from requests.adapters import HTTPAdapter
+
 # Agregar el directorio src al path
 sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
 
 # Imports de módulos propios
-from scraper import PriceScraper, ScrapingConfig
+from scraper import parse_price
 from database import PriceDB, Product, PriceHistory
 from dashboard import create_app
 from alerts import AlertSystem
 from analyzer import PriceAnalyzer
 from utils import setup_logging, load_config, validate_config
+from http_cache import HTTPCache, CachedResponse
+from politeness import DomainScheduler, interleave_by_domain, parse_retry_after
+from price_store import PriceStore
+from price_writer import BufferedPriceWriter
+import rollups
+from trends import TrendTracker, trend_label
+from parse_pipeline import ParsePipeline
+import archive
+from retention import RetentionPolicy
+import db_tuning
+from product_cache import ProductCache
+from daemon import ScrapeDaemon
+from journal import CycleJournal
+import revisit
+from work_queue import WorkQueue
+from distributed import QueueWorker, Coordinator
+from breakers import StoreBreakers, CircuitOpenError, is_store_failure
+from retries import RetryPolicy, RetryQueue
+from dashboard_api import DashboardAPI, DataVersion, SERVERS, serve
+from events import EventBus, register_sse
 
 # Configuración de logging
 logger = logging.getLogger(__name__)
@@ -50,18 +83,50 @@ class PriceMonitor:
         Args:
             config_path: Ruta al archivo de configuración
         """
+        self.config_path = config_path
         self.config = load_config(config_path)
         validate_config(self.config)
+        self._config_mtime = self._config_file_mtime()
         
         # Inicializar componentes
-        self.db = PriceDB(self.config['database']['url'])
-        self.scraper = PriceScraper(ScrapingConfig(
-            delay=self.config['scraping']['delay'],
-            timeout=self.config['scraping']['timeout'],
-            user_agent=self.config['scraping']['user_agent']
-        ))
+        self.db = self._open_db(self.config['database']['url'])
+        self.store = PriceStore(self.db.engine, Product.__tablename__, PriceHistory.__tablename__)
+        self.journal = CycleJournal.from_config(self.config['scraping'])
+        self.events = EventBus.from_config(self.config.get('dashboard', {}))
+        # Nombres de los productos scrapeados, para los eventos 'price' que se publican al guardar
+        self._product_names: Dict[int, str] = {}
+        # Fichero CSV/JSONL que amplía el scheduler con cada lote guardado (scheduler.export)
+        self.export_path: Optional[str] = None
+        self.data_version = DataVersion(self.config.get('dashboard', {}).get('version_file', 'data/prices.version'))
+        self.price_writer = BufferedPriceWriter(
+            self.store,
+            batch_size=self.config['database'].get('batch_size', 500),
+            flush_interval=self.config['database'].get('flush_interval', 5.0),
+            on_flush=self._on_prices_saved
+        )
+        self.http_cache = HTTPCache.from_config(self.config['scraping'])
+        self.timeout = self.config['scraping']['timeout']
+        self.session = requests.Session()
+        self.session.headers['User-Agent'] = self.config['scraping']['user_agent']
+        self._pool_size = 0
+        self._resize_pool(self.config['scraping'].get('concurrency', 1))
+        # Extracción del precio según la tienda (src/scraper.py); se ejecuta en
+        # otro proceso con --parse-workers, así que debe poder serializarse
+        self.parse = parse_price
+        self.politeness = DomainScheduler.from_config(self.config['scraping'])
+        self.breakers = StoreBreakers.from_config(self.config['scraping'])
+        self.retry_policy = RetryPolicy.from_config(self.config['scraping'])
         self.alert_system = AlertSystem(self.config['alerts'])
         self.analyzer = PriceAnalyzer(self.db)
+        trend_config = self.config.get('analysis', {})
+        self.trends = TrendTracker(
+            alpha=trend_config.get('ewma_alpha', 0.2),
+            window=trend_config.get('window', 168),
+            decay=trend_config.get('regression_decay', 0.98)
+        )
+        self.trends.load(self.store)
+        self.retention = RetentionPolicy.from_config(self.config)
+        self.product_cache = ProductCache(self.store)
         
         # Configurar logging
         setup_logging(
@@ -69,94 +134,530 @@ class PriceMonitor:
             log_file=self.config.get('logging', {}).get('file', 'data/logs/price_monitor.log')
         )
         
+        # Resolver todos los productos configurados de una vez
+        _, failed = self.product_cache.resolve(self.config['products'])
+        for product_config, error in failed:
+            logger.error(f"❌ Error procesando producto {product_config['name']}: {str(error)}")
+        
         logger.info("PriceMonitor inicializado correctamente")
 
-    def scrape_once(self, products: List[Dict] = None) -> Dict:
+    def _config_file_mtime(self) -> int:
+        try:
+            return os.stat(self.config_path).st_mtime_ns
+        except OSError:
+            return 0
+
+    def _reload_products_if_changed(self) -> bool:
+        """
+        Si el archivo de configuración cambió desde la última lectura, recarga la
+        lista de productos; la caché de productos solo volverá a la DB para los
+        que hayan cambiado.
+        
+        Returns:
+            True si se recargó la lista de productos
+        """
+        mtime = self._config_file_mtime()
+        if mtime == self._config_mtime:
+            return False
+        try:
+            config = load_config(self.config_path)
+            validate_config(config)
+        except Exception as e:
+            logger.error(f"❌ Configuración modificada pero no válida, se mantiene la anterior: {str(e)}")
+            return False
+        self._config_mtime = mtime
+        self.config['products'] = config['products']
+        logger.info(f"🔄 Configuración recargada: {len(config['products'])} productos")
+        return True
+
+    @staticmethod
+    def _open_db(url: str) -> PriceDB:
+        """
+        Abre la base de datos; en SQLite activa WAL, los PRAGMAs y los índices
+        de ``db_tuning``.
+        """
+        db = PriceDB(url)
+        if url.startswith('sqlite'):
+            db_tuning.install(db.engine, Product.__tablename__, PriceHistory.__tablename__)
+        return db
+
+    def _on_prices_saved(self, records: List[Dict]):
+        """
+        Anota en el diario del ciclo las URLs cuyos precios ya están en la DB,
+        actualiza las tendencias, los añade al export del scheduler y avisa al
+        dashboard de que hay datos nuevos.
+
+        Las tendencias se actualizan aquí y no al recibir el precio: si el lote
+        no llega a guardarse, el estado no incluye lecturas que la DB no tiene.
+        """
+        for record in records:
+            self.trends.update(record['product_id'], record['store'], record['price'], record['timestamp'])
+        if self.export_path:
+            try:
+                archive.append_history(records, self.export_path)
+            except Exception as e:
+                # Los precios ya están en la DB: un fallo del export no los pierde
+                logger.error(f"❌ Error añadiendo precios a {self.export_path}: {str(e)}")
+        if self.journal:
+            self.journal.mark_done((record['product_id'], record['url']) for record in records)
+        self.data_version.bump()
+        if self.events:
+            self._publish_prices(records)
+
+    def _publish_prices(self, records: List[Dict]):
+        """
+        Publica un evento ``price`` por producto con los precios recién guardados.
+
+        Se publica después de escribirlos y de cambiar la versión de los datos:
+        un cliente que reacciona al evento consultando la API ya los encuentra.
+        """
+        updates = {}
+        for record in records:
+            product_id = record['product_id']
+            update = updates.setdefault(product_id, {
+                'product_id': product_id,
+                'product': self._product_names.get(product_id, record.get('title')),
+                'prices': {}
+            })
+            # Los registros llegan en orden: gana la lectura más reciente de cada tienda
+            update['prices'][record['store']] = {
+                'price': record['price'],
+                'url': record['url'],
+                'availability': record.get('availability', True),
+                'timestamp': record['timestamp'].isoformat()
+            }
+        for product_id, update in updates.items():
+            # Las actualizaciones del mismo producto se fusionan en los clientes lentos
+            self.events.publish('price', update, key=product_id)
+
+    def _resize_pool(self, size: int):
+        """
+        Agranda el pool de conexiones por tienda de la sesión HTTP para que
+        ``size`` descargas simultáneas no abran y cierren conexiones.
+        """
+        size = max(10, size)
+        if size <= self._pool_size:
+            return
+        adapter = HTTPAdapter(pool_connections=size, pool_maxsize=size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self._pool_size = size
+
+    def _download(self, url: str, timeout: float = None) -> CachedResponse:
+        """
+        Descarga una página sin parsearla. Con la caché HTTP activada la
+        petición es condicional y, si la página no cambió, la respuesta trae el
+        ``price_data`` guardado en lugar del cuerpo.
+        
+        Args:
+            url: URL a descargar
+            timeout: Timeout de la petición (por defecto ``scraping.timeout``)
+        """
+        timeout = timeout or self.timeout
+        if self.http_cache:
+            return self.http_cache.request(self.session, url, timeout=timeout)
+        response = self.session.get(url, timeout=timeout)
+        response.raise_for_status()
+        return CachedResponse(url, body=response.content)
+
+    def _fetch_price(self, url: str, timeout: float = None) -> Optional[Dict]:
+        """
+        Descarga y parsea una página, a través de la caché HTTP si está activada.
+        
+        Args:
+            url: URL a descargar
+            timeout: Timeout de la petición (por defecto ``scraping.timeout``)
+            
+        Returns:
+            Datos de precio extraídos (o reutilizados de la caché)
+        """
+        return self._parse_response(url, self._download(url, timeout))
+
+    def _parse_response(self, url: str, response: CachedResponse) -> Optional[Dict]:
+        """
+        Extrae el precio de una respuesta de ``_download`` (o reutiliza el de la
+        caché HTTP) y lo guarda en la caché.
+        """
+        if response.cached:
+            return response.price_data
+        price_data = self.parse(url, response.body)
+        if self.http_cache:
+            self.http_cache.store(response, price_data)
+        return price_data
+
+    def _scrape_url(self, url: str, send=None, parse=None):
+        """
+        Descarga una URL respetando la cortesía por dominio y el circuit breaker
+        de su tienda.
+        
+        Args:
+            url: URL a descargar
+            send: Función ``send(url, timeout=None)``; por defecto ``_download``
+                seguida de ``_parse_response``
+            parse: Función ``parse(url, respuesta)`` aplicada al resultado de ``send``
+            
+        Raises:
+            CircuitOpenError: Si el circuito de la tienda está abierto
+        """
+        if send is None:
+            send, parse = self._download, self._parse_response
+        if not self.breakers:
+            self.politeness.acquire(url)
+            response = send(url)
+            return parse(url, response) if parse else response
+        # Una URL que se va a saltar no espera turno en su dominio
+        self.breakers.check(url)
+        self.politeness.acquire(url)
+        # El timeout adaptativo solo mide la descarga, no el parseo
+        return self.breakers.request(url, send, parse)
+
+    def scrape_once(self, products: List[Dict] = None, concurrency: int = None,
+                    parse_workers: int = None) -> Dict:
         """
         Ejecuta un ciclo completo de scraping para todos los productos configurados.
         
+        Si el ciclo anterior se interrumpió (ver CycleJournal), se reanuda y se
+        saltan las URLs cuyos precios ya se guardaron.
+        
         Args:
             products: Lista de productos a scrapear (opcional, usa config si no se especifica)
+            concurrency: Número máximo de descargas simultáneas. Con 1 (por defecto)
+                se recorre cada URL de forma secuencial; con un valor mayor las
+                descargas se reparten entre ``concurrency`` hilos que comparten la
+                sesión HTTP (ver ``_scrape_concurrent``).
+            parse_workers: Si se indica, el HTML se parsea en un pool de ese número
+                de procesos mientras ``concurrency`` hilos descargan (ver ParsePipeline).
             
         Returns:
             Diccionario con estadísticas del scraping
         """
         if products is None:
+            self._reload_products_if_changed()
             products = self.config['products']
+        if concurrency is None:
+            concurrency = self.config['scraping'].get('concurrency', 1)
+        if parse_workers is None:
+            parse_workers = self.config['scraping'].get('parse_workers')
         
-        logger.info(f"Iniciando scraping de {len(products)} productos")
+        logger.info(f"Iniciando scraping de {len(products)} productos (concurrencia: {concurrency})")
         
         stats = {
             'success': 0,
             'errors': 0,
+            'skipped': 0,
+            'retries': 0,
+            'recovered': 0,
             'total': len(products),
             'start_time': datetime.now(),
             'results': []
         }
         
-        for product_config in products:
-            try:
-                logger.info(f"Scrapeando: {product_config['name']}")
-                
-                # Obtener o crear producto en DB
-                product = self.db.get_or_create_product(
-                    name=product_config['name'],
-                    urls=product_config['urls'],
-                    target_price=product_config.get('target_price')
-                )
-                
-                # Scrapear cada URL del producto
-                for url in product_config['urls']:
-                    try:
-                        price_data = self.scraper.scrape_price(url)
-                        
-                        if price_data and price_data['price'] > 0:
-                            # Guardar en base de datos
-                            self.db.save_price_history(
-                                product_id=product.id,
-                                store=price_data['store'],
-                                price=price_data['price'],
-                                url=url,
-                                availability=price_data.get('availability', True),
-                                title=price_data.get('title', product.name)
-                            )
-                            
-                            stats['results'].append({
-                                'product': product.name,
-                                'store': price_data['store'],
-                                'price': price_data['price'],
-                                'url': url,
-                                'status': 'success'
-                            })
-                            
-                            logger.info(f"✅ {product.name} - {price_data['store']}: ${price_data['price']:.2f}")
-                            stats['success'] += 1
-                            
-                        else:
-                            logger.warning(f"⚠️ No se pudo obtener precio para {url}")
-                            stats['errors'] += 1
-                            
-                    except Exception as e:
-                        logger.error(f"❌ Error scrapeando {url}: {str(e)}")
-                        stats['errors'] += 1
-                        
-                # Pausa entre productos
-                time.sleep(self.config['scraping']['delay'])
-                
-            except Exception as e:
-                logger.error(f"❌ Error procesando producto {product_config['name']}: {str(e)}")
-                stats['errors'] += 1
+        completed = self.journal.begin() if self.journal else set()
+        stats['resumed'] = len(completed)
+        
+        self._resize_pool(concurrency)
+        self.politeness.reset_metrics()
+        if self.breakers:
+            self.breakers.reset_metrics()
+        if self.http_cache:
+            self.http_cache.reset_stats()
+        try:
+            jobs = self._resolve_jobs(products, stats, skip=completed)
+            if parse_workers:
+                self._scrape_pipeline(jobs, stats, concurrency, parse_workers)
+            elif concurrency > 1:
+                asyncio.run(self._scrape_concurrent(jobs, stats, concurrency))
+            else:
+                self._scrape_sequential(jobs, stats)
+        finally:
+            # Los precios deben estar en la DB antes de terminar el ciclo
+            self.price_writer.flush()
+            self.trends.save(self.store)
+        
+        # Solo un ciclo que llega hasta aquí se da por terminado en el diario
+        if self.journal:
+            self.journal.end()
         
         stats['end_time'] = datetime.now()
         stats['duration'] = (stats['end_time'] - stats['start_time']).total_seconds()
+        stats['domains'] = self.politeness.metrics()
+        stats['breakers'] = self.breakers.metrics() if self.breakers else {}
+        stats['cache'] = self.http_cache.stats() if self.http_cache else {}
         
-        logger.info(f"Scraping completado: {stats['success']} éxitos, {stats['errors']} errores")
+        logger.info(f"Scraping completado: {stats['success']} éxitos ({stats['recovered']} tras reintentar), "
+                    f"{stats['errors']} errores, {stats['skipped']} saltadas por circuito abierto")
         
         # Verificar alertas después del scraping
         self.check_alerts()
         
         return stats
 
+    def _resolve_jobs(self, products: List[Dict], stats: Dict,
+                      skip: Set[tuple] = frozenset()) -> List[tuple]:
+        """
+        Obtiene los productos de la DB y construye la lista de trabajos (producto, URL),
+        intercalada por dominio para repartir la carga entre tiendas.
+        
+        Args:
+            products: Lista de productos a scrapear
+            stats: Diccionario de estadísticas a actualizar
+            skip: (product_id, url) ya completados en un ciclo reanudado
+            
+        Returns:
+            Lista de tuplas (producto, url)
+        """
+        # Los productos sin cambios salen de la caché sin consultar la DB
+        resolved, failed = self.product_cache.resolve(products)
+        for product_config, error in failed:
+            logger.error(f"❌ Error procesando producto {product_config['name']}: {str(error)}")
+            stats['errors'] += 1
+        
+        jobs = []
+        for product_config in products:
+            product = resolved.get(product_config['name'])
+            if product is None:
+                continue
+            logger.info(f"Scrapeando: {product_config['name']}")
+            for url in product_config['urls']:
+                if (product.id, url) not in skip:
+                    jobs.append((product, url))
+        
+        return interleave_by_domain(jobs, url_of=lambda job: job[1])
+
+    def _scrape_sequential(self, jobs: List[tuple], stats: Dict):
+        """
+        Recorre las URLs una tras otra, esperando el turno de cada dominio. Las
+        URLs de tiendas con el circuito abierto se saltan sin esperar y los
+        reintentos se intercalan con las URLs pendientes cuando vencen.
+        
+        Args:
+            jobs: Tuplas (producto, url) de ``_resolve_jobs``
+            stats: Diccionario de estadísticas a actualizar
+        """
+        retries = RetryQueue()
+        attempts = ((product, url, 0) for product, url in jobs)
+        for product, url, attempt in retries.interleave(attempts):
+            try:
+                price_data = self._scrape_url(url)
+                self._record_attempt(stats, product, url, attempt, price_data)
+            except CircuitOpenError:
+                stats['skipped'] += 1
+            except Exception as e:
+                delay = self._retry_delay(stats, url, attempt, e)
+                if delay is not None:
+                    retries.push((product, url, attempt + 1), delay)
+
+    async def _scrape_concurrent(self, jobs: List[tuple], stats: Dict, concurrency: int):
+        """
+        Descarga las URLs con hasta ``concurrency`` peticiones simultáneas.
+        
+        Las peticiones HTTP son bloqueantes (``requests``) y se ejecutan en un
+        pool de ``concurrency`` hilos que comparte la sesión y su pool de
+        conexiones; no es un cliente HTTP asíncrono. El bucle de asyncio solo
+        coordina: espera el turno de cada dominio (token bucket) sin ocupar un
+        hilo, de modo que una tienda lenta no frena a las demás, y limita las
+        descargas en curso con un semáforo. Los resultados se procesan en el
+        orden de los trabajos, así que las estadísticas y las escrituras en la
+        base de datos son las mismas que en el modo secuencial. Cada reintento
+        es una tarea nueva que espera su backoff y después compite con el resto
+        por su dominio.
+        
+        Args:
+            jobs: Tuplas (producto, url) de ``_resolve_jobs``
+            stats: Diccionario de estadísticas a actualizar
+            concurrency: Número máximo de descargas simultáneas (hilos)
+        """
+        loop = asyncio.get_running_loop()
+        semaphore = asyncio.Semaphore(concurrency)
+        domain_locks = defaultdict(asyncio.Lock)
+        
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            
+            async def fetch(url: str, delay: float = 0):
+                if delay:
+                    await asyncio.sleep(delay)
+                if self.breakers:
+                    self.breakers.check(url)
+                lock = domain_locks[self.politeness.host_for(url)]
+                await self.politeness.acquire_async(url, lock, slot=semaphore)
+                try:
+                    if self.breakers:
+                        request = functools.partial(self.breakers.request, url, self._download,
+                                                    self._parse_response)
+                        return await loop.run_in_executor(executor, request)
+                    return await loop.run_in_executor(executor, self._fetch_price, url)
+                finally:
+                    semaphore.release()
+            
+            tasks = deque(
+                (product, url, 0, asyncio.ensure_future(fetch(url)))
+                for product, url in jobs
+            )
+            
+            while tasks:
+                product, url, attempt, task = tasks.popleft()
+                try:
+                    price_data = await task
+                    self._record_attempt(stats, product, url, attempt, price_data)
+                except CircuitOpenError:
+                    stats['skipped'] += 1
+                except Exception as e:
+                    delay = self._retry_delay(stats, url, attempt, e)
+                    if delay is not None:
+                        tasks.append((product, url, attempt + 1, asyncio.ensure_future(fetch(url, delay))))
+
+    def _scrape_pipeline(self, jobs: List[tuple], stats: Dict, fetch_workers: int, parse_workers: int):
+        """
+        Descarga en hilos y parsea en procesos separados (ver ParsePipeline).
+        
+        Los resultados se guardan a medida que los parsers terminan, por lo que el
+        orden de ``stats['results']`` puede diferir del de la configuración. Los
+        reintentos entran en el pipeline cuando vencen; los que se programan
+        después de que se agoten las URLs se procesan en una pasada más.
+        
+        Args:
+            jobs: Tuplas (producto, url) de ``_resolve_jobs``
+            stats: Diccionario de estadísticas a actualizar
+            fetch_workers: Hilos de descarga
+            parse_workers: Procesos de parseo
+        """
+        # Respuestas parseándose en el pool, para guardar su precio en la caché HTTP
+        downloaded: Dict[str, CachedResponse] = {}
+        
+        def fetch(url: str):
+            response = self._scrape_url(url, self._download)
+            if response.cached:
+                return response.price_data
+            if self.http_cache:
+                downloaded[url] = response
+            return response.body
+        
+        pipeline = ParsePipeline(
+            fetch=fetch,
+            parse=self.parse,
+            fetch_workers=max(1, fetch_workers),
+            parse_workers=parse_workers,
+            queue_size=self.config['scraping'].get('parse_queue_size', 64)
+        )
+        
+        retries = RetryQueue()
+        jobs = [(product, url, 0) for product, url in jobs]
+        # Un solo pool de parsers para la pasada principal y las de reintentos
+        with pipeline:
+            while jobs or retries:
+                pending = ((job, job[1]) for job in retries.interleave(jobs))
+                jobs = []
+                for (product, url, attempt), price_data, error in pipeline.run(pending):
+                    response = downloaded.pop(url, None)
+                    if response is not None and error is None:
+                        self.http_cache.store(response, price_data)
+                    if isinstance(error, CircuitOpenError):
+                        stats['skipped'] += 1
+                        continue
+                    if error is not None:
+                        delay = self._retry_delay(stats, url, attempt, error)
+                        if delay is not None:
+                            retries.push((product, url, attempt + 1), delay)
+                        continue
+                    try:
+                        self._record_attempt(stats, product, url, attempt, price_data)
+                    except Exception as e:
+                        self._handle_scrape_error(url, e)
+                        stats['errors'] += 1
+
+    def _handle_scrape_error(self, url: str, error: Exception):
+        """
+        Registra un error de scraping y, si la tienda pidió esperar (429/503 con
+        Retry-After), pausa su dominio en el planificador.
+        
+        Args:
+            url: URL que falló
+            error: Excepción capturada
+        """
+        logger.error(f"❌ Error scrapeando {url}: {str(error)}")
+        
+        response = getattr(error, 'response', None)
+        if response is not None and getattr(response, 'status_code', None) in (429, 503):
+            retry_after = parse_retry_after(response.headers.get('Retry-After'))
+            if retry_after:
+                logger.warning(f"⏳ {self.politeness.host_for(url)} pide esperar {retry_after:.0f}s")
+                self.politeness.defer(url, retry_after)
+
+    def _retry_delay(self, stats: Dict, url: str, attempt: int, error: Exception) -> Optional[float]:
+        """
+        Registra un error de scraping y decide si la URL se reintenta en este ciclo.
+        
+        Args:
+            stats: Diccionario de estadísticas a actualizar
+            url: URL que falló
+            attempt: Reintentos ya hechos de la URL (0 en la pasada principal)
+            error: Excepción capturada
+            
+        Returns:
+            Segundos hasta el reintento, o None si el fallo es definitivo (no
+            transitorio o sin presupuesto de reintentos)
+        """
+        self._handle_scrape_error(url, error)
+        delay = None
+        if self.retry_policy and is_store_failure(error):
+            delay = self.retry_policy.delay(attempt + 1)
+        if delay is None:
+            stats['errors'] += 1
+        else:
+            stats['retries'] += 1
+            logger.info(f"🔁 Reintento {attempt + 1} de {url} en {delay:.1f}s")
+        return delay
+
+    def _record_attempt(self, stats: Dict, product: Product, url: str, attempt: int, price_data: Dict):
+        """
+        Como ``_record_price``, contando además las URLs recuperadas tras reintentar.
+        """
+        success = stats['success']
+        self._record_price(stats, product, url, price_data)
+        if attempt and stats['success'] > success:
+            stats['recovered'] += 1
+
+    def _record_price(self, stats: Dict, product: Product, url: str, price_data: Dict):
+        """
+        Guarda el precio obtenido para una URL y actualiza las estadísticas.
+        
+        Args:
+            stats: Diccionario de estadísticas a actualizar
+            product: Producto al que pertenece la URL
+            url: URL scrapeada
+            price_data: Datos devueltos por el scraper (puede ser None)
+        """
+        if price_data and price_data['price'] > 0:
+            timestamp = datetime.now()
+            # Antes de añadirlo: el lote puede volcarse (y publicarse) dentro de add
+            self._product_names[product.id] = product.name
+            
+            # Guardar en base de datos (por lotes, se vuelca al final del ciclo)
+            self.price_writer.add(
+                timestamp=timestamp,
+                product_id=product.id,
+                store=price_data['store'],
+                price=price_data['price'],
+                url=url,
+                availability=price_data.get('availability', True),
+                title=price_data.get('title', product.name)
+            )
+            
+            stats['results'].append({
+                'product': product.name,
+                'store': price_data['store'],
+                'price': price_data['price'],
+                'url': url,
+                'status': 'success'
+            })
+            
+            logger.info(f"✅ {product.name} - {price_data['store']}: ${price_data['price']:.2f}")
+            stats['success'] += 1
+            
+        else:
+            logger.warning(f"⚠️ No se pudo obtener precio para {url}")
+            stats['errors'] += 1
+
     def check_alerts(self) -> List[Dict]:
         """
         Verifica y envía alertas basadas en los precios actuales.
@@ -169,18 +670,23 @@ class PriceMonitor:
         alerts_sent = []
         products = self.db.get_all_products()
         
+        # Índice nombre -> configuración (se conserva la primera aparición)
+        config_by_name = {}
+        for product_config in self.config['products']:
+            config_by_name.setdefault(product_config['name'], product_config)
+        
+        # Último precio por (producto, tienda) de todos los productos en una sola consulta
+        latest_by_product = self.store.get_latest_prices_by_product()
+        
         for product in products:
             # Obtener precio más reciente
-            latest_prices = self.db.get_latest_prices(product.id)
+            latest_prices = latest_by_product.get(product.id)
             
             if not latest_prices:
                 continue
             
             # Obtener configuración del producto
-            product_config = next(
-                (p for p in self.config['products'] if p['name'] == product.name), 
-                None
-            )
+            product_config = config_by_name.get(product.name)
             
             if not product_config:
                 continue
@@ -188,6 +694,9 @@ class PriceMonitor:
             target_price = product_config.get('target_price')
             alert_threshold = product_config.get('alert_threshold', 0.1)  # 10% por defecto
             
+            # La caída de precio es por producto: se calcula una vez, no por tienda
+            price_drop = self.trends.detect_price_drop(product.id, threshold=alert_threshold)
+            
             for price_record in latest_prices:
                 # Verificar si el precio está por debajo del objetivo
                 if target_price and price_record.price <= target_price:
@@ -203,10 +712,11 @@ class PriceMonitor:
                     
                     if self.alert_system.send_price_alert(alert_data):
                         alerts_sent.append(alert_data)
+                        if self.events:
+                            self.events.publish('alert', alert_data)
                         logger.info(f"🚨 Alerta enviada: {product.name} - ${price_record.price:.2f}")
                 
                 # Verificar caídas significativas de precio
-                price_drop = self.analyzer.detect_price_drop(product.id, threshold=alert_threshold)
                 if price_drop:
                     alert_data = {
                         'type': 'price_drop',
@@ -220,6 +730,8 @@ class PriceMonitor:
                     
                     if self.alert_system.send_price_drop_alert(alert_data):
                         alerts_sent.append(alert_data)
+                        if self.events:
+                            self.events.publish('alert', alert_data)
                         logger.info(f"📉 Alerta de caída: {product.name} - {price_drop['drop_percentage']:.1f}%")
         
         logger.info(f"Se enviaron {len(alerts_sent)} alertas")
@@ -247,22 +759,29 @@ class PriceMonitor:
         
         products = self.db.get_all_products()
         
+        # Agregados por producto calculados en la DB (MIN/MAX/AVG/COUNT, tiendas y
+        # pendiente), consumidos fila a fila sin cargar el histórico en memoria. Para
+        # ventanas largas se leen los rollups horarios o diarios en lugar de las lecturas.
+        granularity = rollups.granularity_for_window(days)
+        summaries = {
+            summary['product_id']: summary
+            for summary in self.store.iter_price_summary(days=days, granularity=granularity)
+        }
+        
         for product in products:
-            # Obtener histórico de precios
-            price_history = self.db.get_price_history(product.id, days=days)
+            summary = summaries.get(product.id)
             
-            if not price_history:
+            if not summary or not summary['data_points']:
                 continue
             
-            # Calcular estadísticas
-            prices = [p.price for p in price_history]
-            current_price = min(prices)  # Precio más bajo actual
-            max_price = max(prices)
-            min_price = min(prices)
-            avg_price = sum(prices) / len(prices)
+            # Estadísticas del período
+            current_price = summary['min_price']  # Precio más bajo actual
+            max_price = summary['max_price']
+            min_price = summary['min_price']
+            avg_price = summary['avg_price']
             
-            # Analizar tendencias
-            trend = self.analyzer.calculate_price_trend(product.id, days=days)
+            # Tendencia de la ventana del reporte (regresión calculada en la DB)
+            trend = trend_label(summary['slope'])
             
             product_report = {
                 'name': product.name,
@@ -272,8 +791,8 @@ class PriceMonitor:
                 'avg_price': avg_price,
                 'price_change': max_price - min_price,
                 'trend': trend,
-                'data_points': len(price_history),
-                'stores': list(set(p.store for p in price_history)),
+                'data_points': summary['data_points'],
+                'stores': summary['stores'],
                 'target_price': product.target_price,
                 'target_met': product.target_price and current_price <= product.target_price
             }
@@ -292,61 +811,216 @@ class PriceMonitor:
         logger.info(f"Reporte generado para {len(report['products'])} productos")
         return report
 
-    def run_dashboard(self, host: str = None, port: int = None, debug: bool = False):
+    def backfill_rollups(self, chunk_size: int = 10000) -> int:
+        """
+        Reconstruye los rollups OHLC horarios y diarios a partir del histórico.
+        
+        Args:
+            chunk_size: Filas de histórico leídas por bloque
+            
+        Returns:
+            Número de lecturas procesadas
+        """
+        logger.info("Reconstruyendo rollups de precios...")
+        processed = rollups.backfill(self.store, chunk_size=chunk_size)
+        logger.info(f"Rollups reconstruidos a partir de {processed} lecturas")
+        return processed
+
+    def compact_history(self) -> Dict:
+        """
+        Aplica la política de retención: archiva y borra las lecturas crudas
+        antiguas y los rollups horarios caducados (ver RetentionPolicy).
+        
+        Si la configuración no tiene sección ``retention`` se usan los valores
+        por defecto de la política.
+        
+        Returns:
+            Estadísticas de la compactación
+        """
+        return (self.retention or RetentionPolicy()).run(self.store)
+
+    def simulate_revisit(self, days: int = 30, interval: int = 3600) -> Dict:
+        """
+        Reproduce el histórico de los últimos ``days`` días con la revisión
+        adaptativa (``scheduler.adaptive``, o sus valores por defecto) y la
+        compara con el periodo fijo con el que se grabó.
+        
+        Args:
+            days: Días de histórico a reproducir
+            interval: Periodo de las URLs sin historial suficiente, en segundos
+        
+        Returns:
+            Peticiones ahorradas y cambios de precio perdidos (ver revisit.simulate)
+        """
+        since = datetime.now() - timedelta(days=days)
+        histories = revisit.load_histories(self.store.iter_price_history(since=since))
+        adaptive = self.config.get('scheduler', {}).get('adaptive') or {}
+        planner = revisit.RevisitPlanner.from_config(dict(adaptive, enabled=True), default_interval=interval)
+        return revisit.simulate(histories, planner)
+
+    def export_history(self, format: str = 'parquet', days: int = None,
+                       destination: str = None) -> Dict:
+        """
+        Exporta el histórico de precios (Parquet particionado, CSV o JSON Lines).
+        
+        Args:
+            format: 'parquet', 'csv' o 'jsonl'
+            days: Últimos días a exportar (None = todo el histórico)
+            destination: Directorio de salida (por defecto database.export_dir)
+            
+        Returns:
+            Estadísticas de la exportación (rows, bytes, seconds, path)
+        """
+        destination = destination or self._export_dir(format)
+        return archive.export_history(self.store, destination, format=format, days=days)
+
+    def import_history(self, source: str, format: str = None) -> int:
+        """
+        Importa un histórico exportado con ``export_history`` (backfill).
+        
+        Returns:
+            Número de registros importados
+        """
+        logger.info(f"Importando histórico desde {source}...")
+        return archive.import_history(self.store, source, format=format)
+
+    def _export_dir(self, name: str) -> str:
+        base = self.config['database'].get('export_dir', 'data/exports')
+        return os.path.join(base, name)
+
+    def run_dashboard(self, host: str = None, port: int = None, debug: bool = False,
+                      server: str = None, workers: int = None, schedule_interval: int = None,
+                      concurrency: int = None):
         """
         Inicia el dashboard web.
         
+        Con ``schedule_interval`` el scheduler se ejecuta en el mismo proceso y
+        los precios y alertas nuevos llegan a los navegadores por SSE
+        (``/api/v2/events``) en cuanto se scrapean.
+        
         Args:
             host: Host del servidor (por defecto desde config)
             port: Puerto del servidor (por defecto desde config)
             debug: Modo debug de Flask
+            server: 'dev', 'waitress' o 'gunicorn' (por defecto desde config o 'dev')
+            workers: Procesos de gunicorn (por defecto desde config o 4)
+            schedule_interval: Si se indica, periodo del scheduler que se ejecuta junto al dashboard
+            concurrency: Workers del scheduler (default: scheduler.workers o 4)
         """
-        host = host or self.config['dashboard']['host']
-        port = port or self.config['dashboard']['port']
+        dashboard_config = self.config['dashboard']
+        host = host or dashboard_config['host']
+        port = port or dashboard_config['port']
+        server = server or dashboard_config.get('server', 'dev')
+        workers = workers or dashboard_config.get('workers', 4)
+        
+        if schedule_interval and server == 'gunicorn':
+            # Los procesos de gunicorn no comparten el bus de eventos del scheduler
+            raise ValueError("El scheduler junto al dashboard requiere el servidor 'dev' o 'waitress'")
+        if schedule_interval and debug:
+            # El recargador de Flask arrancaría un segundo scheduler en el proceso hijo
+            raise ValueError("El scheduler junto al dashboard no admite el modo debug")
         
-        logger.info(f"Iniciando dashboard en http://{host}:{port}")
+        logger.info(f"Iniciando dashboard en http://{host}:{port} (servidor {server})")
         
-        # Crear app Flask
+        # Crear app Flask con la API cacheada de resumen y gráficos
         app = create_app(self.db, self.analyzer, self.config)
+        DashboardAPI.from_config(self.db, self.store, dashboard_config).register(app)
+        if self.events and schedule_interval:
+            register_sse(app, self.events, heartbeat=dashboard_config.get('events', {}).get('heartbeat', 15))
+        elif self.events:
+            # Sin scheduler en este proceso nadie publica en el bus: el endpoint no se registra (404)
+            logger.info("📡 /api/v2/events desactivado: requiere --schedule en el mismo proceso")
         
-        # Ejecutar servidor
-        app.run(host=host, port=port, debug=debug)
+        daemon = None
+        if schedule_interval:
+            self._enable_export()
+            daemon = ScrapeDaemon.from_config(self, interval=schedule_interval, workers=concurrency)
+            scheduler = threading.Thread(target=daemon.run, name="scheduler", daemon=True)
+            scheduler.start()
+        
+        # Ejecutar servidor; cada proceso de gunicorn abre sus propias conexiones
+        try:
+            serve(app, host, port, server=server, workers=workers,
+                  threads=dashboard_config.get('threads', 8), debug=debug,
+                  post_fork=lambda: self.db.engine.dispose(close=False))
+        finally:
+            if daemon:
+                daemon.stop()
+                scheduler.join()
 
-    def run_scheduler(self, interval: int = 3600):
+    def run_scheduler(self, interval: int = 3600, concurrency: int = None,
+                      parse_workers: int = None):
         """
-        Ejecuta el scraping de forma programada.
+        Ejecuta el monitor como daemon: cada URL se revisa cada ``interval``
+        segundos (más a menudo si el producto está cerca de su precio objetivo)
+        desde una cola de vencimientos atendida por un pool fijo de workers
+        (ver ScrapeDaemon).
         
         Args:
-            interval: Intervalo en segundos entre ejecuciones
+            interval: Periodo de revisión de cada URL, en segundos
+            concurrency: Número de workers (default: scheduler.workers o 4)
+            parse_workers: No se usa en modo daemon; cada worker descarga y parsea
         """
-        logger.info(f"Iniciando scheduler con intervalo de {interval} segundos ({interval/3600:.1f} horas)")
+        if parse_workers:
+            logger.warning("--parse-workers no se usa con el scheduler: cada worker descarga y parsea su URL")
+        
+        self._enable_export()
+        daemon = ScrapeDaemon.from_config(self, interval=interval, workers=concurrency)
+        logger.info(f"Iniciando scheduler con periodo de {interval} segundos ({interval/3600:.1f} horas)")
         
         try:
-            while True:
-                logger.info("⏰ Ejecutando scraping programado...")
-                
-                try:
-                    stats = self.scrape_once()
-                    logger.info(f"✅ Scraping completado: {stats['success']} éxitos, {stats['errors']} errores")
-                    
-                    # Generar reporte si hay errores significativos
-                    if stats['errors'] > stats['success']:
-                        logger.warning("⚠️ Más errores que éxitos, generando reporte...")
-                        report = self.generate_report(days=1)
-                        # Aquí podrías enviar el reporte por email si es crítico
-                        
-                except Exception as e:
-                    logger.error(f"❌ Error en scraping programado: {str(e)}")
-                
-                logger.info(f"😴 Esperando {interval} segundos hasta el próximo scraping...")
-                time.sleep(interval)
-                
+            daemon.run()
         except KeyboardInterrupt:
             logger.info("👋 Scheduler detenido por el usuario")
         except Exception as e:
             logger.error(f"❌ Error fatal en scheduler: {str(e)}")
             raise
 
+    def _enable_export(self):
+        """
+        Activa ``scheduler.export``: cada lote de precios guardado se añade
+        (en modo append) a ese fichero ``.csv.gz`` o ``.jsonl.gz``.
+        """
+        self.export_path = self.config.get('scheduler', {}).get('export')
+        if self.export_path:
+            logger.info(f"🗄️ Los precios del scheduler se añaden a {self.export_path}")
+
+    def _work_queue(self) -> WorkQueue:
+        config = self.config.get('distributed', {})
+        return WorkQueue(self.db.engine, table=config.get('table', 'scrape_jobs'),
+                         lease_seconds=config.get('lease_seconds', 120))
+
+    def run_worker(self, interval: int = 3600, concurrency: int = None):
+        """
+        Ejecuta un worker del modo distribuido: reserva URLs vencidas de la
+        cola compartida, las scrapea y guarda los precios (ver QueueWorker).
+        Se pueden lanzar tantos como se quiera, en una o varias máquinas.
+        
+        Args:
+            interval: Periodo de revisión de cada URL, en segundos
+            concurrency: Hilos del worker (default: distributed.concurrency o 4)
+        """
+        worker = QueueWorker.from_config(self, self._work_queue(), interval=interval, concurrency=concurrency)
+        try:
+            worker.run()
+        except KeyboardInterrupt:
+            logger.info("👋 Worker detenido por el usuario")
+
+    def run_coordinator(self, interval: int = 3600):
+        """
+        Ejecuta el coordinador del modo distribuido: mantiene la cola alineada
+        con la configuración, actualiza tendencias, envía alertas y aplica la
+        retención (ver Coordinator). Debe haber uno solo.
+        
+        Args:
+            interval: Periodo de revisión de cada URL, en segundos
+        """
+        coordinator = Coordinator.from_config(self, self._work_queue(), interval=interval)
+        try:
+            coordinator.run()
+        except KeyboardInterrupt:
+            logger.info("👋 Coordinador detenido por el usuario")
+
     def send_report_email(self, email: str, days: int = 7):
         """
         Envía un reporte por email.
@@ -381,9 +1055,19 @@ def main():
         epilog="""
 Ejemplos de uso:
   python main.py --scrape                     # Ejecutar scraping una vez
+  python main.py --scrape --concurrency=64    # Scraping con 64 descargas simultáneas (hilos)
   python main.py --dashboard                  # Iniciar dashboard web
+  python main.py --dashboard --server=gunicorn --workers=4  # Dashboard multi-proceso
   python main.py --schedule --interval=3600   # Ejecutar cada hora
   python main.py --report --email=user@example.com  # Enviar reporte
+  python main.py --backfill-rollups           # Reconstruir rollups OHLC
+  python main.py --export --format=parquet --days=90  # Exportar histórico
+  python main.py --import-history=data/exports/parquet  # Importar un export
+  python main.py --compact                    # Archivar y compactar datos antiguos
+  python main.py --simulate-revisit --days=30 # Simular la revisión adaptativa
+  python main.py --coordinator                # Modo distribuido: coordinador
+  python main.py --worker --concurrency=16    # Modo distribuido: worker
+  python main.py --dashboard --schedule       # Dashboard con precios en vivo (SSE)
 
 Para más información: https://github.com/tu-usuario/price-monitor
         """
@@ -398,20 +1082,46 @@ Para más información: https://github.com/tu-usuario/price-monitor
                        help='Ejecutar de forma programada')
     parser.add_argument('--report', action='store_true', 
                        help='Generar y mostrar reporte')
+    parser.add_argument('--backfill-rollups', action='store_true',
+                       help='Reconstruir los rollups horarios/diarios desde el histórico')
+    parser.add_argument('--export', action='store_true',
+                       help='Exportar el histórico de precios de los últimos --days días')
+    parser.add_argument('--import-history', metavar='RUTA',
+                       help='Importar un histórico exportado (dataset Parquet o fichero CSV/JSONL)')
+    parser.add_argument('--compact', action='store_true',
+                       help='Archivar y compactar el histórico según la política de retención')
+    parser.add_argument('--simulate-revisit', action='store_true',
+                       help='Reproducir --days días de histórico con la revisión adaptativa')
+    parser.add_argument('--worker', action='store_true',
+                       help='Modo distribuido: procesar URLs de la cola compartida')
+    parser.add_argument('--coordinator', action='store_true',
+                       help='Modo distribuido: sincronizar la cola, tendencias, alertas y retención')
     
     # Opciones adicionales
     parser.add_argument('--config', default='config/settings.json',
                        help='Archivo de configuración (default: config/settings.json)')
     parser.add_argument('--interval', type=int, default=3600,
                        help='Intervalo en segundos para scheduling (default: 3600)')
+    parser.add_argument('--concurrency', type=int, default=None,
+                       help='Descargas simultáneas (hilos) en scraping (default: config o 1 = secuencial)')
+    parser.add_argument('--workers', type=int, default=None,
+                       help='Procesos worker del dashboard con gunicorn (default: 4 o dashboard.workers)')
+    parser.add_argument('--parse-workers', type=int, default=None,
+                       help='Procesos para parsear HTML en paralelo (default: config o desactivado)')
     parser.add_argument('--days', type=int, default=7,
-                       help='Días para el reporte (default: 7)')
+                       help='Días para el reporte o la exportación (default: 7)')
+    parser.add_argument('--format', choices=archive.FORMATS, default='parquet',
+                       help='Formato de exportación (default: parquet)')
+    parser.add_argument('--output', default=None,
+                       help='Directorio de exportación (default: database.export_dir/<formato>)')
     parser.add_argument('--email', type=str,
                        help='Email para enviar reporte')
     parser.add_argument('--host', default='localhost',
                        help='Host para dashboard (default: localhost)')
     parser.add_argument('--port', type=int, default=5000,
                        help='Puerto para dashboard (default: 5000)')
+    parser.add_argument('--server', choices=SERVERS, default=None,
+                       help='Servidor del dashboard (default: config o dev)')
     parser.add_argument('--debug', action='store_true',
                        help='Modo debug para dashboard')
     parser.add_argument('--verbose', '-v', action='store_true',
@@ -420,7 +1130,9 @@ Para más información: https://github.com/tu-usuario/price-monitor
     args = parser.parse_args()
     
     # Si no se especifica ninguna acción, mostrar ayuda
-    if not any([args.scrape, args.dashboard, args.schedule, args.report]):
+    if not any([args.scrape, args.dashboard, args.schedule, args.report, args.backfill_rollups,
+                args.export, args.import_history, args.compact,
+                args.simulate_revisit, args.worker, args.coordinator]):
         parser.print_help()
         return
     
@@ -431,19 +1143,83 @@ Para más información: https://github.com/tu-usuario/price-monitor
         print("✅ Monitor inicializado correctamente")
         
         # Ejecutar acciones solicitadas
+        if args.backfill_rollups:
+            print("\n📊 Reconstruyendo rollups...")
+            processed = monitor.backfill_rollups()
+            print(f"✅ Rollups reconstruidos a partir de {processed} lecturas")
+        
+        if args.import_history:
+            print(f"\n🗄️ Importando histórico desde {args.import_history}...")
+            imported = monitor.import_history(args.import_history)
+            print(f"✅ {imported} precios importados")
+        
+        if args.export:
+            print(f"\n🗄️ Exportando histórico de los últimos {args.days} días ({args.format})...")
+            export = monitor.export_history(format=args.format, days=args.days, destination=args.output)
+            print(f"✅ {export['rows']} precios exportados a {export['path']} "
+                  f"({export['bytes'] / 1024:.0f} KB, {export['seconds']:.1f}s)")
+        
+        if args.compact:
+            print("\n🧊 Aplicando la política de retención...")
+            compaction = monitor.compact_history()
+            if compaction['uncovered']:
+                print(f"⚠️ Compactación cancelada: {compaction['uncovered']} días sin rollup diario completo "
+                      f"antes de {compaction['cutoff']:%Y-%m-%d}; ejecuta --backfill-rollups")
+            else:
+                print(f"✅ {compaction['deleted']} lecturas anteriores a {compaction['cutoff']:%Y-%m-%d} "
+                      f"compactadas ({compaction['archived']} archivadas), "
+                      f"{compaction['hourly_deleted']} rollups horarios eliminados")
+        
+        if args.simulate_revisit:
+            print(f"\n🔁 Simulando la revisión adaptativa sobre {args.days} días de histórico...")
+            simulation = monitor.simulate_revisit(days=args.days, interval=args.interval)
+            if not simulation:
+                print("⚠️ No hay histórico en ese periodo")
+            else:
+                print(f"   URLs: {simulation['urls']}")
+                print(f"   Peticiones: {simulation['adaptive_requests']} frente a "
+                      f"{simulation['baseline_requests']} ({simulation['saved_pct']:.1f}% ahorradas)")
+                print(f"   Cambios perdidos: {simulation['missed']} de {simulation['changes']} "
+                      f"({simulation['missed_pct']:.1f}%)")
+                print(f"   Retraso medio de detección: {simulation['avg_detection_delay'] / 60:.0f} min")
+        
         if args.scrape:
             print("\n🕷️ Ejecutando scraping...")
-            stats = monitor.scrape_once()
+            stats = monitor.scrape_once(concurrency=args.concurrency, parse_workers=args.parse_workers)
             print(f"\n📊 Resultados:")
             print(f"   ✅ Éxitos: {stats['success']}")
             print(f"   ❌ Errores: {stats['errors']}")
+            if stats['retries']:
+                print(f"   🔁 Reintentos: {stats['retries']} ({stats['recovered']} URLs recuperadas)")
             print(f"   ⏱️ Duración: {stats['duration']:.1f} segundos")
+            if stats['skipped']:
+                print(f"   🔌 Saltadas por circuito abierto: {stats['skipped']}")
+            if stats['resumed']:
+                print(f"   📓 Ciclo reanudado: {stats['resumed']} URLs ya completadas antes de la interrupción")
+            if stats['cache']:
+                cache = stats['cache']
+                print(f"   🗃️ Caché: {cache['hits']} aciertos, {cache['misses']} fallos, "
+                      f"{cache['bytes_saved'] / 1024:.0f} KB ahorrados")
             
             if args.verbose and stats['results']:
                 print("\n📋 Detalle de resultados:")
                 for result in stats['results'][:10]:  # Mostrar solo los primeros 10
                     status_icon = "✅" if result['status'] == 'success' else "❌"
                     print(f"   {status_icon} {result['product']} - {result['store']}: ${result['price']:.2f}")
+            
+            if args.verbose and stats['domains']:
+                print("\n🚦 Espera por dominio:")
+                for host, metrics in stats['domains'].items():
+                    print(f"   {host}: {metrics['requests']} peticiones, "
+                          f"cola máx. {metrics['max_queue_depth']}, espera media {metrics['avg_wait']:.1f}s")
+            
+            if args.verbose and stats['breakers']:
+                print("\n🔌 Circuitos por tienda:")
+                for host, metrics in stats['breakers'].items():
+                    p95 = f"{metrics['p95']:.2f}s" if metrics['p95'] is not None else "-"
+                    print(f"   {host}: {metrics['state']}, timeout {metrics['timeout']:.1f}s, p95 {p95}, "
+                          f"{metrics['failures']} fallos ({metrics['timeouts']} timeouts), "
+                          f"{metrics['skipped']} saltadas")
         
         if args.report:
             print(f"\n📈 Generando reporte de últimos {args.days} días...")
@@ -477,13 +1253,28 @@ Para más información: https://github.com/tu-usuario/price-monitor
         if args.dashboard:
             print(f"\n🌐 Iniciando dashboard en http://{args.host}:{args.port}")
             print("Presiona Ctrl+C para detener")
-            monitor.run_dashboard(host=args.host, port=args.port, debug=args.debug)
+            monitor.run_dashboard(host=args.host, port=args.port, debug=args.debug,
+                                  server=args.server, workers=args.workers,
+                                  schedule_interval=args.interval if args.schedule else None,
+                                  concurrency=args.concurrency)
         
-        if args.schedule:
+        # Con --dashboard el scheduler ya se ejecutó junto al servidor
+        if args.schedule and not args.dashboard:
             print(f"\n⏰ Iniciando scheduler (intervalo: {args.interval}s / {args.interval/3600:.1f}h)")
             print("Presiona Ctrl+C para detener")
-            monitor.run_scheduler(interval=args.interval)
-    
+            monitor.run_scheduler(interval=args.interval, concurrency=args.concurrency,
+                                  parse_workers=args.parse_workers)
+
+        if args.coordinator:
+            print(f"\n🛰️ Iniciando coordinador (intervalo: {args.interval}s)")
+            print("Presiona Ctrl+C para detener")
+            monitor.run_coordinator(interval=args.interval)
+
+        if args.worker:
+            print(f"\n🛰️ Iniciando worker (intervalo: {args.interval}s)")
+            print("Presiona Ctrl+C para detener")
+            monitor.run_worker(interval=args.interval, concurrency=args.concurrency)
+
     except KeyboardInterrupt:
         print("\n\n👋 Programa detenido por el usuario")
     except FileNotFoundError as e:
@@ -0,0 +1,354 @@
+"""
+🗄️ Archive - Exportación e importación columnar del histórico de precios
+=========================================================================
+
+El histórico se lee de ``PriceStore.iter_price_history`` por bloques y se
+escribe como un dataset Parquet particionado al estilo Hive::
+
+    data/exports/price_history/date=2024-05-01/store=amazon/part-<id>.parquet
+
+- ``store`` y ``url`` son columnas de diccionario (cada valor distinto se
+  guarda una vez por fichero), y ``store``/``date`` van además en la ruta, así
+  que filtrar por tienda o por fecha solo lee los ficheros necesarios.
+- Cada exportación se escribe primero en un directorio oculto y después se
+  fusiona con cada partición existente (sin filas repetidas): exportar de
+  nuevo los mismos días no duplica nada y las filas que ya estaban en una
+  partición (p. ej. archivadas antes de que la retención las borrase de la
+  DB) nunca se pierden.
+- ``import_history`` hace el camino inverso (backfills) por lotes. Sus
+  rollups solo se añaden en los intervalos que no tenían ninguno, así que
+  restaurar lecturas compactadas no vuelve a sumarlas a los rollups diarios.
+
+El mismo histórico se puede exportar también a CSV o JSON Lines comprimidos
+con gzip (``benchmarks/archive_bench.py`` compara los tres formatos).
+``append_history`` amplía uno de esos ficheros con cada lote que guarda el
+scheduler (``scheduler.export``).
+
+Parquet requiere ``pyarrow`` (dependencia opcional).
+"""
+
+import csv
+import gzip
+import json
+import logging
+import os
+import shutil
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Iterator, List, Optional
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+FORMATS = ('parquet', 'csv', 'jsonl')
+FIELDS = ('timestamp', 'product_id', 'store', 'price', 'url', 'availability', 'title')
+
+ROW_FILES = {
+    'csv': 'price_history.csv.gz',
+    'jsonl': 'price_history.jsonl.gz'
+}
+
+
+def _require_pyarrow():
+    if not PYARROW_AVAILABLE:
+        raise ImportError("El formato Parquet requiere el paquete 'pyarrow' (pip install pyarrow)")
+
+
+def _schemas():
+    """
+    Esquema de las filas y de las particiones del dataset Parquet.
+    """
+    schema = pa.schema([
+        ('timestamp', pa.timestamp('us')),
+        ('product_id', pa.int64()),
+        ('store', pa.dictionary(pa.int32(), pa.string())),
+        ('price', pa.float64()),
+        ('url', pa.dictionary(pa.int32(), pa.string())),
+        ('availability', pa.bool_()),
+        ('title', pa.string()),
+        ('date', pa.string())
+    ])
+    partitioning = pa.schema([('date', pa.string()), ('store', pa.string())])
+    return schema, partitioning
+
+
+def _since(days: Optional[int]) -> Optional[datetime]:
+    """
+    Inicio del primer día completo de la ventana (None = todo el histórico).
+    """
+    if days is None:
+        return None
+    return (datetime.now() - timedelta(days=days)).replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def _record_batches(records: Iterable, schema, chunk_size: int) -> Iterator:
+    """
+    Agrupa registros PriceHistory en RecordBatches de ``chunk_size`` filas.
+    """
+    columns: Dict[str, List] = {name: [] for name in FIELDS}
+    for record in records:
+        for name in FIELDS:
+            columns[name].append(getattr(record, name))
+        if len(columns['timestamp']) >= chunk_size:
+            yield _to_batch(columns, schema)
+            columns = {name: [] for name in FIELDS}
+    if columns['timestamp']:
+        yield _to_batch(columns, schema)
+
+
+def _to_batch(columns: Dict[str, List], schema):
+    columns['date'] = [timestamp.date().isoformat() for timestamp in columns['timestamp']]
+    return pa.RecordBatch.from_pydict(columns, schema=schema)
+
+
+def _row_path(destination: str, format: str) -> str:
+    return os.path.join(destination, ROW_FILES[format])
+
+
+def _parquet_files(folder: str) -> List[str]:
+    if not os.path.isdir(folder):
+        return []
+    return sorted(
+        os.path.join(folder, name) for name in os.listdir(folder)
+        if name.endswith('.parquet') and not name.startswith(('.', '_'))
+    )
+
+
+def _merge_partition(new_folder: str, folder: str):
+    """
+    Fusiona los ficheros de una partición recién exportada con los que ya tenía.
+
+    El resultado (sin filas repetidas, por orden de ``timestamp``) se escribe
+    en un fichero nuevo antes de borrar los anteriores, así que un fallo a
+    mitad nunca deja la partición sin sus datos.
+    """
+    new = ds.dataset(_parquet_files(new_folder), format='parquet').to_table()
+    existing = _parquet_files(folder)
+    table = new
+    if existing:
+        table = pa.concat_tables([ds.dataset(existing, format='parquet').to_table(), new],
+                                 promote_options='permissive')
+        # group_by no admite columnas de diccionario: se agrupa sobre texto
+        plain = table.cast(pa.schema([
+            (field.name, field.type.value_type if pa.types.is_dictionary(field.type) else field.type)
+            for field in table.schema
+        ]))
+        table = plain.group_by(plain.schema.names, use_threads=False).aggregate([]).cast(new.schema)
+    table = table.sort_by('timestamp')
+
+    os.makedirs(folder, exist_ok=True)
+    name = f"part-{uuid.uuid4().hex}.parquet"
+    pq.write_table(table, os.path.join(folder, f".{name}"), compression='zstd')
+    os.replace(os.path.join(folder, f".{name}"), os.path.join(folder, name))
+    for path in existing:
+        os.remove(path)
+
+
+def _export_parquet(records: Iterable, destination: str, chunk_size: int):
+    _require_pyarrow()
+    schema, partitioning = _schemas()
+    # Los directorios que empiezan por '.' no se leen como parte del dataset
+    staging = tempfile.mkdtemp(prefix='.export-', dir=destination)
+    try:
+        ds.write_dataset(
+            _record_batches(records, schema, chunk_size),
+            staging,
+            schema=schema,
+            format='parquet',
+            partitioning=ds.partitioning(partitioning, flavor='hive'),
+            existing_data_behavior='overwrite_or_ignore',
+            file_options=ds.ParquetFileFormat().make_write_options(compression='zstd'),
+            min_rows_per_group=min(chunk_size, 1 << 16)
+        )
+        for folder, _, names in os.walk(staging):
+            if any(name.endswith('.parquet') for name in names):
+                _merge_partition(folder, os.path.join(destination, os.path.relpath(folder, staging)))
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+
+
+def _field(record, name: str):
+    # Filas de la DB (atributos) o registros de BufferedPriceWriter (diccionarios)
+    return record.get(name) if isinstance(record, dict) else getattr(record, name)
+
+
+def _export_rows(records: Iterable, path: str, format: str, append: bool = False) -> int:
+    count = 0
+    header = not (append and os.path.exists(path) and os.path.getsize(path) > 0)
+    with gzip.open(path, 'at' if append else 'wt', encoding='utf-8', newline='') as output:
+        writer = csv.writer(output) if format == 'csv' else None
+        if writer and header:
+            writer.writerow(FIELDS)
+        for record in records:
+            row = {name: _field(record, name) for name in FIELDS}
+            row['timestamp'] = row['timestamp'].isoformat()
+            if writer:
+                writer.writerow(row.values())
+            else:
+                output.write(json.dumps(row, ensure_ascii=False))
+                output.write('\n')
+            count += 1
+    return count
+
+
+def export_history(store, destination: str, format: str = 'parquet', days: Optional[int] = None,
+                   chunk_size: int = 50000, until: Optional[datetime] = None) -> Dict:
+    """
+    Exporta el histórico de precios leyéndolo de la DB por bloques.
+
+    Args:
+        store: Instancia de PriceStore
+        destination: Directorio de salida (raíz del dataset en Parquet)
+        format: 'parquet', 'csv' o 'jsonl' (estos dos comprimidos con gzip)
+        days: Exportar solo los últimos ``days`` días completos (None = todo)
+        chunk_size: Filas leídas de la DB y escritas por bloque
+        until: Exportar solo lecturas anteriores a este instante (None = hasta ahora)
+
+    Returns:
+        Diccionario con rows, bytes, seconds y path
+    """
+    if format not in FORMATS:
+        raise ValueError(f"Formato no soportado: {format} (usa uno de {FORMATS})")
+
+    os.makedirs(destination, exist_ok=True)
+    rows = [0]
+
+    def counted(records):
+        for record in records:
+            rows[0] += 1
+            yield record
+
+    start = time.perf_counter()
+    records = counted(store.iter_price_history(chunk_size=chunk_size, since=_since(days), until=until))
+    if format == 'parquet':
+        _export_parquet(records, destination, chunk_size)
+        path = destination
+    else:
+        path = _row_path(destination, format)
+        _export_rows(records, path, format)
+    seconds = time.perf_counter() - start
+
+    stats = {'rows': rows[0], 'bytes': _size(path), 'seconds': seconds, 'path': path}
+    logger.info(f"🗄️ {stats['rows']} precios exportados a {path} ({format}, "
+                f"{stats['bytes'] / 1024:.0f} KB, {seconds:.1f}s)")
+    return stats
+
+
+def append_history(records: Iterable[Dict], path: str, format: Optional[str] = None) -> int:
+    """
+    Añade lecturas al final de un fichero CSV o JSON Lines comprimido con gzip.
+
+    Cada llamada escribe un miembro gzip nuevo, que ``read_history`` (y
+    ``--import-history``) leen como un solo fichero; la cabecera del CSV solo
+    se escribe si el fichero no existía.
+
+    Args:
+        records: Registros con los campos de ``FIELDS``
+        path: Fichero de salida (``.csv.gz`` o ``.jsonl.gz``)
+        format: 'csv' o 'jsonl' (por defecto se deduce de ``path``)
+
+    Returns:
+        Número de registros añadidos
+    """
+    format = format or _infer_format(path)
+    if format not in ROW_FILES:
+        raise ValueError(f"Formato no soportado: {format} (usa uno de {tuple(ROW_FILES)})")
+    folder = os.path.dirname(path)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+    return _export_rows(records, path, format, append=True)
+
+
+def _size(path: str) -> int:
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    return sum(
+        os.path.getsize(os.path.join(folder, name))
+        for folder, _, names in os.walk(path)
+        for name in names
+    )
+
+
+def _infer_format(source: str) -> str:
+    if os.path.isdir(source):
+        return 'parquet'
+    for format, name in ROW_FILES.items():
+        if source.endswith(name.split('.', 1)[1]):
+            return format
+    raise ValueError(f"No se puede deducir el formato de {source}")
+
+
+def read_history(source: str, format: Optional[str] = None, batch_size: int = 10000) -> Iterator[Dict]:
+    """
+    Lee un histórico exportado registro a registro.
+
+    Args:
+        source: Directorio del dataset Parquet o fichero CSV/JSONL exportado
+        format: 'parquet', 'csv' o 'jsonl' (por defecto se deduce de ``source``)
+        batch_size: Filas leídas por bloque del dataset Parquet
+
+    Yields:
+        Diccionarios con los campos de ``FIELDS``, listos para ``BufferedPriceWriter.add``
+    """
+    format = format or _infer_format(source)
+
+    if format == 'parquet':
+        _require_pyarrow()
+        _, partitioning = _schemas()
+        dataset = ds.dataset(source, format='parquet',
+                             partitioning=ds.partitioning(partitioning, flavor='hive'))
+        for batch in dataset.to_batches(columns=list(FIELDS), batch_size=batch_size):
+            yield from batch.to_pylist()
+        return
+
+    with gzip.open(source, 'rt', encoding='utf-8', newline='') as data:
+        rows = csv.DictReader(data) if format == 'csv' else map(json.loads, data)
+        for row in rows:
+            row['timestamp'] = datetime.fromisoformat(row['timestamp'])
+            if format == 'csv':
+                row['product_id'] = int(row['product_id'])
+                row['price'] = float(row['price'])
+                row['availability'] = row['availability'] == 'True'
+            yield row
+
+
+def import_history(store, source: str, format: Optional[str] = None, batch_size: int = 10000) -> int:
+    """
+    Importa un histórico exportado (backfill) escribiéndolo por lotes.
+
+    Cada lote se guarda con sus rollups en una tabla aparte; al terminar (o
+    si la importación falla a mitad, con los lotes ya guardados) solo pasan a
+    los rollups los de intervalos que no tenían ninguno. Las filas que ya
+    existan en la DB no se detectan, así que no conviene importar dos veces el
+    mismo export.
+
+    Args:
+        store: Instancia de PriceStore
+
+    Returns:
+        Número de registros importados
+    """
+    count = 0
+    batch = []
+    try:
+        for record in read_history(source, format, batch_size=batch_size):
+            batch.append(record)
+            if len(batch) >= batch_size:
+                count += store.save_imported_history_many(batch)
+                batch = []
+                if count % (batch_size * 10) == 0:
+                    logger.info(f"🗄️ {count} precios importados")
+        count += store.save_imported_history_many(batch)
+    finally:
+        added = store.apply_imported_rollups()
+    logger.info(f"🗄️ {count} precios importados desde {source} ({added} rollups nuevos)")
+    return count
@@ -0,0 +1,384 @@
+"""
+🔌 Breakers - Circuit breakers y timeouts adaptativos por tienda
+================================================================
+
+Cuando una tienda cae, cada una de sus URLs esperaba el timeout completo
+(``scraping.timeout``, 30 s por defecto) antes de fallar, y una sola caída
+podía alargar el ciclo horas. ``StoreBreakers`` mantiene por host:
+
+- Un circuit breaker: tras ``failure_threshold`` fallos seguidos de la tienda
+  (timeouts, errores de conexión, 5xx, 429) se abre y sus URLs se saltan
+  (``CircuitOpenError``) durante ``open_seconds``. Pasado ese tiempo pasa a
+  semiabierto y deja pasar una única petición de prueba: si va bien se
+  cierra; si falla vuelve a abrirse con el doble de espera (hasta
+  ``max_open_seconds``). Un 404, un HTML sin precio o cualquier otro error
+  que no sea de la tienda no cuentan como fallo (la tienda respondió), pero
+  tampoco como éxito: no cierran un circuito semiabierto, solo liberan la
+  prueba para la siguiente petición.
+- Un timeout adaptativo: ``timeout_factor`` veces el percentil
+  ``timeout_percentile`` de las últimas ``window`` latencias correctas,
+  entre ``min_timeout`` y el timeout configurado. La latencia es solo la de
+  la petición HTTP: el parseo, que ``request`` ejecuta aparte, no la infla. Cada timeout añade el
+  propio límite a la ventana, así que si la tienda se vuelve más lenta el
+  límite crece en lugar de abrir el circuito por error.
+
+Los estados se conservan entre ciclos; los contadores se reinician con
+``reset_metrics`` al comienzo de cada uno.
+"""
+
+import logging
+import threading
+import time
+from collections import defaultdict, deque
+from typing import Any, Callable, Dict, Optional, TypeVar
+from urllib.error import HTTPError as URLLibHTTPError, URLError
+
+from politeness import DomainScheduler
+
+try:
+    from requests.exceptions import ConnectionError as RequestsConnectionError
+    from requests.exceptions import HTTPError as RequestsHTTPError
+    from requests.exceptions import Timeout as RequestsTimeout
+    TIMEOUT_ERRORS = (TimeoutError, RequestsTimeout)
+    CONNECTION_ERRORS = (ConnectionError, RequestsConnectionError)
+except ImportError:
+    RequestsHTTPError = None
+    TIMEOUT_ERRORS = (TimeoutError,)
+    CONNECTION_ERRORS = (ConnectionError,)
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitOpenError(Exception):
+    """
+    La URL no se pidió porque el circuito de su tienda está abierto.
+    """
+
+    def __init__(self, host: str, retry_in: float):
+        super().__init__(f"Circuito abierto para {host} (reintento en {retry_in:.0f}s)")
+        self.host = host
+        self.retry_in = retry_in
+
+
+def _status_code(error: Exception) -> Optional[int]:
+    # Código HTTP de un error de requests o de urllib; None si no es una respuesta HTTP
+    if RequestsHTTPError is not None and isinstance(error, RequestsHTTPError):
+        return getattr(error.response, 'status_code', None)
+    if isinstance(error, URLLibHTTPError):
+        return error.code
+    return None
+
+
+def is_store_failure(error: Exception) -> bool:
+    """
+    True si el error indica que la tienda no responde (y no un fallo de la URL):
+    timeouts, errores de conexión y respuestas 5xx o 429.
+
+    Otros ``OSError`` (un fichero, un permiso) o los errores del parser no
+    dicen nada de la tienda.
+    """
+    status = _status_code(error)
+    if status is not None:
+        return status >= 500 or status == 429
+    if isinstance(error, URLError) and isinstance(error.reason, Exception):
+        # urllib envuelve los timeouts y errores de conexión
+        error = error.reason
+    return isinstance(error, TIMEOUT_ERRORS + CONNECTION_ERRORS)
+
+
+class CircuitBreaker:
+    """
+    Máquina de estados cerrado → abierto → semiabierto de una tienda.
+    """
+
+    def __init__(self, failure_threshold: int = 5, open_seconds: float = 60,
+                 max_open_seconds: float = 900):
+        self.failure_threshold = failure_threshold
+        self.open_seconds = open_seconds
+        self.max_open_seconds = max_open_seconds
+
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.cooldown = open_seconds
+        self.probing = False
+
+    def retry_in(self, now: float) -> float:
+        """
+        Segundos hasta que se permita la petición de prueba (0 si ya se permite).
+        """
+        if self.state != OPEN:
+            return 0.0
+        return max(0.0, self.opened_at + self.cooldown - now)
+
+    def blocked(self, now: float) -> bool:
+        """
+        True si una petición sería rechazada ahora (sin reservar la prueba).
+        """
+        if self.state == OPEN:
+            return self.retry_in(now) > 0
+        return self.state == HALF_OPEN and self.probing
+
+    def enter(self, now: float) -> bool:
+        """
+        Decide si se admite una petición; en semiabierto reserva la única prueba.
+
+        Returns:
+            True si se admite; False si debe saltarse
+        """
+        if self.state == OPEN:
+            if self.retry_in(now) > 0:
+                return False
+            self.state = HALF_OPEN
+            self.probing = False
+        if self.state == HALF_OPEN:
+            if self.probing:
+                return False
+            self.probing = True
+        return True
+
+    def success(self) -> bool:
+        """
+        Registra una respuesta de la tienda.
+
+        Returns:
+            True si el circuito se acaba de cerrar
+        """
+        if self.state == OPEN:
+            # Respuesta de una petición lanzada antes de abrirse: no decide nada
+            return False
+        closed = self.state == HALF_OPEN
+        self.state = CLOSED
+        self.failures = 0
+        self.cooldown = self.open_seconds
+        self.probing = False
+        return closed
+
+    def release(self):
+        """
+        Registra una petición que no dice nada de la tienda: no cambia el
+        estado, pero en semiabierto deja libre la prueba para otra petición.
+        """
+        if self.state == HALF_OPEN:
+            self.probing = False
+
+    def failure(self, now: float) -> bool:
+        """
+        Registra un fallo de la tienda.
+
+        Returns:
+            True si el circuito se acaba de abrir
+        """
+        self.failures += 1
+        if self.state == HALF_OPEN:
+            self.cooldown = min(self.max_open_seconds, self.cooldown * 2)
+        elif self.state == OPEN or self.failures < self.failure_threshold:
+            return False
+        self.state = OPEN
+        self.opened_at = now
+        self.probing = False
+        return True
+
+
+class _Store:
+    """
+    Circuito y latencias recientes de una tienda.
+    """
+
+    def __init__(self, breaker: CircuitBreaker, window: int):
+        self.breaker = breaker
+        self.latencies = deque(maxlen=window)
+
+
+class StoreBreakers:
+    """
+    Circuit breaker y timeout adaptativo por host. Seguro entre hilos.
+    """
+
+    def __init__(self, default_timeout: float = 30, failure_threshold: int = 5,
+                 open_seconds: float = 60, max_open_seconds: float = 900,
+                 timeout_percentile: float = 0.95, timeout_factor: float = 3.0,
+                 min_timeout: float = 2.0, min_samples: int = 10, window: int = 100):
+        """
+        Args:
+            default_timeout: Timeout máximo y el usado hasta tener ``min_samples`` latencias
+            failure_threshold: Fallos seguidos que abren el circuito
+            open_seconds: Espera inicial antes de la petición de prueba
+            max_open_seconds: Espera máxima tras pruebas fallidas consecutivas
+            timeout_percentile: Percentil de latencia en el que se basa el timeout
+            timeout_factor: Margen sobre ese percentil
+            min_timeout: Timeout mínimo
+            min_samples: Latencias necesarias para adaptar el timeout
+            window: Latencias recientes que se conservan por tienda
+        """
+        self.default_timeout = default_timeout
+        self.failure_threshold = failure_threshold
+        self.open_seconds = open_seconds
+        self.max_open_seconds = max_open_seconds
+        self.timeout_percentile = timeout_percentile
+        self.timeout_factor = timeout_factor
+        self.min_timeout = min_timeout
+        self.min_samples = min_samples
+        self.window = window
+
+        self._stores: Dict[str, _Store] = {}
+        self._lock = threading.Lock()
+        self.reset_metrics()
+
+    @classmethod
+    def from_config(cls, scraping_config: Dict) -> Optional['StoreBreakers']:
+        """
+        Crea los breakers a partir de ``scraping.breakers``; devuelve None si están desactivados.
+        """
+        config = scraping_config.get('breakers', {})
+        if not config.get('enabled', True):
+            return None
+        return cls(
+            default_timeout=scraping_config.get('timeout', 30),
+            failure_threshold=config.get('failure_threshold', 5),
+            open_seconds=config.get('open_seconds', 60),
+            max_open_seconds=config.get('max_open_seconds', 900),
+            timeout_percentile=config.get('timeout_percentile', 0.95),
+            timeout_factor=config.get('timeout_factor', 3.0),
+            min_timeout=config.get('min_timeout', 2.0),
+            min_samples=config.get('min_samples', 10),
+            window=config.get('window', 100)
+        )
+
+    def _store(self, host: str) -> _Store:
+        store = self._stores.get(host)
+        if store is None:
+            breaker = CircuitBreaker(self.failure_threshold, self.open_seconds, self.max_open_seconds)
+            store = self._stores[host] = _Store(breaker, self.window)
+        return store
+
+    @staticmethod
+    def _percentile(samples, fraction: float) -> float:
+        ordered = sorted(samples)
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+    def _timeout(self, store: _Store) -> float:
+        if len(store.latencies) < self.min_samples:
+            return self.default_timeout
+        adaptive = self._percentile(store.latencies, self.timeout_percentile) * self.timeout_factor
+        return min(self.default_timeout, max(self.min_timeout, adaptive))
+
+    def timeout_for(self, url: str) -> float:
+        """
+        Timeout actual para las peticiones a la tienda de ``url``.
+        """
+        with self._lock:
+            return self._timeout(self._store(DomainScheduler.host_for(url)))
+
+    def reset_metrics(self):
+        """
+        Reinicia los contadores (los estados y latencias se conservan).
+        """
+        with self._lock:
+            self._metrics = defaultdict(lambda: {'requests': 0, 'failures': 0, 'timeouts': 0, 'skipped': 0})
+
+    def check(self, url: str):
+        """
+        Lanza ``CircuitOpenError`` si ahora mismo se saltaría ``url``, sin
+        reservar la petición de prueba. Sirve para no esperar turno en la
+        cortesía por dominio para nada.
+        """
+        host = DomainScheduler.host_for(url)
+        with self._lock:
+            breaker = self._store(host).breaker
+            now = time.monotonic()
+            if breaker.blocked(now):
+                self._metrics[host]['skipped'] += 1
+                raise CircuitOpenError(host, breaker.retry_in(now))
+
+    def request(self, url: str, send: Callable[..., Any],
+                parse: Optional[Callable[[str, Any], T]] = None) -> T:
+        """
+        Ejecuta ``send(url, timeout=...)`` si el circuito lo permite y registra
+        el resultado y la latencia.
+
+        Args:
+            url: URL a pedir
+            send: Función que hace la petición HTTP
+            parse: Función ``parse(url, respuesta)`` opcional. Se ejecuta fuera
+                de la medida de latencia, pero sus errores cuentan como los de
+                ``send`` para el circuito
+
+        Returns:
+            El resultado de ``parse``, o la respuesta si no hay ``parse``
+
+        Raises:
+            CircuitOpenError: Si el circuito de la tienda está abierto
+        """
+        host = DomainScheduler.host_for(url)
+        with self._lock:
+            store = self._store(host)
+            now = time.monotonic()
+            if not store.breaker.enter(now):
+                self._metrics[host]['skipped'] += 1
+                raise CircuitOpenError(host, store.breaker.retry_in(now))
+            timeout = self._timeout(store)
+            self._metrics[host]['requests'] += 1
+
+        start = time.monotonic()
+        elapsed = None
+        try:
+            result = send(url, timeout=timeout)
+            elapsed = time.monotonic() - start
+            if parse is not None:
+                result = parse(url, result)
+        except Exception as e:
+            self._record(host, store, e, timeout, elapsed)
+            raise
+        self._record(host, store, None, timeout, elapsed)
+        return result
+
+    def _record(self, host: str, store: _Store, error: Optional[Exception], timeout: float,
+                elapsed: Optional[float]):
+        with self._lock:
+            if error is None:
+                store.latencies.append(elapsed)
+                if store.breaker.success():
+                    logger.info(f"🔌 Circuito cerrado para {host}: la tienda vuelve a responder")
+                return
+            if not is_store_failure(error):
+                # Un 404 o un error del parser: ni abre ni cierra el circuito
+                store.breaker.release()
+                return
+            metrics = self._metrics[host]
+            metrics['failures'] += 1
+            if isinstance(error, TIMEOUT_ERRORS):
+                metrics['timeouts'] += 1
+                # El límite se queda corto: se añade como muestra para que crezca
+                store.latencies.append(timeout)
+            if store.breaker.failure(time.monotonic()):
+                logger.warning(f"🔌 Circuito abierto para {host} tras {store.breaker.failures} fallos "
+                               f"seguidos; se reintenta en {store.breaker.cooldown:.0f}s")
+
+    def metrics(self) -> Dict[str, Dict]:
+        """
+        Estado por tienda: circuito, fallos seguidos, timeout actual, p50/p95
+        de latencia y contadores del ciclo (peticiones, fallos, timeouts, saltadas).
+        """
+        with self._lock:
+            now = time.monotonic()
+            snapshot = {}
+            for host, store in self._stores.items():
+                latencies = store.latencies
+                data = dict(self._metrics[host])
+                data.update({
+                    'state': store.breaker.state,
+                    'consecutive_failures': store.breaker.failures,
+                    'retry_in': store.breaker.retry_in(now),
+                    'timeout': self._timeout(store),
+                    'p50': self._percentile(latencies, 0.50) if latencies else None,
+                    'p95': self._percentile(latencies, 0.95) if latencies else None
+                })
+                snapshot[host] = data
+            return snapshot
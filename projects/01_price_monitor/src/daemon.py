@@ -0,0 +1,407 @@
+"""
+⏲️ Daemon - Planificador continuo con cola de vencimientos
+==========================================================
+
+El scheduler clásico (``scrape_once`` + ``sleep(interval)``) tiene un periodo
+real de ``interval + duración del ciclo``, lanza todas las peticiones a la vez
+al principio de cada ciclo y una tienda lenta retrasa a todos los productos.
+
+``ScrapeDaemon`` programa cada URL por separado:
+
+- Cada URL tiene su próximo vencimiento en un heap (``DueQueue``). Al
+  terminar, se reprograma a ``vencimiento anterior + periodo``, así que el
+  periodo no deriva aunque el scraping tarde.
+- Las URLs nuevas se reparten uniformemente dentro de su periodo (e
+  intercaladas por tienda), de modo que la carga es continua en lugar de
+  concentrarse al principio de cada hora.
+- Con ``scheduler.adaptive`` el periodo de cada URL sale de su tasa de
+  cambio observada (``RevisitPlanner``), dentro de unos límites y de un
+  presupuesto global de peticiones por hora.
+- Los productos cuyo último precio está cerca de ``target_price`` se revisan
+  más a menudo y tienen prioridad cuando coinciden en el tiempo.
+- Un pool fijo de hilos saca trabajos vencidos sin parar; la cortesía por
+  dominio (``DomainScheduler``) y los circuit breakers por tienda
+  (``StoreBreakers``) siguen aplicándose en cada petición.
+- Un fallo transitorio se reintenta con el backoff de ``RetryPolicy``
+  (``scraping.retries``), como en ``scrape_once``: el reintento vuelve a la
+  misma cola y, al terminar, la URL sigue con su vencimiento original.
+
+El daemon no usa ``CycleJournal``: no hay ciclos que reanudar. Cada URL se
+guarda en cuanto se scrapea y, tras un reinicio, las URLs se reparten de nuevo
+a lo largo de su periodo, así que ninguna espera más de un periodo.
+
+El hilo principal hace el mantenimiento periódico: volcar precios y
+tendencias, recargar la configuración, alertas y retención.
+"""
+
+import heapq
+import itertools
+import logging
+import math
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional, Tuple
+
+from breakers import CircuitOpenError
+from politeness import interleave_by_domain
+from revisit import RevisitPlanner
+
+logger = logging.getLogger(__name__)
+
+
+class DueQueue:
+    """
+    Cola de prioridad por instante de vencimiento (``time.monotonic``).
+    """
+
+    def __init__(self):
+        self._heap = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._closed = False
+
+    def push(self, due: float, item: Any, priority: int = 0):
+        """
+        Programa ``item`` para ``due``; a igual vencimiento sale antes la mayor prioridad.
+        """
+        with self._cond:
+            heapq.heappush(self._heap, (due, -priority, next(self._seq), item))
+            self._cond.notify()
+
+    def pop(self) -> Optional[Tuple[Any, float]]:
+        """
+        Espera hasta que venza el primer trabajo y lo devuelve.
+
+        Returns:
+            Tupla (trabajo, vencimiento), o None si la cola se cerró
+        """
+        with self._cond:
+            while not self._closed:
+                timeout = None
+                if self._heap:
+                    due, _, _, item = self._heap[0]
+                    timeout = due - time.monotonic()
+                    if timeout <= 0:
+                        heapq.heappop(self._heap)
+                        return item, due
+                self._cond.wait(timeout)
+            return None
+
+    def close(self):
+        """
+        Despierta a todos los que esperan en ``pop`` para que terminen.
+        """
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+
+class _Job:
+    """
+    Una URL de un producto configurado.
+    """
+
+    def __init__(self, key: Tuple[str, str], product, product_config: Dict, url: str):
+        self.key = key
+        self.product = product
+        self.config = product_config
+        self.url = url
+        self.last_success: Optional[float] = None
+        # Reintentos hechos y vencimiento original mientras se reintenta
+        self.attempts = 0
+        self.retry_of: Optional[float] = None
+
+
+class ScrapeDaemon:
+    """
+    Pool de workers que scrapea cada URL cuando vence.
+    """
+
+    def __init__(self, monitor, interval: float = 3600, workers: int = 4,
+                 near_target_margin: float = 0.1, near_target_factor: float = 0.25,
+                 housekeeping_interval: float = 30, revisit: RevisitPlanner = None):
+        """
+        Args:
+            monitor: PriceMonitor con la DB, el scraper y el resto de componentes
+            interval: Periodo de revisión normal de cada URL, en segundos
+            workers: Hilos que scrapean en paralelo
+            near_target_margin: Un producto está "cerca del objetivo" si su último
+                precio es <= target_price * (1 + margin)
+            near_target_factor: Fracción del periodo para productos cerca del objetivo
+            housekeeping_interval: Segundos entre volcados y tareas de mantenimiento
+            revisit: Planificador adaptativo; sin él todas las URLs usan ``interval``
+        """
+        self.monitor = monitor
+        self.interval = interval
+        self.workers = workers
+        self.near_target_margin = near_target_margin
+        self.near_target_factor = near_target_factor
+        self.housekeeping_interval = housekeeping_interval
+        self.revisit = revisit
+        self.planned_per_hour = 0.0
+
+        self.queue = DueQueue()
+        self._jobs: Dict[Tuple[str, str], _Job] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._stats = self._new_stats()
+        self._last_alerts = time.monotonic()
+
+    @classmethod
+    def from_config(cls, monitor, interval: float, workers: int = None) -> 'ScrapeDaemon':
+        """
+        Crea el daemon con las opciones de la sección ``scheduler``.
+        """
+        config = monitor.config.get('scheduler', {})
+        return cls(
+            monitor,
+            interval=interval,
+            workers=workers or config.get('workers', 4),
+            near_target_margin=config.get('near_target_margin', 0.1),
+            near_target_factor=config.get('near_target_factor', 0.25),
+            housekeeping_interval=config.get('housekeeping_interval', 30),
+            revisit=RevisitPlanner.from_config(config.get('adaptive'), default_interval=interval)
+        )
+
+    @staticmethod
+    def _new_stats() -> Dict:
+        return {'success': 0, 'errors': 0, 'skipped': 0, 'retries': 0, 'recovered': 0, 'results': [], 'lags': []}
+
+    def _merge_stats(self, stats: Dict):
+        # Suma las estadísticas de un scraping a las del periodo; llamar con el lock
+        for name in ('success', 'errors', 'skipped', 'retries', 'recovered'):
+            self._stats[name] += stats[name]
+        self._stats['results'].extend(stats['results'])
+
+    def _near_target(self, job: _Job) -> bool:
+        target = job.config.get('target_price')
+        latest = self.monitor.trends.latest_price(job.product.id)
+        return bool(target) and latest is not None and latest <= target * (1 + self.near_target_margin)
+
+    def _schedule(self, job: _Job, due: float):
+        """
+        Encola ``job``; los productos cerca del objetivo salen antes en caso de empate.
+        """
+        near = self._near_target(job)
+        self.queue.push(due, job, priority=1 if near else 0)
+
+    def _is_current(self, job: _Job) -> bool:
+        # Un trabajo eliminado (o eliminado y vuelto a añadir) deja de ser el actual
+        return self._jobs.get(job.key) is job
+
+    def period(self, job: _Job) -> float:
+        """
+        Periodo de revisión de la URL (adaptativo si hay ``revisit``): más corto
+        si el producto está cerca del objetivo.
+        """
+        period = self.revisit.interval(job.url) if self.revisit else self.interval
+        return period * self.near_target_factor if self._near_target(job) else period
+
+    def sync_jobs(self):
+        """
+        Alinea los trabajos con los productos configurados: añade las URLs
+        nuevas (repartidas a lo largo de su periodo) y olvida las eliminadas.
+        """
+        resolved, failed = self.monitor.product_cache.resolve(self.monitor.config['products'])
+        for product_config, error in failed:
+            logger.error(f"❌ Error procesando producto {product_config['name']}: {str(error)}")
+
+        wanted = {}
+        for product_config in self.monitor.config['products']:
+            product = resolved.get(product_config['name'])
+            if product is None:
+                continue
+            for url in product_config['urls']:
+                wanted[(product_config['name'], url)] = (product, product_config)
+
+        new_jobs = []
+        with self._lock:
+            # Los trabajos eliminados se descartan cuando salen de la cola
+            for key in self._jobs.keys() - wanted.keys():
+                del self._jobs[key]
+
+            for key, (product, product_config) in wanted.items():
+                job = self._jobs.get(key)
+                if job is None:
+                    job = self._jobs[key] = _Job(key, product, product_config, key[1])
+                    new_jobs.append(job)
+                else:
+                    job.product, job.config = product, product_config
+
+            if self.revisit:
+                self._rebalance()
+
+        now = time.monotonic()
+        new_jobs = interleave_by_domain(new_jobs, url_of=lambda job: job.url)
+        for position, job in enumerate(new_jobs):
+            self._schedule(job, now + self.period(job) * position / len(new_jobs))
+
+        if new_jobs:
+            logger.info(f"⏲️ {len(new_jobs)} URLs programadas ({len(self._jobs)} en total)")
+
+    def _worker(self):
+        while True:
+            item = self.queue.pop()
+            if item is None:
+                return
+            job, due = item
+            if not self._is_current(job):
+                continue
+
+            lag = time.monotonic() - due
+            # Un reintento conserva la fase: se reprograma desde el vencimiento original
+            if job.retry_of is not None:
+                due, job.retry_of = job.retry_of, None
+            retry_in = None
+            try:
+                price_data = self.monitor._scrape_url(job.url)
+                # El guardado puede volcar el lote a la DB: se hace fuera del lock
+                stats = self._new_stats()
+                self.monitor._record_attempt(stats, job.product, job.url, job.attempts, price_data)
+                with self._lock:
+                    self._merge_stats(stats)
+                    self._stats['lags'].append(lag)
+                    if price_data and self.revisit:
+                        self.revisit.observe(job.url, price_data['price'], time.time())
+                if price_data:
+                    job.last_success = time.monotonic()
+            except CircuitOpenError:
+                with self._lock:
+                    self._stats['skipped'] += 1
+            except Exception as e:
+                stats = self._new_stats()
+                retry_in = self.monitor._retry_delay(stats, job.url, job.attempts, e)
+                with self._lock:
+                    self._merge_stats(stats)
+            finally:
+                if retry_in is not None and self._is_current(job):
+                    job.attempts += 1
+                    job.retry_of = due
+                    self.queue.push(time.monotonic() + retry_in, job, priority=1)
+                else:
+                    job.attempts = 0
+                    self._reschedule(job, due)
+
+    def _reschedule(self, job: _Job, due: float):
+        """
+        Siguiente vencimiento a partir del anterior (no del final del scraping);
+        si el daemon va tan retrasado que ya pasó, se saltan los periodos perdidos.
+        """
+        if not self._is_current(job):
+            return
+        period = self.period(job)
+        next_due = due + period
+        now = time.monotonic()
+        if next_due <= now:
+            next_due += math.ceil((now - next_due) / period) * period
+        self._schedule(job, next_due)
+
+    def _rebalance(self):
+        # Ajusta los periodos al presupuesto de peticiones; llamar con el lock
+        urls = [job.url for job in self._jobs.values()]
+        self.revisit.rebalance(urls)
+        self.planned_per_hour = self.revisit.requests_per_hour(urls)
+
+    def metrics(self) -> Dict:
+        """
+        Frescura de los datos: trabajos, URLs en cola y antigüedad del último éxito.
+        """
+        now = time.monotonic()
+        staleness = [now - job.last_success for job in list(self._jobs.values()) if job.last_success]
+        return {
+            'jobs': len(self._jobs),
+            'queued': len(self.queue),
+            'never_succeeded': len(self._jobs) - len(staleness),
+            'max_staleness': max(staleness, default=0.0)
+        }
+
+    def housekeeping(self):
+        """
+        Vuelca precios y tendencias, recarga la configuración, evalúa alertas
+        cada ``interval`` y aplica la retención.
+        """
+        if self.monitor._reload_products_if_changed():
+            self.sync_jobs()
+
+        # Con el lock solo se cambian los contadores: la escritura y las alertas
+        # van fuera para que los workers no esperen a la DB
+        with self._lock:
+            stats, self._stats = self._stats, self._new_stats()
+            if self.revisit:
+                self._rebalance()
+
+        self.monitor.price_writer.flush()
+        self.monitor.trends.save(self.monitor.store)
+        if time.monotonic() - self._last_alerts >= self.interval:
+            self._last_alerts = time.monotonic()
+            self.monitor.check_alerts()
+
+        if self.monitor.retention:
+            try:
+                self.monitor.retention.run_if_due(self.monitor.store)
+            except Exception as e:
+                logger.error(f"❌ Error en la compactación del histórico: {str(e)}")
+
+        lags = stats['lags']
+        metrics = self.metrics()
+        logger.info(
+            f"⏲️ {stats['success']} éxitos ({stats['recovered']} tras reintentar), {stats['errors']} errores, "
+            f"{stats['skipped']} saltadas, {stats['retries']} reintentos; "
+            f"retraso medio {sum(lags) / len(lags) if lags else 0:.1f}s (máx. {max(lags, default=0):.1f}s); "
+            f"{metrics['queued']} en cola, dato más antiguo {metrics['max_staleness']:.0f}s"
+        )
+        breakers = self.monitor.breakers.metrics() if self.monitor.breakers else {}
+        open_hosts = [host for host, store in breakers.items() if store['state'] != 'closed']
+        if open_hosts:
+            logger.warning(f"🔌 Circuitos abiertos: {', '.join(sorted(open_hosts))}")
+        if self.revisit:
+            logger.info(f"🔁 Revisión adaptativa: {self.planned_per_hour:.0f} peticiones/hora "
+                        f"previstas (factor de presupuesto {self.revisit.scale:.2f})")
+
+    def learn_history(self, now: datetime = None) -> int:
+        """
+        Enseña al planificador adaptativo las lecturas de los últimos
+        ``history_days`` días (no todo el histórico).
+
+        Returns:
+            Número de lecturas procesadas
+        """
+        since = (now or datetime.now()) - timedelta(days=self.revisit.history_days)
+        return self.revisit.learn(self.monitor.store.iter_price_history(since=since))
+
+    def run(self):
+        """
+        Arranca los workers y hace el mantenimiento hasta ``stop`` o Ctrl+C.
+        """
+        if self.revisit:
+            self.learn_history()
+        self.sync_jobs()
+        threads = [
+            threading.Thread(target=self._worker, name=f"scrape-worker-{i}", daemon=True)
+            for i in range(self.workers)
+        ]
+        for thread in threads:
+            thread.start()
+        logger.info(f"⏲️ Daemon iniciado: {self.workers} workers, periodo {self.interval}s")
+
+        try:
+            while not self._stop.wait(self.housekeeping_interval):
+                try:
+                    self.housekeeping()
+                except Exception as e:
+                    logger.error(f"❌ Error en el mantenimiento del daemon: {str(e)}")
+        finally:
+            self.queue.close()
+            for thread in threads:
+                thread.join()
+            self.housekeeping()
+
+    def stop(self):
+        """
+        Pide al daemon que termine tras el mantenimiento en curso.
+        """
+        self._stop.set()
@@ -0,0 +1,428 @@
+"""
+📈 Dashboard API - Resumen y series de gráficos cacheados
+=========================================================
+
+Cada visita al dashboard volvía a consultar el histórico y a recalcular las
+estadísticas. ``DashboardAPI`` añade a la app Flask de ``create_app`` unos
+endpoints JSON que se sirven desde una caché en memoria:
+
+- ``GET /api/v2/summary?days=7``: último precio por tienda y mínimo, máximo
+  y media de la ventana para todos los productos (``iter_price_summary``).
+- ``GET /api/v2/products/<id>/chart?days=30&width=800``: serie de precios
+  por tienda, leída de los rollups en ventanas largas y reducida con LTTB
+  a tantos puntos como píxeles tiene el gráfico.
+- ``GET /api/v2/cache``: aciertos, fallos e invalidaciones de la caché.
+
+Las respuestas se guardan ya serializadas durante ``cache_ttl`` segundos.
+Si varias peticiones piden a la vez algo que no está en caché, solo una lo
+calcula y el resto espera su resultado. Cuando se guardan precios nuevos,
+el proceso que los escribe actualiza un fichero de versión
+(``DataVersion``); cada worker del dashboard lo comprueba con un ``stat``
+por petición y vacía su caché si cambió, aunque se ejecute en otro proceso.
+
+``serve`` arranca la app con el servidor de desarrollo de Flask (con
+hilos), con waitress o con gunicorn (varios procesos).
+"""
+
+import itertools
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from datetime import datetime
+from typing import Any, Callable, Dict, Hashable, List, Optional, Sequence, Tuple
+
+import rollups
+
+try:
+    from flask import request
+    FLASK_AVAILABLE = True
+except ImportError:
+    FLASK_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+SERVERS = ('dev', 'waitress', 'gunicorn')
+
+
+def lttb(points: Sequence[Tuple[float, float]], threshold: int) -> List[Tuple[float, float]]:
+    """
+    Reduce una serie a ``threshold`` puntos con Largest-Triangle-Three-Buckets.
+
+    Conserva el primer y el último punto y, de cada tramo intermedio, el que
+    forma el triángulo de mayor área con el punto elegido en el tramo anterior
+    y la media del siguiente, de modo que los picos y caídas de precio
+    sobreviven a la reducción.
+
+    Args:
+        points: Pares (x, y) ordenados por x
+        threshold: Puntos de la serie reducida (se devuelve la serie entera si es menor que 3)
+    """
+    n = len(points)
+    if threshold >= n or threshold < 3:
+        return list(points)
+
+    sampled = [points[0]]
+    bucket_size = (n - 2) / (threshold - 2)
+    selected = 0
+    for bucket in range(threshold - 2):
+        # Media del tramo siguiente (el último punto para el último tramo)
+        next_start = int((bucket + 1) * bucket_size) + 1
+        next_end = min(int((bucket + 2) * bucket_size) + 1, n)
+        span = next_end - next_start
+        avg_x = sum(point[0] for point in points[next_start:next_end]) / span
+        avg_y = sum(point[1] for point in points[next_start:next_end]) / span
+
+        ax, ay = points[selected]
+        start = int(bucket * bucket_size) + 1
+        end = int((bucket + 1) * bucket_size) + 1
+        best, best_area = start, -1.0
+        for index in range(start, end):
+            x, y = points[index]
+            area = abs((ax - avg_x) * (y - ay) - (ax - x) * (avg_y - ay))
+            if area > best_area:
+                best, best_area = index, area
+        sampled.append(points[best])
+        selected = best
+    sampled.append(points[-1])
+    return sampled
+
+
+class _Pending:
+    """
+    Cálculo en curso de una clave, compartido por las peticiones que llegan mientras tanto.
+    """
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error: Optional[Exception] = None
+
+
+class TTLCache:
+    """
+    Caché LRU con caducidad por entrada. Seguro entre hilos.
+    """
+
+    def __init__(self, ttl: float = 60, max_entries: int = 1024):
+        """
+        Args:
+            ttl: Segundos que vive cada entrada (0 desactiva la caché)
+            max_entries: Entradas como máximo; se descartan las menos usadas
+        """
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: 'OrderedDict[Hashable, Tuple[float, Any]]' = OrderedDict()
+        self._pending: Dict[Hashable, _Pending] = {}
+        self._generation = itertools.count()
+        self._current = next(self._generation)
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'coalesced': 0, 'invalidations': 0}
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """
+        Devuelve el valor en caché de ``key`` o lo calcula con ``compute()``.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self._stats['hits'] += 1
+                return entry[1]
+            pending = self._pending.get(key)
+            owner = pending is None
+            if owner:
+                pending = self._pending[key] = _Pending()
+                generation = self._current
+                self._stats['misses'] += 1
+            else:
+                self._stats['coalesced'] += 1
+
+        if not owner:
+            pending.done.wait()
+            if pending.error is not None:
+                raise pending.error
+            return pending.value
+
+        try:
+            pending.value = compute()
+        except Exception as e:
+            pending.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._pending[key]
+                # Un valor calculado antes de una invalidación ya no es válido
+                if pending.error is None and self.ttl > 0 and generation == self._current:
+                    self._entries[key] = (time.monotonic() + self.ttl, pending.value)
+                    self._entries.move_to_end(key)
+                    while len(self._entries) > self.max_entries:
+                        self._entries.popitem(last=False)
+            pending.done.set()
+        return pending.value
+
+    def invalidate(self):
+        """
+        Vacía la caché.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._current = next(self._generation)
+            self._stats['invalidations'] += 1
+
+    def stats(self) -> Dict:
+        """
+        Aciertos, fallos, peticiones que esperaron un cálculo en curso e invalidaciones.
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats['entries'] = len(self._entries)
+        return stats
+
+
+class DataVersion:
+    """
+    Fichero que cambia cada vez que se guardan precios. Lo comparten todos los
+    procesos de la máquina (scraper, workers del dashboard).
+    """
+
+    def __init__(self, path: str = 'data/prices.version'):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+
+    def bump(self):
+        """
+        Marca que hay datos nuevos.
+        """
+        # Sustituir el fichero cambia su inodo aunque el reloj tenga poca resolución
+        temporary = f"{self.path}.{os.getpid()}.tmp"
+        with open(temporary, 'w', encoding='utf-8') as marker:
+            marker.write(f"{time.time_ns()}\n")
+        os.replace(temporary, self.path)
+
+    def current(self) -> Optional[Tuple[int, int]]:
+        """
+        Identificador de la versión actual (None si aún no se guardó nada).
+        """
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns
+
+
+class DashboardAPI:
+    """
+    Endpoints JSON del dashboard servidos desde ``TTLCache``.
+    """
+
+    def __init__(self, db, store, cache: TTLCache, version: DataVersion = None,
+                 max_points: int = 1000, summary_days: int = 7, chart_days: int = 30):
+        """
+        Args:
+            db: Instancia de PriceDB
+            store: Instancia de PriceStore (consultas sobre todo el catálogo)
+            cache: Caché de respuestas
+            version: Versión de los datos; si cambia se vacía la caché
+            max_points: Puntos como máximo por serie de un gráfico
+            summary_days: Ventana por defecto del resumen
+            chart_days: Ventana por defecto de los gráficos
+        """
+        self.db = db
+        self.store = store
+        self.cache = cache
+        self.version = version
+        self.max_points = max_points
+        self.summary_days = summary_days
+        self.chart_days = chart_days
+        self._seen_version = version.current() if version else None
+        self._version_lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, db, store, dashboard_config: Dict) -> 'DashboardAPI':
+        """
+        Crea la API a partir de la sección ``dashboard`` de la configuración.
+        """
+        return cls(
+            db,
+            store,
+            cache=TTLCache(ttl=dashboard_config.get('cache_ttl', 60),
+                           max_entries=dashboard_config.get('cache_entries', 1024)),
+            version=DataVersion(dashboard_config.get('version_file', 'data/prices.version')),
+            max_points=dashboard_config.get('max_points', 1000),
+            summary_days=dashboard_config.get('summary_days', 7),
+            chart_days=dashboard_config.get('chart_days', 30)
+        )
+
+    def _check_version(self):
+        if self.version is None:
+            return
+        current = self.version.current()
+        if current == self._seen_version:
+            return
+        with self._version_lock:
+            if current != self._seen_version:
+                self._seen_version = current
+                self.cache.invalidate()
+
+    def summary(self, days: int = None) -> bytes:
+        """
+        Resumen de todos los productos en JSON.
+        """
+        days = days or self.summary_days
+        self._check_version()
+        return self.cache.get_or_compute(('summary', days), lambda: self._dump(self._summary(days)))
+
+    def chart(self, product_id: int, days: int = None, width: int = None) -> bytes:
+        """
+        Series de precios por tienda de un producto en JSON, con como mucho
+        ``width`` puntos por tienda.
+        """
+        days = days or self.chart_days
+        points = max(3, min(width or self.max_points, self.max_points))
+        self._check_version()
+        return self.cache.get_or_compute(('chart', product_id, days, points),
+                                         lambda: self._dump(self._chart(product_id, days, points)))
+
+    @staticmethod
+    def _dump(data: Dict) -> bytes:
+        return json.dumps(data, default=str, separators=(',', ':')).encode('utf-8')
+
+    def _summary(self, days: int) -> Dict:
+        granularity = rollups.granularity_for_window(days)
+        summaries = {
+            summary['product_id']: summary
+            for summary in self.store.iter_price_summary(days=days, granularity=granularity)
+        }
+        latest_by_product = self.store.get_latest_prices_by_product()
+
+        products = []
+        for product in self.db.get_all_products():
+            latest = [
+                {'store': record.store, 'price': record.price, 'url': record.url,
+                 'timestamp': record.timestamp.isoformat()}
+                for record in latest_by_product.get(product.id, [])
+            ]
+            best = min(latest, key=lambda record: record['price']) if latest else None
+            summary = summaries.get(product.id) or {}
+            products.append({
+                'id': product.id,
+                'name': product.name,
+                'target_price': product.target_price,
+                'latest': latest,
+                'best_price': best['price'] if best else None,
+                'best_store': best['store'] if best else None,
+                'target_met': bool(best and product.target_price and best['price'] <= product.target_price),
+                'min_price': summary.get('min_price'),
+                'max_price': summary.get('max_price'),
+                'avg_price': summary.get('avg_price'),
+                'data_points': summary.get('data_points', 0)
+            })
+        return {'generated_at': datetime.now().isoformat(), 'days': days, 'products': products}
+
+    def _chart(self, product_id: int, days: int, points: int) -> Dict:
+        granularity = rollups.granularity_for_window(days)
+        series = defaultdict(list)
+        if granularity == 'raw':
+            for record in self.db.get_price_history(product_id, days=days):
+                series[record.store].append((record.timestamp.timestamp(), record.price))
+        else:
+            # En ventanas largas basta el cierre de cada hora o día
+            for rollup in self.store.get_price_rollups(product_id, days=days, granularity=granularity):
+                series[rollup['store']].append((rollup['bucket'].timestamp(), rollup['close']))
+
+        stores = {}
+        for store, values in series.items():
+            sampled = lttb(values, points)
+            stores[store] = {
+                'x': [datetime.fromtimestamp(x).isoformat() for x, _ in sampled],
+                'y': [y for _, y in sampled],
+                'points': len(values)
+            }
+        return {'product_id': product_id, 'days': days, 'granularity': granularity, 'series': stores}
+
+    def register(self, app):
+        """
+        Añade los endpoints a la app Flask.
+        """
+        if not FLASK_AVAILABLE:
+            raise ImportError("El dashboard requiere el paquete 'flask' (pip install flask)")
+
+        def respond(body: bytes):
+            return app.response_class(body, mimetype='application/json')
+
+        def summary_view():
+            return respond(self.summary(days=request.args.get('days', type=int)))
+
+        def chart_view(product_id: int):
+            return respond(self.chart(product_id, days=request.args.get('days', type=int),
+                                      width=request.args.get('width', type=int)))
+
+        def cache_view():
+            self._check_version()
+            return respond(self._dump(self.cache.stats()))
+
+        app.add_url_rule('/api/v2/summary', 'api_v2_summary', summary_view)
+        app.add_url_rule('/api/v2/products/<int:product_id>/chart', 'api_v2_chart', chart_view)
+        app.add_url_rule('/api/v2/cache', 'api_v2_cache', cache_view)
+
+
+def serve(app, host: str, port: int, server: str = 'dev', workers: int = 4, threads: int = 8,
+          debug: bool = False, post_fork: Callable[[], None] = None):
+    """
+    Ejecuta la app con el servidor elegido.
+
+    Args:
+        app: App Flask
+        host: Host del servidor
+        port: Puerto del servidor
+        server: 'dev' (servidor de Flask con hilos), 'waitress' (un proceso,
+            ``workers * threads`` hilos) o 'gunicorn' (``workers`` procesos de
+            ``threads`` hilos; solo Unix)
+        workers: Procesos (gunicorn)
+        threads: Hilos por proceso
+        debug: Modo debug de Flask (solo con 'dev')
+        post_fork: Se llama en cada proceso de gunicorn tras crearse, p. ej.
+            para no compartir las conexiones a la base de datos del padre
+    """
+    if server == 'dev':
+        app.run(host=host, port=port, debug=debug, threaded=True)
+    elif server == 'waitress':
+        try:
+            from waitress import serve as waitress_serve
+        except ImportError:
+            raise ImportError("El servidor 'waitress' requiere el paquete 'waitress' (pip install waitress)")
+        # Cada conexión SSE ocupa un hilo: waitress no debe limitar las conexiones por debajo
+        waitress_serve(app, host=host, port=port, threads=workers * threads,
+                       connection_limit=max(100, workers * threads))
+    elif server == 'gunicorn':
+        try:
+            from gunicorn.app.base import BaseApplication
+        except ImportError:
+            raise ImportError("El servidor 'gunicorn' requiere el paquete 'gunicorn' (pip install gunicorn)")
+
+        options = {
+            'bind': f"{host}:{port}",
+            'workers': workers,
+            'threads': threads,
+            'worker_class': 'gthread',
+            'accesslog': None
+        }
+        if post_fork:
+            options['post_fork'] = lambda arbiter, worker: post_fork()
+
+        class GunicornApp(BaseApplication):
+            def load_config(self):
+                for key, value in options.items():
+                    self.cfg.set(key, value)
+
+            def load(self):
+                return app
+
+        GunicornApp().run()
+    else:
+        raise ValueError(f"Servidor no soportado: {server} (opciones: {', '.join(SERVERS)})")
@@ -0,0 +1,178 @@
+"""
+🔧 DB Tuning - Índices, PRAGMAs y planes de consulta de SQLite
+==============================================================
+
+Las consultas que se ejecutan en cada ciclo (producto por nombre, últimos
+precios por tienda, histórico de una ventana) necesitan índices compuestos
+para no recorrer toda la tabla a medida que crece:
+
+- ``(product_id, store, timestamp DESC)``: último precio de cada tienda y
+  histórico de un producto.
+- ``(timestamp)``: recorridos por ventana de tiempo (resúmenes, exportación,
+  retención).
+- ``products(name)``: ``get_or_create_product``.
+
+Además se activa el modo WAL (lecturas concurrentes con una escritura) con
+PRAGMAs ajustados para un proceso que escribe por lotes.
+
+Las funciones trabajan sobre conexiones DB-API de ``sqlite3``; ``install``
+engancha los PRAGMAs a cada conexión nueva de un engine de SQLAlchemy.
+"""
+
+import logging
+from typing import Dict, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+# PRAGMAs por conexión (journal_mode se guarda en el propio fichero)
+PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',      # con WAL, fsync solo en los checkpoints
+    'temp_store': 'MEMORY',
+    'cache_size': -65536,         # 64 MB de caché de páginas
+    'mmap_size': 268435456,       # 256 MB mapeados en memoria
+    'busy_timeout': 5000          # ms esperando un lock antes de fallar
+}
+
+# nombre -> (tabla, [(columna, descendente)])
+INDEXES = {
+    'ix_price_history_product_store_ts': ('history', [('product_id', False), ('store', False), ('timestamp', True)]),
+    'ix_price_history_timestamp': ('history', [('timestamp', False)]),
+    'ix_products_name': ('products', [('name', False)])
+}
+
+# Consultas representativas de cada llamada de PriceDB, para EXPLAIN QUERY PLAN
+QUERIES = {
+    'get_or_create_product': "SELECT * FROM {products} WHERE name = ?",
+    'get_latest_prices': (
+        "SELECT * FROM {history} WHERE product_id = ? AND store = ? "
+        "ORDER BY timestamp DESC LIMIT 1"
+    ),
+    'get_price_history': (
+        "SELECT * FROM {history} WHERE product_id = ? AND timestamp >= ? "
+        "ORDER BY timestamp"
+    ),
+    'iter_price_history(since)': "SELECT * FROM {history} WHERE timestamp >= ? ORDER BY timestamp",
+    'get_all_products': "SELECT * FROM {products}"
+}
+
+
+def apply_pragmas(connection):
+    """
+    Aplica ``PRAGMAS`` a una conexión DB-API de sqlite3.
+    """
+    cursor = connection.cursor()
+    for name, value in PRAGMAS.items():
+        cursor.execute(f"PRAGMA {name}={value}")
+    cursor.close()
+
+
+def _tables(products_table: str, history_table: str) -> Dict[str, str]:
+    return {'products': products_table, 'history': history_table}
+
+
+def ensure_indexes(connection, products_table: str = 'products',
+                   history_table: str = 'price_history') -> List[str]:
+    """
+    Crea los índices de ``INDEXES`` que falten.
+
+    Returns:
+        Nombres de los índices creados
+    """
+    tables = _tables(products_table, history_table)
+    existing = {row[0] for row in connection.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    created = []
+    for name, (table, columns) in INDEXES.items():
+        if name in existing:
+            continue
+        definition = ', '.join(f"{column} DESC" if desc else column for column, desc in columns)
+        connection.execute(f"CREATE INDEX {name} ON {tables[table]} ({definition})")
+        created.append(name)
+    connection.commit()
+    if created:
+        logger.info(f"🔧 Índices creados: {', '.join(created)}")
+    return created
+
+
+def verify_indexes(connection, products_table: str = 'products',
+                   history_table: str = 'price_history') -> List[str]:
+    """
+    Comprueba que cada índice existe sobre la tabla y columnas esperadas, en
+    el mismo orden y con la misma dirección.
+
+    Returns:
+        Lista de problemas encontrados (vacía si todo está bien)
+    """
+    tables = _tables(products_table, history_table)
+    problems = []
+    for name, (table, columns) in INDEXES.items():
+        row = connection.execute(
+            "SELECT tbl_name FROM sqlite_master WHERE type = 'index' AND name = ?", (name,)
+        ).fetchone()
+        if row is None:
+            problems.append(f"{name}: no existe")
+            continue
+        if row[0] != tables[table]:
+            problems.append(f"{name}: está sobre {row[0]} en lugar de {tables[table]}")
+            continue
+        # index_xinfo: (seqno, cid, name, desc, coll, key); key = 0 para el rowid final
+        actual = [
+            (info[2], bool(info[3]))
+            for info in connection.execute(f"PRAGMA index_xinfo({name})")
+            if info[5]
+        ]
+        if actual != columns:
+            problems.append(f"{name}: columnas {actual}, se esperaban {columns}")
+    return problems
+
+
+def explain(connection, sql: str, params: Tuple = ()) -> List[str]:
+    """
+    Plan de ejecución de una consulta (columna ``detail`` de EXPLAIN QUERY PLAN).
+    """
+    return [row[-1] for row in connection.execute(f"EXPLAIN QUERY PLAN {sql}", params)]
+
+
+def explain_queries(connection, params: Dict[str, Tuple], products_table: str = 'products',
+                    history_table: str = 'price_history') -> Dict[str, List[str]]:
+    """
+    Planes de ejecución de todas las consultas de ``QUERIES``.
+
+    Args:
+        connection: Conexión sqlite3
+        params: Parámetros de cada consulta, por nombre
+    """
+    tables = _tables(products_table, history_table)
+    return {
+        name: explain(connection, sql.format(**tables), params.get(name, ()))
+        for name, sql in QUERIES.items()
+    }
+
+
+def install(engine, products_table: str = 'products', history_table: str = 'price_history') -> List[str]:
+    """
+    Ajusta un engine de SQLAlchemy sobre SQLite: PRAGMAs en cada conexión
+    nueva, índices creados si faltan y verificación de los existentes.
+
+    Returns:
+        Problemas encontrados por ``verify_indexes``
+    """
+    from sqlalchemy import event
+
+    @event.listens_for(engine, 'connect')
+    def _on_connect(dbapi_connection, connection_record):
+        apply_pragmas(dbapi_connection)
+
+    # Las conexiones ya abiertas en el pool no pasaron por el listener
+    engine.dispose()
+
+    connection = engine.raw_connection()
+    try:
+        ensure_indexes(connection, products_table, history_table)
+        problems = verify_indexes(connection, products_table, history_table)
+    finally:
+        connection.close()
+
+    for problem in problems:
+        logger.warning(f"⚠️ Índice incorrecto: {problem}")
+    return problems
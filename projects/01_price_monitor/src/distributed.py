@@ -0,0 +1,400 @@
+"""
+🛰️ Distributed - Workers y coordinador sobre la cola compartida
+================================================================
+
+Modo distribuido del monitor: un catálogo demasiado grande para un proceso
+se reparte entre varios ``main.py --worker`` (en la misma máquina o en
+varias) que comparten la base de datos.
+
+- ``Coordinator`` (``main.py --coordinator``, uno solo) mantiene la cola
+  alineada con la configuración, actualiza las tendencias a partir de los
+  precios que escriben los workers, evalúa las alertas y aplica la retención.
+- ``QueueWorker`` reserva trabajos vencidos (``WorkQueue.claim``), los
+  scrapea con un pool de hilos, escribe los precios con ``PriceStore`` y solo
+  entonces libera cada trabajo con su siguiente vencimiento. Un hilo renueva
+  los leases de los trabajos en curso; si el worker muere, sus trabajos se
+  reentregan a otro cuando caducan. Cada worker tiene sus propios circuit
+  breakers (``StoreBreakers``); una URL saltada vuelve a la cola para cuando
+  su circuito admita la petición de prueba.
+
+Las tendencias no se actualizan en los workers: cada URL puede caer en un
+worker distinto en cada periodo y sus estados en memoria quedarían
+desfasados. El coordinador las lee del histórico con un retraso de
+``settle_seconds`` para no perder lecturas que aún están en el buffer de
+algún worker.
+"""
+
+import logging
+import math
+import os
+import socket
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from breakers import CircuitOpenError
+from work_queue import Lease, WorkQueue
+
+logger = logging.getLogger(__name__)
+
+
+class QueueWorker:
+    """
+    Proceso que scrapea los trabajos que reserva de la cola compartida.
+    """
+
+    def __init__(self, monitor, queue: WorkQueue, worker_id: str = None, interval: float = 3600,
+                 concurrency: int = 4, batch_size: int = None, retry_delay: float = 300,
+                 max_attempts: int = 3, idle_sleep: float = 5.0, log_interval: float = 60):
+        """
+        Args:
+            monitor: PriceMonitor con la DB, el scraper y el resto de componentes
+            queue: Cola compartida
+            worker_id: Identificador del worker en los leases (default: host:pid)
+            interval: Periodo de revisión de cada URL, en segundos
+            concurrency: Hilos que scrapean en paralelo
+            batch_size: Trabajos reservados a la vez como máximo (default: 2 × concurrency)
+            retry_delay: Segundos hasta reintentar una URL que lanzó una excepción
+            max_attempts: Intentos antes de esperar al siguiente periodo
+            idle_sleep: Espera máxima cuando no hay trabajos vencidos
+            log_interval: Segundos entre resúmenes en el log
+        """
+        self.monitor = monitor
+        self.queue = queue
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        self.interval = interval
+        self.concurrency = concurrency
+        self.batch_size = batch_size or concurrency * 2
+        self.retry_delay = retry_delay
+        self.max_attempts = max_attempts
+        self.idle_sleep = idle_sleep
+        self.log_interval = log_interval
+
+        self._inflight: List[int] = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self.stats = self._new_stats()
+
+    @classmethod
+    def from_config(cls, monitor, queue: WorkQueue, interval: float,
+                    concurrency: int = None) -> 'QueueWorker':
+        """
+        Crea el worker con las opciones de la sección ``distributed``.
+        """
+        config = monitor.config.get('distributed', {})
+        return cls(
+            monitor, queue,
+            worker_id=config.get('worker_id'),
+            interval=interval,
+            concurrency=concurrency or config.get('concurrency', 4),
+            batch_size=config.get('batch_size'),
+            retry_delay=config.get('retry_delay', 300),
+            max_attempts=config.get('max_attempts', 3),
+            idle_sleep=config.get('idle_sleep', 5.0)
+        )
+
+    @staticmethod
+    def _new_stats() -> Dict:
+        return {'jobs': 0, 'success': 0, 'errors': 0, 'skipped': 0, 'retries': 0, 'lost': 0}
+
+    def _heartbeat_loop(self):
+        while not self._stop.wait(self.queue.lease_seconds / 3):
+            with self._lock:
+                job_ids = list(self._inflight)
+            try:
+                self.queue.heartbeat(self.worker_id, job_ids)
+            except Exception as e:
+                logger.error(f"❌ Error renovando leases: {str(e)}")
+
+    def _scrape(self, lease: Lease) -> Tuple[Optional[Dict], Optional[Exception]]:
+        try:
+            return self.monitor._scrape_url(lease.url), None
+        except CircuitOpenError as e:
+            return None, e
+        except Exception as e:
+            self.monitor._handle_scrape_error(lease.url, e)
+            return None, e
+
+    def _next_due(self, lease: Lease, now: float) -> float:
+        # Igual que el daemon: se conserva la fase y se saltan los periodos perdidos
+        next_due = lease.due_at + self.interval
+        if next_due <= now:
+            next_due += math.ceil((now - next_due) / self.interval) * self.interval
+        return next_due
+
+    def _finish(self, finished: List[Tuple[Lease, Optional[Dict], Optional[Exception]]]) -> int:
+        """
+        Guarda los precios de los trabajos terminados y los libera con su
+        siguiente vencimiento (o para reintentarlos si lanzaron una excepción).
+
+        Returns:
+            Trabajos liberados
+        """
+        timestamp = datetime.now()
+        for lease, price_data, error in finished:
+            if price_data and price_data['price'] > 0:
+                self.monitor.price_writer.add(
+                    timestamp=timestamp,
+                    product_id=lease.product_id,
+                    store=price_data['store'],
+                    price=price_data['price'],
+                    url=lease.url,
+                    availability=price_data.get('availability', True),
+                    title=price_data.get('title', '')
+                )
+                self.stats['success'] += 1
+            elif isinstance(error, CircuitOpenError):
+                self.stats['skipped'] += 1
+            else:
+                if error is None:
+                    logger.warning(f"⚠️ No se pudo obtener precio para {lease.url}")
+                self.stats['errors'] += 1
+
+        # Los precios se escriben antes de liberar los trabajos: si el worker
+        # muere antes, los trabajos se reentregan y nada se pierde
+        self.monitor.price_writer.flush()
+
+        now = time.time()
+        completed, retries = [], []
+        for lease, _, error in finished:
+            if isinstance(error, CircuitOpenError) and lease.attempts < self.max_attempts:
+                # Se devuelve a la cola para cuando el circuito admita la prueba
+                retries.append((lease.id, now + max(error.retry_in, self.idle_sleep)))
+            elif error is not None and lease.attempts < self.max_attempts:
+                retries.append((lease.id, now + self.retry_delay))
+            else:
+                completed.append((lease.id, self._next_due(lease, now)))
+        released = self.queue.complete(self.worker_id, completed) + self.queue.release(self.worker_id, retries)
+        self.stats['retries'] += len(retries)
+        self.stats['lost'] += len(finished) - released
+        self.stats['jobs'] += len(finished)
+        return len(finished)
+
+    def _idle_wait(self) -> float:
+        next_due = self.queue.next_due()
+        if next_due is None:
+            return self.idle_sleep
+        return min(self.idle_sleep, max(0.05, next_due - time.time()))
+
+    def _log_stats(self):
+        stats, self.stats = self.stats, self._new_stats()
+        logger.info(
+            f"🛰️ {self.worker_id}: {stats['jobs']} trabajos, {stats['success']} éxitos, "
+            f"{stats['errors']} errores, {stats['skipped']} saltadas por circuito abierto, "
+            f"{stats['retries']} reintentos, {stats['lost']} leases perdidos"
+        )
+
+    def _drained(self) -> bool:
+        counts = self.queue.counts()
+        return not (counts['due'] or counts['leased'] or counts['expired'])
+
+    def run(self, max_jobs: int = None, until_drained: bool = False) -> int:
+        """
+        Procesa trabajos hasta ``stop``, Ctrl+C o haber hecho ``max_jobs``.
+
+        Los hilos no esperan a que termine un lote entero: en cuanto quedan
+        ``concurrency`` trabajos o menos en curso se reservan más, y los
+        terminados se guardan y liberan en grupos de ``concurrency``.
+
+        Args:
+            max_jobs: Trabajos tras los que terminar (None = sin límite)
+            until_drained: Terminar cuando no quede ningún trabajo vencido ni
+                reservado por otro worker (para pruebas y benchmarks)
+
+        Returns:
+            Trabajos procesados
+        """
+        heartbeat = threading.Thread(target=self._heartbeat_loop, name="lease-heartbeat", daemon=True)
+        heartbeat.start()
+        logger.info(f"🛰️ Worker {self.worker_id} iniciado ({self.concurrency} hilos, "
+                    f"hasta {self.batch_size} trabajos reservados)")
+
+        pending: Dict[Future, Lease] = {}
+        finished = []
+        processed = 0
+        next_claim = last_log = time.monotonic()
+        try:
+            with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+                while not self._stop.is_set():
+                    claimed = processed + len(pending) + len(finished)
+                    room = self.batch_size - len(pending)
+                    if max_jobs is not None:
+                        room = min(room, max_jobs - claimed)
+                    if room > 0 and len(pending) <= self.concurrency and time.monotonic() >= next_claim:
+                        leases = self.queue.claim(self.worker_id, room)
+                        if not leases:
+                            next_claim = time.monotonic() + self._idle_wait()
+                        for lease in leases:
+                            pending[executor.submit(self._scrape, lease)] = lease
+                        with self._lock:
+                            self._inflight = [lease.id for lease in pending.values()] + \
+                                             [lease.id for lease, _, _ in finished]
+
+                    if pending:
+                        done, _ = wait(pending, timeout=self.idle_sleep, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            finished.append((pending.pop(future), *future.result()))
+
+                    if finished and (len(finished) >= self.concurrency or not pending):
+                        processed += self._finish(finished)
+                        finished = []
+
+                    if not pending:
+                        if max_jobs is not None and processed >= max_jobs:
+                            break
+                        if until_drained and time.monotonic() < next_claim and self._drained():
+                            break
+                        self._stop.wait(max(0.0, next_claim - time.monotonic()))
+
+                    if time.monotonic() - last_log >= self.log_interval:
+                        last_log = time.monotonic()
+                        self._log_stats()
+
+                # Al parar se guardan y liberan los trabajos que ya estaban en curso
+                for future, lease in pending.items():
+                    finished.append((lease, *future.result()))
+                if finished:
+                    processed += self._finish(finished)
+        finally:
+            self._stop.set()
+            self.monitor.price_writer.flush()
+            self._log_stats()
+        return processed
+
+    def stop(self):
+        """
+        Pide al worker que termine tras los trabajos en curso.
+        """
+        self._stop.set()
+
+
+class Coordinator:
+    """
+    Sincroniza la cola con la configuración y hace el mantenimiento global.
+    """
+
+    def __init__(self, monitor, queue: WorkQueue, interval: float = 3600,
+                 housekeeping_interval: float = 30, settle_seconds: float = 300):
+        """
+        Args:
+            monitor: PriceMonitor con la DB, las tendencias y las alertas
+            queue: Cola compartida
+            interval: Periodo de revisión de cada URL, en segundos
+            housekeeping_interval: Segundos entre pasadas de mantenimiento
+            settle_seconds: Retraso con el que se leen los precios nuevos para
+                las tendencias (mayor que lo que un precio espera en el buffer de un worker)
+        """
+        self.monitor = monitor
+        self.queue = queue
+        self.interval = interval
+        self.housekeeping_interval = housekeeping_interval
+        self.settle_seconds = settle_seconds
+
+        self._stop = threading.Event()
+        self._last_alerts = time.monotonic()
+        self._watermark = self._initial_watermark()
+
+    @classmethod
+    def from_config(cls, monitor, queue: WorkQueue, interval: float) -> 'Coordinator':
+        """
+        Crea el coordinador con las opciones de la sección ``distributed``.
+        """
+        config = monitor.config.get('distributed', {})
+        return cls(
+            monitor, queue,
+            interval=interval,
+            housekeeping_interval=config.get('housekeeping_interval', 30),
+            settle_seconds=config.get('settle_seconds', 300)
+        )
+
+    def _initial_watermark(self) -> datetime:
+        # Se continúa desde la última lectura incorporada a las tendencias
+        last = [
+            state.last_ts
+            for stores in self.monitor.trends.states.values()
+            for state in stores.values()
+            if state.last_ts
+        ]
+        if last:
+            return max(last) + timedelta(microseconds=1)
+        return datetime.now() - timedelta(seconds=self.settle_seconds)
+
+    def sync(self) -> Dict[str, int]:
+        """
+        Añade a la cola las URLs configuradas y elimina las que ya no lo están.
+        """
+        resolved, failed = self.monitor.product_cache.resolve(self.monitor.config['products'])
+        for product_config, error in failed:
+            logger.error(f"❌ Error procesando producto {product_config['name']}: {str(error)}")
+
+        wanted = [
+            (resolved[product_config['name']].id, url)
+            for product_config in self.monitor.config['products']
+            if product_config['name'] in resolved
+            for url in product_config['urls']
+        ]
+        return self.queue.sync(wanted, self.interval)
+
+    def update_trends(self) -> int:
+        """
+        Incorpora a las tendencias los precios escritos por los workers hasta
+        hace ``settle_seconds``.
+
+        Returns:
+            Lecturas incorporadas
+        """
+        until = datetime.now() - timedelta(seconds=self.settle_seconds)
+        if until <= self._watermark:
+            return 0
+        count = 0
+        for record in self.monitor.store.iter_price_history(since=self._watermark, until=until):
+            self.monitor.trends.update(record.product_id, record.store, record.price, record.timestamp)
+            count += 1
+        self._watermark = until
+        self.monitor.trends.save(self.monitor.store)
+        return count
+
+    def housekeeping(self):
+        """
+        Recarga la configuración, actualiza tendencias, evalúa alertas cada
+        ``interval`` y aplica la retención.
+        """
+        if self.monitor._reload_products_if_changed():
+            self.sync()
+
+        readings = self.update_trends()
+        if time.monotonic() - self._last_alerts >= self.interval:
+            self._last_alerts = time.monotonic()
+            self.monitor.check_alerts()
+
+        if self.monitor.retention:
+            try:
+                self.monitor.retention.run_if_due(self.monitor.store)
+            except Exception as e:
+                logger.error(f"❌ Error en la compactación del histórico: {str(e)}")
+
+        counts = self.queue.counts()
+        logger.info(
+            f"🛰️ Cola: {counts['total']} URLs, {counts['due']} vencidas, {counts['leased']} en proceso, "
+            f"{counts['expired']} con lease caducado; {readings} lecturas nuevas"
+        )
+
+    def run(self):
+        """
+        Sincroniza la cola y hace el mantenimiento hasta ``stop`` o Ctrl+C.
+        """
+        self.sync()
+        logger.info(f"🛰️ Coordinador iniciado: periodo {self.interval}s")
+        while not self._stop.wait(self.housekeeping_interval):
+            try:
+                self.housekeeping()
+            except Exception as e:
+                logger.error(f"❌ Error en el mantenimiento del coordinador: {str(e)}")
+
+    def stop(self):
+        """
+        Pide al coordinador que termine.
+        """
+        self._stop.set()
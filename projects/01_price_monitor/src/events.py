@@ -0,0 +1,234 @@
+"""
+📡 Events - Bus de eventos en proceso y envío al dashboard por SSE
+==================================================================
+
+Para ver precios nuevos los clientes del dashboard tenían que preguntar una
+y otra vez, y cada pregunta llegaba a ``PriceDB``. Con ``EventBus`` el
+scraper publica los precios (``price``) en cuanto ``BufferedPriceWriter`` los
+guarda y cambia la versión de los datos, y cada alerta (``alert``) al
+enviarla; el dashboard los reenvía a los navegadores por Server-Sent Events
+(``GET /api/v2/events``), sin consultar la base de datos.
+
+Cada cliente tiene su ``Subscription``: los eventos esperan en ella hasta
+que su conexión los envía. Las actualizaciones de precio del mismo producto
+se fusionan mientras esperan (los precios por tienda se combinan y gana el
+más reciente), así que un cliente lento recibe el estado actual en lugar de
+toda la historia. Los eventos sin clave (alertas) no se fusionan; si se
+acumulan más de ``max_pending`` se descartan los más antiguos.
+
+El bus vive en el proceso que scrapea: el dashboard solo recibe eventos si
+se ejecuta en ese mismo proceso (``--dashboard --schedule``, con 'dev' o
+'waitress'). Sin el scheduler, ``/api/v2/events`` no se registra (404) en
+lugar de dejar conexiones abiertas que nunca recibirían nada.
+"""
+
+import itertools
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Iterable, List, Optional
+
+try:
+    from flask import Response, request
+    FLASK_AVAILABLE = True
+except ImportError:
+    FLASK_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+
+class Event:
+    """
+    Un evento publicado en el bus.
+    """
+
+    __slots__ = ('id', 'topic', 'data', 'key', 'published_at')
+
+    def __init__(self, id: int, topic: str, data: Dict, key: Optional[Hashable], published_at: float):
+        self.id = id
+        self.topic = topic
+        self.data = data
+        self.key = key
+        self.published_at = published_at
+
+    def to_sse(self) -> str:
+        """
+        El evento en formato ``text/event-stream``.
+        """
+        data = json.dumps(self.data, default=str, separators=(',', ':'))
+        return f"id: {self.id}\nevent: {self.topic}\ndata: {data}\n\n"
+
+
+def _merge(old: Dict, new: Dict) -> Dict:
+    # Los campos que son diccionarios (p. ej. precios por tienda) se combinan
+    merged = dict(old)
+    for field, value in new.items():
+        current = merged.get(field)
+        if isinstance(value, dict) and isinstance(current, dict):
+            merged[field] = {**current, **value}
+        else:
+            merged[field] = value
+    return merged
+
+
+class Subscription:
+    """
+    Eventos pendientes de un cliente.
+    """
+
+    __slots__ = ('topics', 'max_pending', 'dropped', 'closed', '_pending', '_condition')
+
+    def __init__(self, topics: Optional[Iterable[str]] = None, max_pending: int = 1000):
+        """
+        Args:
+            topics: Temas que recibe el cliente (None = todos)
+            max_pending: Eventos sin fusionar que pueden esperar antes de descartar los antiguos
+        """
+        self.topics = frozenset(topics) if topics else None
+        self.max_pending = max_pending
+        self.dropped = 0
+        self.closed = False
+        self._pending: 'OrderedDict[Hashable, Event]' = OrderedDict()
+        self._condition = threading.Condition(threading.Lock())
+
+    def wants(self, topic: str) -> bool:
+        return self.topics is None or topic in self.topics
+
+    def offer(self, event: Event):
+        """
+        Encola ``event``, fusionándolo con uno pendiente de la misma clave.
+        """
+        slot = (event.topic, event.key) if event.key is not None else event.id
+        with self._condition:
+            pending = self._pending.pop(slot, None)
+            if pending is not None:
+                event = Event(event.id, event.topic, _merge(pending.data, event.data),
+                              event.key, event.published_at)
+            self._pending[slot] = event
+            if len(self._pending) > self.max_pending:
+                self._pending.popitem(last=False)
+                self.dropped += 1
+            self._condition.notify()
+
+    def get(self, timeout: float = None) -> List[Event]:
+        """
+        Espera hasta ``timeout`` segundos y devuelve todos los eventos pendientes
+        (vacío si no llegó ninguno o la suscripción se cerró).
+        """
+        with self._condition:
+            if not self._pending and not self.closed:
+                self._condition.wait(timeout)
+            events = list(self._pending.values())
+            self._pending.clear()
+        return events
+
+    def close(self):
+        with self._condition:
+            self.closed = True
+            self._condition.notify_all()
+
+
+class EventBus:
+    """
+    Publicación y reparto de eventos entre hilos del mismo proceso.
+    """
+
+    def __init__(self, max_pending: int = 1000):
+        """
+        Args:
+            max_pending: Límite de eventos pendientes por suscripción
+        """
+        self.max_pending = max_pending
+        # Se sustituye entera al (des)suscribir: publicar no necesita el lock
+        self._subscriptions = ()
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._published = 0
+
+    @classmethod
+    def from_config(cls, dashboard_config: Dict) -> Optional['EventBus']:
+        """
+        Crea el bus a partir de ``dashboard.events``; devuelve None si está desactivado.
+        """
+        config = dashboard_config.get('events', {})
+        if not config.get('enabled', True):
+            return None
+        return cls(max_pending=config.get('max_pending', 1000))
+
+    def subscribe(self, topics: Optional[Iterable[str]] = None) -> Subscription:
+        subscription = Subscription(topics, self.max_pending)
+        with self._lock:
+            self._subscriptions = self._subscriptions + (subscription,)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        subscription.close()
+        with self._lock:
+            self._subscriptions = tuple(s for s in self._subscriptions if s is not subscription)
+
+    def publish(self, topic: str, data: Dict[str, Any], key: Optional[Hashable] = None) -> int:
+        """
+        Entrega un evento a todas las suscripciones interesadas.
+
+        Args:
+            topic: Tema del evento ('price', 'alert', ...)
+            data: Contenido serializable a JSON
+            key: Clave de fusión (p. ej. el id del producto); None para no fusionar
+
+        Returns:
+            Suscripciones a las que se entregó
+        """
+        event = Event(next(self._ids), topic, data, key, time.time())
+        delivered = 0
+        for subscription in self._subscriptions:
+            if subscription.wants(topic):
+                subscription.offer(event)
+                delivered += 1
+        self._published += 1
+        return delivered
+
+    def stats(self) -> Dict:
+        """
+        Suscriptores actuales, eventos publicados y descartados por clientes lentos.
+        """
+        subscriptions = self._subscriptions
+        return {
+            'subscribers': len(subscriptions),
+            'published': self._published,
+            'dropped': sum(subscription.dropped for subscription in subscriptions)
+        }
+
+
+def register_sse(app, bus: EventBus, heartbeat: float = 15.0):
+    """
+    Añade ``GET /api/v2/events?topics=price,alert`` a la app Flask.
+
+    Cada conexión ocupa un hilo del servidor mientras está abierta. Un
+    comentario cada ``heartbeat`` segundos mantiene viva la conexión y permite
+    detectar clientes desconectados.
+    """
+    if not FLASK_AVAILABLE:
+        raise ImportError("El dashboard requiere el paquete 'flask' (pip install flask)")
+
+    def events_view():
+        topics = [topic for topic in request.args.get('topics', '').split(',') if topic]
+        subscription = bus.subscribe(topics or None)
+
+        def stream():
+            try:
+                yield "retry: 3000\n\n"
+                while not subscription.closed:
+                    events = subscription.get(timeout=heartbeat)
+                    if not events:
+                        yield ": keepalive\n\n"
+                        continue
+                    yield "".join(event.to_sse() for event in events)
+            finally:
+                bus.unsubscribe(subscription)
+
+        return Response(stream(), mimetype='text/event-stream',
+                        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+    app.add_url_rule('/api/v2/events', 'api_v2_events', events_view)
@@ -0,0 +1,315 @@
+"""
+🗃️ HTTP Cache - Caché persistente de respuestas con GET condicional
+===================================================================
+
+La mayoría de las páginas de producto no cambian entre una ejecución y la
+siguiente. Esta caché guarda en disco, por URL:
+
+- los validadores HTTP (``ETag`` y ``Last-Modified``)
+- un hash SHA-256 del cuerpo de la respuesta
+- el último ``price_data`` extraído
+
+En la siguiente visita se envía ``If-None-Match`` / ``If-Modified-Since``. Si
+la tienda responde ``304 Not Modified`` o el cuerpo tiene el mismo hash, se
+reutiliza el ``price_data`` anterior sin volver a parsear el HTML.
+
+El tamaño de la caché está acotado a ``max_bytes``: se cuenta lo que ocupa
+cada entrada guardada (URL, validadores, hash y ``price_data``; el HTML no se
+guarda) y, al superarlo, se expulsan las entradas usadas hace más tiempo
+(LRU). El total se lleva en memoria, así que guardar una entrada no recorre
+la tabla.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+# Entradas expulsadas por consulta al liberar espacio
+EVICTION_BATCH = 256
+
+
+class CachedResponse:
+    """
+    Resultado de ``HTTPCache.request``: el ``price_data`` guardado si la
+    página no cambió, o el cuerpo descargado para parsearlo.
+    """
+
+    __slots__ = ('url', 'body', 'price_data', 'etag', 'last_modified', 'body_hash')
+
+    def __init__(self, url: str, body: Optional[bytes] = None, price_data: Optional[Dict] = None,
+                 etag: Optional[str] = None, last_modified: Optional[str] = None,
+                 body_hash: Optional[str] = None):
+        self.url = url
+        self.body = body
+        self.price_data = price_data
+        self.etag = etag
+        self.last_modified = last_modified
+        self.body_hash = body_hash
+
+    @property
+    def cached(self) -> bool:
+        """
+        True si se reutiliza el ``price_data`` de la caché (304 o cuerpo sin cambios).
+        """
+        return self.price_data is not None
+
+
+class HTTPCache:
+    """
+    Caché de respuestas HTTP almacenada en SQLite.
+    """
+
+    def __init__(self, path: str = 'data/http_cache.db', max_bytes: int = 64 * 1024 * 1024):
+        """
+        Args:
+            path: Ruta del fichero SQLite de la caché
+            max_bytes: Tamaño máximo de las entradas guardadas antes de expulsar por LRU
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(http_cache)")}
+        if columns and 'entry_size' not in columns:
+            # Caché de una versión anterior: se descarta y se vuelve a llenar
+            self._conn.execute("DROP TABLE http_cache")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS http_cache (
+                url TEXT PRIMARY KEY,
+                etag TEXT,
+                last_modified TEXT,
+                body_hash TEXT NOT NULL,
+                body_size INTEGER NOT NULL,
+                price_data TEXT NOT NULL,
+                entry_size INTEGER NOT NULL,
+                last_access REAL NOT NULL
+            )
+        """)
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_http_cache_last_access ON http_cache (last_access)"
+        )
+        self._conn.commit()
+        self._size = self._conn.execute("SELECT COALESCE(SUM(entry_size), 0) FROM http_cache").fetchone()[0]
+        self.reset_stats()
+
+    @classmethod
+    def from_config(cls, scraping_config: Dict) -> Optional['HTTPCache']:
+        """
+        Crea la caché a partir de ``scraping.cache``; devuelve None si está desactivada.
+        """
+        cache_config = scraping_config.get('cache', {})
+        if not cache_config.get('enabled', True):
+            return None
+        return cls(
+            path=cache_config.get('path', 'data/http_cache.db'),
+            max_bytes=int(cache_config.get('max_mb', 64) * 1024 * 1024)
+        )
+
+    def reset_stats(self):
+        """
+        Reinicia los contadores (normalmente al comienzo de cada ciclo).
+        """
+        self._stats = {
+            'hits': 0,
+            'not_modified': 0,
+            'unchanged': 0,
+            'misses': 0,
+            'bytes_saved': 0,
+            'evictions': 0
+        }
+
+    def stats(self) -> Dict:
+        """
+        Contadores de la caché: aciertos (304 + cuerpo sin cambios), fallos,
+        bytes ahorrados y tamaño actual de las entradas.
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats['size_bytes'] = self._size
+        return stats
+
+    @property
+    def size(self) -> int:
+        """
+        Bytes ocupados por las entradas guardadas.
+        """
+        return self._size
+
+    def _get(self, url: str) -> Optional[Dict]:
+        row = self._conn.execute(
+            "SELECT etag, last_modified, body_hash, body_size, price_data FROM http_cache WHERE url = ?",
+            (url,)
+        ).fetchone()
+        if row is None:
+            return None
+        return {
+            'etag': row[0],
+            'last_modified': row[1],
+            'body_hash': row[2],
+            'body_size': row[3],
+            'price_data': json.loads(row[4])
+        }
+
+    def conditional_headers(self, url: str) -> Dict[str, str]:
+        """
+        Cabeceras condicionales para la próxima petición a ``url``.
+        """
+        with self._lock:
+            return self._validators(self._get(url))
+
+    @staticmethod
+    def _validators(entry: Optional[Dict]) -> Dict[str, str]:
+        headers = {}
+        if entry:
+            if entry['etag']:
+                headers['If-None-Match'] = entry['etag']
+            if entry['last_modified']:
+                headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def _touch(self, url: str, etag: Optional[str] = None, last_modified: Optional[str] = None):
+        self._conn.execute(
+            """UPDATE http_cache
+               SET last_access = ?, etag = COALESCE(?, etag), last_modified = COALESCE(?, last_modified)
+               WHERE url = ?""",
+            (time.time(), etag, last_modified, url)
+        )
+        self._conn.commit()
+
+    def _store(self, url: str, etag: Optional[str], last_modified: Optional[str],
+               body_hash: str, body_size: int, price_data: Dict):
+        data = json.dumps(price_data, default=str)
+        entry_size = len(url) + len(etag or '') + len(last_modified or '') + len(body_hash) + len(data)
+        previous = self._conn.execute("SELECT entry_size FROM http_cache WHERE url = ?", (url,)).fetchone()
+        self._conn.execute(
+            """INSERT OR REPLACE INTO http_cache
+               (url, etag, last_modified, body_hash, body_size, price_data, entry_size, last_access)
+               VALUES (?, ?, ?, ?, ?, ?, ?, ?)""",
+            (url, etag, last_modified, body_hash, body_size, data, entry_size, time.time())
+        )
+        self._size += entry_size - (previous[0] if previous else 0)
+        self._evict()
+        self._conn.commit()
+
+    def _evict(self):
+        # Las entradas más antiguas salen por lotes hasta volver por debajo del límite
+        while self._size > self.max_bytes:
+            rows = self._conn.execute(
+                "SELECT url, entry_size FROM http_cache ORDER BY last_access ASC LIMIT ?",
+                (EVICTION_BATCH,)
+            ).fetchall()
+            if not rows:
+                self._size = 0
+                return
+            evicted = []
+            for url, entry_size in rows:
+                evicted.append((url,))
+                self._size -= entry_size
+                if self._size <= self.max_bytes:
+                    break
+            self._conn.executemany("DELETE FROM http_cache WHERE url = ?", evicted)
+            self._stats['evictions'] += len(evicted)
+
+    def request(self, session, url: str, timeout: Optional[float] = None,
+                headers: Optional[Dict[str, str]] = None) -> CachedResponse:
+        """
+        Descarga ``url`` con GET condicional, sin parsear.
+
+        Si la página no cambió (304 o mismo hash), la respuesta trae el
+        ``price_data`` guardado; si no, trae el cuerpo, que hay que parsear y
+        guardar con ``store``.
+
+        Args:
+            session: Sesión HTTP compatible con ``requests.Session``
+            url: URL del producto
+            timeout: Timeout de la petición
+            headers: Cabeceras adicionales (User-Agent, etc.)
+
+        Raises:
+            requests.HTTPError: Si la tienda responde con un error
+        """
+        with self._lock:
+            entry = self._get(url)
+
+        request_headers = dict(headers or {})
+        request_headers.update(self._validators(entry))
+
+        response = session.get(url, headers=request_headers, timeout=timeout)
+
+        if response.status_code == 304 and entry:
+            with self._lock:
+                self._touch(url, response.headers.get('ETag'), response.headers.get('Last-Modified'))
+                self._stats['hits'] += 1
+                self._stats['not_modified'] += 1
+                self._stats['bytes_saved'] += entry['body_size']
+            return CachedResponse(url, price_data=entry['price_data'])
+
+        response.raise_for_status()
+
+        body = response.content
+        result = CachedResponse(
+            url,
+            body=body,
+            etag=response.headers.get('ETag'),
+            last_modified=response.headers.get('Last-Modified'),
+            body_hash=hashlib.sha256(body).hexdigest()
+        )
+
+        if entry and entry['body_hash'] == result.body_hash:
+            with self._lock:
+                self._touch(url, result.etag, result.last_modified)
+                self._stats['hits'] += 1
+                self._stats['unchanged'] += 1
+            result.price_data = entry['price_data']
+            return result
+
+        with self._lock:
+            self._stats['misses'] += 1
+        return result
+
+    def store(self, response: CachedResponse, price_data: Optional[Dict]):
+        """
+        Guarda el ``price_data`` extraído de una respuesta de ``request`` que
+        no estaba en la caché. Las páginas sin precio no se guardan.
+        """
+        if response.cached or not price_data:
+            return
+        with self._lock:
+            self._store(response.url, response.etag, response.last_modified,
+                        response.body_hash, len(response.body), price_data)
+
+    def fetch(self, session, url: str, parse: Callable[[str, bytes], Optional[Dict]],
+              timeout: Optional[float] = None, headers: Optional[Dict[str, str]] = None) -> Optional[Dict]:
+        """
+        Descarga ``url`` con GET condicional y devuelve su ``price_data``.
+
+        Args:
+            session: Sesión HTTP compatible con ``requests.Session``
+            url: URL del producto
+            parse: Función ``parse(url, body) -> price_data`` usada solo si el contenido cambió
+            timeout: Timeout de la petición
+            headers: Cabeceras adicionales (User-Agent, etc.)
+
+        Returns:
+            Datos de precio extraídos o reutilizados de la caché
+        """
+        response = self.request(session, url, timeout=timeout, headers=headers)
+        if response.cached:
+            return response.price_data
+        price_data = parse(url, response.body)
+        self.store(response, price_data)
+        return price_data
+
+    def close(self):
+        """
+        Cierra la conexión con el fichero de la caché.
+        """
+        with self._lock:
+            self._conn.close()
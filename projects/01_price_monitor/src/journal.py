@@ -0,0 +1,145 @@
+"""
+📓 Journal - Diario de ciclos de scraping para reanudarlos tras una caída
+========================================================================
+
+Si el proceso muere a mitad de ``scrape_once`` (un despliegue, el OOM
+killer, Ctrl+C), el siguiente ciclo empezaría de nuevo por el primer
+producto. ``CycleJournal`` mantiene un fichero de texto de solo-añadir con
+una línea por evento::
+
+    begin  <ciclo>  <inicio epoch>
+    done   <ciclo>  <product_id>  <url>
+    end    <ciclo>
+
+Las líneas ``done`` se escriben (con ``fsync``) cuando los precios ya están
+en la base de datos, es decir, al volcar el ``BufferedPriceWriter``. Al
+empezar un ciclo, si el último quedó sin ``end`` y no tiene más de
+``max_age`` segundos, se reanuda con el mismo identificador y se saltan las
+URLs ya completadas. Al terminar un ciclo el diario se vacía, así que solo
+ocupa espacio mientras hay un ciclo en curso.
+"""
+
+import logging
+import os
+import threading
+import time
+import uuid
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class CycleJournal:
+    """
+    Diario de solo-añadir con las URLs completadas del ciclo en curso.
+    """
+
+    def __init__(self, path: str = 'data/cycle_journal.log', max_age: float = 21600):
+        """
+        Args:
+            path: Ruta del fichero del diario
+            max_age: Segundos tras los que un ciclo interrumpido ya no se reanuda
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.max_age = max_age
+        self.cycle_id: Optional[str] = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, scraping_config: Dict) -> Optional['CycleJournal']:
+        """
+        Crea el diario a partir de ``scraping.journal``; devuelve None si está desactivado.
+        """
+        journal_config = scraping_config.get('journal', {})
+        if not journal_config.get('enabled', True):
+            return None
+        return cls(
+            path=journal_config.get('path', 'data/cycle_journal.log'),
+            max_age=journal_config.get('max_age', 21600)
+        )
+
+    def _read(self) -> Tuple[Optional[str], float, Set[Tuple[int, str]]]:
+        """
+        Último ciclo sin terminar del diario: (id, inicio, URLs completadas).
+        """
+        cycle_id, started, completed = None, 0.0, set()
+        try:
+            with open(self.path, encoding='utf-8') as journal:
+                for line in journal:
+                    # Una línea sin salto final quedó a medias al morir el proceso
+                    if not line.endswith('\n'):
+                        break
+                    fields = line.rstrip('\n').split('\t')
+                    if fields[0] == 'begin' and len(fields) == 3:
+                        cycle_id, started, completed = fields[1], float(fields[2]), set()
+                    elif fields[0] == 'done' and len(fields) == 4 and fields[1] == cycle_id:
+                        completed.add((int(fields[2]), fields[3]))
+                    elif fields[0] == 'end' and len(fields) == 2 and fields[1] == cycle_id:
+                        cycle_id, started, completed = None, 0.0, set()
+        except FileNotFoundError:
+            pass
+        return cycle_id, started, completed
+
+    def _rewrite(self, lines: Iterable[str]):
+        # Se escribe en un fichero temporal y se sustituye de forma atómica
+        temporary = f"{self.path}.tmp"
+        with open(temporary, 'w', encoding='utf-8') as journal:
+            journal.writelines(lines)
+            journal.flush()
+            os.fsync(journal.fileno())
+        os.replace(temporary, self.path)
+
+    def _append(self, lines: Iterable[str]):
+        with open(self.path, 'a', encoding='utf-8') as journal:
+            journal.writelines(lines)
+            journal.flush()
+            os.fsync(journal.fileno())
+
+    def begin(self) -> Set[Tuple[int, str]]:
+        """
+        Empieza un ciclo o reanuda el último interrumpido.
+
+        Returns:
+            (product_id, url) ya completados en el ciclo reanudado (vacío si es nuevo)
+        """
+        with self._lock:
+            cycle_id, started, completed = self._read()
+            if cycle_id and time.time() - started <= self.max_age:
+                # Se compacta el diario dejando solo el ciclo reanudado
+                self._rewrite([f"begin\t{cycle_id}\t{started}\n"] +
+                              [f"done\t{cycle_id}\t{product_id}\t{url}\n" for product_id, url in completed])
+                self.cycle_id = cycle_id
+                logger.info(f"📓 Reanudando el ciclo {cycle_id}: {len(completed)} URLs ya completadas")
+                return completed
+
+            if cycle_id:
+                logger.warning(f"📓 Ciclo {cycle_id} interrumpido hace más de {self.max_age:.0f}s, se descarta")
+            self.cycle_id = uuid.uuid4().hex[:12]
+            self._rewrite([f"begin\t{self.cycle_id}\t{time.time()}\n"])
+            return set()
+
+    def mark_done(self, keys: Iterable[Tuple[int, str]]):
+        """
+        Registra como completadas URLs cuyos precios ya están en la base de
+        datos. Fuera de un ciclo no hace nada.
+        """
+        with self._lock:
+            if self.cycle_id is None:
+                return
+            lines = [f"done\t{self.cycle_id}\t{product_id}\t{url}\n" for product_id, url in keys]
+            if lines:
+                self._append(lines)
+
+    def end(self):
+        """
+        Cierra el ciclo en curso y vacía el diario.
+        """
+        with self._lock:
+            if self.cycle_id is None:
+                return
+            self._append([f"end\t{self.cycle_id}\n"])
+            self._rewrite([])
+            self.cycle_id = None
@@ -0,0 +1,206 @@
+"""
+🏭 Parse Pipeline - Descarga y parseo en etapas separadas
+=========================================================
+
+Parsear HTML con BeautifulSoup consume CPU y retiene el GIL, así que añadir
+más hilos de descarga deja de ayudar en cuanto el parseo satura un núcleo.
+Este pipeline separa las dos etapas:
+
+1. Hilos de descarga que dejan los bytes crudos en una cola acotada.
+2. Un ``ProcessPoolExecutor`` de parsers que extrae ``price_data``.
+
+Si los parsers van por detrás, la cola se llena y los hilos de descarga se
+bloquean (backpressure), de modo que la memoria usada queda acotada por
+``queue_size`` páginas más las que están en vuelo en los procesos.
+
+Los trabajos se leen en un hilo aparte, así que el iterador puede bloquear
+(los reintentos esperan a su vencimiento) sin frenar las descargas; si falla,
+su excepción llega al consumidor de ``run``.
+"""
+
+import logging
+import os
+import queue
+import threading
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Any, Callable, Dict, Hashable, Iterable, Iterator, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+_DONE = object()
+
+
+class _Failed:
+    """
+    Error del iterador de trabajos, que se reenvía al consumidor.
+    """
+
+    def __init__(self, error: Exception):
+        self.error = error
+
+
+class ParsePipeline:
+    """
+    Pipeline de dos etapas: descarga en hilos, parseo en procesos.
+
+    El pool de procesos se crea en la primera llamada a ``run`` y se reutiliza
+    en las siguientes (p. ej. en cada pasada de reintentos) hasta ``close``.
+    """
+
+    def __init__(self, fetch: Callable[[str], Any],
+                 parse: Callable[[str, bytes], Optional[Dict]],
+                 fetch_workers: int = 8, parse_workers: int = None, queue_size: int = 64):
+        """
+        Args:
+            fetch: Función ``fetch(url)`` ejecutada en los hilos de descarga; devuelve
+                los bytes de la página o, si ya tiene el ``price_data`` (p. ej. de la
+                caché HTTP), ese diccionario, que se entrega sin pasar por los parsers
+            parse: Función ``parse(url, body) -> price_data``; debe poder serializarse
+                con pickle (función de nivel de módulo) porque se ejecuta en otro proceso
+            fetch_workers: Hilos de descarga
+            parse_workers: Procesos de parseo (por defecto, número de CPUs)
+            queue_size: Páginas descargadas que pueden esperar a ser parseadas
+        """
+        self.fetch = fetch
+        self.parse = parse
+        self.fetch_workers = fetch_workers
+        self.parse_workers = parse_workers or os.cpu_count() or 1
+        self.queue_size = queue_size
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    def _executor(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.parse_workers)
+        return self._pool
+
+    def close(self):
+        """
+        Termina los procesos de parseo.
+        """
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def run(self, jobs: Iterable[Tuple[Hashable, str]]) -> Iterator[Tuple[Hashable, Optional[Dict], Optional[Exception]]]:
+        """
+        Procesa los trabajos y devuelve los resultados a medida que terminan.
+
+        Args:
+            jobs: Pares (clave, url); la clave identifica el trabajo en los resultados.
+                Puede bloquear (p. ej. esperando a que venza un reintento): se
+                recorre en un hilo propio
+
+        Yields:
+            Tuplas (clave, price_data, error); ``error`` es None si todo fue bien
+
+        Raises:
+            La excepción del iterador ``jobs``, si falla
+        """
+        pending = queue.Queue(maxsize=self.fetch_workers)
+        raw = queue.Queue(maxsize=self.queue_size)
+        stop = threading.Event()
+        counter_lock = threading.Lock()
+        remaining_fetchers = [self.fetch_workers]
+
+        def put(target: queue.Queue, item) -> bool:
+            # Sin bloquear para siempre si el consumidor dejó de leer
+            while not stop.is_set():
+                try:
+                    target.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def feeder():
+            try:
+                for job in jobs:
+                    if not put(pending, job):
+                        return
+            except Exception as e:
+                put(raw, _Failed(e))
+            finally:
+                for _ in range(self.fetch_workers):
+                    put(pending, _DONE)
+
+        def fetcher():
+            try:
+                while not stop.is_set():
+                    try:
+                        job = pending.get(timeout=0.1)
+                    except queue.Empty:
+                        continue
+                    if job is _DONE:
+                        break
+                    key, url = job
+                    try:
+                        item = (key, url, self.fetch(url), None)
+                    except Exception as e:
+                        item = (key, url, None, e)
+                    if not put(raw, item):
+                        break
+            finally:
+                with counter_lock:
+                    remaining_fetchers[0] -= 1
+                    last = remaining_fetchers[0] == 0
+                if last:
+                    put(raw, _DONE)
+
+        threads = [threading.Thread(target=feeder, name="fetch-feeder", daemon=True)] + [
+            threading.Thread(target=fetcher, name=f"fetcher-{i}", daemon=True)
+            for i in range(self.fetch_workers)
+        ]
+        for thread in threads:
+            thread.start()
+
+        # Como mucho dos páginas por proceso esperando en el pool
+        max_in_flight = self.parse_workers * 2
+        in_flight: Dict[Any, Hashable] = {}
+        fetching = True
+        pool = self._executor()
+
+        try:
+            while fetching or in_flight:
+                while fetching and len(in_flight) < max_in_flight:
+                    try:
+                        item = raw.get(timeout=0.05 if in_flight else None)
+                    except queue.Empty:
+                        break
+                    if item is _DONE:
+                        fetching = False
+                        break
+                    if isinstance(item, _Failed):
+                        raise item.error
+                    key, url, body, error = item
+                    if error is not None:
+                        yield key, None, error
+                        continue
+                    if isinstance(body, dict):
+                        yield key, body, None
+                        continue
+                    in_flight[pool.submit(self.parse, url, body)] = key
+
+                if not in_flight:
+                    continue
+
+                done, _ = wait(in_flight, timeout=0.05, return_when=FIRST_COMPLETED)
+                for future in done:
+                    key = in_flight.pop(future)
+                    try:
+                        yield key, future.result(), None
+                    except Exception as e:
+                        yield key, None, e
+        finally:
+            stop.set()
+            for future in in_flight:
+                future.cancel()
+            # El feeder puede seguir esperando un reintento: es daemon y sale
+            # en cuanto intenta entregar el siguiente trabajo
+            for thread in threads[1:]:
+                thread.join()
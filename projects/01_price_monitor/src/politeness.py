@@ -0,0 +1,292 @@
+"""
+🚦 Politeness - Limitación de peticiones por dominio
+====================================================
+
+Cada tienda (host) tiene su propio token bucket con:
+
+- ``rate``: peticiones por segundo sostenidas
+- ``burst``: peticiones que pueden hacerse seguidas si el bucket está lleno
+- ``min_interval``: separación mínima entre dos peticiones al mismo host
+- bloqueo temporal cuando el servidor responde con ``Retry-After``
+
+Así el tiempo total de un ciclo depende del dominio más cargado y no del
+número de productos: mientras una tienda está esperando su turno, las demás
+siguen trabajando.
+"""
+
+import asyncio
+import math
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Callable, Dict, Iterable, List, Optional, TypeVar
+from urllib.parse import urlparse
+
+T = TypeVar('T')
+
+
+class TokenBucket:
+    """
+    Token bucket de un único dominio.
+    """
+
+    def __init__(self, rate: float, burst: int = 1, min_interval: float = 0.0):
+        """
+        Args:
+            rate: Tokens por segundo (0 o negativo = sin límite)
+            burst: Capacidad máxima del bucket
+            min_interval: Segundos mínimos entre dos peticiones consecutivas
+        """
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.min_interval = min_interval
+        self.tokens = float(self.burst)
+        self.updated = time.monotonic()
+        self.last_request = -math.inf
+        self.blocked_until = 0.0
+
+    def _refill(self, now: float):
+        if self.rate > 0:
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        else:
+            self.tokens = float(self.burst)
+        self.updated = now
+
+    def wait_time(self, now: float) -> float:
+        """
+        Segundos que faltan para poder hacer la siguiente petición (0 = ya).
+        """
+        self._refill(now)
+        wait = 0.0
+        if self.tokens < 1:
+            wait = (1 - self.tokens) / self.rate
+        wait = max(wait, self.last_request + self.min_interval - now, self.blocked_until - now)
+        return max(wait, 0.0)
+
+    def take(self, now: float):
+        """
+        Consume un token. Debe llamarse cuando ``wait_time`` devuelve 0.
+        """
+        self._refill(now)
+        self.tokens -= 1
+        self.last_request = now
+
+    def block_for(self, seconds: float, now: float):
+        """
+        Bloquea el dominio durante ``seconds`` (por ejemplo, por un Retry-After).
+        """
+        self.blocked_until = max(self.blocked_until, now + seconds)
+
+
+class DomainScheduler:
+    """
+    Planificador de peticiones con un token bucket por host.
+
+    Es seguro usarlo desde varios hilos y desde código asíncrono.
+    """
+
+    def __init__(self, rate: float = 0.5, burst: int = 1, min_interval: float = 0.0,
+                 domains: Optional[Dict[str, Dict]] = None):
+        """
+        Args:
+            rate: Peticiones por segundo por defecto para cada dominio
+            burst: Ráfaga por defecto
+            min_interval: Separación mínima por defecto
+            domains: Configuración específica por host, p. ej.
+                ``{"amazon.com": {"rate": 0.2, "burst": 2, "min_interval": 3}}``
+        """
+        self.defaults = {'rate': rate, 'burst': burst, 'min_interval': min_interval}
+        self.domains = domains or {}
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+        self.reset_metrics()
+
+    @classmethod
+    def from_config(cls, scraping_config: Dict) -> 'DomainScheduler':
+        """
+        Crea el planificador a partir de la sección ``scraping`` de la configuración.
+
+        Si no hay una sección ``politeness`` se mantiene el comportamiento
+        anterior: una petición cada ``delay`` segundos, pero ahora por dominio.
+        """
+        politeness = scraping_config.get('politeness', {})
+        delay = scraping_config.get('delay', 0)
+        return cls(
+            rate=politeness.get('rate', 1.0 / delay if delay > 0 else 0),
+            burst=politeness.get('burst', 1),
+            min_interval=politeness.get('min_interval', 0.0),
+            domains=politeness.get('domains', {})
+        )
+
+    @staticmethod
+    def host_for(url: str) -> str:
+        """
+        Devuelve el host de una URL sin el prefijo ``www.``.
+        """
+        host = (urlparse(url).hostname or '').lower()
+        return host[4:] if host.startswith('www.') else host
+
+    def _bucket(self, host: str) -> TokenBucket:
+        bucket = self._buckets.get(host)
+        if bucket is None:
+            settings = dict(self.defaults)
+            settings.update(self.domains.get(host, {}))
+            bucket = TokenBucket(settings['rate'], settings['burst'], settings['min_interval'])
+            self._buckets[host] = bucket
+        return bucket
+
+    def reset_metrics(self):
+        """
+        Reinicia las métricas (los buckets y bloqueos se conservan).
+        """
+        with self._lock:
+            self._metrics = defaultdict(lambda: {
+                'requests': 0,
+                'queue_depth': 0,
+                'max_queue_depth': 0,
+                'total_wait': 0.0,
+                'max_wait': 0.0,
+                'deferrals': 0
+            })
+
+    def _enqueue(self, host: str) -> float:
+        with self._lock:
+            metrics = self._metrics[host]
+            metrics['queue_depth'] += 1
+            metrics['max_queue_depth'] = max(metrics['max_queue_depth'], metrics['queue_depth'])
+        return time.monotonic()
+
+    def _peek(self, host: str) -> float:
+        with self._lock:
+            return self._bucket(host).wait_time(time.monotonic())
+
+    def _try_take(self, host: str, since: float) -> float:
+        """
+        Consume un token si está disponible; si no, devuelve cuánto esperar.
+        """
+        with self._lock:
+            now = time.monotonic()
+            bucket = self._bucket(host)
+            wait = bucket.wait_time(now)
+            if wait > 0:
+                return wait
+            bucket.take(now)
+            metrics = self._metrics[host]
+            metrics['queue_depth'] -= 1
+            metrics['requests'] += 1
+            metrics['total_wait'] += now - since
+            metrics['max_wait'] = max(metrics['max_wait'], now - since)
+            return 0.0
+
+    def acquire(self, url: str) -> float:
+        """
+        Bloquea el hilo actual hasta que el dominio de ``url`` admita una petición.
+
+        Returns:
+            Segundos esperados
+        """
+        host = self.host_for(url)
+        since = self._enqueue(host)
+        while True:
+            wait = self._try_take(host, since)
+            if wait == 0:
+                return time.monotonic() - since
+            time.sleep(wait)
+
+    async def acquire_async(self, url: str, lock: asyncio.Lock,
+                            slot: Optional[asyncio.Semaphore] = None) -> float:
+        """
+        Versión asíncrona de ``acquire``.
+
+        Args:
+            url: URL que se va a descargar
+            lock: Lock asíncrono del dominio; serializa a los que esperan en el
+                mismo host para que el orden sea FIFO y no despierten todos a la vez
+            slot: Semáforo de concurrencia global (opcional). Solo se pide cuando
+                el dominio ya admite la petición, de modo que un dominio lento no
+                ocupa plazas y la separación entre peticiones se respeta aunque
+                el pool esté saturado. Si se pasa, el llamador debe liberarlo.
+
+        Returns:
+            Segundos esperados
+        """
+        host = self.host_for(url)
+        since = self._enqueue(host)
+        async with lock:
+            while True:
+                wait = self._peek(host)
+                if wait > 0:
+                    await asyncio.sleep(wait)
+                    continue
+                if slot is not None:
+                    await slot.acquire()
+                if self._try_take(host, since) == 0:
+                    return time.monotonic() - since
+                if slot is not None:
+                    slot.release()
+
+    def defer(self, url: str, seconds: float):
+        """
+        Pausa el dominio de ``url`` (uso típico: respuesta 429/503 con Retry-After).
+        """
+        host = self.host_for(url)
+        with self._lock:
+            self._bucket(host).block_for(seconds, time.monotonic())
+            self._metrics[host]['deferrals'] += 1
+
+    def metrics(self) -> Dict[str, Dict]:
+        """
+        Métricas por dominio: peticiones, profundidad de cola y tiempos de espera.
+        """
+        with self._lock:
+            snapshot = {}
+            for host, metrics in self._metrics.items():
+                data = dict(metrics)
+                data['avg_wait'] = data['total_wait'] / data['requests'] if data['requests'] else 0.0
+                snapshot[host] = data
+            return snapshot
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Interpreta la cabecera Retry-After (segundos o fecha HTTP).
+
+    Returns:
+        Segundos a esperar o None si la cabecera no es válida
+    """
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+def interleave_by_domain(items: Iterable[T], url_of: Callable[[T], str]) -> List[T]:
+    """
+    Reordena los trabajos en round-robin por dominio, manteniendo el orden
+    relativo dentro de cada dominio.
+    """
+    queues: 'OrderedDict[str, List[T]]' = OrderedDict()
+    for item in items:
+        queues.setdefault(DomainScheduler.host_for(url_of(item)), []).append(item)
+
+    result = []
+    position = 0
+    while queues:
+        for host in list(queues):
+            queue = queues[host]
+            if position < len(queue):
+                result.append(queue[position])
+            else:
+                del queues[host]
+        position += 1
+    return result
@@ -0,0 +1,718 @@
+"""
+🗄️ Price Store - Consultas masivas sobre el histórico de precios
+================================================================
+
+``PriceDB`` trabaja fila a fila con el ORM: una transacción por precio
+guardado y una consulta por producto. Para los caminos que mueven miles de
+filas por ciclo, ``PriceStore`` habla directamente con las tablas a través del
+engine de SQLAlchemy (Core, sin objetos ORM):
+
+- ``upsert_products``: todos los productos configurados por nombre en una
+  sola transacción; si ya existen sin cambios es una única consulta
+  (``product_cache.ProductCache``).
+- ``save_price_history_many``: un lote de lecturas en una sola transacción
+  (``executemany``), en lugar de una transacción y un fsync por fila. Los
+  rollups OHLC del lote se fusionan en la misma transacción, así que
+  cualquier escritura a través de ``PriceStore`` los mantiene al día.
+- ``iter_price_history``: recorrido del histórico por bloques con paginación
+  por clave ``(timestamp, id)``; cada bloque es una consulta corta, así que la
+  memoria no depende del tamaño de la tabla y no se mantiene abierta una
+  transacción de lectura durante todo el recorrido.
+- ``get_latest_prices_by_product``: último precio de cada (producto, tienda)
+  de todo el catálogo en una sola consulta (``GROUP BY`` sobre el índice
+  ``(product_id, store, timestamp DESC)`` de ``db_tuning``).
+- ``iter_price_summary``: mínimo, máximo, media, lecturas, tiendas y
+  pendiente de cada producto en una ventana, agregados en la DB (``GROUP BY``)
+  sobre las lecturas o sobre los rollups según la ventana.
+- ``get_price_rollups``: rollups de un producto en una ventana, para los
+  gráficos de ventanas largas.
+- ``merge_rollups``: fusiona agregados OHLC en ``price_rollups`` con un
+  ``INSERT ... ON CONFLICT DO UPDATE`` (SQLite y PostgreSQL).
+- ``stage_rollups`` / ``replace_rollups``: reconstrucción de los rollups en
+  una tabla aparte que sustituye a los actuales en una sola transacción
+  (``rollups.backfill``).
+- ``save_imported_history_many`` / ``apply_imported_rollups``: importación
+  de un histórico exportado sin volver a sumar a los rollups lo que ya
+  resumían.
+- ``count_uncovered_days`` / ``delete_price_history`` / ``delete_rollups``:
+  compactación de la política de retención (``retention.py``).
+- ``save_trend_states`` / ``load_trend_states``: estado incremental de
+  ``trends.TrendTracker`` en ``price_trend_states`` (JSON por producto y tienda).
+
+Las tablas de ``PriceDB`` se reflejan por nombre (``Product.__tablename__`` y
+``PriceHistory.__tablename__``); las tablas propias se crean si no existen.
+"""
+
+import json
+import logging
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from sqlalchemy import (Column, DateTime, Float, Integer, MetaData, PrimaryKeyConstraint, String,
+                        Table, Text, and_, bindparam, case, delete, func, insert, literal, or_, select,
+                        update)
+from sqlalchemy.dialects import postgresql, sqlite
+
+from rollups import aggregate, first_full_bucket
+
+logger = logging.getLogger(__name__)
+
+_INSERTS = {
+    'sqlite': sqlite.insert,
+    'postgresql': postgresql.insert
+}
+
+
+class PriceStore:
+    """
+    Acceso por lotes al histórico de precios y a los rollups, sobre un engine de SQLAlchemy.
+    """
+
+    def __init__(self, engine, products_table: str = 'products', history_table: str = 'price_history',
+                 rollups_table: str = 'price_rollups', trend_states_table: str = 'price_trend_states'):
+        """
+        Args:
+            engine: Engine de SQLAlchemy (SQLite o PostgreSQL), p. ej. ``PriceDB.engine``
+            products_table: Tabla de productos de PriceDB
+            history_table: Tabla del histórico de PriceDB
+            rollups_table: Tabla de rollups OHLC (se crea si no existe)
+            trend_states_table: Tabla del estado de tendencias (se crea si no existe)
+        """
+        if engine.dialect.name not in _INSERTS:
+            raise ValueError(f"Base de datos no soportada: {engine.dialect.name}")
+        self.engine = engine
+        self._insert = _INSERTS[engine.dialect.name]
+
+        metadata = MetaData()
+        self.products = Table(products_table, metadata, autoload_with=engine)
+        self.history = Table(history_table, metadata, autoload_with=engine)
+        self.rollups = Table(rollups_table, metadata, *self._rollup_columns())
+        # Rollups de las lecturas importadas, antes de pasarlos a ``rollups``
+        self.imported_rollups = Table(f"{rollups_table}_import", metadata, *self._rollup_columns())
+        # Rollups reconstruidos por ``rollups.backfill``, antes de sustituir a los actuales
+        self.staged_rollups = Table(f"{rollups_table}_rebuild", metadata, *self._rollup_columns())
+        self.trend_states = Table(
+            trend_states_table, metadata,
+            Column('product_id', Integer, nullable=False),
+            Column('store', String, nullable=False),
+            Column('state', Text, nullable=False),
+            Column('updated_at', DateTime, nullable=False),
+            PrimaryKeyConstraint('product_id', 'store')
+        )
+        metadata.create_all(engine, tables=[self.rollups, self.imported_rollups, self.staged_rollups,
+                                            self.trend_states])
+
+    @staticmethod
+    def _rollup_columns() -> List:
+        return [
+            Column('product_id', Integer, nullable=False),
+            Column('store', String, nullable=False),
+            Column('granularity', String(8), nullable=False),
+            Column('bucket', DateTime, nullable=False),
+            Column('open', Float, nullable=False),
+            Column('high', Float, nullable=False),
+            Column('low', Float, nullable=False),
+            Column('close', Float, nullable=False),
+            Column('count', Integer, nullable=False),
+            Column('sum', Float, nullable=False),
+            Column('first_ts', DateTime, nullable=False),
+            Column('last_ts', DateTime, nullable=False),
+            PrimaryKeyConstraint('product_id', 'store', 'granularity', 'bucket')
+        ]
+
+    def upsert_products(self, products: List[Dict]) -> List:
+        """
+        Crea o actualiza productos por nombre en una sola transacción.
+
+        Una consulta lee todos los productos; solo los que no existen se
+        insertan y solo los que cambiaron se actualizan, cada grupo con un
+        ``executemany``, y en ese caso se vuelven a leer. Si todos existen sin
+        cambios, la llamada es una única consulta.
+
+        Cada inserción comprueba en la misma sentencia que el nombre sigue sin
+        existir (``INSERT ... SELECT ... WHERE NOT EXISTS``): en SQLite, con un
+        solo escritor, dos procesos que arrancan a la vez no duplican un
+        producto. En PostgreSQL eso solo lo garantiza un índice único sobre
+        ``name``; con él, la transacción perdedora falla y se reintenta.
+
+        Args:
+            products: Diccionarios con name, urls (lista, se guarda como JSON) y target_price
+
+        Returns:
+            Filas de ``products`` (con id, name y target_price) en el orden de ``products``
+        """
+        if not products:
+            return []
+        table = self.products
+        values = {
+            product['name']: {
+                'name': product['name'],
+                'urls': json.dumps(product['urls']),
+                'target_price': product.get('target_price')
+            }
+            for product in products
+        }
+        by_name = select(table).where(table.c.name.in_(list(values)))
+
+        with self.engine.begin() as connection:
+            existing = {row.name: row for row in connection.execute(by_name)}
+            new = [value for name, value in values.items() if name not in existing]
+            changed = [
+                {'b_name': name, 'b_urls': value['urls'], 'b_target_price': value['target_price']}
+                for name, value in values.items()
+                if name in existing and (existing[name].urls, existing[name].target_price) !=
+                (value['urls'], value['target_price'])
+            ]
+            if new:
+                name = bindparam('name', type_=table.c.name.type)
+                connection.execute(
+                    insert(table).from_select(
+                        ['name', 'urls', 'target_price'],
+                        select(name, bindparam('urls', type_=table.c.urls.type),
+                               bindparam('target_price', type_=table.c.target_price.type))
+                        .where(~select(table.c.id).where(table.c.name == name).exists())
+                    ),
+                    new
+                )
+            if changed:
+                connection.execute(
+                    update(table)
+                    .where(table.c.name == bindparam('b_name'))
+                    .values(urls=bindparam('b_urls'), target_price=bindparam('b_target_price')),
+                    changed
+                )
+            if new or changed:
+                existing = {row.name: row for row in connection.execute(by_name)}
+
+        return [existing[product['name']] for product in products]
+
+    def save_price_history_many(self, records: Iterable[Dict]) -> int:
+        """
+        Guarda un lote de lecturas y sus rollups en una sola transacción.
+
+        Las lecturas guardadas fila a fila con ``PriceDB.save_price_history``
+        no pasan por aquí y no tienen rollups: ``count_uncovered_days`` las
+        detecta y ``rollups.backfill`` las incorpora.
+
+        Args:
+            records: Diccionarios con los argumentos de ``PriceDB.save_price_history``
+                (product_id, store, price, url, availability, title) y timestamp
+
+        Returns:
+            Filas insertadas
+        """
+        rows = self._history_rows(records)
+        if not rows:
+            return 0
+        with self.engine.begin() as connection:
+            connection.execute(insert(self.history), rows)
+            self._merge_rollups(connection, aggregate(rows))
+        return len(rows)
+
+    def save_imported_history_many(self, records: Iterable[Dict]) -> int:
+        """
+        Guarda un lote de lecturas importadas, con sus rollups aparte.
+
+        Sus agregados se fusionan en ``imported_rollups`` en la misma
+        transacción; ``apply_imported_rollups`` los pasa después a los rollups
+        de los intervalos que aún no tenían ninguno. Un intervalo que ya tenía
+        rollup (p. ej. lecturas compactadas por la retención que se restauran
+        desde el archivo) ya las cuenta y no se suma dos veces.
+
+        Returns:
+            Filas insertadas
+        """
+        rows = self._history_rows(records)
+        if not rows:
+            return 0
+        with self.engine.begin() as connection:
+            connection.execute(insert(self.history), rows)
+            self._merge_rollups(connection, aggregate(rows), self.imported_rollups)
+        return len(rows)
+
+    def apply_imported_rollups(self) -> int:
+        """
+        Pasa a los rollups los agregados importados de intervalos que no tenían
+        rollup y vacía ``imported_rollups``.
+
+        Returns:
+            Rollups añadidos
+        """
+        imported, rollups = self.imported_rollups.c, self.rollups.c
+        existing = select(rollups.product_id).where(
+            rollups.product_id == imported.product_id, rollups.store == imported.store,
+            rollups.granularity == imported.granularity, rollups.bucket == imported.bucket
+        ).exists()
+        columns = [column.name for column in self.rollups.columns]
+        with self.engine.begin() as connection:
+            added = connection.execute(insert(self.rollups).from_select(
+                columns, select(*(imported[name] for name in columns)).where(~existing)
+            )).rowcount
+            connection.execute(delete(self.imported_rollups))
+        return added
+
+    @staticmethod
+    def _history_rows(records: Iterable[Dict]) -> List[Dict]:
+        return [
+            {
+                'product_id': record['product_id'],
+                'store': record['store'],
+                'price': record['price'],
+                'url': record['url'],
+                'availability': record.get('availability', True),
+                'title': record.get('title'),
+                'timestamp': record.get('timestamp') or datetime.now()
+            }
+            for record in records
+        ]
+
+    def iter_price_history(self, since: Optional[datetime] = None, until: Optional[datetime] = None,
+                           chunk_size: int = 10000, product_id: Optional[int] = None) -> Iterator:
+        """
+        Recorre el histórico en orden de ``timestamp`` por bloques de ``chunk_size`` filas.
+
+        Args:
+            since: Incluir lecturas desde este instante (inclusive)
+            until: Incluir lecturas anteriores a este instante (exclusive)
+            chunk_size: Filas por consulta
+            product_id: Limitar a un producto
+
+        Yields:
+            Filas con los atributos de PriceHistory (product_id, store, price,
+            url, availability, title, timestamp, id)
+        """
+        history = self.history.c
+        conditions = []
+        if since is not None:
+            conditions.append(history.timestamp >= since)
+        if until is not None:
+            conditions.append(history.timestamp < until)
+        if product_id is not None:
+            conditions.append(history.product_id == product_id)
+
+        last = None
+        while True:
+            query = select(self.history)
+            where = list(conditions)
+            if last is not None:
+                where.append(or_(
+                    history.timestamp > last.timestamp,
+                    and_(history.timestamp == last.timestamp, history.id > last.id)
+                ))
+            if where:
+                query = query.where(and_(*where))
+            query = query.order_by(history.timestamp, history.id).limit(chunk_size)
+            with self.engine.connect() as connection:
+                rows = connection.execute(query).all()
+            yield from rows
+            if len(rows) < chunk_size:
+                return
+            last = rows[-1]
+
+    def iter_recent_price_history(self, per_store: int) -> Iterator:
+        """
+        Últimas ``per_store`` lecturas de cada (producto, tienda), en orden de ``timestamp``.
+
+        Yields:
+            Filas con los atributos de PriceHistory
+        """
+        history = self.history.c
+        ranked = select(
+            self.history,
+            func.row_number().over(
+                partition_by=(history.product_id, history.store),
+                order_by=(history.timestamp.desc(), history.id.desc())
+            ).label('position')
+        ).subquery()
+        query = (
+            select(*(ranked.c[column.name] for column in self.history.columns))
+            .where(ranked.c.position <= per_store)
+            .order_by(ranked.c.timestamp, ranked.c.id)
+        )
+        with self.engine.connect() as connection:
+            yield from connection.execution_options(stream_results=True).execute(query)
+
+    def get_latest_prices_by_product(self) -> Dict[int, List]:
+        """
+        Última lectura de cada (producto, tienda) de todos los productos.
+
+        Equivale a llamar a ``PriceDB.get_latest_prices`` para cada producto,
+        pero con una sola consulta. Si dos lecturas comparten el último
+        timestamp se devuelve la insertada después.
+
+        Returns:
+            {product_id: [filas ordenadas por tienda]}
+        """
+        history = self.history.c
+        latest = (
+            select(history.product_id, history.store, func.max(history.timestamp).label('timestamp'))
+            .group_by(history.product_id, history.store)
+            .subquery()
+        )
+        query = (
+            select(self.history)
+            .join(latest, and_(
+                history.product_id == latest.c.product_id,
+                history.store == latest.c.store,
+                history.timestamp == latest.c.timestamp
+            ))
+            .order_by(history.product_id, history.store, history.id.desc())
+        )
+        by_product: Dict[int, List] = defaultdict(list)
+        with self.engine.connect() as connection:
+            for row in connection.execute(query):
+                stores = by_product[row.product_id]
+                if not stores or stores[-1].store != row.store:
+                    stores.append(row)
+        return dict(by_product)
+
+    def _days_since(self, column, since: datetime):
+        """
+        Expresión SQL con los días (fraccionarios) entre ``since`` y ``column``.
+        """
+        since = literal(since, DateTime)
+        if self.engine.dialect.name == 'sqlite':
+            return func.julianday(column) - func.julianday(since)
+        return func.extract('epoch', column - since) / 86400
+
+    def _raw_sums(self, since: datetime, until: Optional[datetime] = None):
+        history = self.history.c
+        x = self._days_since(history.timestamp, since)
+        query = select(
+            history.product_id, history.store,
+            func.min(history.price), func.max(history.price),
+            func.count(history.price), func.sum(history.price),
+            func.sum(x), func.sum(x * x), func.sum(x * history.price)
+        ).where(history.timestamp >= since)
+        if until is not None:
+            query = query.where(history.timestamp < until)
+        return query.group_by(history.product_id, history.store).order_by(history.product_id, history.store)
+
+    def _rollup_sums(self, granularity: str, since: datetime, full_from: datetime):
+        # Cada intervalo cuenta como ``count`` lecturas situadas en su inicio
+        rollups = self.rollups.c
+        x = self._days_since(rollups.bucket, since)
+        return (
+            select(
+                rollups.product_id, rollups.store,
+                func.min(rollups.low), func.max(rollups.high),
+                func.sum(rollups['count']), func.sum(rollups['sum']),
+                func.sum(x * rollups['count']), func.sum(x * x * rollups['count']),
+                func.sum(x * rollups['sum'])
+            )
+            .where(rollups.granularity == granularity, rollups.bucket >= full_from)
+            .group_by(rollups.product_id, rollups.store)
+            .order_by(rollups.product_id, rollups.store)
+        )
+
+    def iter_price_summary(self, days: int, granularity: str = 'raw',
+                           now: Optional[datetime] = None) -> Iterator[Dict]:
+        """
+        Estadísticas de cada producto con lecturas en los últimos ``days`` días.
+
+        Con ``granularity`` 'hour' o 'day' se leen los rollups de los
+        intervalos completos de la ventana y las lecturas crudas del trozo
+        inicial que no llega a un intervalo, así que mínimo, máximo, media y
+        lecturas coinciden con 'raw' mientras esas lecturas sigan en
+        PriceHistory.
+
+        Los agregados se calculan en la DB por (producto, tienda), ordenados
+        por producto; aquí solo se combinan las tiendas de cada producto a
+        medida que llegan las filas.
+
+        Args:
+            days: Días de la ventana
+            granularity: 'raw', 'hour' o 'day' (ver ``rollups.granularity_for_window``)
+            now: Fin de la ventana (por defecto, ahora)
+
+        Yields:
+            Diccionarios con product_id, min_price, max_price, avg_price,
+            data_points, stores (lista ordenada) y slope (cambio relativo por
+            día: media de la pendiente de cada tienda entre su precio medio)
+        """
+        since = (now or datetime.now()) - timedelta(days=days)
+        with self.engine.connect() as connection:
+            if granularity == 'raw':
+                head = {}
+                body = connection.execute(self._raw_sums(since))
+            else:
+                full_from = first_full_bucket(since, granularity)
+                head = defaultdict(dict)
+                for row in connection.execute(self._raw_sums(since, until=full_from)):
+                    head[row[0]][row[1]] = tuple(row[2:])
+                body = connection.execute(self._rollup_sums(granularity, since, full_from))
+
+            product_id, stores = None, {}
+            for row in body:
+                if row[0] != product_id:
+                    if stores:
+                        yield self._summarize(product_id, stores, head.pop(product_id, {}))
+                    product_id, stores = row[0], {}
+                stores[row[1]] = tuple(row[2:])
+            if stores:
+                yield self._summarize(product_id, stores, head.pop(product_id, {}))
+
+        # Productos con lecturas solo en el trozo inicial
+        for product_id, stores in head.items():
+            yield self._summarize(product_id, stores, {})
+
+    @staticmethod
+    def _summarize(product_id: int, stores: Dict[str, tuple], head: Dict[str, tuple]) -> Dict:
+        """
+        Combina las sumas por tienda ``(min, max, n, Σy, Σx, Σx², Σxy)`` de un producto.
+        """
+        stores = dict(stores)
+        for store, extra in head.items():
+            sums = stores.get(store)
+            stores[store] = extra if sums is None else (
+                min(sums[0], extra[0]), max(sums[1], extra[1])
+            ) + tuple(a + b for a, b in zip(sums[2:], extra[2:]))
+
+        relative_slopes = []
+        for _, _, n, sy, sx, sxx, sxy in stores.values():
+            denominator = n * sxx - sx * sx
+            if n >= 2 and sy and abs(denominator) > 1e-9:
+                relative_slopes.append((n * sxy - sx * sy) / denominator / (sy / n))
+        count = sum(sums[2] for sums in stores.values())
+        return {
+            'product_id': product_id,
+            'min_price': min(sums[0] for sums in stores.values()),
+            'max_price': max(sums[1] for sums in stores.values()),
+            'avg_price': sum(sums[3] for sums in stores.values()) / count,
+            'data_points': count,
+            'stores': sorted(stores),
+            'slope': sum(relative_slopes) / len(relative_slopes) if relative_slopes else 0.0
+        }
+
+    def merge_rollups(self, rollups: List[Dict]) -> int:
+        """
+        Fusiona agregados de ``rollups.aggregate`` con los guardados, en una transacción.
+
+        Mismo criterio que ``rollups.merge``: ``open`` / ``close`` según
+        ``first_ts`` / ``last_ts``, máximos y mínimos, y suma de ``count`` y ``sum``.
+
+        Returns:
+            Agregados fusionados
+        """
+        if not rollups:
+            return 0
+        with self.engine.begin() as connection:
+            self._merge_rollups(connection, rollups)
+        return len(rollups)
+
+    def _merge_rollups(self, connection, rollups: List[Dict], table: Optional[Table] = None):
+        table = self.rollups if table is None else table
+        current = table.c
+        statement = self._insert(table)
+        new = statement.excluded
+        statement = statement.on_conflict_do_update(
+            index_elements=['product_id', 'store', 'granularity', 'bucket'],
+            set_={
+                'open': case((new.first_ts < current.first_ts, new.open), else_=current.open),
+                'first_ts': case((new.first_ts < current.first_ts, new.first_ts), else_=current.first_ts),
+                'close': case((new.last_ts >= current.last_ts, new.close), else_=current.close),
+                'last_ts': case((new.last_ts >= current.last_ts, new.last_ts), else_=current.last_ts),
+                'high': case((new.high > current.high, new.high), else_=current.high),
+                'low': case((new.low < current.low, new.low), else_=current.low),
+                'count': current['count'] + new['count'],
+                'sum': current['sum'] + new['sum']
+            }
+        )
+        connection.execute(statement, rollups)
+
+    def stage_rollups(self, rollups: List[Dict]) -> int:
+        """
+        Fusiona agregados en la tabla de reconstrucción, sin tocar los rollups actuales.
+
+        Returns:
+            Agregados fusionados
+        """
+        if not rollups:
+            return 0
+        with self.engine.begin() as connection:
+            self._merge_rollups(connection, rollups, self.staged_rollups)
+        return len(rollups)
+
+    def clear_staged_rollups(self) -> int:
+        """
+        Vacía la tabla de reconstrucción (p. ej. los restos de una reconstrucción interrumpida).
+
+        Returns:
+            Filas borradas
+        """
+        with self.engine.begin() as connection:
+            return connection.execute(delete(self.staged_rollups)).rowcount
+
+    def replace_rollups(self, since: Optional[datetime] = None) -> int:
+        """
+        Sustituye los rollups (todos, o los de intervalos que empiezan en
+        ``since`` o después) por los reconstruidos, en una sola transacción, y
+        vacía la tabla de reconstrucción.
+
+        Returns:
+            Rollups copiados
+        """
+        statement = delete(self.rollups)
+        if since is not None:
+            statement = statement.where(self.rollups.c.bucket >= since)
+        columns = [column.name for column in self.rollups.columns]
+        with self.engine.begin() as connection:
+            connection.execute(statement)
+            copied = connection.execute(insert(self.rollups).from_select(
+                columns, select(*(self.staged_rollups.c[name] for name in columns))
+            )).rowcount
+            connection.execute(delete(self.staged_rollups))
+        return copied
+
+    def get_price_rollups(self, product_id: int, days: int, granularity: str) -> List[Dict]:
+        """
+        Rollups de un producto cuyos intervalos empiezan en los últimos ``days`` días.
+
+        Returns:
+            Diccionarios con las columnas de ``price_rollups``, ordenados por
+            tienda e intervalo
+        """
+        rollups = self.rollups.c
+        query = (
+            select(self.rollups)
+            .where(rollups.product_id == product_id, rollups.granularity == granularity,
+                   rollups.bucket >= datetime.now() - timedelta(days=days))
+            .order_by(rollups.store, rollups.bucket)
+        )
+        with self.engine.connect() as connection:
+            return [dict(row) for row in connection.execute(query).mappings()]
+
+    def get_oldest_price_timestamp(self) -> Optional[datetime]:
+        """
+        Instante de la lectura más antigua que conserva el histórico (None si está vacío).
+        """
+        with self.engine.connect() as connection:
+            return connection.execute(select(func.min(self.history.c.timestamp))).scalar()
+
+    def get_oldest_rollup_timestamp(self) -> Optional[datetime]:
+        """
+        Instante de la lectura más antigua resumida en los rollups (None si no hay).
+        """
+        with self.engine.connect() as connection:
+            return connection.execute(select(func.min(self.rollups.c.first_ts))).scalar()
+
+    def save_trend_states(self, states: List[tuple]) -> int:
+        """
+        Guarda (o reemplaza) estados de tendencias en una transacción.
+
+        Args:
+            states: Tuplas (product_id, store, diccionario de ``StreamingPriceState.to_dict``)
+
+        Returns:
+            Estados guardados
+        """
+        if not states:
+            return 0
+        now = datetime.now()
+        rows = [
+            {'product_id': product_id, 'store': store, 'state': json.dumps(state), 'updated_at': now}
+            for product_id, store, state in states
+        ]
+        statement = self._insert(self.trend_states)
+        statement = statement.on_conflict_do_update(
+            index_elements=['product_id', 'store'],
+            set_={'state': statement.excluded.state, 'updated_at': statement.excluded.updated_at}
+        )
+        with self.engine.begin() as connection:
+            connection.execute(statement, rows)
+        return len(rows)
+
+    def load_trend_states(self) -> Iterator[tuple]:
+        """
+        Estados de tendencias guardados.
+
+        Yields:
+            Tuplas (product_id, store, diccionario del estado)
+        """
+        with self.engine.connect() as connection:
+            rows = connection.execute(select(self.trend_states)).all()
+        for row in rows:
+            yield row.product_id, row.store, json.loads(row.state)
+
+    def count_uncovered_days(self, before: datetime) -> int:
+        """
+        Días (producto, tienda) anteriores a ``before`` con lecturas que su
+        rollup diario no resume por completo (o que no tienen rollup).
+
+        Returns:
+            0 si todas las lecturas anteriores a ``before`` están en los rollups diarios
+        """
+        history, rollups = self.history.c, self.rollups.c
+        raw = (
+            select(history.product_id, history.store, func.date(history.timestamp).label('day'),
+                   func.count().label('readings'))
+            .where(history.timestamp < before)
+            .group_by(history.product_id, history.store, func.date(history.timestamp))
+            .subquery()
+        )
+        daily = (
+            select(rollups.product_id, rollups.store, func.date(rollups.bucket).label('day'),
+                   rollups['count'].label('readings'))
+            .where(rollups.granularity == 'day', rollups.bucket < before)
+            .subquery()
+        )
+        query = (
+            select(func.count())
+            .select_from(raw.outerjoin(daily, and_(
+                raw.c.product_id == daily.c.product_id,
+                raw.c.store == daily.c.store,
+                raw.c.day == daily.c.day
+            )))
+            .where(or_(daily.c.readings.is_(None), daily.c.readings < raw.c.readings))
+        )
+        with self.engine.connect() as connection:
+            return connection.execute(query).scalar()
+
+    def delete_price_history(self, before: datetime, chunk_size: int = 50000) -> int:
+        """
+        Borra las lecturas anteriores a ``before``, de la más antigua a la más
+        reciente, en transacciones de ``chunk_size`` filas.
+
+        Returns:
+            Filas borradas
+        """
+        history = self.history.c
+        oldest = (
+            select(history.id)
+            .where(history.timestamp < before)
+            .order_by(history.timestamp, history.id)
+            .limit(chunk_size)
+        )
+        deleted = 0
+        while True:
+            with self.engine.begin() as connection:
+                rows = connection.execute(delete(self.history).where(history.id.in_(oldest))).rowcount
+            deleted += rows
+            if rows < chunk_size:
+                return deleted
+
+    def delete_rollups(self, granularity: str, before: datetime) -> int:
+        """
+        Borra los rollups de ``granularity`` de intervalos anteriores a ``before``.
+
+        Returns:
+            Filas borradas
+        """
+        statement = delete(self.rollups).where(self.rollups.c.granularity == granularity,
+                                               self.rollups.c.bucket < before)
+        with self.engine.begin() as connection:
+            return connection.execute(statement).rowcount
+
+    def clear_rollups(self, since: Optional[datetime] = None) -> int:
+        """
+        Borra los rollups (todos, o los de intervalos que empiezan en ``since`` o después).
+
+        Returns:
+            Filas borradas
+        """
+        statement = delete(self.rollups)
+        if since is not None:
+            statement = statement.where(self.rollups.c.bucket >= since)
+        with self.engine.begin() as connection:
+            return connection.execute(statement).rowcount
@@ -0,0 +1,96 @@
+"""
+💾 Price Writer - Escritura por lotes del histórico de precios
+==============================================================
+
+Guardar cada precio con ``PriceDB.save_price_history`` implica una transacción
+(y un fsync en SQLite) por fila. ``BufferedPriceWriter`` acumula los registros
+y los envía con ``PriceStore.save_price_history_many`` cada ``batch_size`` filas
+o cada ``flush_interval`` segundos, en una única transacción por lote.
+
+``PriceStore`` actualiza en la misma transacción los rollups OHLC por hora y
+por día de cada lote (ver ``rollups.py``).
+"""
+
+import logging
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+
+logger = logging.getLogger(__name__)
+
+
+class BufferedPriceWriter:
+    """
+    Buffer de registros de precio que se vuelca a la base de datos por lotes.
+    """
+
+    def __init__(self, store, batch_size: int = 500, flush_interval: float = 5.0,
+                 on_flush: Optional[Callable[[List[Dict]], None]] = None):
+        """
+        Args:
+            store: Instancia de PriceStore
+            batch_size: Filas acumuladas que disparan un volcado
+            flush_interval: Segundos máximos que un registro espera en el buffer
+            on_flush: Se llama con los registros de cada lote ya guardado
+        """
+        self.store = store
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.on_flush = on_flush
+        self._buffer: List[Dict] = []
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+
+    def add(self, **record):
+        """
+        Añade un registro con los mismos argumentos que ``PriceDB.save_price_history``
+        (product_id, store, price, url, availability, title). Si no se indica
+        ``timestamp`` se usa el momento de la llamada.
+        """
+        record.setdefault('timestamp', datetime.now())
+        with self._lock:
+            self._buffer.append(record)
+            due = (len(self._buffer) >= self.batch_size or
+                   time.monotonic() - self._last_flush >= self.flush_interval)
+        if due:
+            self.flush()
+
+    def flush(self) -> int:
+        """
+        Escribe todos los registros pendientes en una sola transacción.
+
+        Si la escritura falla, los registros se conservan para el siguiente intento.
+
+        Returns:
+            Número de filas escritas
+        """
+        with self._lock:
+            records, self._buffer = self._buffer, []
+            self._last_flush = time.monotonic()
+            if not records:
+                return 0
+            try:
+                # Lecturas y rollups en la misma transacción: nunca quedan desalineados
+                self.store.save_price_history_many(records)
+            except Exception:
+                self._buffer = records + self._buffer
+                raise
+            if self.on_flush:
+                self.on_flush(records)
+        logger.debug(f"💾 {len(records)} precios guardados en lote")
+        return len(records)
+
+    @property
+    def pending(self) -> int:
+        """
+        Registros en el buffer pendientes de escribir.
+        """
+        return len(self._buffer)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.flush()
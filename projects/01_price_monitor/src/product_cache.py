@@ -0,0 +1,109 @@
+"""
+🪪 Product Cache - Identidad de los productos configurados en memoria
+=====================================================================
+
+Los productos de la configuración casi nunca cambian, pero cada ciclo hacía
+un ``get_or_create_product`` (SELECT y quizá INSERT/UPDATE) por producto.
+``ProductCache`` guarda el producto de la DB por nombre junto con una huella
+(hash) de su configuración:
+
+- al arrancar, todos los productos se resuelven con un único
+  ``PriceStore.upsert_products`` (una sola consulta si ya existen);
+- en cada ciclo, un producto cuya huella no ha cambiado es una búsqueda en
+  un diccionario;
+- solo los productos nuevos o modificados vuelven a la DB, de nuevo en un
+  único upsert.
+
+Si el upsert falla, la transacción se deshace entera y ``resolve`` devuelve
+el error para cada producto pendiente; el siguiente ``resolve`` lo reintenta.
+No hay un camino producto a producto: con varios procesos (modo distribuido)
+dos ``get_or_create_product`` simultáneos podrían crear el mismo producto dos
+veces.
+"""
+
+import hashlib
+import json
+import logging
+from typing import Any, Dict, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class ProductCache:
+    """
+    Caché nombre -> producto de la DB, invalidada por la huella de la configuración.
+    """
+
+    def __init__(self, store):
+        """
+        Args:
+            store: Instancia de PriceStore
+        """
+        self.store = store
+        self._entries: Dict[str, Tuple[str, Any]] = {}
+
+    @staticmethod
+    def fingerprint(product_config: Dict) -> str:
+        """
+        Huella de los campos que se guardan en la DB (nombre, URLs y precio objetivo).
+        """
+        identity = {
+            'name': product_config['name'],
+            'urls': product_config['urls'],
+            'target_price': product_config.get('target_price')
+        }
+        return hashlib.sha1(json.dumps(identity, sort_keys=True).encode('utf-8')).hexdigest()
+
+    def resolve(self, products: List[Dict]) -> Tuple[Dict[str, Any], List[Tuple[Dict, Exception]]]:
+        """
+        Devuelve el producto de la DB de cada configuración.
+
+        Args:
+            products: Configuraciones de producto (name, urls, target_price)
+
+        Returns:
+            Tupla (productos por nombre, [(configuración, error)] de los que fallaron)
+        """
+        stale = []
+        for product_config in products:
+            fingerprint = self.fingerprint(product_config)
+            entry = self._entries.get(product_config['name'])
+            if entry is None or entry[0] != fingerprint:
+                stale.append((product_config, fingerprint))
+
+        failed = []
+        if stale:
+            failed = self._refresh(stale)
+
+        resolved = {
+            product_config['name']: self._entries[product_config['name']][1]
+            for product_config in products
+            if product_config['name'] in self._entries
+        }
+        return resolved, failed
+
+    def _refresh(self, stale: List[Tuple[Dict, str]]) -> List[Tuple[Dict, Exception]]:
+        rows = [
+            {
+                'name': product_config['name'],
+                'urls': product_config['urls'],
+                'target_price': product_config.get('target_price')
+            }
+            for product_config, _ in stale
+        ]
+        try:
+            products = self.store.upsert_products(rows)
+        except Exception as e:
+            logger.error(f"❌ Error guardando {len(rows)} productos: {str(e)}")
+            return [(product_config, e) for product_config, _ in stale]
+
+        for (product_config, fingerprint), product in zip(stale, products):
+            self._entries[product_config['name']] = (fingerprint, product)
+        logger.info(f"🪪 {len(stale)} productos resueltos en la DB")
+        return []
+
+    def invalidate(self):
+        """
+        Vacía la caché; el siguiente ``resolve`` vuelve a la DB.
+        """
+        self._entries.clear()
@@ -0,0 +1,169 @@
+"""
+🧊 Retention - Política de retención y compactación del histórico
+==================================================================
+
+``PriceHistory`` crece sin límite, y con él el coste de cada consulta. La
+política divide los datos en capas:
+
+- **Caliente**: lecturas crudas de los últimos ``raw_days`` días, en
+  ``PriceHistory``. Es lo único que leen las consultas de detalle.
+- **Templada**: rollups horarios de los últimos ``hourly_days`` días
+  (None = se conservan siempre).
+- **Fría**: rollups diarios (open/high/low/close por tienda y día), que se
+  conservan siempre y son lo que leen los reportes de 30+ días.
+
+Las lecturas crudas más antiguas que ``raw_days`` se archivan opcionalmente
+(Parquet particionado o JSON Lines comprimido, ver ``archive.py``) y después
+se borran. ``BufferedPriceWriter`` actualiza los rollups en cada lote, pero
+las lecturas guardadas por otros caminos pueden no estar resumidas: antes de
+borrar nada se comprueba que los rollups diarios cubren todas las lecturas
+anteriores al corte y, si no, la compactación se cancela hasta que se
+reconstruyan (``--backfill-rollups``).
+
+``granularity_for_window`` lee datos crudos para ventanas de menos de 2 días y
+rollups horarios hasta 30 días, así que la política exige ``raw_days`` y
+``hourly_days`` por encima de esos umbrales para que ninguna ventana quede
+incompleta.
+"""
+
+import logging
+import os
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+import archive
+from rollups import MIN_DAYS_FOR_GRANULARITY
+
+logger = logging.getLogger(__name__)
+
+
+class RetentionPolicy:
+    """
+    Mantenimiento periódico: archivar, compactar y borrar datos antiguos.
+    """
+
+    def __init__(self, raw_days: int = 90, hourly_days: Optional[int] = 400,
+                 archive_dir: Optional[str] = 'data/archive', archive_format: str = 'parquet',
+                 interval_hours: float = 24, chunk_size: int = 50000):
+        """
+        Args:
+            raw_days: Días de lecturas crudas que se conservan en PriceHistory
+            hourly_days: Días de rollups horarios que se conservan (None = todos)
+            archive_dir: Directorio donde archivar las lecturas crudas antes de
+                borrarlas (None = borrar sin archivar)
+            archive_format: 'parquet' (requiere pyarrow), 'csv' o 'jsonl'
+            interval_hours: Horas mínimas entre dos ejecuciones de ``run_if_due``
+            chunk_size: Filas por bloque al archivar y al borrar
+        """
+        if raw_days < MIN_DAYS_FOR_GRANULARITY['hour']:
+            raise ValueError(f"raw_days debe ser al menos {MIN_DAYS_FOR_GRANULARITY['hour']}")
+        if hourly_days is not None and hourly_days < MIN_DAYS_FOR_GRANULARITY['day']:
+            raise ValueError(f"hourly_days debe ser al menos {MIN_DAYS_FOR_GRANULARITY['day']}")
+        if archive_format not in archive.FORMATS:
+            raise ValueError(f"Formato de archivo no soportado: {archive_format}")
+        if archive_dir and archive_format == 'parquet' and not archive.PYARROW_AVAILABLE:
+            logger.warning("pyarrow no está instalado, se archivará en JSON Lines")
+            archive_format = 'jsonl'
+
+        self.raw_days = raw_days
+        self.hourly_days = hourly_days
+        self.archive_dir = archive_dir
+        self.archive_format = archive_format
+        self.interval = interval_hours * 3600
+        self.chunk_size = chunk_size
+        self._last_run: Optional[float] = None
+
+    @classmethod
+    def from_config(cls, config: Dict) -> Optional['RetentionPolicy']:
+        """
+        Crea la política desde la sección ``retention`` de la configuración.
+
+        Returns:
+            None si la sección no existe o ``enabled`` es false
+        """
+        retention = config.get('retention')
+        if not retention or not retention.get('enabled', True):
+            return None
+        return cls(
+            raw_days=retention.get('raw_days', 90),
+            hourly_days=retention.get('hourly_days', 400),
+            archive_dir=retention.get('archive_dir', 'data/archive') if retention.get('archive', True) else None,
+            archive_format=retention.get('archive_format', 'parquet'),
+            interval_hours=retention.get('interval_hours', 24),
+            chunk_size=retention.get('chunk_size', 50000)
+        )
+
+    @staticmethod
+    def _cutoff(days: int, now: datetime) -> datetime:
+        """
+        Inicio del día de hace ``days`` días: se compactan días completos.
+        """
+        return (now - timedelta(days=days)).replace(hour=0, minute=0, second=0, microsecond=0)
+
+    def run(self, store, now: datetime = None) -> Dict:
+        """
+        Ejecuta una pasada completa de mantenimiento.
+
+        Las lecturas solo se borran después de haberse archivado; si el archivo
+        falla, la excepción se propaga y no se borra nada. Tampoco se borra
+        nada si los rollups diarios no cubren las lecturas anteriores al corte.
+
+        Args:
+            store: Instancia de PriceStore
+            now: Instante de referencia (por defecto, ahora)
+
+        Returns:
+            Diccionario con cutoff, uncovered, archived, deleted, hourly_deleted
+            y seconds
+        """
+        now = now or datetime.now()
+        start = time.perf_counter()
+        cutoff = self._cutoff(self.raw_days, now)
+        stats = {'cutoff': cutoff, 'uncovered': 0, 'archived': 0, 'deleted': 0, 'hourly_deleted': 0}
+
+        stats['uncovered'] = store.count_uncovered_days(before=cutoff)
+        if stats['uncovered']:
+            stats['seconds'] = time.perf_counter() - start
+            self._last_run = time.monotonic()
+            logger.error(
+                f"🧊 Retención cancelada: {stats['uncovered']} días (producto, tienda) anteriores a "
+                f"{cutoff:%Y-%m-%d} no están resumidos en los rollups diarios; ejecuta --backfill-rollups"
+            )
+            return stats
+
+        if self.archive_dir:
+            destination = os.path.join(self.archive_dir, self.archive_format)
+            if self.archive_format != 'parquet':
+                # Un fichero por ejecución; el dataset Parquet se amplía por particiones
+                destination = os.path.join(destination, cutoff.date().isoformat())
+            exported = archive.export_history(store, destination, format=self.archive_format,
+                                              chunk_size=self.chunk_size, until=cutoff)
+            stats['archived'] = exported['rows']
+
+        stats['deleted'] = store.delete_price_history(before=cutoff, chunk_size=self.chunk_size)
+
+        if self.hourly_days is not None:
+            stats['hourly_deleted'] = store.delete_rollups(
+                granularity='hour', before=self._cutoff(self.hourly_days, now)
+            )
+
+        stats['seconds'] = time.perf_counter() - start
+        self._last_run = time.monotonic()
+        logger.info(
+            f"🧊 Retención: {stats['deleted']} lecturas anteriores a {cutoff:%Y-%m-%d} compactadas "
+            f"({stats['archived']} archivadas), {stats['hourly_deleted']} rollups horarios eliminados "
+            f"en {stats['seconds']:.1f}s"
+        )
+        return stats
+
+    def run_if_due(self, store) -> Optional[Dict]:
+        """
+        Ejecuta ``run`` si han pasado ``interval_hours`` desde la última vez.
+
+        Returns:
+            Estadísticas de la pasada, o None si aún no tocaba
+        """
+        if self._last_run is not None and time.monotonic() - self._last_run < self.interval:
+            return None
+        return self.run(store)
@@ -0,0 +1,123 @@
+"""
+🔁 Retries - Reintentos diferidos con backoff exponencial y jitter
+==================================================================
+
+Un 503 o un timeout pasajero dejaba el producto sin dato hasta el siguiente
+ciclo. Con ``RetryPolicy`` los fallos transitorios de la tienda (ver
+``breakers.is_store_failure``) se reintentan dentro del mismo ciclo:
+
+- La espera del reintento ``n`` es ``base_delay * 2 ** (n - 1)`` (hasta
+  ``max_delay``), de la que la mitad es aleatoria ("equal jitter") para que
+  los reintentos de una tienda que acaba de fallar no lleguen todos a la vez.
+- Cada URL tiene un presupuesto de ``max_retries`` reintentos por ciclo;
+  agotado, el fallo es definitivo.
+- Los reintentos esperan en una ``RetryQueue`` y se intercalan con el
+  trabajo pendiente a medida que vencen, así que no frenan la pasada
+  principal.
+"""
+
+import heapq
+import itertools
+import random
+import threading
+import time
+from typing import Dict, Generic, Iterable, Iterator, List, Optional, TypeVar
+
+T = TypeVar('T')
+
+
+class RetryPolicy:
+    """
+    Presupuesto de reintentos por URL y espera entre ellos.
+    """
+
+    def __init__(self, max_retries: int = 3, base_delay: float = 2.0, max_delay: float = 60.0):
+        """
+        Args:
+            max_retries: Reintentos como máximo por URL y ciclo
+            base_delay: Espera máxima antes del primer reintento
+            max_delay: Espera máxima antes de cualquier reintento
+        """
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    @classmethod
+    def from_config(cls, scraping_config: Dict) -> Optional['RetryPolicy']:
+        """
+        Crea la política a partir de ``scraping.retries``; devuelve None si está desactivada.
+        """
+        config = scraping_config.get('retries', {})
+        if not config.get('enabled', True) or config.get('max_retries', 3) <= 0:
+            return None
+        return cls(
+            max_retries=config.get('max_retries', 3),
+            base_delay=config.get('base_delay', 2.0),
+            max_delay=config.get('max_delay', 60.0)
+        )
+
+    def delay(self, attempt: int) -> Optional[float]:
+        """
+        Segundos de espera antes del reintento número ``attempt`` (1, 2, ...).
+
+        Returns:
+            La espera, o None si se agotó el presupuesto de la URL
+        """
+        if attempt > self.max_retries:
+            return None
+        cap = min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+        return cap / 2 + random.uniform(0, cap / 2)
+
+
+class RetryQueue(Generic[T]):
+    """
+    Reintentos pendientes ordenados por vencimiento. Seguro entre hilos.
+    """
+
+    def __init__(self):
+        self._heap: List = []
+        self._counter = itertools.count()
+        self._condition = threading.Condition()
+
+    def push(self, item: T, delay: float):
+        """
+        Programa ``item`` para dentro de ``delay`` segundos.
+        """
+        with self._condition:
+            heapq.heappush(self._heap, (time.monotonic() + delay, next(self._counter), item))
+            self._condition.notify_all()
+
+    def pop_due(self) -> List[T]:
+        """
+        Saca los reintentos ya vencidos, del más antiguo al más reciente.
+        """
+        now = time.monotonic()
+        due = []
+        with self._condition:
+            while self._heap and self._heap[0][0] <= now:
+                due.append(heapq.heappop(self._heap)[2])
+        return due
+
+    def interleave(self, items: Iterable[T]) -> Iterator[T]:
+        """
+        Recorre ``items`` insertando antes de cada uno los reintentos vencidos.
+        Al terminar ``items`` espera a los reintentos que quedan (también a los
+        que se programen mientras tanto) hasta que la cola se vacía.
+        """
+        for item in items:
+            yield from self.pop_due()
+            yield item
+
+        while True:
+            with self._condition:
+                if not self._heap:
+                    return
+                wait = self._heap[0][0] - time.monotonic()
+                if wait > 0:
+                    # Se despierta antes si se programa un reintento más próximo
+                    self._condition.wait(wait)
+            yield from self.pop_due()
+
+    def __len__(self) -> int:
+        with self._condition:
+            return len(self._heap)
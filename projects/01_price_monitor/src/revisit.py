@@ -0,0 +1,287 @@
+"""
+🔁 Revisit - Frecuencia de revisión adaptativa por URL
+======================================================
+
+Revisar todas las URLs con el mismo periodo desperdicia peticiones en precios
+que no cambian en semanas y muestrea poco los que cambian a diario.
+``RevisitPlanner`` estima para cada URL su tasa de cambio y deriva de ella el
+periodo de revisión:
+
+- Los cambios de precio se modelan como un proceso de Poisson de tasa λ. Si
+  de ``n`` revisiones (separadas en media ``Δ`` segundos) ``X`` detectaron un
+  cambio, la estimación con corrección de sesgo es
+  ``λ = -ln(1 - (X + 0.5) / (n + 1)) / Δ``. Los contadores decaen en cada
+  observación para adaptarse si la volatilidad cambia.
+- El periodo es ``changes_per_visit / λ`` (cambios esperados entre dos
+  visitas), acotado a ``[min_interval, max_interval]``. Las URLs sin datos
+  usan el periodo por defecto.
+- Con ``budget_per_hour``, si la suma de peticiones por hora de todas las URLs
+  supera el presupuesto, todos los periodos se alargan en la misma proporción
+  (``rebalance``) hasta cumplirlo.
+- Al arrancar solo se aprende de los últimos ``history_days`` días: con el
+  olvido de ``decay`` las lecturas más antiguas apenas pesan, y leer todo el
+  histórico en cada arranque crece sin límite.
+
+``simulate`` reproduce históricos grabados para comparar el planificador con
+el periodo fijo: peticiones ahorradas frente a cambios de precio perdidos.
+"""
+
+import heapq
+import logging
+import math
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+SECONDS_PER_HOUR = 3600
+
+
+class _UrlStats:
+    __slots__ = ('checks', 'changes', 'elapsed', 'last_price', 'last_ts')
+
+    def __init__(self):
+        self.checks = 0.0
+        self.changes = 0.0
+        self.elapsed = 0.0
+        self.last_price: Optional[float] = None
+        self.last_ts: Optional[float] = None
+
+
+class RevisitPlanner:
+    """
+    Periodo de revisión de cada URL a partir de su tasa de cambio observada.
+    """
+
+    def __init__(self, default_interval: float = 3600, min_interval: float = 900,
+                 max_interval: float = 86400, changes_per_visit: float = 0.5,
+                 budget_per_hour: Optional[float] = None, decay: float = 0.99,
+                 history_days: float = 30):
+        """
+        Args:
+            default_interval: Periodo de las URLs sin historial (segundos)
+            min_interval: Periodo mínimo (segundos)
+            max_interval: Periodo máximo (segundos)
+            changes_per_visit: Cambios esperados entre dos visitas; menos = más visitas
+            budget_per_hour: Peticiones por hora máximas entre todas las URLs (None = sin límite)
+            decay: Factor de olvido de los contadores por observación
+            history_days: Días de histórico que se leen al arrancar
+        """
+        if not 0 < min_interval <= max_interval:
+            raise ValueError("Se requiere 0 < min_interval <= max_interval")
+        self.default_interval = default_interval
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.changes_per_visit = changes_per_visit
+        self.budget_per_hour = budget_per_hour
+        self.decay = decay
+        self.history_days = history_days
+        self.scale = 1.0
+        self._stats: Dict[str, _UrlStats] = {}
+
+    @classmethod
+    def from_config(cls, config: Optional[Dict], default_interval: float) -> Optional['RevisitPlanner']:
+        """
+        Crea el planificador desde la sección ``scheduler.adaptive``.
+
+        Returns:
+            None si la sección no existe o ``enabled`` es false
+        """
+        if not config or not config.get('enabled', True):
+            return None
+        return cls(
+            default_interval=default_interval,
+            min_interval=config.get('min_interval', 900),
+            max_interval=config.get('max_interval', 86400),
+            changes_per_visit=config.get('changes_per_visit', 0.5),
+            budget_per_hour=config.get('budget_per_hour'),
+            decay=config.get('decay', 0.99),
+            history_days=config.get('history_days', 30)
+        )
+
+    def observe(self, url: str, price: float, timestamp: float):
+        """
+        Registra una revisión de ``url`` (``timestamp`` en segundos epoch).
+        """
+        stats = self._stats.get(url)
+        if stats is None:
+            stats = self._stats[url] = _UrlStats()
+        if stats.last_ts is not None and timestamp > stats.last_ts:
+            stats.checks = stats.checks * self.decay + 1
+            stats.changes = stats.changes * self.decay + (price != stats.last_price)
+            stats.elapsed = stats.elapsed * self.decay + (timestamp - stats.last_ts)
+        stats.last_price = price
+        stats.last_ts = timestamp
+
+    def learn(self, records: Iterable) -> int:
+        """
+        Aprende las tasas de cambio de un histórico (registros PriceHistory en
+        orden cronológico, con url, price y timestamp).
+
+        Returns:
+            Número de registros procesados
+        """
+        count = 0
+        for record in records:
+            self.observe(record.url, record.price, record.timestamp.timestamp())
+            count += 1
+        logger.info(f"🔁 Tasas de cambio aprendidas de {count} lecturas ({len(self._stats)} URLs)")
+        return count
+
+    def change_rate(self, url: str) -> Optional[float]:
+        """
+        Cambios por segundo estimados, o None si aún no hay dos revisiones.
+        """
+        stats = self._stats.get(url)
+        if stats is None or stats.checks < 1:
+            return None
+        changed = (stats.changes + 0.5) / (stats.checks + 1)
+        return -math.log(1 - changed) / (stats.elapsed / stats.checks)
+
+    def _clamp(self, interval: float) -> float:
+        return min(self.max_interval, max(self.min_interval, interval))
+
+    def _base_interval(self, url: str) -> float:
+        rate = self.change_rate(url)
+        if rate is None:
+            return self._clamp(self.default_interval)
+        return self._clamp(self.changes_per_visit / rate)
+
+    def interval(self, url: str) -> float:
+        """
+        Periodo de revisión de ``url`` en segundos, ya ajustado al presupuesto.
+        """
+        return self._clamp(self._base_interval(url) * self.scale)
+
+    def requests_per_hour(self, urls: Iterable[str], scale: float = None) -> float:
+        """
+        Peticiones por hora que generarían ``urls`` con el factor ``scale``.
+        """
+        scale = self.scale if scale is None else scale
+        return sum(SECONDS_PER_HOUR / self._clamp(self._base_interval(url) * scale) for url in urls)
+
+    def rebalance(self, urls: Iterable[str]) -> float:
+        """
+        Recalcula el factor común de los periodos para respetar ``budget_per_hour``.
+
+        Solo alarga periodos (factor >= 1). Si ni con todos en ``max_interval``
+        se cumple el presupuesto, se queda en el máximo posible.
+
+        Returns:
+            Factor aplicado
+        """
+        urls = list(urls)
+        if not self.budget_per_hour or not urls:
+            self.scale = 1.0
+            return self.scale
+
+        if self.requests_per_hour(urls, 1.0) <= self.budget_per_hour:
+            self.scale = 1.0
+            return self.scale
+
+        # requests_per_hour decrece con la escala: búsqueda binaria
+        low = 1.0
+        high = self.max_interval / min(self._base_interval(url) for url in urls)
+        if self.requests_per_hour(urls, high) > self.budget_per_hour:
+            logger.warning(f"🔁 Presupuesto de {self.budget_per_hour} peticiones/hora insuficiente "
+                           f"para {len(urls)} URLs incluso con el periodo máximo")
+            self.scale = high
+            return self.scale
+        for _ in range(40):
+            middle = (low + high) / 2
+            if self.requests_per_hour(urls, middle) > self.budget_per_hour:
+                low = middle
+            else:
+                high = middle
+        self.scale = high
+        return self.scale
+
+
+def load_histories(records: Iterable) -> Dict[str, List[Tuple[float, float]]]:
+    """
+    Agrupa registros PriceHistory por URL: {url: [(timestamp epoch, precio), ...]}.
+    """
+    histories: Dict[str, List[Tuple[float, float]]] = defaultdict(list)
+    for record in records:
+        histories[record.url].append((record.timestamp.timestamp(), record.price))
+    for series in histories.values():
+        series.sort()
+    return dict(histories)
+
+
+def simulate(histories: Dict[str, List[Tuple[float, float]]], planner: RevisitPlanner,
+             rebalance_every: float = SECONDS_PER_HOUR) -> Dict:
+    """
+    Reproduce los históricos con el planificador y lo compara con el periodo fijo.
+
+    Cada lectura grabada se toma como una petición del scheduler de periodo fijo
+    y como la verdad del precio hasta la siguiente lectura. El planificador
+    empieza sin datos y aprende durante la reproducción, como en producción.
+
+    Un cambio de precio se considera perdido si el precio volvió a cambiar
+    antes de que ninguna visita del planificador lo viera.
+
+    Returns:
+        Diccionario con urls, baseline_requests, adaptive_requests, saved_pct,
+        changes, missed, missed_pct, avg_detection_delay (segundos) y final_scale
+    """
+    urls = [url for url, series in histories.items() if series]
+    if not urls:
+        return {}
+    end = max(histories[url][-1][0] for url in urls)
+
+    baseline_requests = sum(len(histories[url]) for url in urls)
+    changes = 0
+    seen_runs: Dict[str, set] = {url: {0} for url in urls}
+    for url in urls:
+        series = histories[url]
+        changes += sum(1 for i in range(1, len(series)) if series[i][1] != series[i - 1][1])
+
+    # Índice de la lectura vigente y del inicio de su tramo de precio constante
+    position = {url: 0 for url in urls}
+    run_start = {url: 0 for url in urls}
+    adaptive_requests = 0
+    delays = []
+
+    queue = [(histories[url][0][0], url) for url in urls]
+    heapq.heapify(queue)
+    next_rebalance = min(start for start, _ in queue)
+
+    while queue:
+        now, url = heapq.heappop(queue)
+        if now > end:
+            continue
+        if now >= next_rebalance:
+            planner.rebalance(urls)
+            next_rebalance = now + rebalance_every
+
+        series = histories[url]
+        index = position[url]
+        while index + 1 < len(series) and series[index + 1][0] <= now:
+            index += 1
+            if series[index][1] != series[index - 1][1]:
+                run_start[url] = index
+        position[url] = index
+
+        adaptive_requests += 1
+        run = run_start[url]
+        if run not in seen_runs[url]:
+            seen_runs[url].add(run)
+            delays.append(now - series[run][0])
+        planner.observe(url, series[index][1], now)
+
+        heapq.heappush(queue, (now + planner.interval(url), url))
+
+    detected = sum(len(runs) - 1 for runs in seen_runs.values())
+    missed = changes - detected
+    return {
+        'urls': len(urls),
+        'baseline_requests': baseline_requests,
+        'adaptive_requests': adaptive_requests,
+        'saved_pct': 100 * (1 - adaptive_requests / baseline_requests),
+        'changes': changes,
+        'missed': missed,
+        'missed_pct': 100 * missed / changes if changes else 0.0,
+        'avg_detection_delay': sum(delays) / len(delays) if delays else 0.0,
+        'final_scale': planner.scale
+    }
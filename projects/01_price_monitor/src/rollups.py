@@ -0,0 +1,185 @@
+"""
+📊 Rollups - Agregados OHLC por hora y por día del histórico de precios
+=======================================================================
+
+Para cada (producto, tienda) y cada intervalo (hora o día) se guarda:
+
+- ``open`` / ``close``: primer y último precio del intervalo
+- ``high`` / ``low``: precio máximo y mínimo
+- ``count`` / ``sum``: número de lecturas y su suma (para calcular la media)
+
+Los agregados se calculan aquí, en Python, a partir de cada lote que guarda
+``PriceStore.save_price_history_many`` y se fusionan en la base de datos en la
+misma transacción. Un gráfico de un año lee ~365 filas diarias por
+tienda en lugar de millones de lecturas horarias.
+"""
+
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Ventanas (en días) a partir de las cuales conviene leer cada rollup
+MIN_DAYS_FOR_GRANULARITY = {
+    'hour': 2,
+    'day': 30
+}
+
+BUCKET_LENGTH = {
+    'hour': timedelta(hours=1),
+    'day': timedelta(days=1)
+}
+
+
+def bucket_start(timestamp: datetime, granularity: str) -> datetime:
+    """
+    Inicio del intervalo al que pertenece ``timestamp``.
+    """
+    if granularity == 'hour':
+        return timestamp.replace(minute=0, second=0, microsecond=0)
+    if granularity == 'day':
+        return timestamp.replace(hour=0, minute=0, second=0, microsecond=0)
+    raise ValueError(f"Granularidad no soportada: {granularity}")
+
+
+def first_full_bucket(since: datetime, granularity: str) -> datetime:
+    """
+    Inicio del primer intervalo que empieza en ``since`` o después.
+    """
+    start = bucket_start(since, granularity)
+    return start if start == since else start + BUCKET_LENGTH[granularity]
+
+
+def granularity_for_window(days: int) -> str:
+    """
+    Rollup más grueso que aún da suficiente resolución para una ventana de ``days`` días.
+
+    Returns:
+        'day', 'hour' o 'raw' si conviene leer el histórico sin agregar
+    """
+    if days >= MIN_DAYS_FOR_GRANULARITY['day']:
+        return 'day'
+    if days >= MIN_DAYS_FOR_GRANULARITY['hour']:
+        return 'hour'
+    return 'raw'
+
+
+def merge(current: Dict, delta: Dict) -> Dict:
+    """
+    Fusiona dos agregados del mismo (producto, tienda, intervalo).
+
+    El orden de llegada no importa: ``open`` y ``close`` se eligen por
+    ``first_ts`` / ``last_ts``.
+    """
+    merged = dict(current)
+    if delta['first_ts'] < current['first_ts']:
+        merged['open'] = delta['open']
+        merged['first_ts'] = delta['first_ts']
+    if delta['last_ts'] >= current['last_ts']:
+        merged['close'] = delta['close']
+        merged['last_ts'] = delta['last_ts']
+    merged['high'] = max(current['high'], delta['high'])
+    merged['low'] = min(current['low'], delta['low'])
+    merged['count'] = current['count'] + delta['count']
+    merged['sum'] = current['sum'] + delta['sum']
+    return merged
+
+
+def aggregate(records: Iterable[Dict], granularities: Iterable[str] = ('hour', 'day')) -> List[Dict]:
+    """
+    Calcula los agregados OHLC de un lote de registros de precio.
+
+    Args:
+        records: Registros con product_id, store, price y timestamp
+        granularities: Intervalos a calcular
+
+    Returns:
+        Lista de agregados listos para ``PriceStore.merge_rollups``
+    """
+    granularities = tuple(granularities)
+    rollups: Dict[Tuple, Dict] = {}
+
+    for record in records:
+        price = record['price']
+        timestamp = record['timestamp']
+        for granularity in granularities:
+            key = (record['product_id'], record['store'], granularity,
+                   bucket_start(timestamp, granularity))
+            delta = {
+                'product_id': key[0],
+                'store': key[1],
+                'granularity': granularity,
+                'bucket': key[3],
+                'open': price,
+                'high': price,
+                'low': price,
+                'close': price,
+                'count': 1,
+                'sum': price,
+                'first_ts': timestamp,
+                'last_ts': timestamp
+            }
+            current = rollups.get(key)
+            rollups[key] = merge(current, delta) if current else delta
+
+    return list(rollups.values())
+
+
+def backfill(store, chunk_size: int = 10000) -> int:
+    """
+    Reconstruye los rollups a partir del histórico de lecturas.
+
+    El histórico se lee en bloques con ``PriceStore.iter_price_history`` y cada
+    bloque se fusiona en una tabla de reconstrucción (``PriceStore.stage_rollups``),
+    así que la memoria usada no depende del tamaño de la tabla. Al terminar,
+    ``PriceStore.replace_rollups`` sustituye los rollups en una sola
+    transacción: si la reconstrucción se interrumpe, los actuales siguen
+    intactos y la siguiente ejecución empieza de cero.
+
+    Si los rollups resumen lecturas anteriores a la más antigua del histórico
+    (la retención ya las compactó), solo se reconstruyen los intervalos desde
+    el primer día completo que aún tiene lecturas; los anteriores son la única
+    copia de esos datos y se conservan.
+
+    Args:
+        store: Instancia de PriceStore
+        chunk_size: Filas por bloque
+
+    Returns:
+        Número de lecturas procesadas
+    """
+    oldest = store.get_oldest_price_timestamp()
+    if oldest is None:
+        logger.info("📊 Rollups: el histórico está vacío, no hay nada que reconstruir")
+        return 0
+
+    since = None
+    oldest_rollup = store.get_oldest_rollup_timestamp()
+    if oldest_rollup is not None and oldest_rollup < oldest:
+        since = first_full_bucket(oldest, 'day')
+        logger.info(f"📊 Rollups: se conservan los anteriores a {since:%Y-%m-%d} (lecturas ya compactadas)")
+    store.clear_staged_rollups()
+
+    processed = 0
+    chunk = []
+    for record in store.iter_price_history(since=since, chunk_size=chunk_size):
+        chunk.append({
+            'product_id': record.product_id,
+            'store': record.store,
+            'price': record.price,
+            'timestamp': record.timestamp
+        })
+        if len(chunk) >= chunk_size:
+            store.stage_rollups(aggregate(chunk))
+            processed += len(chunk)
+            chunk = []
+            logger.info(f"📊 Rollups: {processed} lecturas procesadas")
+
+    if chunk:
+        store.stage_rollups(aggregate(chunk))
+        processed += len(chunk)
+
+    store.replace_rollups(since=since)
+    return processed
+
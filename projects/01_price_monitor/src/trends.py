@@ -0,0 +1,316 @@
+"""
+📈 Trends - Estado incremental de tendencias y caídas de precio
+================================================================
+
+En lugar de recalcular todo desde el histórico en cada consulta, se mantiene
+por cada (producto, tienda) un pequeño estado que se actualiza en O(1) con
+cada precio nuevo:
+
+- EWMA (media móvil exponencial) del precio
+- mínimo y máximo de las últimas ``window`` lecturas (colas monótonas)
+- último precio y precio anterior
+- regresión lineal con decaimiento exponencial para la pendiente
+
+Las alertas miden la caída contra la lectura anterior de la misma tienda,
+como el cálculo original sobre el histórico. ``reference='window'`` la mide
+contra el máximo de la ventana: un precio que baja un 4% tres veces seguidas
+también cuenta.
+
+El estado se guarda en la base de datos (``PriceStore.save_trend_states``) y
+se recupera al arrancar, de modo que las alertas y los reportes son consultas
+directas sobre memoria. ``TrendTracker`` tiene su propio lock: los workers del
+daemon actualizan mientras el mantenimiento guarda y evalúa alertas.
+"""
+
+import logging
+import threading
+from collections import deque
+from datetime import datetime
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Cambio relativo por día por debajo del cual la tendencia se considera estable
+STABLE_SLOPE = 0.001
+
+
+def trend_label(relative_slope: float) -> str:
+    """
+    'up', 'down' o 'stable' según el cambio relativo por día.
+    """
+    if relative_slope > STABLE_SLOPE:
+        return 'up'
+    if relative_slope < -STABLE_SLOPE:
+        return 'down'
+    return 'stable'
+
+
+class StreamingPriceState:
+    """
+    Estado incremental del precio de un producto en una tienda.
+    """
+
+    def __init__(self, alpha: float = 0.2, window: int = 168, decay: float = 0.98):
+        """
+        Args:
+            alpha: Peso de la última lectura en la EWMA
+            window: Lecturas usadas para el mínimo/máximo móvil (168 = una semana horaria)
+            decay: Factor de olvido de la regresión (1 = regresión sobre todo el histórico)
+        """
+        self.alpha = alpha
+        self.window = window
+        self.decay = decay
+
+        self.count = 0
+        self.ewma: Optional[float] = None
+        self.last_price: Optional[float] = None
+        self.previous_price: Optional[float] = None
+        self.origin: Optional[datetime] = None
+        self.last_ts: Optional[datetime] = None
+
+        # Colas monótonas de (índice, precio) para mínimo y máximo móviles
+        self._min = deque()
+        self._max = deque()
+
+        # Sumas ponderadas de la regresión precio ~ días
+        self._sw = self._sx = self._sy = self._sxx = self._sxy = 0.0
+
+    def update(self, price: float, timestamp: datetime):
+        """
+        Incorpora una nueva lectura de precio.
+        """
+        if self.origin is None:
+            self.origin = timestamp
+
+        self.previous_price = self.last_price
+        self.last_price = price
+        self.last_ts = timestamp
+        self.ewma = price if self.ewma is None else self.alpha * price + (1 - self.alpha) * self.ewma
+
+        index = self.count
+        self.count += 1
+        while self._min and self._min[-1][1] >= price:
+            self._min.pop()
+        self._min.append((index, price))
+        while self._max and self._max[-1][1] <= price:
+            self._max.pop()
+        self._max.append((index, price))
+        oldest = self.count - self.window
+        if self._min[0][0] < oldest:
+            self._min.popleft()
+        if self._max[0][0] < oldest:
+            self._max.popleft()
+
+        x = (timestamp - self.origin).total_seconds() / 86400
+        self._sw = self.decay * self._sw + 1
+        self._sx = self.decay * self._sx + x
+        self._sy = self.decay * self._sy + price
+        self._sxx = self.decay * self._sxx + x * x
+        self._sxy = self.decay * self._sxy + x * price
+
+    @property
+    def rolling_min(self) -> Optional[float]:
+        return self._min[0][1] if self._min else None
+
+    @property
+    def rolling_max(self) -> Optional[float]:
+        return self._max[0][1] if self._max else None
+
+    @property
+    def slope(self) -> float:
+        """
+        Pendiente de la regresión en unidades de precio por día.
+        """
+        denominator = self._sw * self._sxx - self._sx ** 2
+        if self.count < 2 or abs(denominator) < 1e-12:
+            return 0.0
+        return (self._sw * self._sxy - self._sx * self._sy) / denominator
+
+    def price_drop(self, threshold: float) -> Optional[Dict]:
+        """
+        Caída desde la lectura anterior si supera ``threshold``.
+        """
+        if not self.previous_price or self.last_price is None:
+            return None
+        drop = (self.previous_price - self.last_price) / self.previous_price
+        if drop < threshold:
+            return None
+        return {
+            'previous_price': self.previous_price,
+            'current_price': self.last_price,
+            'drop_percentage': drop * 100
+        }
+
+    def window_drop(self, threshold: float) -> Optional[Dict]:
+        """
+        Caída desde el máximo de la ventana si supera ``threshold``.
+
+        Solo cuenta cuando la última lectura baja respecto a la anterior y es
+        el mínimo de la ventana, así que un precio que se queda abajo no
+        vuelve a avisar en cada lectura.
+        """
+        if not self.previous_price or self.last_price is None:
+            return None
+        if self.last_price >= self.previous_price or self.last_price > self.rolling_min:
+            return None
+        high = self.rolling_max
+        drop = (high - self.last_price) / high
+        if drop < threshold:
+            return None
+        return {
+            'previous_price': high,
+            'current_price': self.last_price,
+            'drop_percentage': drop * 100
+        }
+
+    def to_dict(self) -> Dict:
+        """
+        Estado serializable para guardarlo en la base de datos.
+        """
+        return {
+            'alpha': self.alpha,
+            'window': self.window,
+            'decay': self.decay,
+            'count': self.count,
+            'ewma': self.ewma,
+            'last_price': self.last_price,
+            'previous_price': self.previous_price,
+            'origin': self.origin.isoformat() if self.origin else None,
+            'last_ts': self.last_ts.isoformat() if self.last_ts else None,
+            'min': list(self._min),
+            'max': list(self._max),
+            'regression': [self._sw, self._sx, self._sy, self._sxx, self._sxy]
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'StreamingPriceState':
+        state = cls(alpha=data['alpha'], window=data['window'], decay=data['decay'])
+        state.count = data['count']
+        state.ewma = data['ewma']
+        state.last_price = data['last_price']
+        state.previous_price = data['previous_price']
+        state.origin = datetime.fromisoformat(data['origin']) if data['origin'] else None
+        state.last_ts = datetime.fromisoformat(data['last_ts']) if data['last_ts'] else None
+        state._min = deque(tuple(item) for item in data['min'])
+        state._max = deque(tuple(item) for item in data['max'])
+        state._sw, state._sx, state._sy, state._sxx, state._sxy = data['regression']
+        return state
+
+
+class TrendTracker:
+    """
+    Conjunto de estados por (producto, tienda) con persistencia en la DB.
+    """
+
+    def __init__(self, alpha: float = 0.2, window: int = 168, decay: float = 0.98):
+        self.settings = {'alpha': alpha, 'window': window, 'decay': decay}
+        self.states: Dict[int, Dict[str, StreamingPriceState]] = {}
+        self._dirty = set()
+        self._lock = threading.Lock()
+
+    def update(self, product_id: int, store: str, price: float, timestamp: datetime):
+        """
+        Actualiza el estado de (producto, tienda) con una nueva lectura.
+        """
+        with self._lock:
+            stores = self.states.setdefault(product_id, {})
+            state = stores.get(store)
+            if state is None:
+                state = stores[store] = StreamingPriceState(**self.settings)
+            state.update(price, timestamp)
+            self._dirty.add((product_id, store))
+
+    def detect_price_drop(self, product_id: int, threshold: float = 0.1,
+                          reference: str = 'previous') -> Optional[Dict]:
+        """
+        Mayor caída reciente del producto entre todas sus tiendas.
+
+        Args:
+            product_id: ID del producto
+            threshold: Caída relativa mínima (0.1 = 10%)
+            reference: 'previous' (lectura anterior) o 'window' (máximo de la ventana)
+
+        Returns:
+            Diccionario con previous_price, current_price, drop_percentage y store,
+            o None si ninguna tienda bajó más de ``threshold``
+        """
+        best = None
+        with self._lock:
+            for store, state in self.states.get(product_id, {}).items():
+                drop = state.price_drop(threshold) if reference == 'previous' else state.window_drop(threshold)
+                if drop and (best is None or drop['drop_percentage'] > best['drop_percentage']):
+                    best = dict(drop, store=store)
+        return best
+
+    def latest_price(self, product_id: int) -> Optional[float]:
+        """
+        Último precio más bajo del producto entre todas sus tiendas.
+        """
+        with self._lock:
+            prices = [
+                state.last_price
+                for state in self.states.get(product_id, {}).values()
+                if state.last_price is not None
+            ]
+        return min(prices) if prices else None
+
+    def calculate_price_trend(self, product_id: int) -> str:
+        """
+        Tendencia del producto: 'up', 'down' o 'stable'.
+
+        Combina las pendientes de cada tienda relativas a su EWMA.
+        """
+        with self._lock:
+            relative_slopes = [
+                state.slope / state.ewma
+                for state in self.states.get(product_id, {}).values()
+                if state.ewma
+            ]
+        if not relative_slopes:
+            return 'stable'
+        return trend_label(sum(relative_slopes) / len(relative_slopes))
+
+    def load(self, store):
+        """
+        Recupera los estados guardados; si no hay ninguno, los reconstruye con
+        las últimas ``window`` lecturas de cada (producto, tienda).
+
+        Args:
+            store: Instancia de PriceStore
+        """
+        for product_id, store_name, data in store.load_trend_states():
+            self.states.setdefault(product_id, {})[store_name] = StreamingPriceState.from_dict(data)
+
+        if not self.states:
+            logger.info("📈 Sin estado de tendencias guardado, reconstruyendo desde el histórico reciente...")
+            for record in store.iter_recent_price_history(per_store=self.settings['window']):
+                self.update(record.product_id, record.store, record.price, record.timestamp)
+            self.save(store)
+
+        logger.info(f"📈 Estado de tendencias cargado para {len(self.states)} productos")
+
+    def save(self, store):
+        """
+        Guarda en la DB los estados modificados desde el último guardado.
+
+        Los estados se copian con el lock y se escriben fuera de él, así que
+        las actualizaciones no esperan a la DB. Si la escritura falla, se
+        vuelven a marcar para el siguiente intento.
+
+        Args:
+            store: Instancia de PriceStore
+        """
+        with self._lock:
+            dirty, self._dirty = self._dirty, set()
+            states = [
+                (product_id, store_name, self.states[product_id][store_name].to_dict())
+                for product_id, store_name in dirty
+            ]
+        if not states:
+            return
+        try:
+            store.save_trend_states(states)
+        except Exception:
+            with self._lock:
+                self._dirty |= dirty
+            raise
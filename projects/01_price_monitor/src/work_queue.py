@@ -0,0 +1,240 @@
+"""
+📬 Work Queue - Cola de trabajos compartida entre procesos con leases
+=====================================================================
+
+Para repartir el catálogo entre varios procesos (``main.py --worker``), en
+una o varias máquinas, cada URL es una fila de la tabla ``scrape_jobs`` en la
+misma base de datos que el histórico:
+
+- ``due_at``: instante (epoch) en que vence la siguiente revisión.
+- ``lease_owner`` / ``lease_expires``: el worker que la tiene reservada y
+  hasta cuándo. Un worker reserva trabajos vencidos con un único
+  ``UPDATE ... WHERE id IN (SELECT ... LIMIT n) RETURNING``; en PostgreSQL
+  la subconsulta lleva ``FOR UPDATE SKIP LOCKED`` para que los workers no se
+  bloqueen entre sí, y en SQLite la sentencia ya es atómica (un escritor).
+- Mientras procesa, el worker renueva sus leases (``heartbeat``). Si muere,
+  sus leases caducan y los trabajos vuelven a poder reservarse: entrega
+  "al menos una vez".
+- ``complete`` y ``release`` (por lotes, con un único ``UPDATE``) solo afectan a
+  filas cuyo lease sigue siendo del worker, así que un worker que perdió el
+  lease no pisa al nuevo dueño.
+
+Los instantes son segundos epoch (``time.time()``) porque se comparan entre
+máquinas distintas.
+"""
+
+import logging
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import (Column, Float, Index, Integer, MetaData, String, Table,
+                        UniqueConstraint, and_, case, delete, func, insert, or_, select, update)
+
+from politeness import interleave_by_domain
+
+logger = logging.getLogger(__name__)
+
+
+class Lease:
+    """
+    Trabajo reservado por un worker.
+    """
+
+    __slots__ = ('id', 'product_id', 'url', 'due_at', 'attempts')
+
+    def __init__(self, id: int, product_id: int, url: str, due_at: float, attempts: int):
+        self.id = id
+        self.product_id = product_id
+        self.url = url
+        self.due_at = due_at
+        self.attempts = attempts
+
+    def __repr__(self) -> str:
+        return f"Lease(id={self.id}, url={self.url!r}, attempts={self.attempts})"
+
+
+class WorkQueue:
+    """
+    Cola de URLs a scrapear con leases, sobre un engine de SQLAlchemy.
+    """
+
+    def __init__(self, engine, table: str = 'scrape_jobs', lease_seconds: float = 120):
+        """
+        Args:
+            engine: Engine de SQLAlchemy (SQLite o PostgreSQL), p. ej. ``PriceStore.engine``
+            table: Nombre de la tabla de trabajos
+            lease_seconds: Duración de cada lease; se renueva con ``heartbeat``
+        """
+        self.engine = engine
+        self.lease_seconds = lease_seconds
+        metadata = MetaData()
+        self.jobs = Table(
+            table, metadata,
+            Column('id', Integer, primary_key=True),
+            Column('product_id', Integer, nullable=False),
+            Column('url', String, nullable=False),
+            Column('due_at', Float, nullable=False),
+            Column('lease_owner', String),
+            Column('lease_expires', Float),
+            Column('attempts', Integer, nullable=False, default=0),
+            UniqueConstraint('product_id', 'url', name=f'uq_{table}_product_url'),
+            Index(f'ix_{table}_due_at', 'due_at')
+        )
+        metadata.create_all(engine)
+
+    def sync(self, wanted: Iterable[Tuple[int, str]], interval: float, now: float = None) -> Dict[str, int]:
+        """
+        Alinea la cola con los (product_id, url) configurados: las URLs nuevas
+        se reparten a lo largo de ``interval`` (intercaladas por tienda) y las
+        que ya no están configuradas se eliminan.
+
+        Returns:
+            Diccionario con added y removed
+        """
+        now = time.time() if now is None else now
+        wanted = list(dict.fromkeys(wanted))
+        wanted_keys = set(wanted)
+        with self.engine.begin() as connection:
+            existing = {
+                (row.product_id, row.url): row.id
+                for row in connection.execute(select(self.jobs.c.id, self.jobs.c.product_id, self.jobs.c.url))
+            }
+            new = interleave_by_domain([key for key in wanted if key not in existing], url_of=lambda key: key[1])
+            if new:
+                connection.execute(insert(self.jobs), [
+                    {'product_id': product_id, 'url': url, 'attempts': 0,
+                     'due_at': now + interval * position / len(new)}
+                    for position, (product_id, url) in enumerate(new)
+                ])
+            removed = [job_id for key, job_id in existing.items() if key not in wanted_keys]
+            if removed:
+                connection.execute(delete(self.jobs).where(self.jobs.c.id.in_(removed)))
+
+        if new or removed:
+            logger.info(f"📬 Cola sincronizada: {len(new)} URLs añadidas, {len(removed)} eliminadas")
+        return {'added': len(new), 'removed': len(removed)}
+
+    def _claimable(self, now: float):
+        return and_(
+            self.jobs.c.due_at <= now,
+            or_(self.jobs.c.lease_expires.is_(None), self.jobs.c.lease_expires < now)
+        )
+
+    def claim(self, worker_id: str, limit: int = 10, now: float = None) -> List[Lease]:
+        """
+        Reserva hasta ``limit`` trabajos vencidos (los más atrasados primero),
+        incluidos los de leases caducados de workers caídos.
+        """
+        now = time.time() if now is None else now
+        candidates = (
+            select(self.jobs.c.id)
+            .where(self._claimable(now))
+            .order_by(self.jobs.c.due_at)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        statement = (
+            update(self.jobs)
+            .where(self.jobs.c.id.in_(candidates.scalar_subquery()))
+            .values(lease_owner=worker_id, lease_expires=now + self.lease_seconds,
+                    attempts=self.jobs.c.attempts + 1)
+            .returning(self.jobs.c.id, self.jobs.c.product_id, self.jobs.c.url,
+                       self.jobs.c.due_at, self.jobs.c.attempts)
+        )
+        with self.engine.begin() as connection:
+            rows = connection.execute(statement).all()
+
+        leases = sorted((Lease(*row) for row in rows), key=lambda lease: lease.due_at)
+        redelivered = sum(1 for lease in leases if lease.attempts > 1)
+        if redelivered:
+            logger.warning(f"📬 {worker_id}: {redelivered} trabajos reentregados tras caducar su lease")
+        return leases
+
+    def _owned(self, worker_id: str, job_ids: Iterable[int]):
+        return and_(self.jobs.c.id.in_(list(job_ids)), self.jobs.c.lease_owner == worker_id)
+
+    def heartbeat(self, worker_id: str, job_ids: Iterable[int], now: float = None) -> int:
+        """
+        Renueva los leases de ``job_ids`` que siguen siendo de ``worker_id``.
+
+        Returns:
+            Leases renovados
+        """
+        job_ids = list(job_ids)
+        if not job_ids:
+            return 0
+        now = time.time() if now is None else now
+        with self.engine.begin() as connection:
+            result = connection.execute(
+                update(self.jobs)
+                .where(self._owned(worker_id, job_ids))
+                .values(lease_expires=now + self.lease_seconds)
+            )
+        return result.rowcount
+
+    def _finish(self, worker_id: str, jobs: Iterable[Tuple[int, float]], **values) -> int:
+        jobs = list(jobs)
+        if not jobs:
+            return 0
+        # Un único UPDATE para todo el lote: cada fila toma su vencimiento con un CASE
+        due_at = case(dict(jobs), value=self.jobs.c.id)
+        with self.engine.begin() as connection:
+            result = connection.execute(
+                update(self.jobs)
+                .where(self._owned(worker_id, [job_id for job_id, _ in jobs]))
+                .values(due_at=due_at, lease_owner=None, lease_expires=None, **values)
+            )
+        return result.rowcount
+
+    def complete(self, worker_id: str, jobs: Iterable[Tuple[int, float]]) -> int:
+        """
+        Libera trabajos terminados y los programa para su siguiente vencimiento,
+        en una sola transacción.
+
+        Args:
+            jobs: Pares (id del trabajo, siguiente vencimiento)
+
+        Returns:
+            Trabajos liberados; los que falten tenían un lease caducado que ya
+            reservó otro worker
+        """
+        return self._finish(worker_id, jobs, attempts=0)
+
+    def release(self, worker_id: str, jobs: Iterable[Tuple[int, float]]) -> int:
+        """
+        Devuelve trabajos fallidos a la cola para reintentarlos (``attempts``
+        se conserva).
+
+        Args:
+            jobs: Pares (id del trabajo, instante del reintento)
+
+        Returns:
+            Trabajos liberados
+        """
+        return self._finish(worker_id, jobs)
+
+    def next_due(self) -> Optional[float]:
+        """
+        Vencimiento más próximo entre los trabajos sin lease activo.
+        """
+        now = time.time()
+        with self.engine.connect() as connection:
+            return connection.execute(
+                select(func.min(self.jobs.c.due_at))
+                .where(or_(self.jobs.c.lease_expires.is_(None), self.jobs.c.lease_expires < now))
+            ).scalar()
+
+    def counts(self, now: float = None) -> Dict[str, int]:
+        """
+        Trabajos totales, vencidos sin reservar, con lease activo y con lease caducado.
+        """
+        now = time.time() if now is None else now
+        jobs = self.jobs.c
+        with self.engine.connect() as connection:
+            row = connection.execute(select(
+                func.count(),
+                func.count().filter(self._claimable(now)),
+                func.count().filter(jobs.lease_expires >= now),
+                func.count().filter(jobs.lease_expires < now)
+            )).one()
+        return {'total': row[0], 'due': row[1], 'leased': row[2], 'expired': row[3]}
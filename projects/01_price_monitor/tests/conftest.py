@@ -0,0 +1,42 @@
+"""
+Configuración común de los tests: los módulos del monitor viven en ``src/``.
+"""
+
+import os
+import sys
+
+import pytest
+from sqlalchemy import (Boolean, Column, DateTime, Float, ForeignKey, Integer, MetaData, String,
+                        Table, Text, create_engine)
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+
+@pytest.fixture
+def engine(tmp_path):
+    """
+    SQLite temporal con las tablas ``products`` y ``price_history`` de PriceDB.
+    """
+    engine = create_engine(f"sqlite:///{tmp_path / 'prices.db'}")
+    metadata = MetaData()
+    Table(
+        'products', metadata,
+        Column('id', Integer, primary_key=True),
+        Column('name', String, nullable=False),
+        Column('urls', Text),
+        Column('target_price', Float)
+    )
+    Table(
+        'price_history', metadata,
+        Column('id', Integer, primary_key=True),
+        Column('product_id', Integer, ForeignKey('products.id'), nullable=False),
+        Column('store', String, nullable=False),
+        Column('price', Float, nullable=False),
+        Column('url', String),
+        Column('availability', Boolean),
+        Column('title', String),
+        Column('timestamp', DateTime, nullable=False)
+    )
+    metadata.create_all(engine)
+    yield engine
+    engine.dispose()
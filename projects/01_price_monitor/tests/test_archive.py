@@ -0,0 +1,131 @@
+"""
+Tests de la exportación e importación del histórico.
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import delete, func, insert, select
+
+import archive
+from price_store import PriceStore
+from price_writer import BufferedPriceWriter
+from rollups import aggregate
+
+START = datetime(2024, 3, 1)
+
+
+@pytest.fixture
+def store(engine):
+    store = PriceStore(engine)
+    with engine.begin() as connection:
+        connection.execute(insert(store.products), [{'id': 1, 'name': 'A'}, {'id': 2, 'name': 'B'}])
+    return store
+
+
+def _record(product_id, store, hours, price=10.0):
+    return dict(product_id=product_id, store=store, price=price, url=f"https://{store}/{product_id}",
+                availability=True, title=f"Producto {product_id}", timestamp=START + timedelta(hours=hours))
+
+
+def _seed(store, days=3):
+    with BufferedPriceWriter(store, batch_size=1000, flush_interval=3600) as writer:
+        for hour in range(days * 24):
+            for product_id, name in ((1, 'a.com'), (2, 'b.com')):
+                writer.add(**_record(product_id, name, hour, price=100.0 + hour))
+
+
+def _history_rows(store):
+    with store.engine.connect() as connection:
+        return connection.execute(select(func.count()).select_from(store.history)).scalar()
+
+
+def _daily(store):
+    with store.engine.connect() as connection:
+        rows = connection.execute(select(store.rollups).where(store.rollups.c.granularity == 'day'))
+        return {(row.product_id, row.store, row.bucket): (row.count, row.sum) for row in rows}
+
+
+def _exported(path, format=None):
+    return sorted((row['timestamp'], row['product_id'], row['store'], row['price'])
+                  for row in archive.read_history(path, format))
+
+
+def test_parquet_export_is_idempotent(store, tmp_path):
+    pytest.importorskip('pyarrow')
+    destination = str(tmp_path / 'parquet')
+    _seed(store)
+    archive.export_history(store, destination)
+    first = _exported(destination)
+    archive.export_history(store, destination)
+    assert _exported(destination) == first
+    assert len(first) == _history_rows(store)
+
+
+def test_parquet_export_keeps_rows_already_archived(store, tmp_path):
+    pytest.importorskip('pyarrow')
+    destination = str(tmp_path / 'parquet')
+    _seed(store, days=1)
+    archive.export_history(store, destination)
+    # La retención borra el día de la DB; después llega una lectura tardía de ese día
+    with store.engine.begin() as connection:
+        connection.execute(delete(store.history))
+    store.save_price_history_many([_record(1, 'a.com', 12.5, price=1.0)])
+    archive.export_history(store, destination)
+
+    rows = _exported(destination)
+    assert len(rows) == 2 * 24 + 1
+    assert (START + timedelta(hours=12.5), 1, 'a.com', 1.0) in rows
+
+
+@pytest.mark.parametrize('format', ['jsonl', 'csv'])
+def test_row_formats_round_trip(store, tmp_path, format):
+    _seed(store, days=1)
+    exported = archive.export_history(store, str(tmp_path), format=format)
+    assert exported['rows'] == 2 * 24
+    assert _exported(exported['path'], format) == sorted(
+        (row.timestamp, row.product_id, row.store, row.price) for row in store.iter_price_history()
+    )
+
+
+@pytest.mark.parametrize('format', ['jsonl', 'csv'])
+def test_append_history_extends_the_same_file(tmp_path, format):
+    path = str(tmp_path / 'scheduler' / archive.ROW_FILES[format])
+    batches = [
+        [dict(timestamp=START + timedelta(hours=hour), product_id=1, store='a.com', price=10.0 + hour,
+              url='u', availability=True, title='A') for hour in range(first, first + 3)]
+        for first in (0, 3)
+    ]
+    assert [archive.append_history(batch, path) for batch in batches] == [3, 3]
+    # Un solo encabezado y todas las filas, en orden, aunque haya dos miembros gzip
+    assert [row['price'] for row in archive.read_history(path)] == [10.0 + hour for hour in range(6)]
+
+
+def test_import_restores_compacted_rows_without_double_counting(store, tmp_path):
+    _seed(store)
+    daily = _daily(store)
+    exported = archive.export_history(store, str(tmp_path), format='jsonl')
+    with store.engine.begin() as connection:
+        connection.execute(delete(store.history))
+
+    assert archive.import_history(store, exported['path'], batch_size=7) == exported['rows']
+    assert _history_rows(store) == exported['rows']
+    assert _daily(store) == daily
+
+
+def test_import_into_an_empty_store_builds_rollups_across_batches(store, tmp_path):
+    _seed(store)
+    exported = archive.export_history(store, str(tmp_path), format='jsonl')
+    expected = {(row['product_id'], row['store'], row['bucket']): (row['count'], row['sum'])
+                for row in aggregate(({'product_id': row.product_id, 'store': row.store, 'price': row.price,
+                                       'timestamp': row.timestamp} for row in store.iter_price_history()),
+                                     ('day',))}
+    with store.engine.begin() as connection:
+        connection.execute(delete(store.history))
+        connection.execute(delete(store.rollups))
+
+    # Lotes que parten cada día en varios trozos
+    archive.import_history(store, exported['path'], batch_size=7)
+    assert _daily(store) == expected
+    with store.engine.connect() as connection:
+        assert connection.execute(select(func.count()).select_from(store.imported_rollups)).scalar() == 0
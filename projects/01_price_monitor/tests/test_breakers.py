@@ -0,0 +1,167 @@
+"""
+Tests de los circuit breakers por tienda: qué cuenta como fallo y la máquina de estados.
+"""
+
+import socket
+from urllib.error import HTTPError, URLError
+
+import pytest
+import requests
+
+import breakers
+from breakers import CLOSED, HALF_OPEN, OPEN, CircuitOpenError, StoreBreakers, is_store_failure
+
+URL = 'https://shop.example/item/1'
+
+
+def _http_error(status):
+    response = requests.Response()
+    response.status_code = status
+    return requests.HTTPError(f"{status}", response=response)
+
+
+@pytest.mark.parametrize('error', [
+    requests.Timeout(), requests.ConnectionError(), TimeoutError(), ConnectionRefusedError(),
+    _http_error(503), _http_error(429), HTTPError(URL, 502, 'Bad Gateway', None, None),
+    URLError(socket.timeout()), URLError(ConnectionResetError())
+])
+def test_store_failures(error):
+    assert is_store_failure(error)
+
+
+@pytest.mark.parametrize('error', [
+    _http_error(404), _http_error(403), HTTPError(URL, 404, 'Not Found', None, None),
+    FileNotFoundError(), PermissionError(), ValueError("sin precio"), URLError('unknown url type')
+])
+def test_errors_that_say_nothing_about_the_store(error):
+    assert not is_store_failure(error)
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(breakers.time, 'monotonic', clock)
+    return clock
+
+
+def _send(error=None):
+    def send(url, timeout=None):
+        if error is not None:
+            raise error
+        return 'ok'
+    return send
+
+
+def _state(store_breakers):
+    return store_breakers.metrics()['shop.example']['state']
+
+
+def _open(store_breakers):
+    for _ in range(store_breakers.failure_threshold):
+        with pytest.raises(requests.Timeout):
+            store_breakers.request(URL, _send(requests.Timeout()))
+
+
+def test_circuit_opens_and_a_successful_probe_closes_it(clock):
+    store_breakers = StoreBreakers(failure_threshold=3, open_seconds=60)
+    _open(store_breakers)
+    assert _state(store_breakers) == OPEN
+    with pytest.raises(CircuitOpenError):
+        store_breakers.request(URL, _send())
+
+    clock.now += 60
+    assert store_breakers.request(URL, _send()) == 'ok'
+    assert _state(store_breakers) == CLOSED
+    assert store_breakers.metrics()['shop.example']['skipped'] == 1
+
+
+def test_failed_probe_doubles_the_wait(clock):
+    store_breakers = StoreBreakers(failure_threshold=3, open_seconds=60, max_open_seconds=100)
+    _open(store_breakers)
+    clock.now += 60
+    with pytest.raises(requests.ConnectionError):
+        store_breakers.request(URL, _send(requests.ConnectionError()))
+    assert store_breakers.metrics()['shop.example']['retry_in'] == 100
+
+
+def test_non_store_error_does_not_close_a_half_open_circuit(clock):
+    store_breakers = StoreBreakers(failure_threshold=3, open_seconds=60)
+    _open(store_breakers)
+    clock.now += 60
+
+    with pytest.raises(ValueError):
+        store_breakers.request(URL, _send(ValueError("sin precio")))
+    assert _state(store_breakers) == HALF_OPEN
+    # La prueba queda libre: la siguiente petición decide
+    with pytest.raises(requests.Timeout):
+        store_breakers.request(URL, _send(requests.Timeout()))
+    assert _state(store_breakers) == OPEN
+
+
+def test_non_store_errors_do_not_open_the_circuit():
+    store_breakers = StoreBreakers(failure_threshold=2)
+    for _ in range(5):
+        with pytest.raises(requests.HTTPError):
+            store_breakers.request(URL, _send(_http_error(404)))
+    metrics = store_breakers.metrics()['shop.example']
+    assert (metrics['state'], metrics['failures'], metrics['requests']) == (CLOSED, 0, 5)
+
+
+def test_timeout_adapts_to_observed_latency_and_grows_on_timeouts(clock):
+    store_breakers = StoreBreakers(default_timeout=30, min_samples=3, min_timeout=0.5,
+                                   timeout_factor=3.0, failure_threshold=100)
+
+    def send(url, timeout=None):
+        clock.now += 0.5
+        return 'ok'
+
+    for _ in range(3):
+        store_breakers.request(URL, send)
+    assert store_breakers.timeout_for(URL) == pytest.approx(1.5)
+
+    # Cada timeout entra como muestra: el límite crece, con el configurado como tope
+    with pytest.raises(requests.Timeout):
+        store_breakers.request(URL, _send(requests.Timeout()))
+    assert store_breakers.timeout_for(URL) == pytest.approx(4.5)
+    for _ in range(2):
+        with pytest.raises(requests.Timeout):
+            store_breakers.request(URL, _send(requests.Timeout()))
+    assert store_breakers.timeout_for(URL) == 30
+
+
+def test_latency_excludes_the_parse_step(clock):
+    store_breakers = StoreBreakers(default_timeout=30, min_samples=3, min_timeout=0.5,
+                                   timeout_factor=3.0, failure_threshold=100)
+
+    def send(url, timeout=None):
+        clock.now += 0.5
+        return b'<html>'
+
+    def parse(url, body):
+        clock.now += 20
+        return {'price': 1.0, 'body': body}
+
+    for _ in range(3):
+        assert store_breakers.request(URL, send, parse) == {'price': 1.0, 'body': b'<html>'}
+    assert store_breakers.timeout_for(URL) == pytest.approx(1.5)
+
+
+def test_parse_errors_do_not_close_a_half_open_circuit(clock):
+    store_breakers = StoreBreakers(failure_threshold=3, open_seconds=60)
+    _open(store_breakers)
+    clock.now += 60
+
+    def parse(url, body):
+        raise ValueError("sin precio")
+
+    with pytest.raises(ValueError):
+        store_breakers.request(URL, _send(), parse)
+    assert _state(store_breakers) == HALF_OPEN
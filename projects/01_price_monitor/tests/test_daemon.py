@@ -0,0 +1,148 @@
+"""
+Tests del daemon: cola de vencimientos, reparto de URLs, reprogramación y reintentos.
+"""
+
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+import daemon
+from daemon import DueQueue, ScrapeDaemon
+
+
+def test_due_queue_orders_by_due_then_priority():
+    queue = DueQueue()
+    now = time.monotonic()
+    queue.push(now - 1, 'normal')
+    queue.push(now - 1, 'near-target', priority=1)
+    queue.push(now - 2, 'oldest')
+    queue.push(now + 60, 'later')
+    assert [queue.pop()[0] for _ in range(3)] == ['oldest', 'near-target', 'normal']
+    assert len(queue) == 1
+
+
+def test_close_wakes_up_waiting_workers():
+    queue = DueQueue()
+    queue.push(time.monotonic() + 60, 'later')
+    results = []
+    worker = threading.Thread(target=lambda: results.append(queue.pop()))
+    worker.start()
+    queue.close()
+    worker.join(5)
+    assert results == [None]
+
+
+class FakeMonitor:
+    """
+    Lo mínimo de PriceMonitor que usa el daemon: scraping programable y estadísticas.
+    """
+
+    def __init__(self, products, responses=None, retry_delays=None):
+        self.config = {'products': products}
+        self.product_cache = SimpleNamespace(resolve=lambda configs: (
+            {config['name']: SimpleNamespace(id=index, name=config['name'])
+             for index, config in enumerate(configs)}, []
+        ))
+        self.trends = SimpleNamespace(latest_price=lambda product_id: None)
+        self.responses = responses or {}
+        self.retry_delays = retry_delays or {}
+        self.fetched = []
+        self.recorded = []
+
+    def _scrape_url(self, url):
+        self.fetched.append(url)
+        response = self.responses.get(url, [{'price': 1.0, 'store': 'a.com'}])
+        result = response.pop(0) if len(response) > 1 else response[0]
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    def _record_attempt(self, stats, product, url, attempt, price_data):
+        self.recorded.append((url, attempt))
+        stats['success'] += 1
+        if attempt:
+            stats['recovered'] += 1
+
+    def _retry_delay(self, stats, url, attempt, error):
+        delay = self.retry_delays.get(attempt)
+        stats['errors' if delay is None else 'retries'] += 1
+        return delay
+
+
+PRODUCTS = [
+    {'name': 'A', 'urls': ['https://a.com/1', 'https://a.com/2']},
+    {'name': 'B', 'urls': ['https://b.com/1']},
+]
+
+
+def test_sync_spreads_new_urls_over_the_period_and_forgets_removed_ones(monkeypatch):
+    monkeypatch.setattr(daemon.time, 'monotonic', lambda: 1000.0)
+    monitor = FakeMonitor(PRODUCTS)
+    scrape = ScrapeDaemon(monitor, interval=300)
+    scrape.sync_jobs()
+    dues = sorted((due - 1000.0, item.url) for due, _, _, item in scrape.queue._heap)
+    # Intercaladas por tienda y repartidas a lo largo del periodo
+    assert dues == [(0.0, 'https://a.com/1'), (100.0, 'https://b.com/1'), (200.0, 'https://a.com/2')]
+
+    monitor.config['products'] = PRODUCTS[:1]
+    scrape.sync_jobs()
+    assert sorted(key[1] for key in scrape._jobs) == ['https://a.com/1', 'https://a.com/2']
+
+
+def test_reschedule_keeps_the_phase_and_skips_missed_periods(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(daemon.time, 'monotonic', lambda: now[0])
+    scrape = ScrapeDaemon(FakeMonitor(PRODUCTS[1:]), interval=100)
+    scrape.sync_jobs()
+    job = next(iter(scrape._jobs.values()))
+    scrape.queue._heap.clear()
+
+    now[0] = 1030.0
+    scrape._reschedule(job, due=1000.0)
+    now[0] = 1350.0
+    scrape._reschedule(job, due=1100.0)
+    assert sorted(due for due, _, _, _ in scrape.queue._heap) == [1100.0, 1400.0]
+
+
+def _run_until(scrape, condition, timeout=5):
+    threads = [threading.Thread(target=scrape._worker) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    scrape.queue.close()
+    for thread in threads:
+        thread.join()
+
+
+def test_transient_failure_is_retried_and_keeps_the_original_due():
+    url = 'https://b.com/1'
+    monitor = FakeMonitor(PRODUCTS[1:], responses={url: [ConnectionError("reset"), {'price': 2.0, 'store': 'b.com'}]},
+                          retry_delays={0: 0.01})
+    scrape = ScrapeDaemon(monitor, interval=3600)
+    scrape.sync_jobs()
+    first_due = scrape.queue._heap[0][0]
+
+    _run_until(scrape, lambda: monitor.recorded)
+    assert monitor.fetched == [url, url]
+    assert monitor.recorded == [(url, 1)]
+    assert (scrape._stats['retries'], scrape._stats['recovered'], scrape._stats['errors']) == (1, 1, 0)
+    # Tras el reintento la URL vuelve a su fase: un periodo después del vencimiento original
+    job = next(iter(scrape._jobs.values()))
+    assert job.attempts == 0 and job.retry_of is None
+    assert [due for due, _, _, _ in scrape.queue._heap] == [pytest.approx(first_due + 3600)]
+
+
+def test_permanent_failure_waits_for_the_next_period():
+    url = 'https://b.com/1'
+    monitor = FakeMonitor(PRODUCTS[1:], responses={url: [ValueError("sin precio")]})
+    scrape = ScrapeDaemon(monitor, interval=3600)
+    scrape.sync_jobs()
+
+    _run_until(scrape, lambda: scrape._stats['errors'])
+    assert monitor.fetched == [url]
+    assert (scrape._stats['errors'], scrape._stats['retries']) == (1, 0)
+    assert len(scrape.queue) == 1
@@ -0,0 +1,123 @@
+"""
+Tests de la API cacheada del dashboard: LTTB, TTLCache y versión de los datos.
+"""
+
+import threading
+import time
+
+import pytest
+
+import dashboard_api
+from dashboard_api import DashboardAPI, DataVersion, TTLCache, lttb
+
+
+def test_lttb_keeps_endpoints_and_spikes():
+    points = [(float(x), 100.0) for x in range(1000)]
+    points[500] = (500.0, 40.0)
+    sampled = lttb(points, 50)
+    assert len(sampled) == 50
+    assert sampled[0] == points[0] and sampled[-1] == points[-1]
+    assert (500.0, 40.0) in sampled
+    assert [x for x, _ in sampled] == sorted(x for x, _ in sampled)
+
+
+def test_lttb_returns_short_series_untouched():
+    points = [(0.0, 1.0), (1.0, 2.0), (2.0, 3.0)]
+    assert lttb(points, 10) == points
+    assert lttb(points * 2, 2) == points * 2
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(dashboard_api.time, 'monotonic', clock)
+    return clock
+
+
+def test_entries_expire_after_the_ttl(clock):
+    cache = TTLCache(ttl=60)
+    values = iter(range(10))
+    assert cache.get_or_compute('k', lambda: next(values)) == 0
+    assert cache.get_or_compute('k', lambda: next(values)) == 0
+    clock.now += 61
+    assert cache.get_or_compute('k', lambda: next(values)) == 1
+    assert cache.stats() == {'hits': 1, 'misses': 2, 'coalesced': 0, 'invalidations': 0, 'entries': 1}
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = TTLCache(ttl=60, max_entries=2)
+    cache.get_or_compute('a', lambda: 1)
+    cache.get_or_compute('b', lambda: 2)
+    cache.get_or_compute('a', lambda: 1)
+    cache.get_or_compute('c', lambda: 3)
+    assert cache.get_or_compute('a', lambda: 'recomputed') == 1
+    assert cache.get_or_compute('b', lambda: 'recomputed') == 'recomputed'
+
+
+def test_concurrent_misses_share_one_computation():
+    cache = TTLCache(ttl=60)
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return 'value'
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_compute('k', compute)))
+               for _ in range(5)]
+    threads[0].start()
+    started.wait(5)
+    for thread in threads[1:]:
+        thread.start()
+    while cache.stats()['coalesced'] < 4:
+        time.sleep(0.01)
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert results == ['value'] * 5 and len(calls) == 1
+
+
+def test_value_computed_across_an_invalidation_is_not_stored():
+    cache = TTLCache(ttl=60)
+
+    def compute():
+        cache.invalidate()
+        return 'stale'
+
+    assert cache.get_or_compute('k', compute) == 'stale'
+    assert cache.get_or_compute('k', lambda: 'fresh') == 'fresh'
+
+
+def test_errors_are_not_cached():
+    cache = TTLCache(ttl=60)
+
+    def fail():
+        raise ValueError("db")
+
+    with pytest.raises(ValueError):
+        cache.get_or_compute('k', fail)
+    assert cache.get_or_compute('k', lambda: 'ok') == 'ok'
+
+
+def test_a_new_data_version_empties_the_cache(tmp_path):
+    version = DataVersion(str(tmp_path / 'prices.version'))
+    assert version.current() is None
+    api = DashboardAPI(db=None, store=None, cache=TTLCache(ttl=60), version=version)
+    api.cache.get_or_compute('k', lambda: 'old')
+
+    version.bump()
+    api._check_version()
+    assert api.cache.get_or_compute('k', lambda: 'new') == 'new'
+    api._check_version()
+    assert api.cache.stats()['invalidations'] == 1
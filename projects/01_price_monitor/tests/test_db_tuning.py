@@ -0,0 +1,62 @@
+"""
+Tests del ajuste de SQLite: PRAGMAs por conexión, índices y planes de consulta.
+"""
+
+import sqlite3
+
+from sqlalchemy import text
+
+import db_tuning
+
+
+def test_install_applies_pragmas_to_every_connection(engine):
+    assert db_tuning.install(engine) == []
+    for _ in range(2):
+        with engine.connect() as connection:
+            assert connection.execute(text("PRAGMA journal_mode")).scalar() == 'wal'
+            # NORMAL = 1
+            assert connection.execute(text("PRAGMA synchronous")).scalar() == 1
+            assert connection.execute(text("PRAGMA busy_timeout")).scalar() == 5000
+
+
+def test_ensure_indexes_is_idempotent(engine):
+    connection = engine.raw_connection()
+    try:
+        assert db_tuning.ensure_indexes(connection) == list(db_tuning.INDEXES)
+        assert db_tuning.ensure_indexes(connection) == []
+        assert db_tuning.verify_indexes(connection) == []
+    finally:
+        connection.close()
+
+
+def test_verify_reports_a_wrong_index():
+    connection = sqlite3.connect(':memory:')
+    connection.execute("CREATE TABLE products (id INTEGER PRIMARY KEY, name TEXT)")
+    connection.execute("CREATE TABLE price_history (id INTEGER PRIMARY KEY, product_id INTEGER, "
+                       "store TEXT, price REAL, timestamp TEXT)")
+    # Mismas columnas pero sin DESC en timestamp
+    connection.execute("CREATE INDEX ix_price_history_product_store_ts ON price_history (product_id, store, timestamp)")
+    db_tuning.ensure_indexes(connection)
+
+    problems = db_tuning.verify_indexes(connection)
+    assert len(problems) == 1 and problems[0].startswith('ix_price_history_product_store_ts: columnas')
+
+
+def test_queries_use_the_indexes(engine):
+    db_tuning.install(engine)
+    connection = engine.raw_connection()
+    try:
+        plans = db_tuning.explain_queries(connection, {
+            'get_or_create_product': ('A',),
+            'get_latest_prices': (1, 'a.com'),
+            'get_price_history': (1, '2024-01-01'),
+            'iter_price_history(since)': ('2024-01-01',),
+        })
+    finally:
+        connection.close()
+    assert 'ix_products_name' in ' '.join(plans['get_or_create_product'])
+    assert 'ix_price_history_product_store_ts' in ' '.join(plans['get_latest_prices'])
+    assert 'ix_price_history_timestamp' in ' '.join(plans['iter_price_history(since)'])
+    # Ninguna consulta filtrada recorre la tabla entera ni ordena en memoria
+    for name in ('get_or_create_product', 'get_latest_prices', 'iter_price_history(since)'):
+        assert not any(step.startswith('SCAN') or 'TEMP B-TREE' in step for step in plans[name]), plans[name]
@@ -0,0 +1,73 @@
+"""
+Tests del bus de eventos: fusión por producto, descartes y envío por SSE.
+"""
+
+import json
+
+import pytest
+
+from events import EventBus, register_sse
+
+
+def _price(store, price):
+    return {'product_id': 1, 'product': 'A', 'prices': {store: {'price': price}}}
+
+
+def test_pending_price_updates_of_a_product_are_merged():
+    bus = EventBus()
+    subscription = bus.subscribe()
+    bus.publish('price', _price('a.com', 10.0), key=1)
+    bus.publish('price', _price('b.com', 20.0), key=1)
+    bus.publish('price', _price('a.com', 9.0), key=1)
+    bus.publish('price', dict(_price('a.com', 5.0), product_id=2), key=2)
+
+    events = subscription.get(timeout=0)
+    assert [event.key for event in events] == [1, 2]
+    assert events[0].data['prices'] == {'a.com': {'price': 9.0}, 'b.com': {'price': 20.0}}
+    # El evento fusionado lleva el id del último publicado
+    assert events[0].id == 3
+    assert subscription.get(timeout=0) == []
+
+
+def test_unkeyed_events_are_not_merged_and_the_oldest_are_dropped():
+    bus = EventBus(max_pending=3)
+    subscription = bus.subscribe()
+    for number in range(5):
+        bus.publish('alert', {'number': number})
+    assert [event.data['number'] for event in subscription.get(timeout=0)] == [2, 3, 4]
+    assert bus.stats() == {'subscribers': 1, 'published': 5, 'dropped': 2}
+
+
+def test_subscriptions_only_receive_their_topics():
+    bus = EventBus()
+    prices, everything = bus.subscribe(['price']), bus.subscribe()
+    assert bus.publish('alert', {'message': 'x'}) == 1
+    assert bus.publish('price', _price('a.com', 1.0), key=1) == 2
+    assert [event.topic for event in prices.get(timeout=0)] == ['price']
+    assert [event.topic for event in everything.get(timeout=0)] == ['alert', 'price']
+
+    bus.unsubscribe(prices)
+    assert prices.closed and bus.stats()['subscribers'] == 1
+
+
+def test_sse_endpoint_streams_events_and_unsubscribes():
+    flask = pytest.importorskip('flask')
+    bus = EventBus()
+    app = flask.Flask(__name__)
+    register_sse(app, bus, heartbeat=0.05)
+
+    response = app.test_client().get('/api/v2/events?topics=price', buffered=False)
+    assert response.mimetype == 'text/event-stream'
+    chunks = iter(response.response)
+    assert next(chunks) == b"retry: 3000\n\n"
+    assert bus.stats()['subscribers'] == 1
+
+    assert next(chunks) == b": keepalive\n\n"
+    bus.publish('alert', {'message': 'x'})
+    bus.publish('price', _price('a.com', 10.0), key=1)
+    lines = next(chunks).decode().splitlines()
+    assert lines[:2] == ['id: 2', 'event: price']
+    assert json.loads(lines[2][len('data: '):]) == _price('a.com', 10.0)
+
+    response.close()
+    assert bus.stats()['subscribers'] == 0
@@ -0,0 +1,163 @@
+"""
+Tests de la caché HTTP con GET condicional, contra un servidor local.
+"""
+
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from http_cache import HTTPCache
+
+
+class _Store:
+    """
+    Estado de la tienda falsa: página servida, ETag y peticiones recibidas.
+    """
+
+    def __init__(self):
+        self.body = b'<span class="price">19.99</span>'
+        self.etag = '"v1"'
+        self.requests = []
+
+
+@pytest.fixture
+def store():
+    state = _Store()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            state.requests.append(dict(self.headers))
+            if state.etag and self.headers.get('If-None-Match') == state.etag:
+                self.send_response(304)
+                self.end_headers()
+                return
+            self.send_response(200)
+            if state.etag:
+                self.send_header('ETag', state.etag)
+            self.send_header('Content-Length', str(len(state.body)))
+            self.end_headers()
+            self.wfile.write(state.body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    state.url = f"http://127.0.0.1:{server.server_address[1]}/product/1"
+    yield state
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = HTTPCache(path=str(tmp_path / 'http_cache.db'))
+    yield cache
+    cache.close()
+
+
+class _CountingParser:
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, url, body):
+        self.calls.append((url, body))
+        return {'price': float(body.split(b'>')[1].split(b'<')[0]), 'url': url}
+
+
+def test_not_modified_reuses_price_without_parsing(store, cache):
+    parse = _CountingParser()
+    with requests.Session() as session:
+        first = cache.fetch(session, store.url, parse, timeout=5)
+        second = cache.fetch(session, store.url, parse, timeout=5)
+
+    assert first == second == {'price': 19.99, 'url': store.url}
+    assert parse.calls == [(store.url, store.body)]
+    assert 'If-None-Match' not in store.requests[0]
+    assert store.requests[1]['If-None-Match'] == '"v1"'
+    stats = cache.stats()
+    assert stats['misses'] == 1
+    assert stats['not_modified'] == 1
+    assert stats['bytes_saved'] == len(store.body)
+
+
+def test_unchanged_body_without_etag_is_a_hit(store, cache):
+    store.etag = None
+    parse = _CountingParser()
+    with requests.Session() as session:
+        cache.fetch(session, store.url, parse, timeout=5)
+        response = cache.request(session, store.url, timeout=5)
+
+    assert response.cached
+    assert response.price_data['price'] == 19.99
+    assert len(parse.calls) == 1
+    assert cache.stats()['unchanged'] == 1
+
+
+def test_changed_page_is_parsed_again(store, cache):
+    parse = _CountingParser()
+    with requests.Session() as session:
+        cache.fetch(session, store.url, parse, timeout=5)
+        store.body = b'<span class="price">17.50</span>'
+        store.etag = '"v2"'
+        price_data = cache.fetch(session, store.url, parse, timeout=5)
+
+    assert price_data['price'] == 17.50
+    assert len(parse.calls) == 2
+    assert cache.stats()['misses'] == 2
+
+
+def test_request_and_store_split(store, cache):
+    with requests.Session() as session:
+        response = cache.request(session, store.url, timeout=5)
+        assert not response.cached
+        assert response.body == store.body
+        cache.store(response, {'price': 19.99})
+
+        assert cache.request(session, store.url, timeout=5).price_data == {'price': 19.99}
+
+
+def test_pages_without_price_are_not_cached(store, cache):
+    with requests.Session() as session:
+        cache.fetch(session, store.url, lambda url, body: None, timeout=5)
+    assert cache.size == 0
+    assert cache.conditional_headers(store.url) == {}
+
+
+def test_eviction_is_bounded_by_bytes(tmp_path):
+    cache = HTTPCache(path=str(tmp_path / 'http_cache.db'), max_bytes=2000)
+    try:
+        for i in range(100):
+            cache._store(f"https://shop.test/{i}", '"e"', None, 'h' * 64, 5000, {'price': i, 'title': 'x' * 50})
+            assert cache.size <= cache.max_bytes
+        assert cache.stats()['evictions'] > 0
+        # Las entradas más recientes sobreviven, las primeras se expulsan
+        assert cache.conditional_headers('https://shop.test/99') == {'If-None-Match': '"e"'}
+        assert cache.conditional_headers('https://shop.test/0') == {}
+    finally:
+        cache.close()
+
+
+def test_replacing_an_entry_does_not_double_count(cache):
+    cache._store('https://shop.test/1', None, None, 'h' * 64, 10, {'price': 1})
+    size = cache.size
+    cache._store('https://shop.test/1', None, None, 'h' * 64, 10, {'price': 2})
+    assert cache.size == size
+
+
+def test_size_survives_reopening(tmp_path):
+    path = str(tmp_path / 'http_cache.db')
+    cache = HTTPCache(path=path)
+    for i in range(10):
+        cache._store(f"https://shop.test/{i}", None, None, 'h' * 64, 10, {'price': i})
+    size = cache.size
+    cache.close()
+
+    reopened = HTTPCache(path=path)
+    try:
+        assert reopened.size == size > 0
+    finally:
+        reopened.close()
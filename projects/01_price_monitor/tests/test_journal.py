@@ -0,0 +1,59 @@
+"""
+Tests del diario de ciclos: reanudación, caducidad y líneas a medias.
+"""
+
+import journal
+from journal import CycleJournal
+
+
+def _journal(tmp_path, **kwargs):
+    return CycleJournal(path=str(tmp_path / 'cycle_journal.log'), **kwargs)
+
+
+def test_interrupted_cycle_is_resumed_with_its_completed_urls(tmp_path):
+    first = _journal(tmp_path)
+    assert first.begin() == set()
+    first.mark_done([(1, 'https://a.com/1'), (2, 'https://b.com/2')])
+
+    # El proceso muere sin ``end``: el siguiente arranque reanuda el mismo ciclo
+    second = _journal(tmp_path)
+    assert second.begin() == {(1, 'https://a.com/1'), (2, 'https://b.com/2')}
+    assert second.cycle_id == first.cycle_id
+
+    second.mark_done([(3, 'https://a.com/3')])
+    second.end()
+    assert open(second.path).read() == ''
+    assert _journal(tmp_path).begin() == set()
+
+
+def test_expired_cycle_is_discarded(tmp_path, monkeypatch):
+    first = _journal(tmp_path, max_age=60)
+    first.begin()
+    first.mark_done([(1, 'https://a.com/1')])
+
+    now = journal.time.time()
+    monkeypatch.setattr(journal.time, 'time', lambda: now + 61)
+    second = _journal(tmp_path, max_age=60)
+    assert second.begin() == set()
+    assert second.cycle_id != first.cycle_id
+
+
+def test_truncated_last_line_is_ignored(tmp_path):
+    first = _journal(tmp_path)
+    first.begin()
+    first.mark_done([(1, 'https://a.com/1')])
+    with open(first.path, 'a', encoding='utf-8') as log:
+        log.write(f"done\t{first.cycle_id}\t2\thttps://a.co")
+
+    assert _journal(tmp_path).begin() == {(1, 'https://a.com/1')}
+
+
+def test_mark_done_outside_a_cycle_does_nothing(tmp_path):
+    idle = _journal(tmp_path)
+    idle.mark_done([(1, 'https://a.com/1')])
+    idle.end()
+    assert not (tmp_path / 'cycle_journal.log').exists()
+
+
+def test_from_config():
+    assert CycleJournal.from_config({'journal': {'enabled': False}}) is None
@@ -0,0 +1,99 @@
+"""
+Tests de ParsePipeline: resultados, errores del iterador de trabajos y reutilización del pool.
+"""
+
+import threading
+import time
+
+import pytest
+
+from parse_pipeline import ParsePipeline
+
+
+def parse_length(url, body):
+    if body == b'broken':
+        raise ValueError(url)
+    return {'price': float(len(body))}
+
+
+PAGES = {'a': b'x' * 3, 'b': b'broken', 'c': {'price': 7.0}}
+
+
+def _fetch(url):
+    if url == 'missing':
+        raise ConnectionError(url)
+    return PAGES[url]
+
+
+def _run(pipeline, jobs):
+    return {key: (price_data, type(error).__name__ if error else None)
+            for key, price_data, error in pipeline.run(jobs)}
+
+
+def test_results_errors_and_cached_data():
+    with ParsePipeline(fetch=_fetch, parse=parse_length, fetch_workers=2, parse_workers=1) as pipeline:
+        results = _run(pipeline, [(1, 'a'), (2, 'b'), (3, 'c'), (4, 'missing')])
+    assert results == {
+        1: ({'price': 3.0}, None),
+        2: (None, 'ValueError'),
+        3: ({'price': 7.0}, None),
+        4: (None, 'ConnectionError')
+    }
+
+
+def test_failing_jobs_iterator_reaches_the_consumer():
+    def jobs():
+        yield 1, 'a'
+        raise RuntimeError("jobs")
+
+    with ParsePipeline(fetch=_fetch, parse=parse_length, fetch_workers=2, parse_workers=1) as pipeline:
+        with pytest.raises(RuntimeError, match="jobs"):
+            _run(pipeline, jobs())
+        # El pipeline sigue utilizable tras el error
+        assert _run(pipeline, [(1, 'a')]) == {1: ({'price': 3.0}, None)}
+
+
+def test_blocking_jobs_iterator_does_not_stall_fetches():
+    release = threading.Event()
+    fetched = []
+
+    def fetch(url):
+        fetched.append(url)
+        return PAGES[url]
+
+    def jobs():
+        yield 1, 'c'
+        # Como un reintento que aún no ha vencido
+        release.wait(5)
+        yield 2, 'c'
+
+    with ParsePipeline(fetch=fetch, parse=parse_length, fetch_workers=2, parse_workers=1) as pipeline:
+        results = pipeline.run(jobs())
+        first = next(results)
+        assert first[0] == 1 and fetched == ['c']
+        release.set()
+        assert [key for key, _, _ in results] == [2]
+
+
+def test_process_pool_is_reused_between_runs():
+    with ParsePipeline(fetch=_fetch, parse=parse_length, fetch_workers=1, parse_workers=1) as pipeline:
+        _run(pipeline, [(1, 'a')])
+        pool = pipeline._pool
+        _run(pipeline, [(2, 'a')])
+        assert pipeline._pool is pool
+    assert pipeline._pool is None
+
+
+def test_closing_the_results_early_stops_the_fetchers():
+    def jobs():
+        for index in range(10000):
+            yield index, 'c'
+
+    pipeline = ParsePipeline(fetch=_fetch, parse=parse_length, fetch_workers=4, parse_workers=1, queue_size=2)
+    results = pipeline.run(jobs())
+    next(results)
+    start = time.monotonic()
+    results.close()
+    assert time.monotonic() - start < 2
+    assert not any(thread.name.startswith('fetcher-') for thread in threading.enumerate())
+    pipeline.close()
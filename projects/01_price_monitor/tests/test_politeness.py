@@ -0,0 +1,137 @@
+"""
+Tests de la cortesía por dominio: token buckets, Retry-After y reparto entre tiendas.
+"""
+
+import asyncio
+import threading
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+import pytest
+
+import politeness
+from politeness import DomainScheduler, TokenBucket, interleave_by_domain, parse_retry_after
+
+
+class Clock:
+    """
+    Reloj falso: ``sleep`` avanza el tiempo en lugar de esperar.
+    """
+
+    def __init__(self):
+        self.now = 1000.0
+        self.slept = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(politeness.time, 'monotonic', clock.monotonic)
+    monkeypatch.setattr(politeness.time, 'sleep', clock.sleep)
+    return clock
+
+
+def test_bucket_allows_a_burst_then_the_sustained_rate(clock):
+    bucket = TokenBucket(rate=0.5, burst=2)
+    for _ in range(2):
+        assert bucket.wait_time(clock.now) == 0
+        bucket.take(clock.now)
+    assert bucket.wait_time(clock.now) == pytest.approx(2.0)
+    clock.now += 2
+    assert bucket.wait_time(clock.now) == 0
+
+
+def test_min_interval_and_block_for(clock):
+    bucket = TokenBucket(rate=0, burst=5, min_interval=3)
+    bucket.take(clock.now)
+    assert bucket.wait_time(clock.now + 1) == pytest.approx(2.0)
+    bucket.block_for(30, clock.now)
+    assert bucket.wait_time(clock.now + 3) == pytest.approx(27.0)
+
+
+def test_each_host_waits_only_for_itself(clock):
+    scheduler = DomainScheduler(rate=0.5, domains={'fast.com': {'rate': 0, 'burst': 1}})
+    assert scheduler.acquire('https://www.slow.com/1') == 0
+    assert scheduler.acquire('https://slow.com/2') == pytest.approx(2.0)
+    # Otra tienda no espera al turno de slow.com, y fast.com no tiene límite
+    assert scheduler.acquire('https://other.com/1') == 0
+    assert [scheduler.acquire('https://fast.com/1') for _ in range(3)] == [0, 0, 0]
+
+    metrics = scheduler.metrics()
+    assert (metrics['slow.com']['requests'], metrics['slow.com']['max_wait']) == (2, pytest.approx(2.0))
+    assert metrics['slow.com']['queue_depth'] == 0
+
+
+def test_defer_blocks_the_host_and_is_counted(clock):
+    scheduler = DomainScheduler(rate=0)
+    scheduler.defer('https://shop.com/1', 10)
+    assert scheduler.acquire('https://shop.com/2') == pytest.approx(10.0)
+    assert scheduler.metrics()['shop.com']['deferrals'] == 1
+
+
+def test_from_config_keeps_the_old_delay_per_domain():
+    scheduler = DomainScheduler.from_config({'delay': 4})
+    assert scheduler.defaults == {'rate': 0.25, 'burst': 1, 'min_interval': 0.0}
+    assert DomainScheduler.from_config({'delay': 0}).defaults['rate'] == 0
+    assert DomainScheduler.from_config({'politeness': {'rate': 2, 'burst': 3}}).defaults['burst'] == 3
+
+
+def test_concurrent_threads_on_one_host_are_spaced(monkeypatch):
+    scheduler = DomainScheduler(rate=0, min_interval=0.05)
+    taken = []
+    take = TokenBucket.take
+
+    def spy(bucket, now):
+        taken.append(now)
+        take(bucket, now)
+
+    monkeypatch.setattr(TokenBucket, 'take', spy)
+    threads = [threading.Thread(target=scheduler.acquire, args=('https://shop.com/item',)) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(taken) == 4
+    assert all(later - earlier >= 0.05 - 1e-9 for earlier, later in zip(taken, taken[1:]))
+    assert scheduler.metrics()['shop.com']['requests'] == 4
+
+
+def test_async_acquire_releases_the_slot_while_the_host_waits():
+    scheduler = DomainScheduler(rate=0, min_interval=0.05)
+
+    async def main():
+        lock, slot = asyncio.Lock(), asyncio.Semaphore(1)
+        waits = []
+
+        async def fetch():
+            waits.append(await scheduler.acquire_async('https://shop.com/item', lock, slot))
+            slot.release()
+
+        await asyncio.gather(*(fetch() for _ in range(3)))
+        return waits
+
+    waits = sorted(asyncio.run(main()))
+    assert waits[0] < 0.02 and waits[-1] >= 0.09
+
+
+def test_parse_retry_after():
+    assert parse_retry_after('120') == 120.0
+    assert parse_retry_after(None) is None
+    assert parse_retry_after('pronto') is None
+    later = format_datetime(datetime.now(timezone.utc) + timedelta(seconds=60), usegmt=True)
+    assert 55 <= parse_retry_after(later) <= 60
+    assert parse_retry_after('Wed, 21 Oct 2015 07:28:00 GMT') == 0.0
+
+
+def test_interleave_by_domain_round_robins_hosts():
+    urls = ['https://a.com/1', 'https://a.com/2', 'https://a.com/3', 'https://www.b.com/1', 'https://c.com/1']
+    assert interleave_by_domain(urls, url_of=lambda url: url) == [
+        'https://a.com/1', 'https://www.b.com/1', 'https://c.com/1', 'https://a.com/2', 'https://a.com/3'
+    ]
@@ -0,0 +1,171 @@
+"""
+Tests de PriceStore: escritura por lotes, recorrido por bloques y rollups.
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import func, insert, select
+
+from price_store import PriceStore
+from price_writer import BufferedPriceWriter
+from rollups import aggregate
+
+START = datetime(2024, 3, 1, 10, 0)
+
+
+def _record(product_id, store, price, minutes, **extra):
+    return dict(product_id=product_id, store=store, price=price, url=f"https://{store}/{product_id}",
+                availability=True, title=f"Producto {product_id}",
+                timestamp=START + timedelta(minutes=minutes), **extra)
+
+
+@pytest.fixture
+def store(engine):
+    store = PriceStore(engine)
+    with engine.begin() as connection:
+        connection.execute(insert(store.products), [{'id': 1, 'name': 'A'}, {'id': 2, 'name': 'B'}])
+    return store
+
+
+def _rows(store):
+    with store.engine.connect() as connection:
+        return connection.execute(select(func.count()).select_from(store.history)).scalar()
+
+
+def test_save_many_inserts_in_one_call(store):
+    records = [_record(1, 'amazon.com', 10.0 + i, i) for i in range(100)]
+    assert store.save_price_history_many(records) == 100
+    assert _rows(store) == 100
+    assert store.save_price_history_many([]) == 0
+
+
+def test_iter_price_history_pages_through_equal_timestamps(store):
+    # Varias lecturas con el mismo timestamp a caballo entre bloques
+    records = [_record(1, f"store{i}.com", float(i), i // 7) for i in range(50)]
+    store.save_price_history_many(records)
+
+    rows = list(store.iter_price_history(chunk_size=5))
+    assert len(rows) == 50
+    assert len({row.id for row in rows}) == 50
+    assert [row.timestamp for row in rows] == sorted(row.timestamp for row in rows)
+
+
+def test_iter_price_history_filters(store):
+    store.save_price_history_many([_record(1, 'a.com', 1.0, i) for i in range(10)] +
+                                  [_record(2, 'a.com', 2.0, i) for i in range(10)])
+    since, until = START + timedelta(minutes=3), START + timedelta(minutes=6)
+    rows = list(store.iter_price_history(since=since, until=until, product_id=2, chunk_size=2))
+    assert [row.timestamp for row in rows] == [START + timedelta(minutes=m) for m in (3, 4, 5)]
+    assert {row.product_id for row in rows} == {2}
+
+
+def _stored_rollups(store, granularity):
+    with store.engine.connect() as connection:
+        rows = connection.execute(select(store.rollups).where(store.rollups.c.granularity == granularity))
+        return {(row.product_id, row.store, row.bucket): row._asdict() for row in rows}
+
+
+def test_merge_rollups_matches_aggregating_everything_at_once(store):
+    records = [_record(1, 'a.com', price, minutes)
+               for minutes, price in [(0, 10.0), (20, 7.0), (50, 12.0), (70, 9.0), (130, 11.0)]]
+    # Lotes fuera de orden: open/close dependen de first_ts/last_ts, no de la llegada
+    for batch in (records[3:], records[:1], records[1:3]):
+        store.merge_rollups(aggregate(batch))
+
+    expected = {(r['product_id'], r['store'], r['bucket']): r for r in aggregate(records, ('hour',))}
+    stored = _stored_rollups(store, 'hour')
+    assert stored.keys() == expected.keys()
+    fields = ('open', 'high', 'low', 'close', 'count', 'sum', 'first_ts', 'last_ts')
+    for key, rollup in expected.items():
+        assert [stored[key][field] for field in fields] == [rollup[field] for field in fields]
+
+    day = _stored_rollups(store, 'day')[(1, 'a.com', START.replace(hour=0))]
+    assert (day['open'], day['high'], day['low'], day['close'], day['count']) == (10.0, 12.0, 7.0, 11.0, 5)
+
+
+def test_buffered_writer_saves_history_and_rollups_together(store):
+    with BufferedPriceWriter(store, batch_size=3, flush_interval=3600) as writer:
+        for i in range(7):
+            writer.add(**_record(1, 'a.com', 10.0 + i, i))
+        assert writer.pending == 1
+    assert _rows(store) == 7
+    assert _stored_rollups(store, 'hour')[(1, 'a.com', START)]['count'] == 7
+
+
+def test_failed_rollup_merge_rolls_back_the_batch(store, monkeypatch):
+    def broken(connection, rollups):
+        raise RuntimeError("rollups")
+
+    monkeypatch.setattr(store, '_merge_rollups', broken)
+    writer = BufferedPriceWriter(store, batch_size=100, flush_interval=3600)
+    writer.add(**_record(1, 'a.com', 10.0, 0))
+    with pytest.raises(RuntimeError):
+        writer.flush()
+    # Ni lecturas sin rollups ni registros perdidos: el lote sigue en el buffer
+    assert writer.pending == 1
+    assert _rows(store) == 0
+
+
+def test_latest_prices_by_product_one_row_per_store(store):
+    store.save_price_history_many([
+        _record(1, 'a.com', 10.0, 0), _record(1, 'a.com', 11.0, 5), _record(1, 'b.com', 20.0, 1),
+        _record(2, 'a.com', 30.0, 2),
+        # Empate en el último timestamp: gana la lectura insertada después
+        _record(2, 'b.com', 40.0, 3), _record(2, 'b.com', 41.0, 3),
+    ])
+    latest = store.get_latest_prices_by_product()
+    assert {product_id: [(row.store, row.price) for row in rows] for product_id, rows in latest.items()} == {
+        1: [('a.com', 11.0), ('b.com', 20.0)],
+        2: [('a.com', 30.0), ('b.com', 41.0)]
+    }
+    assert latest[1][0].url == 'https://a.com/1'
+
+
+def _seed_hourly(store, days, now):
+    """
+    Lecturas cada 20 minutos de dos productos: el 1 sube en a.com y baja en b.com, el 2 sube.
+    """
+    start = now - timedelta(days=days)
+    with BufferedPriceWriter(store, batch_size=5000, flush_interval=3600) as writer:
+        for step in range(days * 72):
+            timestamp = start + timedelta(minutes=20 * step)
+            writer.add(product_id=1, store='a.com', price=100 + step * 0.5, url='u', timestamp=timestamp)
+            writer.add(product_id=1, store='b.com', price=500 - step * 0.1, url='u', timestamp=timestamp)
+            writer.add(product_id=2, store='c.com', price=50 + step, url='u', timestamp=timestamp)
+
+
+@pytest.mark.parametrize('days, granularity', [(3, 'hour'), (5, 'day'), (10, 'day')])
+def test_summary_from_rollups_matches_raw(store, days, granularity):
+    now = datetime(2024, 3, 20, 13, 47)
+    _seed_hourly(store, 12, now)
+
+    raw = {s['product_id']: s for s in store.iter_price_summary(days, 'raw', now=now)}
+    rolled = {s['product_id']: s for s in store.iter_price_summary(days, granularity, now=now)}
+    assert raw.keys() == rolled.keys() == {1, 2}
+    for product_id, summary in raw.items():
+        other = rolled[product_id]
+        assert (other['min_price'], other['max_price'], other['data_points'], other['stores']) == \
+            (summary['min_price'], summary['max_price'], summary['data_points'], summary['stores'])
+        assert other['avg_price'] == pytest.approx(summary['avg_price'])
+        assert other['slope'] == pytest.approx(summary['slope'], rel=0.05)
+    assert raw[1]['stores'] == ['a.com', 'b.com']
+    assert raw[1]['data_points'] == 2 * days * 72
+
+
+def test_summary_slope_follows_the_window(store):
+    now = datetime(2024, 3, 20, 12, 0)
+    _seed_hourly(store, 5, now)
+    summary = {s['product_id']: s for s in store.iter_price_summary(5, 'raw', now=now)}
+    assert summary[2]['slope'] > 0
+    assert summary[1]['slope'] > 0  # a.com sube más rápido (relativo) de lo que baja b.com
+    store.save_price_history_many([_record(3, 'a.com', 10.0, 0)])
+    assert all(s['product_id'] != 3 for s in store.iter_price_summary(5, 'raw', now=now))
+
+
+def test_summary_includes_products_only_in_the_partial_bucket(store):
+    now = datetime(2024, 3, 20, 13, 30)
+    # Única lectura en el trozo inicial (antes del primer día completo de la ventana)
+    store.save_price_history_many([dict(_record(7, 'a.com', 42.0, 0), timestamp=now - timedelta(days=4) + timedelta(hours=2))])
+    summaries = list(store.iter_price_summary(4, 'day', now=now))
+    assert [(s['product_id'], s['data_points'], s['stores']) for s in summaries] == [(7, 1, ['a.com'])]
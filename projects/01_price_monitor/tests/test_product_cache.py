@@ -0,0 +1,84 @@
+"""
+Tests de la caché de productos: upsert por lotes en PriceStore y búsquedas en memoria por ciclo.
+"""
+
+import json
+
+import pytest
+from sqlalchemy import event, func, select
+
+from price_store import PriceStore
+from product_cache import ProductCache
+
+PRODUCTS = [
+    {'name': 'A', 'urls': ['https://a.com/1'], 'target_price': 10.0},
+    {'name': 'B', 'urls': ['https://b.com/1', 'https://a.com/2']},
+]
+
+
+@pytest.fixture
+def store(engine):
+    return PriceStore(engine)
+
+
+@pytest.fixture
+def statements(engine):
+    executed = []
+    event.listen(engine, 'before_cursor_execute',
+                 lambda connection, cursor, statement, *args: executed.append(statement.split()[0]))
+    return executed
+
+
+def _products(store):
+    with store.engine.connect() as connection:
+        return {row.name: (json.loads(row.urls), row.target_price)
+                for row in connection.execute(select(store.products))}
+
+
+def test_upsert_creates_updates_and_keeps_order(store):
+    created = store.upsert_products(PRODUCTS)
+    assert [row.name for row in created] == ['A', 'B']
+    assert _products(store) == {'A': (['https://a.com/1'], 10.0),
+                                'B': (['https://b.com/1', 'https://a.com/2'], None)}
+
+    updated = store.upsert_products([dict(PRODUCTS[1], target_price=99.0), PRODUCTS[0]])
+    assert [(row.name, row.target_price) for row in updated] == [('B', 99.0), ('A', 10.0)]
+    assert [row.id for row in updated] == [created[1].id, created[0].id]
+    with store.engine.connect() as connection:
+        assert connection.execute(select(func.count()).select_from(store.products)).scalar() == 2
+
+
+def test_startup_is_one_statement_and_cycles_are_dictionary_lookups(store, statements):
+    store.upsert_products(PRODUCTS)
+    statements.clear()
+
+    # Un arranque con los productos ya en la DB: una sola consulta
+    cache = ProductCache(store)
+    resolved, failed = cache.resolve(PRODUCTS)
+    assert failed == [] and set(resolved) == {'A', 'B'}
+    assert statements == ['SELECT']
+
+    statements.clear()
+    for _ in range(3):
+        assert cache.resolve(PRODUCTS)[0] == resolved
+    assert statements == []
+
+    # Solo vuelve a la DB el producto cuya configuración cambió
+    cache.resolve([PRODUCTS[0], dict(PRODUCTS[1], target_price=5.0)])
+    assert statements == ['SELECT', 'UPDATE', 'SELECT']
+
+
+def test_failed_upsert_reports_every_pending_product_and_retries(store, monkeypatch):
+    cache = ProductCache(store)
+    upsert = store.upsert_products
+
+    def fail(rows):
+        raise ConnectionError("db")
+
+    monkeypatch.setattr(store, 'upsert_products', fail)
+    resolved, failed = cache.resolve(PRODUCTS)
+    assert resolved == {} and [config['name'] for config, _ in failed] == ['A', 'B']
+
+    monkeypatch.setattr(store, 'upsert_products', upsert)
+    resolved, failed = cache.resolve(PRODUCTS)
+    assert failed == [] and set(resolved) == {'A', 'B'}
@@ -0,0 +1,82 @@
+"""
+Tests de la política de retención y compactación.
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import func, insert, select
+
+import rollups
+from price_store import PriceStore
+from price_writer import BufferedPriceWriter
+from retention import RetentionPolicy
+
+NOW = datetime(2024, 6, 1, 12, 0)
+
+
+@pytest.fixture
+def store(engine):
+    store = PriceStore(engine)
+    with engine.begin() as connection:
+        connection.execute(insert(store.products), [{'id': 1, 'name': 'A'}])
+    return store
+
+
+def _readings(days):
+    start = NOW - timedelta(days=days)
+    return [dict(product_id=1, store='a.com', price=100.0 + hour % 5, url='u',
+                 timestamp=start + timedelta(hours=hour))
+            for hour in range(days * 24)]
+
+
+def _count(store, table, **filters):
+    query = select(func.count()).select_from(table)
+    for column, value in filters.items():
+        query = query.where(table.c[column] == value)
+    with store.engine.connect() as connection:
+        return connection.execute(query).scalar()
+
+
+def test_compaction_keeps_raw_days_and_daily_rollups(store):
+    with BufferedPriceWriter(store, batch_size=1000, flush_interval=3600) as writer:
+        for record in _readings(60):
+            writer.add(**record)
+    daily = _count(store, store.rollups, granularity='day')
+
+    stats = RetentionPolicy(raw_days=10, hourly_days=30, archive_dir=None, chunk_size=100).run(store, now=NOW)
+
+    cutoff = datetime(2024, 5, 22)
+    assert stats['cutoff'] == cutoff and stats['uncovered'] == 0
+    assert stats['deleted'] == 24 * 60 - _count(store, store.history)
+    assert store.get_oldest_price_timestamp() == cutoff
+    assert _count(store, store.rollups, granularity='day') == daily
+    with store.engine.connect() as connection:
+        oldest_hour = connection.execute(select(func.min(store.rollups.c.bucket))
+                                         .where(store.rollups.c.granularity == 'hour')).scalar()
+    assert oldest_hour == datetime(2024, 5, 2)
+    assert stats['hourly_deleted'] == 24 * 29 + 12
+
+
+def test_compaction_refuses_when_rollups_do_not_cover_the_cutoff(store):
+    # Lecturas guardadas sin rollups, como las de PriceDB.save_price_history
+    with store.engine.begin() as connection:
+        connection.execute(insert(store.history), _readings(20))
+    policy = RetentionPolicy(raw_days=10, archive_dir=None)
+
+    stats = policy.run(store, now=NOW)
+    assert stats['uncovered'] == 10 and stats['deleted'] == 0
+    assert _count(store, store.history) == 20 * 24
+
+    rollups.backfill(store)
+    stats = policy.run(store, now=NOW)
+    assert stats['uncovered'] == 0 and stats['deleted'] == 10 * 24 - 12
+
+
+def test_partially_compacted_day_still_counts_as_covered(store):
+    with BufferedPriceWriter(store, batch_size=1000, flush_interval=3600) as writer:
+        for record in _readings(20):
+            writer.add(**record)
+    # Una compactación interrumpida deja medio día: el rollup resume más lecturas de las que quedan
+    store.delete_price_history(before=NOW - timedelta(days=15), chunk_size=1000)
+    assert store.count_uncovered_days(before=datetime(2024, 5, 22)) == 0
@@ -0,0 +1,55 @@
+"""
+Tests de los reintentos diferidos: presupuesto, backoff con jitter y cola de vencimientos.
+"""
+
+import threading
+import time
+
+from retries import RetryPolicy, RetryQueue
+
+
+def test_delay_doubles_with_equal_jitter_and_respects_the_cap():
+    policy = RetryPolicy(max_retries=4, base_delay=2.0, max_delay=5.0)
+    for attempt, cap in ((1, 2.0), (2, 4.0), (3, 5.0), (4, 5.0)):
+        delays = [policy.delay(attempt) for _ in range(200)]
+        assert all(cap / 2 <= delay <= cap for delay in delays)
+    assert policy.delay(5) is None
+
+
+def test_from_config():
+    assert RetryPolicy.from_config({'retries': {'enabled': False}}) is None
+    assert RetryPolicy.from_config({'retries': {'max_retries': 0}}) is None
+    policy = RetryPolicy.from_config({'retries': {'max_retries': 1, 'base_delay': 0.5}})
+    assert (policy.max_retries, policy.base_delay, policy.max_delay) == (1, 0.5, 60.0)
+
+
+def test_pop_due_returns_only_expired_retries_in_order():
+    queue = RetryQueue()
+    queue.push('later', 60)
+    queue.push('first', 0)
+    queue.push('second', 0)
+    assert queue.pop_due() == ['first', 'second']
+    assert len(queue) == 1
+
+
+def test_interleave_inserts_due_retries_and_waits_for_the_rest():
+    queue = RetryQueue()
+    queue.push('retry-now', 0)
+    queue.push('retry-soon', 0.05)
+    start = time.monotonic()
+    assert list(queue.interleave(['a', 'b'])) == ['retry-now', 'a', 'b', 'retry-soon']
+    assert time.monotonic() - start >= 0.05
+    assert len(queue) == 0
+
+
+def test_interleave_wakes_up_for_a_retry_scheduled_while_waiting():
+    queue = RetryQueue()
+    queue.push('slow', 5)
+    items = queue.interleave([])
+    threading.Timer(0.05, queue.push, args=('fast', 0)).start()
+
+    start = time.monotonic()
+    assert next(items) == 'fast'
+    assert time.monotonic() - start < 2
+    assert len(queue) == 1
+
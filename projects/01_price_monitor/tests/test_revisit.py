@@ -0,0 +1,136 @@
+"""
+Tests de la revisión adaptativa: tasas de cambio, presupuesto, simulación y aprendizaje al arrancar.
+"""
+
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import insert
+
+from daemon import ScrapeDaemon
+from price_store import PriceStore
+from revisit import RevisitPlanner, load_histories, simulate
+
+START = datetime(2024, 3, 1)
+HOUR = 3600
+
+
+def _observe(planner, url, prices, step=HOUR):
+    for index, price in enumerate(prices):
+        planner.observe(url, price, START.timestamp() + index * step)
+
+
+def test_urls_without_two_checks_use_the_default_interval():
+    planner = RevisitPlanner(default_interval=7200, min_interval=900, max_interval=86400)
+    _observe(planner, 'https://a.com/1', [10.0])
+    assert planner.change_rate('https://a.com/1') is None
+    assert planner.interval('https://a.com/1') == 7200
+    assert RevisitPlanner(default_interval=60, min_interval=900).interval('https://b.com/1') == 900
+
+
+def test_volatile_urls_are_checked_more_often_than_stable_ones():
+    planner = RevisitPlanner(min_interval=900, max_interval=86400)
+    _observe(planner, 'https://shop.com/stable', [10.0] * 50)
+    _observe(planner, 'https://shop.com/volatile', [10.0, 11.0] * 25)
+    _observe(planner, 'https://shop.com/daily', [10.0] * 24 + [9.0] * 24 + [8.0] * 2)
+    assert planner.interval('https://shop.com/stable') == 86400
+    assert planner.interval('https://shop.com/volatile') == 900
+    assert 900 < planner.interval('https://shop.com/daily') < 86400
+
+
+def test_change_rate_follows_the_observed_frequency():
+    planner = RevisitPlanner(decay=1.0)
+    # Un cambio cada 4 horas: unas 0.25 por hora
+    _observe(planner, 'https://shop.com/1', [float(index // 4) for index in range(401)])
+    assert planner.change_rate('https://shop.com/1') * HOUR == pytest.approx(0.29, abs=0.02)
+
+
+def test_rebalance_stretches_all_periods_to_fit_the_budget():
+    urls = [f'https://shop.com/{index}' for index in range(10)]
+    planner = RevisitPlanner(default_interval=HOUR, max_interval=86400, budget_per_hour=5)
+    assert planner.rebalance(urls) == pytest.approx(2.0, rel=1e-6)
+    assert planner.requests_per_hour(urls) <= 5
+    assert planner.interval(urls[0]) == pytest.approx(2 * HOUR, rel=1e-6)
+
+    planner.budget_per_hour = 20
+    assert planner.rebalance(urls) == 1.0
+
+
+def test_rebalance_stops_at_the_maximum_interval():
+    urls = [f'https://shop.com/{index}' for index in range(10)]
+    planner = RevisitPlanner(default_interval=HOUR, max_interval=4 * HOUR, budget_per_hour=1)
+    assert planner.rebalance(urls) == pytest.approx(4.0)
+    assert planner.interval(urls[0]) == 4 * HOUR
+
+
+def test_from_config():
+    assert RevisitPlanner.from_config(None, default_interval=HOUR) is None
+    assert RevisitPlanner.from_config({'enabled': False}, default_interval=HOUR) is None
+    planner = RevisitPlanner.from_config({'min_interval': 60, 'history_days': 7}, default_interval=HOUR)
+    assert (planner.min_interval, planner.history_days, planner.default_interval) == (60, 7, HOUR)
+    with pytest.raises(ValueError):
+        RevisitPlanner(min_interval=100, max_interval=10)
+
+
+def _record(url, price, hour):
+    return SimpleNamespace(url=url, price=price, timestamp=START + timedelta(hours=hour))
+
+
+def _histories(hours=240):
+    records = [_record('https://shop.com/stable', 10.0, hour) for hour in range(hours)]
+    records += [_record('https://shop.com/volatile', 10.0 + hour % 2, hour) for hour in range(hours)]
+    return load_histories(reversed(records))
+
+
+def test_load_histories_groups_and_sorts_by_url():
+    histories = _histories(hours=3)
+    assert histories['https://shop.com/volatile'] == [
+        (START.timestamp() + hour * HOUR, 10.0 + hour % 2) for hour in range(3)
+    ]
+
+
+def test_simulation_with_the_recorded_period_matches_the_baseline():
+    planner = RevisitPlanner(default_interval=HOUR, min_interval=HOUR, max_interval=HOUR)
+    result = simulate(_histories(), planner)
+    assert result['adaptive_requests'] == result['baseline_requests'] == 480
+    assert (result['changes'], result['missed'], result['avg_detection_delay']) == (239, 0, 0.0)
+
+
+def test_simulation_saves_requests_on_stable_urls():
+    planner = RevisitPlanner(default_interval=HOUR, min_interval=HOUR, max_interval=86400)
+    result = simulate(_histories(), planner)
+    assert result['urls'] == 2 and result['changes'] == 239
+    assert result['adaptive_requests'] < result['baseline_requests']
+    assert result['saved_pct'] > 40
+    # La URL volátil se sigue revisando a cada lectura
+    assert result['missed'] == 0
+
+
+def test_simulation_counts_changes_missed_by_long_periods():
+    planner = RevisitPlanner(default_interval=4 * HOUR, min_interval=4 * HOUR, max_interval=4 * HOUR)
+    result = simulate(_histories(hours=9), planner)
+    # La URL volátil cambia cada hora y solo se visita cada 4: se ven 2 de 8 cambios
+    assert (result['changes'], result['missed'], result['adaptive_requests']) == (8, 6, 6)
+    assert result['missed_pct'] == pytest.approx(75.0)
+    assert simulate({}, planner) == {}
+
+
+@pytest.fixture
+def store(engine):
+    store = PriceStore(engine)
+    with engine.begin() as connection:
+        connection.execute(insert(store.products), [{'id': 1, 'name': 'A'}])
+    return store
+
+
+def test_daemon_learns_only_the_recent_history(store):
+    now = START + timedelta(days=60)
+    store.save_price_history_many([
+        dict(product_id=1, store='a.com', price=10.0, url='https://a.com/1', timestamp=START + timedelta(days=day))
+        for day in range(60)
+    ])
+    planner = RevisitPlanner(history_days=7)
+    scrape_daemon = ScrapeDaemon(SimpleNamespace(store=store), revisit=planner)
+    assert scrape_daemon.learn_history(now=now) == 7
+    assert planner._stats['https://a.com/1'].checks == pytest.approx(sum(0.99 ** index for index in range(6)))
@@ -0,0 +1,148 @@
+"""
+Tests de los rollups OHLC: fusión de agregados y reconstrucción desde el histórico.
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import delete, func, insert, select
+
+import rollups
+from price_store import PriceStore
+from price_writer import BufferedPriceWriter
+from retention import RetentionPolicy
+
+START = datetime(2024, 3, 1, 0, 0)
+
+
+def _delta(price, timestamp):
+    return rollups.aggregate([{'product_id': 1, 'store': 'a.com', 'price': price, 'timestamp': timestamp}],
+                             ('day',))[0]
+
+
+def test_merge_is_independent_of_arrival_order():
+    deltas = [_delta(10.0, START + timedelta(hours=3)), _delta(7.0, START + timedelta(hours=1)),
+              _delta(12.0, START + timedelta(hours=5))]
+    forward = rollups.merge(rollups.merge(deltas[0], deltas[1]), deltas[2])
+    backward = rollups.merge(rollups.merge(deltas[2], deltas[1]), deltas[0])
+    assert forward == backward
+    assert (forward['open'], forward['high'], forward['low'], forward['close']) == (7.0, 12.0, 7.0, 12.0)
+    assert (forward['count'], forward['sum']) == (3, 29.0)
+
+
+def test_aggregate_groups_by_bucket():
+    records = [{'product_id': 1, 'store': 'a.com', 'price': float(minutes), 'timestamp': START + timedelta(minutes=minutes)}
+               for minutes in (0, 30, 60, 90)]
+    hourly = sorted(rollups.aggregate(records, ('hour',)), key=lambda rollup: rollup['bucket'])
+    assert [(rollup['bucket'], rollup['open'], rollup['close'], rollup['count']) for rollup in hourly] == [
+        (START, 0.0, 30.0, 2), (START + timedelta(hours=1), 60.0, 90.0, 2)
+    ]
+
+
+def test_buckets_and_granularity():
+    timestamp = datetime(2024, 3, 1, 13, 47, 5)
+    assert rollups.bucket_start(timestamp, 'hour') == datetime(2024, 3, 1, 13)
+    assert rollups.first_full_bucket(timestamp, 'day') == datetime(2024, 3, 2)
+    assert rollups.first_full_bucket(datetime(2024, 3, 2), 'day') == datetime(2024, 3, 2)
+    assert [rollups.granularity_for_window(days) for days in (1, 7, 90)] == ['raw', 'hour', 'day']
+    with pytest.raises(ValueError):
+        rollups.bucket_start(timestamp, 'week')
+
+
+@pytest.fixture
+def store(engine):
+    store = PriceStore(engine)
+    with engine.begin() as connection:
+        connection.execute(insert(store.products), [{'id': 1, 'name': 'A'}])
+    return store
+
+
+def _seed(store, days):
+    with BufferedPriceWriter(store, batch_size=1000, flush_interval=3600) as writer:
+        for hour in range(days * 24):
+            writer.add(product_id=1, store='a.com', price=100.0 + hour % 7, url='u',
+                       timestamp=START + timedelta(hours=hour, minutes=15))
+
+
+def _stored(store, granularity):
+    with store.engine.connect() as connection:
+        rows = connection.execute(select(store.rollups).where(store.rollups.c.granularity == granularity))
+        return {row.bucket: row._asdict() for row in rows}
+
+
+def test_backfill_rebuilds_the_same_rollups(store):
+    _seed(store, 3)
+    written = {granularity: _stored(store, granularity) for granularity in ('hour', 'day')}
+    store.clear_rollups()
+
+    assert rollups.backfill(store, chunk_size=25) == 3 * 24
+    for granularity, expected in written.items():
+        assert _stored(store, granularity) == expected
+
+
+def test_backfill_after_retention_keeps_compacted_rollups(store):
+    _seed(store, 10)
+    days, hours = _stored(store, 'day'), _stored(store, 'hour')
+    stats = RetentionPolicy(raw_days=5, archive_dir=None).run(store, now=START + timedelta(days=12))
+    assert stats['deleted'] == 7 * 24
+
+    # Solo se releen las lecturas desde el primer día completo tras la primera conservada
+    assert rollups.backfill(store) == 2 * 24
+    assert _stored(store, 'day') == days
+    assert _stored(store, 'hour') == hours
+
+
+def test_interrupted_backfill_keeps_the_current_rollups(store, monkeypatch):
+    _seed(store, 3)
+    written = _stored(store, 'hour')
+    stage = store.stage_rollups
+    calls = []
+
+    def fail_on_second_chunk(chunk):
+        calls.append(chunk)
+        if len(calls) == 2:
+            raise RuntimeError("db")
+        return stage(chunk)
+
+    monkeypatch.setattr(store, 'stage_rollups', fail_on_second_chunk)
+    with pytest.raises(RuntimeError):
+        rollups.backfill(store, chunk_size=25)
+    assert _stored(store, 'hour') == written
+
+    # La siguiente ejecución descarta el primer bloque que quedó a medias
+    monkeypatch.setattr(store, 'stage_rollups', stage)
+    assert rollups.backfill(store, chunk_size=25) == 3 * 24
+    assert _stored(store, 'hour') == written
+    with store.engine.connect() as connection:
+        assert connection.execute(select(func.count()).select_from(store.staged_rollups)).scalar() == 0
+
+
+def test_store_writes_keep_rollups_without_the_writer(store):
+    store.save_price_history_many([
+        {'product_id': 1, 'store': 'a.com', 'price': price, 'url': 'u', 'timestamp': START + timedelta(minutes=minute)}
+        for minute, price in ((5, 10.0), (20, 7.0), (40, 12.0))
+    ])
+    hour = _stored(store, 'hour')[START]
+    assert (hour['open'], hour['high'], hour['low'], hour['close'], hour['count']) == (10.0, 12.0, 7.0, 12.0, 3)
+    assert store.count_uncovered_days(START + timedelta(days=1)) == 0
+
+
+def test_backfill_with_empty_history_keeps_rollups(store):
+    _seed(store, 2)
+    days = _stored(store, 'day')
+    with store.engine.begin() as connection:
+        connection.execute(delete(store.history))
+    assert rollups.backfill(store) == 0
+    assert _stored(store, 'day') == days
+
+
+def test_get_price_rollups_window(store):
+    now = datetime.now().replace(minute=0, second=0, microsecond=0)
+    store.merge_rollups(rollups.aggregate([
+        {'product_id': 1, 'store': store_name, 'price': 10.0, 'timestamp': now - timedelta(days=age)}
+        for age in (1, 5, 40) for store_name in ('b.com', 'a.com')
+    ], ('day',)))
+    rows = store.get_price_rollups(1, days=30, granularity='day')
+    assert [row['store'] for row in rows] == ['a.com', 'a.com', 'b.com', 'b.com']
+    assert [row['bucket'] for row in rows[:2]] == sorted(row['bucket'] for row in rows[:2])
+    assert store.get_price_rollups(1, days=30, granularity='hour') == []
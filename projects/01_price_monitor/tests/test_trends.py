@@ -0,0 +1,120 @@
+"""
+Tests del estado incremental de tendencias y de su persistencia.
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import insert
+
+from price_store import PriceStore
+from trends import StreamingPriceState, TrendTracker
+
+START = datetime(2024, 3, 1)
+
+
+def _state(prices, window=5):
+    state = StreamingPriceState(window=window)
+    for hour, price in enumerate(prices):
+        state.update(price, START + timedelta(hours=hour))
+    return state
+
+
+def test_rolling_window_forgets_old_readings():
+    state = _state([50.0, 100.0, 90.0, 80.0, 85.0, 95.0, 70.0], window=3)
+    assert (state.rolling_min, state.rolling_max) == (70.0, 95.0)
+
+
+def test_alert_drop_is_measured_from_the_previous_reading():
+    drop = _state([100.0, 90.0, 80.0]).price_drop(0.1)
+    assert (drop['previous_price'], drop['current_price']) == (90.0, 80.0)
+    assert drop['drop_percentage'] == pytest.approx(100 / 9)
+    # Una bajada gradual no avisa: ninguna lectura cae un 10% respecto a la anterior
+    assert _state([100.0, 96.0, 92.0, 88.0]).price_drop(0.1) is None
+    assert _state([100.0, 80.0, 80.0]).price_drop(0.1) is None
+
+
+def test_gradual_drop_is_measured_from_the_window_high():
+    drop = _state([100.0, 96.0, 92.0, 88.0]).window_drop(0.1)
+    assert drop['previous_price'] == 100.0
+    assert drop['drop_percentage'] == pytest.approx(12.0)
+
+
+def test_window_drop_alerts_once_while_the_price_stays_low():
+    assert _state([100.0, 80.0]).window_drop(0.1) is not None
+    assert _state([100.0, 80.0, 80.0]).window_drop(0.1) is None
+    assert _state([100.0, 80.0, 90.0, 85.0]).window_drop(0.1) is None
+    assert _state([100.0, 80.0, 90.0, 75.0]).window_drop(0.1) is not None
+
+
+def test_drop_outside_the_window_does_not_count():
+    assert _state([100.0, 90.0, 90.0, 90.0, 90.0, 90.0, 89.0], window=3).window_drop(0.1) is None
+
+
+def test_tracker_reports_the_largest_drop_among_stores():
+    tracker = TrendTracker()
+    for hour, (a, b) in enumerate([(100.0, 50.0), (88.0, 40.0)]):
+        tracker.update(1, 'a.com', a, START + timedelta(hours=hour))
+        tracker.update(1, 'b.com', b, START + timedelta(hours=hour))
+    drop = tracker.detect_price_drop(1, threshold=0.1)
+    assert (drop['store'], drop['previous_price'], drop['current_price']) == ('b.com', 50.0, 40.0)
+    assert tracker.detect_price_drop(1, threshold=0.25) is None
+    assert tracker.detect_price_drop(2) is None
+
+
+def test_state_round_trip():
+    state = _state([100.0, 96.0, 92.0, 99.0])
+    restored = StreamingPriceState.from_dict(state.to_dict())
+    assert restored.to_dict() == state.to_dict()
+    assert restored.slope == pytest.approx(state.slope)
+
+
+@pytest.fixture
+def store(engine):
+    store = PriceStore(engine)
+    with engine.begin() as connection:
+        connection.execute(insert(store.products), [{'id': 1, 'name': 'A'}])
+    return store
+
+
+def test_load_rebuilds_from_the_last_window_and_persists(store):
+    store.save_price_history_many([
+        dict(product_id=1, store=name, price=price, url='u', timestamp=START + timedelta(hours=hour))
+        for hour, price in enumerate([500.0, 400.0, 100.0, 98.0, 97.0]) for name in ('a.com', 'b.com')
+    ])
+    tracker = TrendTracker(window=3)
+    tracker.load(store)
+    state = tracker.states[1]['a.com']
+    assert (state.count, state.rolling_max, state.last_price) == (3, 100.0, 97.0)
+
+    # El segundo arranque lee los estados guardados, no el histórico
+    restored = TrendTracker(window=3)
+    restored.load(store)
+    assert {name: value.to_dict() for name, value in restored.states[1].items()} == \
+        {name: value.to_dict() for name, value in tracker.states[1].items()}
+
+
+def test_save_only_writes_changed_states(store):
+    tracker = TrendTracker()
+    tracker.update(1, 'a.com', 10.0, START)
+    tracker.save(store)
+    tracker.update(1, 'a.com', 9.0, START + timedelta(hours=1))
+    tracker.save(store)
+    tracker.save(store)
+    states = list(store.load_trend_states())
+    assert [(product_id, name, data['last_price']) for product_id, name, data in states] == [(1, 'a.com', 9.0)]
+
+
+def test_failed_save_keeps_states_for_the_next_attempt(store, monkeypatch):
+    tracker = TrendTracker()
+    tracker.update(1, 'a.com', 10.0, START)
+
+    def fail(states):
+        raise ConnectionError("db")
+
+    monkeypatch.setattr(store, 'save_trend_states', fail)
+    with pytest.raises(ConnectionError):
+        tracker.save(store)
+    monkeypatch.undo()
+    tracker.save(store)
+    assert [name for _, name, _ in store.load_trend_states()] == ['a.com']
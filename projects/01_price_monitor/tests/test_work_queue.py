@@ -0,0 +1,93 @@
+"""
+Tests de la cola de trabajos compartida: sincronización, leases y reentrega.
+"""
+
+import pytest
+from sqlalchemy import event
+
+from work_queue import WorkQueue
+
+NOW = 1_700_000_000.0
+URLS = [(1, 'https://a.com/1'), (1, 'https://b.com/1'), (2, 'https://a.com/2'), (2, 'https://b.com/2')]
+
+
+@pytest.fixture
+def queue(engine):
+    queue = WorkQueue(engine, lease_seconds=60)
+    # Todos vencen en el mismo instante
+    queue.sync(URLS, interval=0, now=NOW)
+    return queue
+
+
+def test_sync_spreads_new_urls_and_removes_the_old_ones(engine):
+    queue = WorkQueue(engine)
+    assert queue.sync(URLS, interval=400, now=NOW) == {'added': 4, 'removed': 0}
+    leases = queue.claim('w1', limit=10, now=NOW + 400)
+    assert [lease.due_at - NOW for lease in leases] == [0, 100, 200, 300]
+    # Intercaladas por tienda
+    assert [lease.url.split('/')[2] for lease in leases] == ['a.com', 'b.com', 'a.com', 'b.com']
+
+    assert queue.sync(URLS[:3] + [(3, 'https://c.com/3')], interval=400, now=NOW) == {'added': 1, 'removed': 1}
+    assert queue.counts(now=NOW)['total'] == 4
+
+
+def test_claimed_jobs_are_not_handed_out_twice(queue):
+    first = queue.claim('w1', limit=3, now=NOW)
+    second = queue.claim('w2', limit=3, now=NOW)
+    assert len(first) == 3 and len(second) == 1
+    assert not {lease.id for lease in first} & {lease.id for lease in second}
+    assert queue.claim('w3', now=NOW) == []
+    assert queue.counts(now=NOW) == {'total': 4, 'due': 0, 'leased': 4, 'expired': 0}
+
+
+def test_expired_lease_is_redelivered_and_the_old_owner_cannot_finish_it(queue):
+    lost = queue.claim('w1', limit=1, now=NOW)[0]
+    assert queue.counts(now=NOW + 61)['expired'] == 1
+
+    # w1 murió: su lease caduca y otro worker lo recibe con un intento más
+    redelivered = [lease for lease in queue.claim('w2', limit=10, now=NOW + 61) if lease.id == lost.id]
+    assert redelivered[0].attempts == 2
+    assert queue.heartbeat('w1', [lost.id], now=NOW + 62) == 0
+    assert queue.complete('w1', [(lost.id, NOW + 3600)]) == 0
+    assert queue.complete('w2', [(lost.id, NOW + 3600)]) == 1
+
+
+def test_heartbeat_keeps_the_lease(queue):
+    leases = queue.claim('w1', limit=10, now=NOW)
+    assert queue.heartbeat('w1', [lease.id for lease in leases], now=NOW + 50) == 4
+    assert queue.claim('w2', now=NOW + 61) == []
+    assert len(queue.claim('w2', now=NOW + 111)) == 4
+
+
+def test_complete_reschedules_and_release_keeps_attempts(queue):
+    done, failed = queue.claim('w1', limit=2, now=NOW)
+    assert queue.complete('w1', [(done.id, NOW + 3600)]) == 1
+    assert queue.release('w1', [(failed.id, NOW + 10)]) == 1
+
+    retried = queue.claim('w2', limit=10, now=NOW + 10)
+    assert [(lease.id, lease.attempts) for lease in retried if lease.id == failed.id] == [(failed.id, 2)]
+    assert done.id not in {lease.id for lease in retried}
+    # complete reinicia los intentos
+    again = queue.claim('w3', limit=10, now=NOW + 3600)
+    assert [lease.attempts for lease in again if lease.id == done.id] == [1]
+
+
+def test_complete_finishes_a_batch_with_one_update(queue, engine):
+    leases = queue.claim('w1', limit=4, now=NOW)
+    # Los leases de w1 caducan y w2 los reserva todos
+    assert len(queue.claim('w2', limit=10, now=NOW + 61)) == 4
+    statements = []
+
+    def count(connection, cursor, statement, parameters, context, executemany):
+        statements.append(statement.split()[0])
+
+    event.listen(engine, 'before_cursor_execute', count)
+    try:
+        finished = queue.complete('w1', [(lease.id, NOW + 100 * index) for index, lease in enumerate(leases)])
+    finally:
+        event.remove(engine, 'before_cursor_execute', count)
+    assert (finished, statements) == (0, ['UPDATE'])
+
+    assert queue.complete('w2', [(lease.id, NOW + 100 * index) for index, lease in enumerate(leases)]) == 4
+    due = {lease.id: lease.due_at for lease in queue.claim('w3', limit=10, now=NOW + 1000)}
+    assert due == {lease.id: NOW + 100 * index for index, lease in enumerate(leases)}